@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import buscar_articulos
+
+app_name = "api"
+
+urlpatterns = [
+    path("articulos/buscar/", buscar_articulos, name="buscar_articulos"),
+]
@@ -0,0 +1,57 @@
+"""
+Vistas JSON de la app "api".
+
+`buscar_articulos` envuelve `BuscarArticuloUseCase` para los clientes que
+consultan periódicamente (tablets): devuelve los mismos dicts de resultados
+que la página de búsqueda, con un ETag derivado de la versión de los datos
+(`BuscarArticuloUseCase.version`) y de los parámetros. Si el cliente manda
+`If-None-Match` y nada cambió, responde `304 Not Modified` sin ejecutar la
+búsqueda. `Cache-Control: private, max-age=API_BUSQUEDA_MAX_AGE` permite
+reusar la respuesta unos segundos antes de revalidar.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from articulos.adapters.repository import BusquedaRepository
+from articulos.domain.use_cases import BuscarArticuloUseCase
+
+
+def _parametros(request):
+    return (
+        request.GET.get("q", ""),
+        request.GET.get("proveedor") or None,
+        request.GET.get("modo", "codigo"),
+    )
+
+
+def _etag(request) -> str:
+    version = BuscarArticuloUseCase(BusquedaRepository()).version()
+    clave = "\n".join([version, *(p or "" for p in _parametros(request))])
+    return hashlib.sha256(clave.encode("utf-8")).hexdigest()[:32]
+
+
+@condition(etag_func=_etag)
+def _buscar(request):
+    query, abreviatura, modo = _parametros(request)
+    resultados = BuscarArticuloUseCase(BusquedaRepository()).execute(query=query, abreviatura=abreviatura, modo=modo)
+    return JsonResponse({"query": query, "proveedor": abreviatura, "modo": modo, "resultados": resultados})
+
+
+@require_GET
+def buscar_articulos(request):
+    """
+    GET /api/articulos/buscar/?q=<código o palabras>&proveedor=<abreviatura>&modo=codigo|descripcion
+
+    Respuesta: `{"query", "proveedor", "modo", "resultados": [...]}`; 400 si
+    `modo` no es válido; 304 si el ETag enviado sigue vigente.
+    """
+    if _parametros(request)[2] not in BuscarArticuloUseCase.MODOS:
+        return JsonResponse({"error": "modo inválido: use 'codigo' o 'descripcion'"}, status=400)
+    response = _buscar(request)
+    patch_cache_control(response, private=True, max_age=int(getattr(settings, "API_BUSQUEDA_MAX_AGE", 5)))
+    return response
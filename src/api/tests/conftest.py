@@ -0,0 +1,2 @@
+# La API busca sobre los datos de artículos: mismas fábricas que sus tests
+from articulos.tests.conftest import consultas, crear_ap, crear_asr, crear_proveedor  # noqa: F401
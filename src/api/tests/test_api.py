@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from articulos.adapters.models import ArticuloProveedor, ArticuloSinRevisar, PrecioCalculado
+from precios.adapters.models import PrecioDeLista
+
+# La búsqueda lee por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+URL = reverse("api:buscar_articulos")
+
+
+@pytest.fixture
+def prov(crear_proveedor):
+    return crear_proveedor("PA")
+
+
+def test_devuelve_los_resultados_de_la_busqueda(prov, client, crear_ap):
+    ap = crear_ap(prov, "37/", "Tornillo galvanizado")
+    resp = client.get(URL, {"q": "37", "proveedor": "PA"})
+    assert resp.status_code == 200
+    datos = resp.json()
+    assert [r["id"] for r in datos["resultados"]] == [ap.pk]
+    assert datos["resultados"][0]["precios"]["final"] > 0
+    assert "private" in resp["Cache-Control"] and "max-age=5" in resp["Cache-Control"]
+
+    por_descripcion = client.get(URL, {"q": "galv", "modo": "descripcion"})
+    assert [r["id"] for r in por_descripcion.json()["resultados"]] == [ap.pk]
+    assert por_descripcion["ETag"] != resp["ETag"]
+    assert client.get(URL, {"q": "37", "modo": "otro"}).status_code == 400
+
+
+def test_304_sin_cambios_y_200_al_cambiar_un_precio(prov, client, crear_ap, consultas):
+    ap = crear_ap(prov, "37/")
+    primera = client.get(URL, {"q": "37"})
+    etag = primera["ETag"]
+
+    capturadas, segunda = consultas(lambda: client.get(URL, {"q": "37"}, HTTP_IF_NONE_MATCH=etag), "negocio_db")
+    assert segunda.status_code == 304 and segunda.content == b""
+    assert segunda["ETag"] == etag and "max-age" in segunda["Cache-Control"]
+    # Sólo los agregados de la versión: la búsqueda no se ejecuta
+    assert len(capturadas) == 2
+
+    ap.precio = 150
+    ap.save()
+    tercera = client.get(URL, {"q": "37"}, HTTP_IF_NONE_MATCH=etag)
+    assert tercera.status_code == 200 and tercera["ETag"] != etag
+
+    # Un AP nuevo (aunque todavía sin precio guardado) también cambia la versión
+    etag = tercera["ETag"]
+    pl = PrecioDeLista.objects.bulk_create([PrecioDeLista(proveedor=prov, codigo="370/", descripcion="Item", precio=1)])[0]
+    asr = ArticuloSinRevisar.objects.bulk_create([
+        ArticuloSinRevisar(proveedor=prov, codigo_proveedor="370/", precio=1, estado="pendiente")
+    ])[0]
+    ArticuloProveedor.objects.bulk_create([
+        ArticuloProveedor(articulo_s_revisar=asr, proveedor=prov, precio_de_lista=pl, codigo_proveedor="370/", precio=1, stock=0)
+    ])
+    assert client.get(URL, {"q": "37"}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_precio_vencido_se_recalcula_antes_de_validar(prov, client, crear_ap):
+    ap = crear_ap(prov, "37/")
+    etag = client.get(URL, {"q": "37"})["ETag"]
+    PrecioCalculado.objects.filter(articulo_proveedor=ap).update(vigente_hasta=timezone.now() - timedelta(seconds=1))
+
+    resp = client.get(URL, {"q": "37"}, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert PrecioCalculado.objects.get(articulo_proveedor=ap).vigente_hasta is None
@@ -0,0 +1,64 @@
+"""
+LRU de proceso para la búsqueda por código de barras (escaneo en mostrador).
+
+Un lector de código de barras manda ráfagas de lecturas, muchas repetidas (el
+mismo artículo escaneado varias veces, varias tablets en `TABLET_MODE`). Los
+resultados ya armados se guardan por código:
+
+- hasta `ARTICULOS_BARRAS_LRU` códigos (0 = sin cache), desalojando el menos usado;
+- cada entrada vence a los `ARTICULOS_BARRAS_TTL` segundos (cambios hechos por
+  otro proceso);
+- `limpiar()` la vacía entera: lo llaman `recalcular_precios` (cualquier precio
+  guardado que cambió) y las señales de Articulo/ArticuloSinRevisar (un código
+  de barras nuevo o cambiado).
+
+Los resultados devueltos son compartidos: no modificarlos.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.conf import settings
+
+_ENTRADAS: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+_LOCK = threading.Lock()
+# Se incrementa en cada limpiar(): un resultado calculado antes no se guarda después
+_GENERACION = 0
+
+
+def _limites() -> Tuple[int, float]:
+    return (
+        int(getattr(settings, "ARTICULOS_BARRAS_LRU", 512)),
+        float(getattr(settings, "ARTICULOS_BARRAS_TTL", 15)),
+    )
+
+
+def obtener(codigo: str, calcular: Callable[[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Resultados para `codigo` desde el LRU, o `calcular(codigo)` (fuera del lock) y se guardan."""
+    maximo, ttl = _limites()
+    if maximo <= 0:
+        return calcular(codigo)
+    ahora = time.monotonic()
+    with _LOCK:
+        entrada = _ENTRADAS.get(codigo)
+        if entrada is not None and entrada[0] > ahora:
+            _ENTRADAS.move_to_end(codigo)
+            return entrada[1]
+        generacion = _GENERACION
+    resultados = calcular(codigo)
+    with _LOCK:
+        if generacion == _GENERACION:
+            _ENTRADAS[codigo] = (ahora + ttl, resultados)
+            _ENTRADAS.move_to_end(codigo)
+            while len(_ENTRADAS) > maximo:
+                _ENTRADAS.popitem(last=False)
+    return resultados
+
+
+def limpiar() -> None:
+    global _GENERACION
+    with _LOCK:
+        _ENTRADAS.clear()
+        _GENERACION += 1
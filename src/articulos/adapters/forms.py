@@ -5,7 +5,9 @@ Estos formularios ayudan a validar datos en las vistas, manteniendo el
 acoplamiento con Django dentro de la capa de infraestructura y
 permitiendo que el dominio permanezca libre de dependencias.
 """
-from typing import List, Tuple
+import csv
+import io
+from typing import Any, Dict, List, Optional, Tuple
 
 from django import forms
 from django.apps import apps
@@ -18,16 +20,18 @@ class MapearArticuloForm(ModelForm):
 
     - Modelo base: Articulo
     - Campos: codigo_barras, descripcion
-    - Campo adicional: articulo_id (ChoiceField) para seleccionar un Articulo
-      existente o dejar vacío para crear uno nuevo.
+    - Campo adicional: articulo_id (oculto) con el Articulo existente elegido
+      en el autocompletado, o vacío para crear uno nuevo.
 
     Se utiliza en la vista `mapear_articulo` para validar datos antes de
-    ejecutar el caso de uso de mapeo.
+    ejecutar el caso de uso de mapeo. El id elegido se valida con una sola
+    lectura por clave primaria y queda en `articulo_elegido`, así que el
+    costo del formulario no depende del tamaño del catálogo.
     """
 
-    articulo_id = forms.ChoiceField(
+    articulo_id = forms.CharField(
         required=False,
-        choices=[],  # se completa dinámicamente en __init__
+        widget=forms.HiddenInput,
         label="Artículo existente (opcional)",
     )
 
@@ -37,13 +41,7 @@ class MapearArticuloForm(ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        Articulo = apps.get_model("articulos", "Articulo")
-        # Poblar choices con artículos existentes usando la base por defecto
-        opciones: List[Tuple[str, str]] = [("", "Crear nuevo")]
-        for art in Articulo.objects.all()[:500]:
-            etiqueta = f"{getattr(art, 'codigo_barras', '')} - {getattr(art, 'nombre', getattr(art, 'descripcion', ''))}"
-            opciones.append((str(art.id), etiqueta))
-        self.fields["articulo_id"].choices = opciones
+        self.articulo_elegido = None
 
         # Estilos Tailwind para widgets, alineados con core_auth
         base_input = {
@@ -58,10 +56,107 @@ class MapearArticuloForm(ModelForm):
             "placeholder": "Descripción para publicación",
             "rows": 3,
         })
-        self.fields["articulo_id"].widget.attrs.update({
-            "class": "block w-full px-3 py-2 border border-gray-300 bg-white rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 sm:text-sm",
+
+    def clean_articulo_id(self) -> str:
+        """Vacío (crear nuevo) o el id de un Articulo existente."""
+        articulo_id = (self.cleaned_data.get("articulo_id") or "").strip()
+        if not articulo_id:
+            return ""
+        Articulo = apps.get_model("articulos", "Articulo")
+        try:
+            self.articulo_elegido = Articulo.objects.get(pk=int(articulo_id))
+        except (ValueError, Articulo.DoesNotExist):
+            raise forms.ValidationError("El artículo elegido no existe.")
+        return articulo_id
+
+
+class MapearEnBloqueForm(forms.Form):
+    """
+    Formulario para el mapeo en bloque: pares pegados o un archivo CSV.
+
+    Una fila por ArticuloSinRevisar: `asr_id, articulo_id, codigo_barras`
+    (separados por coma, punto y coma o tabulación), con uno solo de los dos
+    destinos; `asr_id, codigo_barras` es la forma corta. Una primera fila con
+    esos nombres de columna permite otro orden. En `cleaned_data["pares"]`
+    quedan los dicts que espera `MapearEnBloqueUseCase`.
+    """
+
+    COLUMNAS = ("asr_id", "articulo_id", "codigo_barras")
+
+    texto = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={"rows": 10}),
+        label="Pares pegados",
+        help_text="Una fila por pendiente: asr_id, articulo_id, codigo_barras (uno de los dos destinos).",
+    )
+    archivo = forms.FileField(required=False, label="Archivo CSV")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["texto"].widget.attrs.update({
+            "class": "appearance-none block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm placeholder-gray-400 focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 sm:text-sm font-mono",
+            "placeholder": "123,,7791234567890\n124,56,",
         })
 
+    def clean(self):
+        cleaned = super().clean()
+        contenido = cleaned.get("texto") or ""
+        archivo = cleaned.get("archivo")
+        if archivo:
+            contenido += "\n" + archivo.read().decode("utf-8-sig", errors="replace")
+        pares, invalidas = self._leer_pares(contenido)
+        if invalidas:
+            raise forms.ValidationError(
+                "Filas inválidas (se espera asr_id numérico y un destino): %(filas)s",
+                params={"filas": ", ".join(str(n) for n in invalidas[:20])},
+            )
+        if not pares:
+            raise forms.ValidationError("Pegá al menos un par o subí un archivo CSV.")
+        cleaned["pares"] = pares
+        return cleaned
+
+    def _leer_pares(self, contenido: str) -> Tuple[List[Dict[str, Any]], List[int]]:
+        lineas = [linea for linea in contenido.splitlines() if linea.strip()]
+        if not lineas:
+            return [], []
+        try:
+            delimitador = csv.Sniffer().sniff(lineas[0], delimiters=",;\t").delimiter
+        except csv.Error:
+            delimitador = ","
+        filas = list(csv.reader(io.StringIO("\n".join(lineas)), delimiter=delimitador))
+        columnas: Tuple[str, ...] = self.COLUMNAS
+        encabezado = [c.strip().lower() for c in filas[0]]
+        if "asr_id" in encabezado:
+            columnas = tuple(encabezado)
+            filas = filas[1:]
+
+        pares: List[Dict[str, Any]] = []
+        invalidas: List[int] = []
+        for numero, fila in enumerate(filas, start=1):
+            valores = [v.strip() for v in fila]
+            if columnas is self.COLUMNAS and len(valores) == 2:
+                # Forma corta: asr_id, codigo_barras
+                valores = [valores[0], "", valores[1]]
+            datos = dict(zip(columnas, valores))
+            asr_id = self._entero(datos.get("asr_id"))
+            articulo_id = self._entero(datos.get("articulo_id"))
+            if asr_id is None or (datos.get("articulo_id") and articulo_id is None):
+                invalidas.append(numero)
+                continue
+            pares.append({
+                "articulo_s_revisar_id": asr_id,
+                "articulo_id": articulo_id,
+                "codigo_barras": datos.get("codigo_barras") or None,
+            })
+        return pares, invalidas
+
+    @staticmethod
+    def _entero(valor: Optional[str]) -> Optional[int]:
+        try:
+            return int(valor) if valor else None
+        except ValueError:
+            return None
+
 
 class EditArticuloProveedorForm(ModelForm):
     """
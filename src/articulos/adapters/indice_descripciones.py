@@ -0,0 +1,238 @@
+"""
+Índice de búsqueda por descripción de ArticuloProveedor.
+
+Buscar por palabras de `descripcion_proveedor` con `icontains` recorre toda la
+tabla (cientos de miles de filas entre proveedores). Este módulo mantiene un
+índice real según el motor de la base:
+
+- SQLite: tabla virtual FTS5 `<tabla AP>_fts` de contenido externo (rowid = id
+  del AP) con la descripción y el proveedor (como token, para filtrar por
+  proveedor dentro del índice), sincronizada por triggers AFTER
+  INSERT/UPDATE/DELETE sobre la tabla de AP, así que también la mantienen
+  `bulk_create`, `bulk_update` y `update()`. Tokenizador `unicode61` sin
+  acentos; el orden es `bm25`, calculado sobre las `_CANDIDATOS` coincidencias
+  más recientes (una palabra común coincide con decenas de miles de filas y
+  puntuarlas todas es lo que hace lenta la consulta).
+- PostgreSQL (`USE_POSTGRES`): índices GIN sobre `to_tsvector('simple', ...)`
+  y, si la extensión `pg_trgm` está disponible, `gin_trgm_ops` para que las
+  coincidencias dentro de una palabra (`ILIKE`) también usen índice. El orden
+  es `ts_rank_cd`. Crea además el índice de la búsqueda por código sobre
+  `(codigo_proveedor COLLATE "C", id)` (ver `BusquedaRepository._por_codigo`):
+  el de `Meta.indexes` usa la collation de la base y no sirve al rango ni al
+  keyset por bytes.
+
+`asegurar_indice(using)` crea lo que falte (idempotente); lo llama el
+post_migrate de la app y, una vez por proceso, la primera búsqueda.
+`reconstruir_indice(using)` vuelve a poblarlo desde la tabla (comando
+`indexar_descripciones`). Con otros motores se cae a `icontains` por palabra.
+"""
+
+import logging
+import re
+import threading
+from typing import Any, List, Optional
+
+from django.apps import apps
+from django.db import DatabaseError, connections, transaction
+
+logger = logging.getLogger("articulos.indice_descripciones")
+
+# Palabras de la búsqueda (letras/dígitos; el resto separa)
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+# Coincidencias (las de id más alto) que se ordenan por relevancia en SQLite
+_CANDIDATOS = 5000
+# Alias con el índice ya asegurado en este proceso
+_ASEGURADOS: set = set()
+_LOCK = threading.Lock()
+
+
+def _tabla_ap() -> str:
+    return apps.get_model("articulos", "ArticuloProveedor")._meta.db_table
+
+
+def _tabla_fts() -> str:
+    return f"{_tabla_ap()}_fts"
+
+
+def palabras(texto: str) -> List[str]:
+    """Palabras de búsqueda en minúsculas, sin repetir y en orden."""
+    vistas: List[str] = []
+    for palabra in _PALABRA.findall((texto or "").lower()):
+        if palabra not in vistas:
+            vistas.append(palabra)
+    return vistas
+
+
+# ----------------------------------------------------------------------
+# Creación / mantenimiento
+# ----------------------------------------------------------------------
+def _sqlite_existe(cursor, tabla: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [tabla])
+    return cursor.fetchone() is not None
+
+
+_INSERTAR = (
+    'INSERT INTO "{fts}"(rowid, descripcion_proveedor, proveedor_id) '
+    "VALUES ({fila}.id, {fila}.descripcion_proveedor, {fila}.proveedor_id)"
+)
+# Con contenido externo el borrado recibe los valores indexados
+_BORRAR = (
+    'INSERT INTO "{fts}"("{fts}", rowid, descripcion_proveedor, proveedor_id) '
+    "VALUES ('delete', {fila}.id, {fila}.descripcion_proveedor, {fila}.proveedor_id)"
+)
+
+
+def _asegurar_sqlite(cursor) -> None:
+    ap, fts = _tabla_ap(), _tabla_fts()
+    if not _sqlite_existe(cursor, ap):
+        return
+    nueva = not _sqlite_existe(cursor, fts)
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5('
+        f"descripcion_proveedor, proveedor_id, content='{ap}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # Triggers de sincronización (forma estándar de FTS5 con contenido externo)
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{ap}" BEGIN '
+        f'{_INSERTAR.format(fts=fts, fila="new")}; END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{ap}" BEGIN '
+        f'{_BORRAR.format(fts=fts, fila="old")}; END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF descripcion_proveedor, proveedor_id ON "{ap}" BEGIN '
+        f'{_BORRAR.format(fts=fts, fila="old")}; {_INSERTAR.format(fts=fts, fila="new")}; END'
+    )
+    if nueva:
+        # Filas anteriores a la creación del índice
+        cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+
+
+def _asegurar_postgres(cursor, connection) -> None:
+    ap = _tabla_ap()
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS "{ap}_codigo_c" ON "{ap}" (codigo_proveedor COLLATE "C", id)')
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{ap}_desc_tsv" ON "{ap}" '
+        f"USING gin (to_tsvector('simple', descripcion_proveedor))"
+    )
+    try:
+        # Savepoint propio: sin permisos para la extensión no se invalida la transacción de quien llama
+        with transaction.atomic(using=connection.alias), connection.cursor() as c:
+            c.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            c.execute(f'CREATE INDEX IF NOT EXISTS "{ap}_desc_trgm" ON "{ap}" USING gin (descripcion_proveedor gin_trgm_ops)')
+    except DatabaseError as exc:
+        logger.warning("[busqueda] pg_trgm no disponible (%s); las subcadenas no usarán índice", exc)
+
+
+def asegurar_indice(using: str = "default") -> bool:
+    """Crea el índice de descripciones en `using` si falta. Devuelve False si el motor no lo soporta."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _asegurar_sqlite(cursor)
+            return True
+        if connection.vendor == "postgresql":
+            _asegurar_postgres(cursor, connection)
+            return True
+    return False
+
+
+def reconstruir_indice(using: str = "default") -> None:
+    """Vuelve a poblar el índice desde la tabla de AP (p.ej. tras cargas hechas sin triggers)."""
+    connection = connections[using]
+    asegurar_indice(using)
+    if connection.vendor == "sqlite":
+        fts = _tabla_fts()
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+            cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'optimize\')')
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX "{_tabla_ap()}_desc_tsv"')
+
+
+def _asegurado(using: str) -> bool:
+    if using in _ASEGURADOS:
+        return True
+    with _LOCK:
+        if using not in _ASEGURADOS:
+            try:
+                if not asegurar_indice(using):
+                    return False
+            except Exception:
+                logger.exception("[busqueda] No se pudo crear el índice de descripciones")
+                return False
+            _ASEGURADOS.add(using)
+    return True
+
+
+# ----------------------------------------------------------------------
+# Consulta
+# ----------------------------------------------------------------------
+def _match_fts5(tokens: List[str], proveedor_id: Optional[Any]) -> str:
+    # Cada palabra entre comillas (sin sintaxis FTS5 del usuario), todas requeridas. Como
+    # prefijo salvo las de una letra: coinciden con casi todo y no tienen índice de prefijo.
+    terminos = " ".join('"{}"{}'.format(t.replace('"', '""'), "*" if len(t) > 1 else "") for t in tokens)
+    consulta = f"{{descripcion_proveedor}}: ({terminos})"
+    if proveedor_id is not None:
+        consulta += f' AND proveedor_id: "{int(proveedor_id)}"'
+    return consulta
+
+
+def _tsquery(tokens: List[str]) -> str:
+    # Las palabras ya son sólo \w: no llevan operadores de tsquery
+    return " & ".join(f"{t}:*" for t in tokens)
+
+
+def ids_por_descripcion(
+    texto: str, proveedor_id: Optional[Any] = None, limite: int = 50, using: str = "negocio_db"
+) -> Optional[List[Any]]:
+    """Ids de AP cuya descripción contiene todas las palabras de `texto` (como prefijo), por relevancia.
+
+    Devuelve None si el motor no tiene índice (quien llama usa `icontains`).
+    """
+    tokens = palabras(texto)
+    if not tokens:
+        return []
+    if not _asegurado(using):
+        return None
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        return _ids_sqlite(connection, _match_fts5(tokens, proveedor_id), limite)
+    return _ids_postgres(connection, tokens, proveedor_id, limite)
+
+
+def _ids_sqlite(connection, consulta: str, limite: int) -> List[Any]:
+    fts = _tabla_fts()
+    with connection.cursor() as cursor:
+        # Id desde el que quedan las _CANDIDATOS coincidencias más recientes (rango de rowid: usa el índice)
+        cursor.execute(
+            f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s ORDER BY rowid DESC LIMIT 1 OFFSET %s',
+            [consulta, _CANDIDATOS - 1],
+        )
+        corte = cursor.fetchone()
+        cursor.execute(
+            f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s AND rowid >= %s '
+            f'ORDER BY bm25("{fts}", 1.0, 0.0), rowid LIMIT %s',
+            [consulta, corte[0] if corte else 0, limite],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def _ids_postgres(connection, tokens: List[str], proveedor_id: Optional[Any], limite: int) -> List[Any]:
+    ap = _tabla_ap()
+    filtro_prov = ' AND ap."proveedor_id" = %s' if proveedor_id is not None else ""
+    extra = [proveedor_id] if proveedor_id is not None else []
+    # Todas las palabras en orden como subcadena (índice trigram) o como prefijo de palabra (tsvector)
+    patron = "%" + "%".join(t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") for t in tokens) + "%"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT ap.\"id\" FROM \"{ap}\" ap, to_tsquery('simple', %s) q "
+            f"WHERE (to_tsvector('simple', ap.\"descripcion_proveedor\") @@ q "
+            f"OR ap.\"descripcion_proveedor\" ILIKE %s){filtro_prov} "
+            f"ORDER BY ts_rank_cd(to_tsvector('simple', ap.\"descripcion_proveedor\"), q) DESC, ap.\"id\" LIMIT %s",
+            [_tsquery(tokens), patron, *extra, limite],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
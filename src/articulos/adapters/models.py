@@ -1,8 +1,11 @@
 from django.db import models
 from django.apps import apps
 from django.conf import settings
+from django.utils import timezone
 from decimal import Decimal
 from articulos.domain.pricing import calculate_prices
+from articulos.adapters.resolutor_precios import resolutor_activo
+from precios.adapters import cache_descuentos
 
 
 class ArticuloBase(models.Model):
@@ -48,15 +51,16 @@ class ArticuloBase(models.Model):
         Prioriza el FK en la propia instancia. Si no hay, intenta compatibilidad
         con FKs históricas (p.ej., en ASR o en AP) y por último usa 'Sin Descuento'.
         """
+        # Dentro de una operación con resolutor activo (búsqueda, recálculo) se resuelve desde su cache
+        resolutor = resolutor_activo()
+        if resolutor is not None:
+            return resolutor.descuento_de_articulo(self)
         Descuento = apps.get_model('precios', 'Descuento')
-        # 1) FK en ArticuloBase (nuevo modelo de datos)
+        # 1) FK en ArticuloBase (nuevo modelo de datos), desde el cache de proceso
         if getattr(self, 'descuento_id', None):
-            try:
-                obj = Descuento.objects.using('default').get(pk=self.descuento_id)
-                if getattr(obj, 'is_active', lambda: True)():
-                    return obj
-            except Descuento.DoesNotExist:
-                pass
+            obj = cache_descuentos.descuento_activo(self.descuento_id)
+            if obj is not None:
+                return obj
         # 2) Compatibilidad: si el modelo concreto tenía FK propia 'descuento'
         try:
             own_fk = super().descuento  # may not exist; defensive
@@ -71,16 +75,15 @@ class ArticuloBase(models.Model):
         # 3) Compatibilidad: tomar del primer ArticuloProveedor relacionado si está activo
         try:
             ap = getattr(self, 'articuloproveedor_set', None)
-            if ap is not None and ap.exists():
-                ap0 = ap.first()
-                if getattr(ap0, 'descuento', None) and ap0.descuento and ap0.descuento.is_active():
-                    return ap0.descuento
+            if ap is not None:
+                obj = cache_descuentos.descuento_activo(ap.values_list('descuento_id', flat=True).first())
+                if obj is not None:
+                    return obj
         except Exception:
             pass
         # 4) Default: 'Sin Descuento' (no crear aquí para evitar locks en tests)
-        try:
-            return Descuento.objects.using('default').get(tipo="Sin Descuento")
-        except Descuento.DoesNotExist:
+        obj = cache_descuentos.sin_descuento()
+        if obj is None:
             # Devolver instancia no persistida como configuración por defecto
             return Descuento(
                 tipo="Sin Descuento",
@@ -89,6 +92,7 @@ class ArticuloBase(models.Model):
                 bulto=0.0,
                 cantidad_bulto=5,
             )
+        return obj
 
     def get_proveedor(self):
         raise NotImplementedError
@@ -151,13 +155,11 @@ class ArticuloSinRevisar(ArticuloBase):
             pass
         self.codigo_proveedor = f"{codigo_base}/"
         # Asignar descuento por defecto si no se proporcionó, sin crear en DB
-        if not getattr(self, 'descuento', None):
-            Descuento = apps.get_model('precios', 'Descuento')
-            try:
-                self.descuento = Descuento.objects.using('default').get(tipo="Sin Descuento")
-            except Descuento.DoesNotExist:
-                # No asignar si no existe; ArticuloBase.get_descuento manejará valor por defecto
-                pass
+        if self.descuento_id is None and not getattr(self, 'descuento', None):
+            # Si no existe no se asigna; ArticuloBase.get_descuento manejará valor por defecto
+            default = cache_descuentos.sin_descuento()
+            if default is not None:
+                self.descuento = default
         super().save(*args, **kwargs)
 
     def get_descuento(self):
@@ -165,6 +167,9 @@ class ArticuloSinRevisar(ArticuloBase):
         return super().get_descuento()
 
     def get_proveedor(self):
+        resolutor = resolutor_activo()
+        if resolutor is not None:
+            return resolutor.proveedor(self.proveedor_id)
         # Forzar lectura desde DB para coherencia de pruebas de performance
         from proveedores.adapters.models import Proveedor
         try:
@@ -207,7 +212,9 @@ class ArticuloProveedor(models.Model):
     class Meta:
         unique_together = ('proveedor', 'codigo_proveedor')
         indexes = [
-            models.Index(fields=['proveedor', 'codigo_proveedor'])
+            models.Index(fields=['proveedor', 'codigo_proveedor']),
+            # Búsqueda por código paginada por keyset sobre (codigo_proveedor, id)
+            models.Index(fields=['codigo_proveedor', 'id']),
         ]
         constraints = [
             models.CheckConstraint(
@@ -239,7 +246,9 @@ class ArticuloProveedor(models.Model):
             return {'error': 'No hay artículo asociado'}
         # Priorizar descuento propio del AP; si no, usar el del target
         config_desc = self.descuento if getattr(self, 'descuento', None) else target.get_descuento()
-        return target.generar_precios(
+        # Implementación base: Articulo.generar_precios no acepta los overrides del AP
+        return ArticuloBase.generar_precios(
+            target,
             precio_de_lista=self.precio,
             cantidad=cantidad,
             pago_efectivo=pago_efectivo,
@@ -249,4 +258,89 @@ class ArticuloProveedor(models.Model):
             descuento_override=config_desc,
             proveedor_override=self.proveedor,
         )
+
+
+class TerminoArticulo(models.Model):
+    """Índice invertido de palabras normalizadas de `Articulo.nombre`/`descripcion`.
+
+    Lo usa el motor de sugerencias de mapeo (`articulos.adapters.sugerencias_mapeo`)
+    para juntar candidatos sin recorrer todos los artículos. Se mantiene al
+    guardar un Articulo (ver `articulos.signals`).
+    """
+    termino = models.CharField(max_length=50)
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='terminos')
+
+    class Meta:
+        unique_together = ('termino', 'articulo')
+
+
+class SugerenciaMapeo(models.Model):
+    """Articulo candidato para mapear un ArticuloSinRevisar, precalculado en segundo plano."""
+    articulo_s_revisar = models.ForeignKey(ArticuloSinRevisar, on_delete=models.CASCADE, related_name='sugerencias')
+    articulo = models.ForeignKey(Articulo, on_delete=models.CASCADE, related_name='+')
+    puntaje = models.FloatField()
+    motivo = models.CharField(
+        max_length=20, choices=[('codigo_barras', 'Código de barras'), ('descripcion', 'Descripción')]
+    )
+    calculada = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('articulo_s_revisar', 'articulo')
+        indexes = [
+            models.Index(fields=['articulo_s_revisar', '-puntaje']),
+        ]
+
+
+class PrecioCalculado(models.Model):
+    """Precios de venta precalculados de un ArticuloProveedor (cantidad=1).
+
+    Es una copia desnormalizada de `ArticuloProveedor.generar_precios(cantidad=1)`
+    que la búsqueda lee en la misma consulta de los resultados. Se recalcula al
+    escribir (ver `articulos.adapters.precios_calculados` y `articulos.signals`).
+    `vigente_hasta` marca el próximo cambio de ventana de un descuento temporal
+    involucrado: pasada esa fecha el valor guardado ya no sirve y se recalcula.
+    """
+    articulo_proveedor = models.OneToOneField(
+        ArticuloProveedor, on_delete=models.CASCADE, related_name='precio_calculado'
+    )
+    base = models.DecimalField(max_digits=14, decimal_places=2)
+    final = models.DecimalField(max_digits=14, decimal_places=2)
+    final_efectivo = models.DecimalField(max_digits=14, decimal_places=2)
+    bulto = models.DecimalField(max_digits=14, decimal_places=2)
+    final_bulto = models.DecimalField(max_digits=14, decimal_places=2)
+    final_bulto_efectivo = models.DecimalField(max_digits=14, decimal_places=2)
+    cantidad_bulto_articulo = models.IntegerField(default=1)
+    umbral_descuento_bulto = models.IntegerField(default=0)
+    descuento_bulto = models.FloatField(default=0)
+    factor_descuento_bulto = models.FloatField(default=1)
+    aplica_descuento_bulto = models.BooleanField(default=False)
+    # Indexados: la versión de la búsqueda (ETag de la API) toma su mínimo/máximo
+    vigente_hasta = models.DateTimeField(null=True, blank=True, db_index=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    def vigente(self, ahora=None):
+        return self.vigente_hasta is None or (ahora or timezone.now()) < self.vigente_hasta
+
+    def como_precios(self):
+        """Mismo dict que `calculate_prices(cantidad=1)`."""
+        return {
+            'base': self.base,
+            'final': self.final,
+            'final_efectivo': self.final_efectivo,
+            'bulto': self.bulto,
+            'final_bulto': self.final_bulto,
+            'final_bulto_efectivo': self.final_bulto_efectivo,
+            'cantidad_bulto_aplicada': 1,
+            'cantidad_bulto_articulo': self.cantidad_bulto_articulo,
+            'umbral_descuento_bulto': self.umbral_descuento_bulto,
+            'debug_descuento_bulto': self.descuento_bulto,
+            'debug_factor_descuento_bulto': self.factor_descuento_bulto,
+            'debug_bulto_articulo': self.cantidad_bulto_articulo,
+            'debug_cantidad': 1.0,
+            'debug_cantidad_bulto_politica': self.umbral_descuento_bulto,
+            'debug_aplica_descuento_bulto': self.aplica_descuento_bulto,
+            'debug_min_qty': self.umbral_descuento_bulto,
+            'debug_applied_qty': 1.0,
+        }
+
 # Archivo de modelos del adaptador
\ No newline at end of file
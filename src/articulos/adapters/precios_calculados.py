@@ -0,0 +1,285 @@
+"""
+Mantenimiento de `PrecioCalculado`: precios de venta de cada ArticuloProveedor
+guardados al escribir en lugar de recalcularse en cada búsqueda.
+
+- `recalcular_precios(aps)` recalcula en bloque (lotes de `_LOTE` AP) con una
+  cantidad fija de consultas por lote: los descuentos se resuelven en memoria
+  replicando `ArticuloBase.get_descuento` sobre las relaciones precargadas, los
+  precios salen de `calculate_prices_batch` (uno por proveedor + descuento) y el
+  resultado se escribe con un único upsert por lote.
+- `programar_recalculo(**filtros)` lo usan las señales: recalcula en el momento
+  o, dentro de `recalculo_diferido()`, acumula los filtros y recalcula una sola
+  vez al salir (importación fila a fila); `aplicar_recalculo_diferido()`
+  adelanta lo acumulado antes de cada punto de control.
+- `precios_de_varios(aps)` / `precios_de(ap)` devuelven los precios guardados
+  o, si faltan o vencieron, los recalculan (todos juntos) y guardan.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache_barras
+from .resolutor_precios import ResolutorPrecios, resolutor_precios
+
+logger = logging.getLogger("articulos.precios_calculados")
+
+# AP por consulta/upsert
+_LOTE = 500
+
+_CAMPOS = [
+    "base",
+    "final",
+    "final_efectivo",
+    "bulto",
+    "final_bulto",
+    "final_bulto_efectivo",
+    "cantidad_bulto_articulo",
+    "umbral_descuento_bulto",
+    "descuento_bulto",
+    "factor_descuento_bulto",
+    "aplica_descuento_bulto",
+    "vigente_hasta",
+    "actualizado",
+]
+
+_local = threading.local()
+
+
+def _modelos():
+    return (
+        apps.get_model("articulos", "ArticuloProveedor"),
+        apps.get_model("articulos", "PrecioCalculado"),
+    )
+
+
+def _en_lotes(valores: List[Any], n: int = _LOTE) -> Iterator[List[Any]]:
+    for i in range(0, len(valores), n):
+        yield valores[i:i + n]
+
+
+def _proximo_cambio(descuentos: Iterable[Any], ahora) -> Optional[Any]:
+    """Primera fecha futura en que alguno de los descuentos entra o sale de vigencia."""
+    cambios = []
+    for d in descuentos:
+        # `Descuento.is_active` tolera un segundo después de `hasta`
+        for limite in (d.desde, d.hasta + timedelta(seconds=1) if d.hasta else None):
+            if limite is not None and limite > ahora:
+                cambios.append(limite)
+    return min(cambios) if cambios else None
+
+
+def _calcular_lote(aps: List[Any], resolutor: ResolutorPrecios, ahora) -> List[Any]:
+    """(ap, campos de PrecioCalculado) por AP, con un `calculate_prices_batch` por proveedor + descuento."""
+    from ..domain.pricing import calculate_prices_batch
+
+    grupos: Dict[Any, List[Any]] = {}
+    descuentos: Dict[Any, Any] = {}
+    for ap in aps:
+        if not (ap.articulo_id or ap.articulo_s_revisar_id):
+            continue
+        config = resolutor.descuento_de_ap(ap)
+        clave = (ap.proveedor_id, id(config))
+        descuentos[clave] = config
+        grupos.setdefault(clave, []).append(ap)
+
+    filas: List[Any] = []
+    for clave, grupo in grupos.items():
+        # Mismos parámetros que ArticuloBase.generar_precios con los overrides del AP
+        config = descuentos[clave]
+        proveedor = grupo[0].proveedor
+        precios = calculate_prices_batch(
+            precios_de_lista=[ap.precio for ap in grupo],
+            ivas=[ap.precio_de_lista.iva for ap in grupo],
+            bultos=[ap.precio_de_lista.bulto or 1 for ap in grupo],
+            dividir=[ap.dividir for ap in grupo],
+            proveedor_desc_com=getattr(proveedor, "descuento_comercial", 0),
+            proveedor_margen=getattr(proveedor, "margen_ganancia", 1),
+            proveedor_margen_ef=getattr(proveedor, "margen_ganancia_efectivo", 1),
+            descuento_general=getattr(config, "general", 0),
+            descuento_activo=getattr(config, "is_active", lambda: True)(),
+            descuento_bulto=getattr(config, "bulto", 0),
+            descuento_cantidad_bulto=getattr(config, "cantidad_bulto", 1),
+            cantidad=1,
+        )
+        for i, ap in enumerate(grupo):
+            filas.append((ap, {
+                "base": precios["base"][i],
+                "final": precios["final"][i],
+                "final_efectivo": precios["final_efectivo"][i],
+                "bulto": precios["bulto"][i],
+                "final_bulto": precios["final_bulto"][i],
+                "final_bulto_efectivo": precios["final_bulto_efectivo"][i],
+                "cantidad_bulto_articulo": precios["cantidad_bulto_articulo"][i],
+                "umbral_descuento_bulto": precios["umbral_descuento_bulto"][i],
+                "descuento_bulto": precios["debug_descuento_bulto"][i],
+                "factor_descuento_bulto": precios["debug_factor_descuento_bulto"][i],
+                "aplica_descuento_bulto": precios["debug_aplica_descuento_bulto"][i],
+                "vigente_hasta": _proximo_cambio(resolutor.involucrados(ap), ahora),
+            }))
+    return filas
+
+
+def _ids(aps: Any) -> List[Any]:
+    if hasattr(aps, "values_list"):
+        return list(aps.values_list("id", flat=True))
+    return [getattr(ap, "pk", ap) for ap in aps]
+
+
+def recalcular_precios(aps: Any) -> List[Any]:
+    """Recalcula y guarda `PrecioCalculado` de los AP dados (ids, instancias o QuerySet).
+
+    Devuelve los `PrecioCalculado` escritos.
+    """
+    ArticuloProveedor, PrecioCalculado = _modelos()
+    ahora = timezone.now()
+    escritos: List[Any] = []
+    with resolutor_precios() as resolutor:
+        for lote in _en_lotes(sorted(set(_ids(aps)))):
+            escritos.extend(_recalcular_lote(ArticuloProveedor, PrecioCalculado, lote, resolutor, ahora))
+    if escritos:
+        # Los resultados por código de barras cacheados llevan precios
+        cache_barras.limpiar()
+    logger.debug("[precios] %s PrecioCalculado recalculados", len(escritos))
+    return escritos
+
+
+def _recalcular_lote(ArticuloProveedor, PrecioCalculado, lote: List[Any], resolutor: ResolutorPrecios, ahora) -> List[Any]:
+    cargados = list(
+        ArticuloProveedor.objects.using("default")
+        .filter(id__in=lote)
+        .select_related(
+            "proveedor",
+            "precio_de_lista",
+            "descuento",
+            "articulo__descuento",
+            "articulo_s_revisar__descuento",
+        )
+    )
+    resolutor.precargar(cargados)
+    objs = [
+        PrecioCalculado(articulo_proveedor=ap, **campos)
+        for ap, campos in _calcular_lote(cargados, resolutor, ahora)
+    ]
+    if objs:
+        PrecioCalculado.objects.using("default").bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["articulo_proveedor"],
+            update_fields=_CAMPOS,
+        )
+    return objs
+
+
+def _filtro(pendientes: Dict[str, Set[Any]]) -> Q:
+    filtro = Q(pk__in=[])
+    for campo, valores in pendientes.items():
+        ids = [v for v in valores if v is not None]
+        if ids:
+            filtro |= Q(**{f"{campo}__in": ids})
+        if None in valores:
+            filtro |= Q(**{f"{campo}__isnull": True})
+    return filtro
+
+
+def aps_a_recalcular(**filtros: Iterable[Any]) -> List[Any]:
+    """Ids de los AP que cumplen alguno de los filtros (ver `programar_recalculo`)."""
+    ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+    pendientes = {campo: set(valores) for campo, valores in filtros.items()}
+    return list(ArticuloProveedor.objects.using("default").filter(_filtro(pendientes)).values_list("id", flat=True))
+
+
+def _recalcular_pendientes(pendientes: Dict[str, Set[Any]]) -> None:
+    if any(pendientes.values()):
+        recalcular_precios(aps_a_recalcular(**pendientes))
+
+
+def programar_recalculo(**filtros: Iterable[Any]) -> None:
+    """Recalcula los AP que cumplen alguno de los filtros (`campo=[valores]`; None = campo nulo).
+
+    Dentro de `recalculo_diferido()` sólo los acumula.
+    """
+    pendientes: Optional[Dict[str, Set[Any]]] = getattr(_local, "pendientes", None)
+    nuevos = {campo: set(valores) for campo, valores in filtros.items()}
+    if pendientes is None:
+        _recalcular_pendientes(nuevos)
+        return
+    for campo, valores in nuevos.items():
+        pendientes.setdefault(campo, set()).update(valores)
+
+
+@contextmanager
+def recalculo_diferido():
+    """Acumula los recálculos pedidos por las señales y los ejecuta una sola vez al salir.
+
+    Si el bloque termina con error igual se recalcula lo acumulado (lo ya
+    confirmado en transacciones previas necesita sus precios); un fallo de ese
+    recálculo se registra sin ocultar el error original.
+    """
+    if getattr(_local, "pendientes", None) is not None:
+        yield
+        return
+    _local.pendientes = {}
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        pendientes = _local.pendientes
+        _local.pendientes = None
+        if ok:
+            _recalcular_pendientes(pendientes)
+        else:
+            try:
+                _recalcular_pendientes(pendientes)
+            except Exception:
+                logger.exception("[precios] No se pudieron recalcular los precios pendientes")
+
+
+def aplicar_recalculo_diferido() -> None:
+    """Dentro de `recalculo_diferido()`, recalcula ya lo acumulado hasta ahora.
+
+    Para quien confirma progreso a mitad del bloque (puntos de control de una
+    importación): lo confirmado no debe quedar con precios sin recalcular.
+    """
+    pendientes: Optional[Dict[str, Set[Any]]] = getattr(_local, "pendientes", None)
+    if pendientes:
+        _recalcular_pendientes(pendientes)
+        pendientes.clear()
+
+
+def precios_de_varios(aps: List[Any]) -> Dict[Any, Dict[str, Any]]:
+    """Precios (cantidad=1) por id de AP desde `PrecioCalculado`.
+
+    Los que faltan o vencieron se recalculan juntos con un solo `recalcular_precios`.
+    """
+    ahora = timezone.now()
+    resultado: Dict[Any, Dict[str, Any]] = {}
+    pendientes: List[Any] = []
+    for ap in aps:
+        try:
+            snapshot = ap.precio_calculado
+        except ObjectDoesNotExist:
+            snapshot = None
+        if snapshot is not None and snapshot.vigente(ahora):
+            resultado[ap.pk] = snapshot.como_precios()
+        else:
+            pendientes.append(ap)
+    if pendientes:
+        recalculados = {pc.articulo_proveedor_id: pc for pc in recalcular_precios(pendientes)}
+        for ap in pendientes:
+            snapshot = recalculados.get(ap.pk)
+            resultado[ap.pk] = snapshot.como_precios() if snapshot is not None else ap.generar_precios(cantidad=1)
+    return resultado
+
+
+def precios_de(ap: Any) -> Dict[str, Any]:
+    """Precios del AP (cantidad=1) desde `PrecioCalculado`; si falta o venció, se recalcula y guarda."""
+    return precios_de_varios([ap])[ap.pk]
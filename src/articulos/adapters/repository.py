@@ -7,12 +7,23 @@ src/articulos/domain/interfaces.py utilizando Django ORM.
 Todas las consultas se realizan contra la base de datos "negocio_db".
 """
 
-from typing import Any, Dict, List, Optional
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
 from django.apps import apps
-from django.db.models import QuerySet
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Max, Min, Q, QuerySet, Value, When
+from django.db.models.functions import Collate
 from django.utils import timezone
 
+from . import cache_barras
+from .indice_descripciones import ids_por_descripcion, palabras
+from .precios_calculados import precios_de_varios, programar_recalculo, recalcular_precios
+from .resolutor_precios import resolutor_precios
+from .sugerencias_mapeo import _PALABRA, _VACIAS, indexar_articulos, normalizar
 from ..domain.interfaces import (
     CalcularPrecioPort,
     BuscarArticuloPort,
@@ -56,6 +67,104 @@ def _normalize_code_and_abbr(query: str, abreviatura: Optional[str] = None) -> D
     return {"code": code, "abbr": abbr}
 
 
+def _escribir_cursor(ap: Any) -> str:
+    """Cursor opaco (base64 de JSON) con la clave de orden del último AP de la página."""
+    crudo = json.dumps([ap.codigo_proveedor, ap.pk], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def _leer_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Clave (codigo_proveedor, id) del cursor; None si falta o no es válido (primera página)."""
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        codigo, pk = json.loads(crudo.decode("utf-8"))
+        return str(codigo), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def _siguiente_prefijo(prefijo: str) -> str:
+    """Cota superior exclusiva de las cadenas que empiezan con `prefijo` (para filtrar por rango con índice)."""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+
+# Collation byte a byte por motor para `codigo_proveedor` en la búsqueda por código.
+# Con una collation de idioma (en_US.UTF-8) PostgreSQL ignora la puntuación al
+# comparar y "3.7/" caería dentro del rango de "37"; SQLite ya compara bytes.
+COLLATION_CODIGO = {"postgresql": "C"}
+
+
+def _con_codigo_binario(qs: QuerySet) -> QuerySet:
+    """`qs` con el alias `codigo_binario` (codigo_proveedor comparado byte a byte) para rango y keyset."""
+    collation = COLLATION_CODIGO.get(connections[qs.db].vendor)
+    codigo = F("codigo_proveedor")
+    return qs.alias(codigo_binario=Collate(codigo, collation) if collation else codigo)
+
+
+def _contar_aprox(qs: QuerySet) -> Tuple[int, bool]:
+    """(total, exacto): cuenta exacta hasta un tope; por encima, la estimación del planner si hay.
+
+    El conteo se hace sobre `LIMIT tope + 1`, así que nunca recorre más que eso.
+    """
+    tope = int(getattr(settings, "ARTICULOS_BUSQUEDA_CONTEO_MAX", 1000))
+    total = qs.order_by()[: tope + 1].count()
+    if total <= tope:
+        return total, True
+    return max(tope, _estimar_filas(qs.order_by()) or 0), False
+
+
+def _estimar_filas(qs: QuerySet) -> Optional[int]:
+    """Filas estimadas por el planner de PostgreSQL (sin ejecutar la consulta); None en otros motores."""
+    connection = connections[qs.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = qs.query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (DatabaseError, ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def consolidar_por_precio_de_lista(filtro: Optional[Q] = None, using: str = "negocio_db") -> int:
+    """
+    Deja un único ArticuloProveedor (el de menor id) por PrecioDeLista; devuelve cuántos borró.
+
+    Los grupos repetidos salen de una sola consulta `GROUP BY precio_de_lista
+    HAVING COUNT(*) > 1`, restringida a los PrecioDeLista de los AP que cumplen
+    `filtro` (None = toda la tabla, ver el comando `consolidar_articulos_proveedor`).
+    """
+    ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+    qs = ArticuloProveedor.objects.using(using).filter(precio_de_lista__isnull=False)
+    if filtro is not None:
+        alcance = ArticuloProveedor.objects.using(using).filter(filtro).values("precio_de_lista")
+        qs = qs.filter(precio_de_lista__in=alcance)
+    grupos = list(
+        qs.order_by()
+        .values("precio_de_lista")
+        .annotate(filas=Count("id"), conservar=Min("id"))
+        .filter(filas__gt=1)
+        .values_list("precio_de_lista", "conservar")
+    )
+    borrados = 0
+    for i in range(0, len(grupos), 500):
+        lote = grupos[i:i + 500]
+        _, por_modelo = (
+            ArticuloProveedor.objects.using(using)
+            .filter(precio_de_lista_id__in=[pl_id for pl_id, _ in lote])
+            .exclude(id__in=[ap_id for _, ap_id in lote])
+            .delete()
+        )
+        borrados += por_modelo.get(ArticuloProveedor._meta.label, 0)
+    return borrados
+
+
 class PrecioRepository(CalcularPrecioPort):
     """
     Implementación del puerto `CalcularPrecioPort` usando Django ORM.
@@ -64,6 +173,10 @@ class PrecioRepository(CalcularPrecioPort):
     """
 
     def calcular_precios(self, articulo_id: Any, tipo: str, cantidad: int, pago_efectivo: bool) -> Dict[str, Any]:
+        with resolutor_precios():
+            return self._calcular_precios(articulo_id, tipo, cantidad, pago_efectivo)
+
+    def _calcular_precios(self, articulo_id: Any, tipo: str, cantidad: int, pago_efectivo: bool) -> Dict[str, Any]:
         if tipo == "articulo":
             ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
             ap = (
@@ -86,33 +199,168 @@ class BusquedaRepository(BuscarArticuloPort):
     Implementación del puerto `BuscarArticuloPort` usando Django ORM.
 
     Busca en PrecioDeLista, ArticuloSinRevisar y ArticuloProveedor
-    contra la base de datos "negocio_db".
+    contra la base de datos "negocio_db", por código o por palabras de la
+    descripción. Los precios se leen de `PrecioCalculado` en la misma
+    consulta (ver `precios_calculados`).
     """
 
     def buscar_articulos(self, query: str, abreviatura: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self._pagina(self._por_codigo(query, abreviatura), None, 50)[0]
+
+    def buscar_pagina(
+        self, query: str, abreviatura: Optional[str] = None, cursor: Optional[str] = None, limite: int = 50
+    ) -> Dict[str, Any]:
+        qs_ap = self._por_codigo(query, abreviatura)
+        total, exacto = _contar_aprox(qs_ap)
+        resultados, siguiente = self._pagina(qs_ap, _leer_cursor(cursor), limite)
+        return {"resultados": resultados, "siguiente": siguiente, "total": total, "total_exacto": exacto}
+
+    def _por_codigo(self, query: str, abreviatura: Optional[str]) -> QuerySet:
         norm = _normalize_code_and_abbr(query, abreviatura)
         code: str = norm["code"] or ""
         abbr: Optional[str] = norm["abbr"]
 
-        # Solo devolvemos ArticuloProveedor en los resultados
-        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
-
-        results: List[Dict[str, Any]] = []
-
         # Prefijo a buscar (sin la barra final) para permitir coincidencias por inicio
         prefix = code.rstrip("/")
 
-        # ArticuloProveedor: buscar por codigo_proveedor y abreviatura
-        base_no_slash = prefix
-        qs_ap: QuerySet = ArticuloProveedor.objects.using("negocio_db").select_related(
-            "proveedor", "precio_de_lista", "articulo"
-        )
-        qs_ap = qs_ap.filter(codigo_proveedor__istartswith=base_no_slash).order_by("codigo_proveedor")
+        # Solo devolvemos ArticuloProveedor: buscar por codigo_proveedor y abreviatura
+        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+        qs_ap = _con_codigo_binario(ArticuloProveedor.objects.using("negocio_db").all())
+        if prefix and prefix.lower() == prefix.upper():
+            # Sin letras (el caso habitual: "37", "0037-25") el prefijo es un rango: usa el índice de código
+            qs_ap = qs_ap.filter(codigo_binario__gte=prefix, codigo_binario__lt=_siguiente_prefijo(prefix))
+        elif prefix:
+            qs_ap = qs_ap.filter(codigo_proveedor__istartswith=prefix)
         if abbr:
             qs_ap = qs_ap.filter(proveedor__abreviatura__iexact=abbr)
-        for ap in qs_ap[:50]:
-            codigo = getattr(ap, "get_codigo_completo", lambda: f"{ap.codigo_proveedor}/{ap.proveedor.abreviatura}")()
-            precios_calc = ap.generar_precios(cantidad=1, pago_efectivo=False)
+        return qs_ap
+
+    def _pagina(self, qs_ap: QuerySet, desde: Optional[Tuple[str, int]], limite: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Página por keyset sobre (codigo_proveedor, id): cuesta lo mismo en cualquier profundidad.
+
+        `qs_ap` viene de `_por_codigo` (con el alias `codigo_binario`): orden y
+        cursor comparan con la misma collation que el índice.
+        """
+        qs_ap = qs_ap.order_by("codigo_binario", "id")
+        if desde is not None:
+            codigo, pk = desde
+            qs_ap = qs_ap.filter(Q(codigo_binario__gt=codigo) | Q(codigo_binario=codigo, id__gt=pk))
+        aps = list(self._con_relaciones(qs_ap)[: limite + 1])
+        siguiente = _escribir_cursor(aps[limite - 1]) if len(aps) > limite else None
+        return self._resultados(aps[:limite]), siguiente
+
+    def buscar_por_descripcion(self, texto: str, abreviatura: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Busca por palabras de `descripcion_proveedor` usando el índice de texto (ver `indice_descripciones`)."""
+        abbr = abreviatura.strip().upper() if isinstance(abreviatura, str) and abreviatura.strip() else None
+        proveedor_id = None
+        if abbr:
+            Proveedor = apps.get_model("proveedores", "Proveedor")
+            proveedor_id = (
+                Proveedor.objects.using("negocio_db").filter(abreviatura__iexact=abbr).values_list("id", flat=True).first()
+            )
+            if proveedor_id is None:
+                return []
+        ids = ids_por_descripcion(texto, proveedor_id=proveedor_id, limite=50)
+        if ids is None:
+            # Motor sin índice de texto: todas las palabras con icontains (recorre la tabla)
+            qs_ap = self._con_relaciones(self._aps())
+            for palabra in palabras(texto):
+                qs_ap = qs_ap.filter(descripcion_proveedor__icontains=palabra)
+            if proveedor_id is not None:
+                qs_ap = qs_ap.filter(proveedor_id=proveedor_id)
+            return self._resultados(list(qs_ap.order_by("-id")[:50]))
+        # Mantener el orden por relevancia del índice
+        por_id = self._con_relaciones(self._aps()).in_bulk(ids)
+        return self._resultados([por_id[pk] for pk in ids if pk in por_id])
+
+    def buscar_por_codigo_barras(self, codigo_barras: str) -> List[Dict[str, Any]]:
+        """AP (con precios guardados) de todos los proveedores del código de barras, con LRU delante."""
+        codigo = (codigo_barras or "").strip()
+        if not codigo:
+            return []
+        return cache_barras.obtener(codigo, self._por_codigo_barras)
+
+    def _por_codigo_barras(self, codigo: str) -> List[Dict[str, Any]]:
+        Articulo = apps.get_model("articulos", "Articulo")
+        ArticuloSinRevisar = apps.get_model("articulos", "ArticuloSinRevisar")
+        # Una sola consulta: los IN por subconsulta usan los índices de codigo_barras y de los FK del AP
+        qs_ap = self._aps().filter(
+            Q(articulo_id__in=Articulo.objects.filter(codigo_barras=codigo).values("id"))
+            | Q(articulo_s_revisar_id__in=ArticuloSinRevisar.objects.filter(codigo_barras=codigo).values("id"))
+        )
+        return self._resultados(list(self._con_relaciones(qs_ap).order_by("id")[:50]))
+
+    def version_busqueda(self) -> str:
+        """
+        Versión de los datos que devuelve la búsqueda (para ETag): cambia al
+        agregar o borrar un AP y al recalcular cualquier `PrecioCalculado`.
+
+        Dos consultas de agregados sobre índices. Si algún precio guardado
+        venció (descuento temporal), se recalculan primero: la versión nunca
+        valida precios que la búsqueda ya no devolvería.
+        """
+        PrecioCalculado = apps.get_model("articulos", "PrecioCalculado")
+        precios = PrecioCalculado.objects.using("negocio_db")
+        agregados = precios.aggregate(filas=Count("id"), actualizado=Max("actualizado"), vence=Min("vigente_hasta"))
+        ahora = timezone.now()
+        if agregados["vence"] is not None and agregados["vence"] <= ahora:
+            recalcular_precios(list(precios.filter(vigente_hasta__lte=ahora).values_list("articulo_proveedor_id", flat=True)))
+            agregados = precios.aggregate(filas=Count("id"), actualizado=Max("actualizado"))
+        aps = self._aps().aggregate(filas=Count("id"), ultimo=Max("id"))
+        actualizado = agregados["actualizado"]
+        return "{}.{}.{}.{}".format(
+            aps["filas"], aps["ultimo"] or 0, agregados["filas"], actualizado.timestamp() if actualizado else 0
+        )
+
+    def autocompletar_articulos(self, texto: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Articulo cuyo código de barras empieza con `texto` o con palabras que
+        empiezan con cada palabra de `texto` (nombre o descripción).
+
+        Ambos criterios van por índice: el código por rango sobre
+        `codigo_barras` y las palabras por rango sobre `TerminoArticulo` (una
+        subconsulta por palabra). Primero los que coinciden por código.
+        """
+        Articulo = apps.get_model("articulos", "Articulo")
+        TerminoArticulo = apps.get_model("articulos", "TerminoArticulo")
+        texto = (texto or "").strip()
+        if not texto:
+            return []
+        articulos = Articulo.objects.using("negocio_db").only("id", "codigo_barras", "nombre", "descripcion")
+
+        encontrados = list(
+            articulos.filter(codigo_barras__gte=texto, codigo_barras__lt=_siguiente_prefijo(texto))
+            .order_by("codigo_barras")[:limite]
+        )
+        palabras = [p[:50] for p in _PALABRA.findall(normalizar(texto)) if len(p) >= 2 and p not in _VACIAS]
+        if len(encontrados) < limite and palabras:
+            por_palabras = articulos.exclude(id__in=[a.id for a in encontrados])
+            for palabra in palabras:
+                por_palabras = por_palabras.filter(
+                    id__in=TerminoArticulo.objects.using("negocio_db")
+                    .filter(termino__gte=palabra, termino__lt=_siguiente_prefijo(palabra))
+                    .values("articulo_id")
+                )
+            encontrados.extend(por_palabras.order_by("nombre", "id")[: limite - len(encontrados)])
+        return [
+            {"id": a.id, "codigo_barras": a.codigo_barras, "nombre": a.nombre, "descripcion": a.descripcion}
+            for a in encontrados
+        ]
+
+    def _aps(self) -> QuerySet:
+        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+        return ArticuloProveedor.objects.using("negocio_db").all()
+
+    def _con_relaciones(self, qs_ap: QuerySet) -> QuerySet:
+        return qs_ap.select_related("proveedor", "precio_de_lista", "articulo", "descuento", "precio_calculado")
+
+    def _resultados(self, aps: List[Any]) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        # Precios guardados; los faltantes/vencidos se recalculan juntos (cantidad fija de consultas)
+        with resolutor_precios():
+            precios = precios_de_varios(aps)
+        for ap in aps:
+            precios_calc = precios[ap.pk]
             puede_mapear = ap.articulo_id is None
             pendiente_id = ap.articulo_s_revisar_id if puede_mapear else None
             results.append(
@@ -171,31 +419,14 @@ class MapeoRepository(MapearArticuloPort):
         ArticuloProveedor.objects.using("negocio_db").filter(articulo_s_revisar=asr).update(
             articulo=art, articulo_s_revisar=None
         )
+        # update() no dispara señales: el descuento ahora sale del Articulo
+        programar_recalculo(articulo_id=[art.pk])
 
-        # Consolidar por PrecioDeLista: asegurar un único ArticuloProveedor por cada precio_de_lista
-        # Si hay múltiples AP con el mismo precio_de_lista, conservar el primero y eliminar el resto
+        # Consolidar por PrecioDeLista: un único ArticuloProveedor por cada precio_de_lista,
+        # sólo entre los del Articulo mapeado (el barrido completo es un comando de mantenimiento)
         from django.db import transaction
         with transaction.atomic(using="negocio_db"):
-            dups = (
-                ArticuloProveedor.objects.using("negocio_db")
-                .values("precio_de_lista")
-                .order_by("precio_de_lista")
-            )
-            seen = set()
-            for row in dups:
-                pl_id = row["precio_de_lista"]
-                if pl_id in seen or pl_id is None:
-                    continue
-                seen.add(pl_id)
-                qs = (
-                    ArticuloProveedor.objects.using("negocio_db")
-                    .filter(precio_de_lista_id=pl_id)
-                    .order_by("id")
-                )
-                keep = qs.first()
-                extra_ids = list(qs.values_list("id", flat=True))[1:]
-                if extra_ids:
-                    ArticuloProveedor.objects.using("negocio_db").filter(id__in=extra_ids).delete()
+            consolidar_por_precio_de_lista(Q(articulo=art))
 
         # Marcar ASR como mapeado y fecha (usuario_id eliminado: el campo 'usuario' no es necesario
         # para la importación/mapeo y evita dependencias con auth_user en la base 'default').
@@ -208,4 +439,94 @@ class MapeoRepository(MapearArticuloPort):
             "articulo_s_revisar_id": asr.id,
             "articulo_id": art.id,
             "relaciones_actualizadas": True,
-        }
\ No newline at end of file
+        }
+
+    def mapear_en_bloque(self, pares: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mapea muchos ArticuloSinRevisar en una transacción, con sentencias por
+        conjunto en lugar de una ronda por par:
+
+        - Articulo por código de barras: los existentes en una consulta y los
+          que faltan en un `bulk_create` (con la descripción del primer ASR).
+        - AP de cada ASR -> su Articulo: un UPDATE con CASE por lote.
+        - Consolidación por PrecioDeLista acotada a los Articulo tocados y los
+          ASR a "mapeado" en un UPDATE.
+
+        Los pares con ASR o Articulo inexistentes, o ASR ya mapeados, vuelven
+        en `errores` y no se aplican.
+        """
+        ArticuloSinRevisar = apps.get_model("articulos", "ArticuloSinRevisar")
+        Articulo = apps.get_model("articulos", "Articulo")
+        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+
+        errores: List[Dict[str, Any]] = []
+        nuevos: Dict[str, str] = {}
+        destino: Dict[Any, Any] = {}
+        with transaction.atomic(using="negocio_db"):
+            asrs = {
+                fila["id"]: fila
+                for fila in ArticuloSinRevisar.objects.using("negocio_db")
+                .filter(id__in={p["articulo_s_revisar_id"] for p in pares})
+                .values("id", "estado", "descripcion_proveedor")
+            }
+            existentes = set(
+                Articulo.objects.using("negocio_db")
+                .filter(id__in={p["articulo_id"] for p in pares if p.get("articulo_id") is not None})
+                .values_list("id", flat=True)
+            )
+            por_codigo = dict(
+                Articulo.objects.using("negocio_db")
+                .filter(codigo_barras__in={p["codigo_barras"] for p in pares if p.get("codigo_barras")})
+                .values_list("codigo_barras", "id")
+            )
+
+            validos: List[Dict[str, Any]] = []
+            for par in pares:
+                asr = asrs.get(par["articulo_s_revisar_id"])
+                if asr is None:
+                    errores.append({**par, "error": "ArticuloSinRevisar inexistente"})
+                elif asr["estado"] == "mapeado":
+                    errores.append({**par, "error": "ArticuloSinRevisar ya mapeado"})
+                elif par.get("articulo_id") is not None and par["articulo_id"] not in existentes:
+                    errores.append({**par, "error": "Articulo inexistente"})
+                else:
+                    if par.get("articulo_id") is None and par["codigo_barras"] not in por_codigo:
+                        nuevos.setdefault(par["codigo_barras"], asr["descripcion_proveedor"])
+                    validos.append(par)
+
+            if nuevos:
+                Articulo.objects.using("negocio_db").bulk_create(
+                    [Articulo(codigo_barras=codigo, descripcion=descripcion) for codigo, descripcion in nuevos.items()]
+                )
+                por_codigo.update(
+                    Articulo.objects.using("negocio_db").filter(codigo_barras__in=list(nuevos)).values_list("codigo_barras", "id")
+                )
+            for par in validos:
+                articulo_id = par["articulo_id"] if par.get("articulo_id") is not None else por_codigo[par["codigo_barras"]]
+                destino[par["articulo_s_revisar_id"]] = articulo_id
+
+            pares_destino = list(destino.items())
+            for i in range(0, len(pares_destino), 500):
+                lote = pares_destino[i:i + 500]
+                ArticuloProveedor.objects.using("negocio_db").filter(
+                    articulo_s_revisar_id__in=[asr_id for asr_id, _ in lote]
+                ).update(
+                    articulo_id=Case(
+                        *[When(articulo_s_revisar_id=asr_id, then=Value(art_id)) for asr_id, art_id in lote],
+                        output_field=BigIntegerField(),
+                    ),
+                    articulo_s_revisar=None,
+                )
+            if destino:
+                consolidar_por_precio_de_lista(Q(articulo_id__in=set(destino.values())))
+                ArticuloSinRevisar.objects.using("negocio_db").filter(id__in=list(destino)).update(
+                    estado="mapeado", fecha_mapeo=timezone.now()
+                )
+
+        if nuevos:
+            # bulk_create no dispara señales: indexar los Articulo nuevos para las sugerencias
+            indexar_articulos([por_codigo[codigo] for codigo in nuevos], using="negocio_db")
+        if destino:
+            # update() no dispara señales: el descuento ahora sale del Articulo
+            programar_recalculo(articulo_id=set(destino.values()))
+        return {"mapeados": len(destino), "articulos_creados": len(nuevos), "errores": errores}
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Resolución de Descuento y Proveedor para el cálculo de precios, con cache por operación.
+
+`ArticuloBase.get_descuento()` consulta el Descuento por pk, luego el primer
+ArticuloProveedor del artículo y por último "Sin Descuento";
+`ArticuloSinRevisar.get_proveedor()` relee el Proveedor. Calcular precios de una
+página de resultados costaba varias consultas por fila.
+
+Dentro de `resolutor_precios()` (una búsqueda, un recálculo de precios) esos
+métodos usan el `ResolutorPrecios` activo del hilo, que:
+
+- guarda Descuento y Proveedor por id (una instancia por id, cargada en bloque;
+  los Descuento salen del cache de proceso `precios.adapters.cache_descuentos`),
+- resuelve "Sin Descuento" una sola vez,
+- con `precargar(aps)` trae en una consulta el descuento del primer AP de cada
+  artículo (paso 3 de `get_descuento`) para todos los AP de la página.
+
+Fuera de ese contexto el comportamiento es el de siempre (lecturas a la base).
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.apps import apps
+from django.db.models import Q
+
+from precios.adapters import cache_descuentos
+
+_local = threading.local()
+
+
+class ResolutorPrecios:
+    """Cache de Descuento/Proveedor por id para una operación (no compartir entre hilos)."""
+
+    def __init__(self) -> None:
+        self._descuentos: Dict[Any, Any] = {}
+        self._proveedores: Dict[Any, Any] = {}
+        self._sin_descuento: Any = None
+        # ("a" | "s", id del artículo) -> Descuento del primer AP (o None)
+        self._primero_por_target: Dict[Tuple[str, Any], Any] = {}
+
+    # ------------------------------------------------------------------
+    # Instancias por id
+    # ------------------------------------------------------------------
+    def descuentos(self, ids: Iterable[Any]) -> Dict[Any, Any]:
+        faltan = {pk for pk in ids if pk and pk not in self._descuentos}
+        if faltan:
+            self._descuentos.update(cache_descuentos.descuentos(faltan))
+        return {pk: self._descuentos.get(pk) for pk in ids if pk}
+
+    def descuento(self, pk: Any) -> Any:
+        return self.descuentos([pk]).get(pk) if pk else None
+
+    def proveedor(self, pk: Any) -> Any:
+        if not pk:
+            return None
+        if pk not in self._proveedores:
+            Proveedor = apps.get_model("proveedores", "Proveedor")
+            self._proveedores[pk] = Proveedor.objects.using("default").filter(pk=pk).first()
+        return self._proveedores[pk]
+
+    def registrar(self, obj: Any) -> Any:
+        """Adopta una instancia ya cargada (p.ej. por select_related); devuelve la canónica por id."""
+        if obj is None or obj.pk is None:
+            return obj
+        cache = self._proveedores if obj._meta.label == "proveedores.Proveedor" else self._descuentos
+        actual = cache.get(obj.pk)
+        if actual is None:
+            cache[obj.pk] = actual = obj
+        return actual
+
+    def sin_descuento(self) -> Any:
+        if self._sin_descuento is None:
+            Descuento = apps.get_model("precios", "Descuento")
+            obj = cache_descuentos.sin_descuento()
+            self._sin_descuento = self.registrar(obj) if obj is not None else Descuento(
+                tipo="Sin Descuento", temporal=False, general=0.0, bulto=0.0, cantidad_bulto=5
+            )
+        return self._sin_descuento
+
+    # ------------------------------------------------------------------
+    # Paso 3 de get_descuento: descuento del primer AP del artículo
+    # ------------------------------------------------------------------
+    def precargar(self, aps: List[Any]) -> None:
+        """Adopta las relaciones ya cargadas de `aps` y trae, en una consulta, el primer AP de cada artículo."""
+        for ap in aps:
+            for obj in (ap, ap.articulo if ap.articulo_id else ap.articulo_s_revisar):
+                for campo in ("descuento", "proveedor"):
+                    if _cacheado(obj, campo):
+                        self.registrar(getattr(obj, campo))
+        articulos = {ap.articulo_id for ap in aps if ap.articulo_id and ("a", ap.articulo_id) not in self._primero_por_target}
+        asrs = {
+            ap.articulo_s_revisar_id
+            for ap in aps
+            if ap.articulo_s_revisar_id and ("s", ap.articulo_s_revisar_id) not in self._primero_por_target
+        }
+        self._cargar_primeros(articulos, asrs)
+
+    def _cargar_primeros(self, articulos: set, asrs: set) -> None:
+        if not articulos and not asrs:
+            return
+        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+        filas = (
+            ArticuloProveedor.objects.using("default")
+            .filter(Q(articulo_id__in=articulos) | Q(articulo_s_revisar_id__in=asrs))
+            .order_by("id")
+            .values_list("articulo_id", "articulo_s_revisar_id", "descuento_id")
+        )
+        ids: Dict[Tuple[str, Any], Any] = {}
+        for articulo_id, asr_id, descuento_id in filas:
+            clave = ("a", articulo_id) if articulo_id in articulos else ("s", asr_id)
+            ids.setdefault(clave, descuento_id)
+        descuentos = self.descuentos(set(ids.values()))
+        for pk in articulos:
+            self._primero_por_target[("a", pk)] = descuentos.get(ids.get(("a", pk)))
+        for pk in asrs:
+            self._primero_por_target[("s", pk)] = descuentos.get(ids.get(("s", pk)))
+
+    def _primero(self, articulo: Any) -> Any:
+        clave = _clave(articulo)
+        if clave not in self._primero_por_target:
+            pk = clave[1]
+            self._cargar_primeros({pk} if clave[0] == "a" else set(), {pk} if clave[0] == "s" else set())
+        return self._primero_por_target.get(clave)
+
+    # ------------------------------------------------------------------
+    # Resolución (mismas reglas que los modelos)
+    # ------------------------------------------------------------------
+    def descuento_de_articulo(self, articulo: Any) -> Any:
+        """Equivalente a `ArticuloBase.get_descuento()` para un Articulo o ArticuloSinRevisar."""
+        propio = self.descuento(getattr(articulo, "descuento_id", None))
+        if propio is not None and propio.is_active():
+            return propio
+        if articulo.pk is not None:
+            primero = self._primero(articulo)
+            if primero is not None and primero.is_active():
+                return primero
+        return self.sin_descuento()
+
+    def descuento_de_ap(self, ap: Any) -> Any:
+        """Descuento que usa `ArticuloProveedor.generar_precios`: el propio (sin mirar vigencia) o el del artículo."""
+        if ap.descuento_id:
+            return self.registrar(ap.descuento)
+        return self.descuento_de_articulo(ap.articulo if ap.articulo_id else ap.articulo_s_revisar)
+
+    def involucrados(self, ap: Any) -> List[Any]:
+        """Descuentos temporales cuya ventana puede cambiar el resultado del AP."""
+        target = ap.articulo if ap.articulo_id else ap.articulo_s_revisar
+        candidatos = [
+            self.descuento(ap.descuento_id),
+            self.descuento(getattr(target, "descuento_id", None)),
+            None if ap.descuento_id or target is None else self._primero(target),
+        ]
+        return [d for d in candidatos if d is not None and d.temporal]
+
+
+def _cacheado(obj: Any, campo: str) -> bool:
+    """True si la relación ya está cargada en la instancia (no dispara consultas)."""
+    try:
+        return obj._meta.get_field(campo).is_cached(obj)
+    except Exception:
+        return False
+
+
+def _clave(articulo: Any) -> Tuple[str, Any]:
+    return ("s", articulo.pk) if articulo._meta.model_name == "articulosinrevisar" else ("a", articulo.pk)
+
+
+def resolutor_activo() -> Optional[ResolutorPrecios]:
+    return getattr(_local, "resolutor", None)
+
+
+@contextmanager
+def resolutor_precios():
+    """Activa un `ResolutorPrecios` en el hilo (o reutiliza el que ya esté activo)."""
+    actual = resolutor_activo()
+    if actual is not None:
+        yield actual
+        return
+    _local.resolutor = ResolutorPrecios()
+    try:
+        yield _local.resolutor
+    finally:
+        _local.resolutor = None
@@ -0,0 +1,223 @@
+"""
+Sugerencias de mapeo: Articulo candidatos para cada ArticuloSinRevisar pendiente.
+
+- Primero el código de barras exacto (puntaje 1).
+- Después, similitud de la descripción normalizada (sin acentos ni mayúsculas):
+  los candidatos salen del índice invertido `TerminoArticulo` (palabras de
+  `Articulo.nombre`/`descripcion`, una consulta agrupada por pendiente) y se
+  ordenan por Jaccard de trigramas contra la descripción del proveedor.
+
+El índice se arma una vez (`indexar_articulos()`, comando
+`precalcular_sugerencias --reindexar`) y se actualiza al guardar cada Articulo.
+Las sugerencias se precalculan en lote (`precalcular_sugerencias`; tras cada
+importación, la tarea `articulos.precalcular_sugerencias` sólo con los
+ArticuloSinRevisar que creó o cambió) y la página de mapeo sólo las lee
+(`sugerencias_de`).
+
+Ajustes: `ARTICULOS_SUGERENCIAS_MAX` (por pendiente) y
+`ARTICULOS_SUGERENCIAS_MIN` (similitud mínima, 0 a 1).
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+logger = logging.getLogger("articulos.sugerencias_mapeo")
+
+# ArticuloSinRevisar / Articulo por lote
+_LOTE = 200
+# Candidatos por pendiente que se puntúan (los de más palabras en común)
+_CANDIDATOS = 50
+# Palabras demasiado comunes para distinguir artículos
+_VACIAS = frozenset({"con", "para", "del", "los", "las", "por", "sin", "una", "uno", "que", "mas"})
+
+_PALABRA = re.compile(r"\w+")
+
+Sugerencia = Tuple[Any, float, str]
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas y sin acentos/diacríticos."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def terminos(texto: Optional[str]) -> Set[str]:
+    """Palabras indexables: 3+ letras, o 2+ caracteres si tienen dígitos (medidas como "6x40")."""
+    resultado = set()
+    for palabra in _PALABRA.findall(normalizar(texto)):
+        if palabra in _VACIAS:
+            continue
+        if len(palabra) >= 3 or (len(palabra) == 2 and any(c.isdigit() for c in palabra)):
+            resultado.add(palabra[:50])
+    return resultado
+
+
+def trigramas(texto: Optional[str]) -> FrozenSet[str]:
+    """Trigramas por palabra, con relleno como `pg_trgm` ("  ab", " abc", "bc ")."""
+    resultado = set()
+    for palabra in _PALABRA.findall(normalizar(texto)):
+        relleno = f"  {palabra} "
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return frozenset(resultado)
+
+
+def similitud(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard entre dos conjuntos de trigramas."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _limites() -> Tuple[int, float]:
+    return (
+        int(getattr(settings, "ARTICULOS_SUGERENCIAS_MAX", 5)),
+        float(getattr(settings, "ARTICULOS_SUGERENCIAS_MIN", 0.3)),
+    )
+
+
+def indexar_articulos(ids: Optional[Iterable[Any]] = None, using: str = "default") -> int:
+    """(Re)arma los `TerminoArticulo` de los Articulo dados (None = todos). Devuelve cuántos escribió."""
+    Articulo = apps.get_model("articulos", "Articulo")
+    TerminoArticulo = apps.get_model("articulos", "TerminoArticulo")
+    articulos = Articulo.objects.using(using).order_by("id")
+    terminos_qs = TerminoArticulo.objects.using(using)
+    if ids is not None:
+        ids = list(ids)
+        articulos = articulos.filter(id__in=ids)
+        terminos_qs = terminos_qs.filter(articulo_id__in=ids)
+    escritos = 0
+    with transaction.atomic(using=using):
+        terminos_qs.delete()
+        ultimo = 0
+        while True:
+            lote = list(articulos.filter(id__gt=ultimo).values_list("id", "nombre", "descripcion")[:_LOTE * 5])
+            if not lote:
+                break
+            ultimo = lote[-1][0]
+            filas = [
+                TerminoArticulo(termino=termino, articulo_id=pk)
+                for pk, nombre, descripcion in lote
+                for termino in terminos(f"{nombre} {descripcion}")
+            ]
+            TerminoArticulo.objects.using(using).bulk_create(filas, batch_size=1000)
+            escritos += len(filas)
+    return escritos
+
+
+def _candidatos(texto: str, using: str) -> List[Any]:
+    """Ids de Articulo con más palabras en común con `texto` (una consulta agrupada)."""
+    buscadas = terminos(texto)
+    if not buscadas:
+        return []
+    TerminoArticulo = apps.get_model("articulos", "TerminoArticulo")
+    return list(
+        TerminoArticulo.objects.using(using)
+        .filter(termino__in=buscadas)
+        .values("articulo_id")
+        .annotate(coincidencias=Count("id"))
+        .order_by("-coincidencias", "articulo_id")
+        .values_list("articulo_id", flat=True)[:_CANDIDATOS]
+    )
+
+
+def sugerir(pendientes: List[Dict[str, Any]], using: str = "default") -> Dict[Any, List[Sugerencia]]:
+    """Sugerencias `(articulo_id, puntaje, motivo)` por id de pendiente, de mayor a menor puntaje.
+
+    `pendientes`: dicts con "id", "codigo_barras" y "descripcion_proveedor".
+    """
+    Articulo = apps.get_model("articulos", "Articulo")
+    maximo, minimo = _limites()
+
+    codigos = {p["codigo_barras"] for p in pendientes if p.get("codigo_barras")}
+    por_codigo = dict(
+        Articulo.objects.using(using).filter(codigo_barras__in=codigos).values_list("codigo_barras", "id")
+    ) if codigos else {}
+
+    candidatos = {p["id"]: _candidatos(p.get("descripcion_proveedor") or "", using) for p in pendientes}
+    ids = {pk for lista in candidatos.values() for pk in lista}
+    textos = {
+        pk: trigramas(f"{nombre} {descripcion}")
+        for pk, nombre, descripcion in Articulo.objects.using(using).filter(id__in=ids).values_list("id", "nombre", "descripcion")
+    } if ids else {}
+
+    resultado: Dict[Any, List[Sugerencia]] = {}
+    for pendiente in pendientes:
+        sugeridas: List[Sugerencia] = []
+        exacto = por_codigo.get(pendiente.get("codigo_barras"))
+        if exacto is not None:
+            sugeridas.append((exacto, 1.0, "codigo_barras"))
+        propios = trigramas(pendiente.get("descripcion_proveedor"))
+        puntuados = sorted(
+            ((pk, similitud(propios, textos[pk])) for pk in candidatos[pendiente["id"]] if pk in textos and pk != exacto),
+            key=lambda par: (-par[1], par[0]),
+        )
+        sugeridas.extend((pk, round(puntaje, 4), "descripcion") for pk, puntaje in puntuados if puntaje >= minimo)
+        resultado[pendiente["id"]] = sugeridas[:maximo]
+    return resultado
+
+
+def precalcular_sugerencias(asr_ids: Optional[Iterable[Any]] = None, using: str = "default") -> int:
+    """Recalcula y guarda las sugerencias de los pendientes (None = todos). Devuelve cuántas guardó.
+
+    Con `asr_ids` (p.ej. los que creó o cambió una importación) sólo se
+    recalculan esos; en los dos casos se descartan las sugerencias de los que
+    ya no están pendientes.
+    """
+    ArticuloSinRevisar = apps.get_model("articulos", "ArticuloSinRevisar")
+    SugerenciaMapeo = apps.get_model("articulos", "SugerenciaMapeo")
+
+    campos = ("id", "codigo_barras", "descripcion_proveedor")
+    pendientes = ArticuloSinRevisar.objects.using(using).filter(estado="pendiente").order_by("id")
+    SugerenciaMapeo.objects.using(using).filter(~Q(articulo_s_revisar__estado="pendiente")).delete()
+    if asr_ids is None:
+        lotes = _lotes_por_id(pendientes.values(*campos))
+    else:
+        ids = sorted(set(asr_ids))
+        lotes = (
+            (ids[i:i + _LOTE], list(pendientes.filter(id__in=ids[i:i + _LOTE]).values(*campos)))
+            for i in range(0, len(ids), _LOTE)
+        )
+
+    guardadas = 0
+    for ids_lote, lote in lotes:
+        sugeridas = sugerir(lote, using=using) if lote else {}
+        filas = [
+            SugerenciaMapeo(articulo_s_revisar_id=asr_id, articulo_id=articulo_id, puntaje=puntaje, motivo=motivo)
+            for asr_id, lista in sugeridas.items()
+            for articulo_id, puntaje, motivo in lista
+        ]
+        with transaction.atomic(using=using):
+            SugerenciaMapeo.objects.using(using).filter(articulo_s_revisar_id__in=ids_lote).delete()
+            SugerenciaMapeo.objects.using(using).bulk_create(filas)
+        guardadas += len(filas)
+    logger.info("[sugerencias] %s sugerencias precalculadas", guardadas)
+    return guardadas
+
+
+def _lotes_por_id(filas: Any) -> Iterable[Tuple[List[Any], List[Dict[str, Any]]]]:
+    """`(ids, filas)` de a `_LOTE` filas (QuerySet de `.values()` ordenado por id), paginando por id."""
+    ultimo = 0
+    while True:
+        lote = list(filas.filter(id__gt=ultimo)[:_LOTE])
+        if not lote:
+            return
+        ultimo = lote[-1]["id"]
+        yield [fila["id"] for fila in lote], lote
+
+
+def sugerencias_de(asr_id: Any, using: str = "default") -> List[Any]:
+    """Sugerencias guardadas de un pendiente (con su Articulo), de mayor a menor puntaje."""
+    SugerenciaMapeo = apps.get_model("articulos", "SugerenciaMapeo")
+    return list(
+        SugerenciaMapeo.objects.using(using)
+        .filter(articulo_s_revisar_id=asr_id)
+        .select_related("articulo")
+        .order_by("-puntaje", "id")
+    )
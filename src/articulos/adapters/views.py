@@ -8,12 +8,23 @@ mantener el desacople entre Django y la lógica pura de Python.
 from typing import Any, Dict, List
 
 from django.apps import apps
+from django.conf import settings
+from django.http import JsonResponse
 from django.shortcuts import redirect, render
+from django.views.decorators.http import require_GET
 from django.views.generic import ListView
 
-from ..domain.use_cases import BuscarArticuloUseCase, MapearArticuloUseCase
+from ..domain.use_cases import (
+    AutocompletarArticuloUseCase,
+    BuscarArticuloPaginadoUseCase,
+    BuscarArticuloUseCase,
+    BuscarPorCodigoBarrasUseCase,
+    MapearArticuloUseCase,
+    MapearEnBloqueUseCase,
+)
 from .repository import BusquedaRepository, MapeoRepository
-from .forms import MapearArticuloForm, EditArticuloProveedorForm
+from .sugerencias_mapeo import sugerencias_de
+from .forms import MapearArticuloForm, MapearEnBloqueForm, EditArticuloProveedorForm
 
 
 class BuscarArticuloView(ListView):
@@ -23,6 +34,9 @@ class BuscarArticuloView(ListView):
     - template_name: articulos/buscar_articulos.html
     - context_object_name: "resultados"
 
+    Con `?modo=descripcion` busca por palabras de la descripción en lugar de
+    por código. Por código pagina con cursor: `?despues=<siguiente>`.
+
     Los resultados pueden incluir entradas provenientes de:
       - PrecioDeLista
       - ArticuloSinRevisar
@@ -34,14 +48,60 @@ class BuscarArticuloView(ListView):
 
     def get_queryset(self) -> List[Dict[str, Any]]:  # type: ignore[override]
         query = self.request.GET.get("q", "")
-        use_case = BuscarArticuloUseCase(BusquedaRepository())
-        return use_case.execute(query=query)
+        self.pagina: Dict[str, Any] = {}
+        if self._modo() == "descripcion":
+            use_case = BuscarArticuloUseCase(BusquedaRepository())
+            return use_case.execute(query=query, modo="descripcion")
+        # Por código: de a una página, siguiendo el cursor `?despues=` de la anterior
+        self.pagina = BuscarArticuloPaginadoUseCase(BusquedaRepository()).execute(
+            query=query, cursor=self.request.GET.get("despues")
+        )
+        return self.pagina["resultados"]
 
     def get_context_data(self, **kwargs):  # type: ignore[override]
         context = super().get_context_data(**kwargs)
         context["query"] = self.request.GET.get("q", "")
+        context["modo"] = self._modo()
+        pagina = getattr(self, "pagina", {})
+        context["siguiente"] = pagina.get("siguiente")
+        context["total"] = pagina.get("total")
+        context["total_exacto"] = pagina.get("total_exacto", True)
+        context["es_primera_pagina"] = not self.request.GET.get("despues")
         return context
 
+    def _modo(self) -> str:
+        # Por código (por defecto) o por palabras de la descripción
+        return "descripcion" if self.request.GET.get("modo") == "descripcion" else "codigo"
+
+
+@require_GET
+def buscar_por_codigo_barras(request, codigo_barras: str):
+    """
+    Vista JSON para el escaneo en mostrador (tablets en `TABLET_MODE`).
+
+    Devuelve los ArticuloProveedor de todos los proveedores vinculados al
+    código de barras, con sus precios guardados:
+    `{"codigo_barras": str, "resultados": [...]}`; 404 si no hay ninguno.
+    """
+    resultados = BuscarPorCodigoBarrasUseCase(BusquedaRepository()).execute(codigo_barras=codigo_barras)
+    return JsonResponse({"codigo_barras": codigo_barras, "resultados": resultados}, status=200 if resultados else 404)
+
+
+@require_GET
+def autocompletar_articulos(request):
+    """
+    Vista JSON para el autocompletado de Articulo en la página de mapeo.
+
+    `?q=` es un prefijo de código de barras o el inicio de palabras del
+    nombre/descripción; devuelve hasta `ARTICULOS_AUTOCOMPLETAR_LIMITE`
+    resultados: `{"resultados": [{"id", "codigo_barras", "nombre", "descripcion"}]}`.
+    """
+    limite = int(getattr(settings, "ARTICULOS_AUTOCOMPLETAR_LIMITE", 20))
+    resultados = AutocompletarArticuloUseCase(BusquedaRepository()).execute(
+        texto=request.GET.get("q", ""), limite=limite
+    )
+    return JsonResponse({"resultados": resultados})
+
 
 def mapear_articulo(request, pendiente_id: int):
     """
@@ -62,17 +122,19 @@ def mapear_articulo(request, pendiente_id: int):
         ArticuloSinRevisar.objects.select_related("proveedor", "descuento").get(pk=pendiente_id)
     )
 
+    # Sugerencias precalculadas en segundo plano (ver sugerencias_mapeo): sólo se leen
+    sugerencias = sugerencias_de(pendiente.id)
+
     if request.method == "POST":
         # Integración con forms: validar datos del POST con MapearArticuloForm
         form = MapearArticuloForm(request.POST)
         if form.is_valid():
             codigo_barras = (form.cleaned_data.get("codigo_barras") or "").strip()
             descripcion = (form.cleaned_data.get("descripcion") or "").strip() or pendiente.descripcion_proveedor
-            articulo_id = (form.cleaned_data.get("articulo_id") or "").strip()
 
-            # Usar artículo existente si se seleccionó
-            if articulo_id:
-                art = Articulo.objects.get(pk=articulo_id)
+            # Usar artículo existente si se eligió (ya leído al validar el formulario)
+            if form.articulo_elegido is not None:
+                art = form.articulo_elegido
             else:
                 # Crear o actualizar Articulo en base de negocio
                 if codigo_barras:
@@ -130,9 +192,16 @@ def mapear_articulo(request, pendiente_id: int):
     # GET: mostrar plantilla con datos del pendiente y sugerencia de descripción
     # GET: inicializar formulario con descripción sugerida; en POST, reutilizar form si existe
     if request.method == "GET":
-        form = MapearArticuloForm(initial={"descripcion": pendiente.descripcion_proveedor})
+        inicial = {"descripcion": pendiente.descripcion_proveedor}
+        elegido = None
+        if sugerencias:
+            # Preseleccionar la mejor sugerencia
+            elegido = sugerencias[0].articulo
+            inicial.update(articulo_id=str(elegido.id), codigo_barras=elegido.codigo_barras)
+        form = MapearArticuloForm(initial=inicial)
     else:
         form = locals().get("form") or MapearArticuloForm()
+        elegido = getattr(form, "articulo_elegido", None)
 
     contexto = {
         "pendiente": pendiente,
@@ -142,10 +211,34 @@ def mapear_articulo(request, pendiente_id: int):
         "Articulo": apps.get_model("articulos", "Articulo"),
         # Proveer el formulario para renderizado/errores
         "form": form,
+        "sugerencias": sugerencias,
+        # Articulo existente elegido (etiqueta del autocompletado)
+        "articulo_elegido": elegido,
     }
     return render(request, "articulos/mapear_articulo.html", contexto)
 
 
+def mapear_en_bloque(request):
+    """
+    Vista de función para mapear muchos ArticuloSinRevisar de una vez.
+
+    Flujo:
+    - GET: muestra el formulario (pares pegados o archivo CSV).
+    - POST: valida con MapearEnBloqueForm y ejecuta MapearEnBloqueUseCase en
+      una sola operación; vuelve a mostrar el formulario con el resumen
+      (mapeados, artículos creados y pares rechazados con su motivo).
+    """
+    resultado = None
+    if request.method == "POST":
+        form = MapearEnBloqueForm(request.POST, request.FILES)
+        if form.is_valid():
+            resultado = MapearEnBloqueUseCase(MapeoRepository()).execute(form.cleaned_data["pares"])
+            form = MapearEnBloqueForm()
+    else:
+        form = MapearEnBloqueForm()
+    return render(request, "articulos/mapear_en_bloque.html", {"form": form, "resultado": resultado})
+
+
 def editar_articulo_proveedor(request, ap_id: int):
     """
     Edita campos de ArticuloProveedor y su PrecioDeLista relacionado:
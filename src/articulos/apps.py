@@ -9,3 +9,5 @@ class ArticulosConfig(AppConfig):
         # Asegura el registro de modelos ubicados en adapters
         from . import adapters  # noqa: F401
         from .adapters import models as _models  # noqa: F401
+        # Conectar señales que mantienen PrecioCalculado
+        import articulos.signals  # noqa: F401
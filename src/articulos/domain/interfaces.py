@@ -79,6 +79,93 @@ class BuscarArticuloPort:
         """
         raise NotImplementedError
 
+    def buscar_pagina(
+        self,
+        query: str,
+        abreviatura: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limite: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Busca artículos por código, de a una página ordenada por (código, id).
+
+        Parametros:
+        - query / abreviatura: como en `buscar_articulos`.
+        - cursor: Valor opaco `siguiente` de la página anterior (None = primera página).
+        - limite: Resultados por página.
+
+        Retorna:
+        - {"resultados": [...], "siguiente": str | None, "total": int, "total_exacto": bool}
+          donde `total` es exacto hasta un tope y, por encima, una estimación.
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
+
+    def buscar_por_codigo_barras(self, codigo_barras: str) -> List[Dict[str, Any]]:
+        """
+        Busca por código de barras exacto (de Articulo o ArticuloSinRevisar).
+
+        Parametros:
+        - codigo_barras: Código leído por el escáner.
+
+        Retorna:
+        - Los ArticuloProveedor vinculados (uno por proveedor), con la misma
+          forma que `buscar_articulos`; lista vacía si no hay ninguno.
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
+
+    def buscar_por_descripcion(
+        self,
+        texto: str,
+        abreviatura: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca artículos por palabras de la descripción del proveedor.
+
+        Parametros:
+        - texto: Palabras a buscar (todas deben aparecer, como inicio de palabra).
+        - abreviatura: Abreviatura de proveedor (opcional) para restringir búsqueda.
+
+        Retorna:
+        - Lista de resultados con la misma forma que `buscar_articulos`,
+          ordenada por relevancia.
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
+
+    def autocompletar_articulos(self, texto: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Articulo para el autocompletado de la página de mapeo.
+
+        Parametros:
+        - texto: Prefijo de código de barras o inicio de palabras del nombre/descripción.
+        - limite: Máximo de resultados.
+
+        Retorna:
+        - Lista de {"id", "codigo_barras", "nombre", "descripcion"}, primero los
+          que coinciden por código de barras.
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
+
+    def version_busqueda(self) -> str:
+        """
+        Versión opaca de los datos que devuelve la búsqueda.
+
+        Retorna:
+        - Cadena que cambia cuando cambia algún resultado posible (artículos
+          agregados o borrados, precios recalculados). Sirve de validador
+          (ETag) para no repetir una búsqueda cuyos datos no cambiaron.
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
+
 
 class MapearArticuloPort:
     """
@@ -109,3 +196,19 @@ class MapearArticuloPort:
         Debe lanzar NotImplementedError en la interfaz.
         """
         raise NotImplementedError
+
+    def mapear_en_bloque(self, pares: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mapea muchos ArticuloSinRevisar en una sola operación.
+
+        Parametros:
+        - pares: Lista de {"articulo_s_revisar_id", "articulo_id", "codigo_barras"}
+          con uno solo de `articulo_id` (Articulo existente) o `codigo_barras`
+          (Articulo existente con ese código, o uno nuevo).
+
+        Retorna:
+        - {"mapeados": int, "articulos_creados": int, "errores": [par + {"error": str}]}
+
+        Debe lanzar NotImplementedError en la interfaz.
+        """
+        raise NotImplementedError
@@ -1,5 +1,5 @@
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
 
 
 def _to_dec(val: Any) -> Decimal:
@@ -131,3 +131,163 @@ def calculate_prices(
     })
 
     return result
+
+
+# Claves de importes (Decimal redondeado) en el resultado de `calculate_prices`
+_MONEY_KEYS = ("base", "final", "final_efectivo", "bulto", "final_bulto", "final_bulto_efectivo")
+
+# Por encima de este importe (en centavos) no se usa float64: se calcula con Decimal
+_MAX_CENTS_FLOAT = 1e13
+
+
+def calculate_prices_batch(
+    *,
+    precios_de_lista: Sequence[Any],
+    ivas: Sequence[Any],
+    bultos: Sequence[Any],
+    dividir: Sequence[bool],
+    proveedor_desc_com: Any,
+    proveedor_margen: Any,
+    proveedor_margen_ef: Any,
+    descuento_general: Any,
+    descuento_activo: bool,
+    descuento_bulto: Any,
+    descuento_cantidad_bulto: Any,
+    cantidad: Any = 1,
+    debug: bool = False,
+) -> Dict[str, List[Any]]:
+    """
+    `calculate_prices` para muchos artículos que comparten proveedor y descuento.
+
+    Recibe una secuencia por artículo (precio de lista, IVA, bulto, dividir) y
+    devuelve un dict con las mismas claves que `calculate_prices`, cada una con
+    la lista de valores en el orden de entrada. Los parámetros compartidos se
+    convierten una sola vez.
+
+    Los importes se calculan con NumPy (float64) y se redondean HALF_UP al
+    centavo; una fila cuyo valor en centavos queda tan cerca de ,5 que el error
+    de float podría cambiar el redondeo (o que es demasiado grande) se recalcula
+    con `calculate_prices`, así el resultado es idéntico al de la versión Decimal.
+    Sin NumPy se usa `calculate_prices` para todas las filas.
+    """
+    n = len(precios_de_lista)
+    if not (len(ivas) == len(bultos) == len(dividir) == n):
+        raise ValueError("precios_de_lista, ivas, bultos y dividir deben tener el mismo largo")
+
+    def _decimal(i: int) -> Dict[str, Any]:
+        return calculate_prices(
+            precio_de_lista=precios_de_lista[i],
+            iva=ivas[i],
+            proveedor_desc_com=proveedor_desc_com,
+            proveedor_margen=proveedor_margen,
+            proveedor_margen_ef=proveedor_margen_ef,
+            descuento_general=descuento_general,
+            descuento_activo=descuento_activo,
+            descuento_bulto=descuento_bulto,
+            descuento_cantidad_bulto=descuento_cantidad_bulto,
+            bulto_articulo=bultos[i],
+            cantidad=cantidad,
+            dividir=dividir[i],
+            debug=debug,
+        )
+
+    try:
+        import numpy as np  # type: ignore
+    except ImportError:  # pragma: no cover - NumPy viene con pandas
+        np = None
+    if np is None or n == 0:
+        filas = [_decimal(i) for i in range(n)]
+        return {k: [f[k] for f in filas] for k in (filas[0] if filas else _keys_vacias())}
+
+    # Contexto compartido (igual que en calculate_prices)
+    desc_com = _to_dec(proveedor_desc_com)
+    margen = _to_dec(proveedor_margen)
+    margen_ef = _to_dec(proveedor_margen_ef)
+    gen = _to_dec(descuento_general) if descuento_activo else Decimal("0")
+    qty = _to_dec(cantidad)
+    threshold = int(_to_dec(descuento_cantidad_bulto)) if descuento_cantidad_bulto is not None else 1
+    bulk_percent = _to_dec(descuento_bulto) if descuento_bulto is not None else Decimal("0")
+    gen_factor = _normalize_factor_or_percent(gen) if descuento_activo and gen > 0 else Decimal("0")
+
+    # Columnas por artículo
+    bulto_dec = [_to_dec(b) or Decimal("1") for b in bultos]
+    precio = np.array([_to_float(p) for p in precios_de_lista], dtype=np.float64)
+    iva = np.array([_to_float(v) for v in ivas], dtype=np.float64)
+    bulto = np.array([float(b) for b in bulto_dec], dtype=np.float64)
+    bulto_qty = np.array([int(b) for b in bulto_dec], dtype=np.int64)
+    divide = np.array([bool(d) for d in dividir]) & (bulto > 0)
+
+    has_bulk = bulk_percent > Decimal("0")
+    no_threshold = (threshold is None) or (threshold <= 1)
+    apply_bulk = has_bulk & (no_threshold | (qty >= threshold) | (bulto_qty >= threshold))
+    factor_bulto = np.where(apply_bulk, 1.0 - float(bulk_percent) / 100.0, 1.0)
+
+    base = np.where(divide, precio / bulto, precio) * (1.0 + iva) * (1.0 - float(desc_com))
+    final_unit = base * float(margen) * (1.0 - float(gen_factor))
+    importes = {
+        "base": base,
+        "final": final_unit,
+        "final_efectivo": final_unit * float(margen_ef),
+        "bulto": base * bulto_qty,
+        "final_bulto": final_unit * bulto_qty * factor_bulto,
+        "final_bulto_efectivo": (final_unit * float(margen_ef)) * bulto_qty * factor_bulto,
+    }
+
+    # Redondeo HALF_UP en centavos y filas dudosas (cerca de ,5 o fuera de rango)
+    dudosas = np.zeros(n, dtype=bool)
+    centavos = {}
+    for k, v in importes.items():
+        c = np.abs(v) * 100.0
+        frac = c - np.floor(c)
+        tolerancia = c * 1e-12 + 1e-9
+        dudosas |= (np.abs(frac - 0.5) <= tolerancia) | ~np.isfinite(c) | (c >= _MAX_CENTS_FLOAT)
+        centavos[k] = np.sign(v) * np.floor(c + 0.5)
+
+    factor_bulto_dec = [
+        (Decimal("1") - (bulk_percent / Decimal("100"))) if a else Decimal("1") for a in apply_bulk.tolist()
+    ]
+    result: Dict[str, List[Any]] = {
+        k: [Decimal(int(x)).scaleb(-2) for x in np.where(dudosas, 0, c).tolist()] for k, c in centavos.items()
+    }
+    result.update({
+        "cantidad_bulto_aplicada": [int(qty or 0)] * n,
+        "cantidad_bulto_articulo": [int(b) for b in bulto_dec],
+        "umbral_descuento_bulto": [int(threshold or 0)] * n,
+        "debug_descuento_bulto": [float(bulk_percent)] * n,
+        "debug_factor_descuento_bulto": [float(f) for f in factor_bulto_dec],
+        "debug_bulto_articulo": [int(b) for b in bulto_dec],
+        "debug_cantidad": [float(qty)] * n,
+        "debug_cantidad_bulto_politica": [int(threshold or 0)] * n,
+        "debug_aplica_descuento_bulto": [bool(a) for a in apply_bulk.tolist()],
+        "debug_min_qty": [int(threshold or 0)] * n,
+        "debug_applied_qty": [float(qty)] * n,
+    })
+    for i in np.flatnonzero(dudosas).tolist():
+        fila = _decimal(i)
+        for k in _MONEY_KEYS:
+            result[k][i] = fila[k]
+    return result
+
+
+def _to_float(val: Any) -> float:
+    if isinstance(val, (Decimal, int, float)) and not isinstance(val, bool):
+        return float(val)
+    return float(_to_dec(val))
+
+
+def _keys_vacias() -> Dict[str, Any]:
+    """Claves del resultado (para lotes vacíos)."""
+    return calculate_prices(
+        precio_de_lista=0,
+        iva=0,
+        proveedor_desc_com=0,
+        proveedor_margen=1,
+        proveedor_margen_ef=1,
+        descuento_general=0,
+        descuento_activo=False,
+        descuento_bulto=0,
+        descuento_cantidad_bulto=1,
+        bulto_articulo=1,
+        cantidad=1,
+        dividir=False,
+    )
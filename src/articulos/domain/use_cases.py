@@ -7,7 +7,7 @@ Estos casos de uso son Python puro y delegan la interacción a puertos
 dependencias ni lógica específica de Django.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from .interfaces import (
     CalcularPrecioPort,
@@ -61,19 +61,29 @@ class CalcularPrecioUseCase:
 
 class BuscarArticuloUseCase:
     """
-    Caso de uso para buscar artículos por código y/o abreviatura.
+    Caso de uso para buscar artículos por código y/o abreviatura, o por
+    palabras de la descripción (`modo="descripcion"`).
 
     Delegará la consulta al puerto `BuscarArticuloPort`.
     """
 
+    MODOS = ("codigo", "descripcion")
+
     def __init__(self, busqueda_repo: BuscarArticuloPort) -> None:
         self._busqueda_repo = busqueda_repo
 
-    def execute(self, query: str, abreviatura: Optional[str] = None) -> List[Dict[str, Any]]:
+    def execute(self, query: str, abreviatura: Optional[str] = None, modo: str = "codigo") -> List[Dict[str, Any]]:
         """
         Delegar la búsqueda al repositorio/puerto.
         """
         q = (query or "").strip()
+        if modo not in self.MODOS:
+            raise ValueError("modo inválido: use 'codigo' o 'descripcion'")
+        if modo == "descripcion":
+            # Sin palabras no hay nada que buscar (la abreviatura sola no alcanza)
+            if not q:
+                return []
+            return self._busqueda_repo.buscar_por_descripcion(texto=q, abreviatura=abreviatura) or []
         # Rama de retorno cuando no hay datos de entrada
         if not q and not abreviatura:
             return []
@@ -81,6 +91,88 @@ class BuscarArticuloUseCase:
         # Rama alternativa si el repositorio devuelve vacío
         return resultado or []
 
+    def version(self) -> str:
+        """
+        Versión de los datos de búsqueda (ver `BuscarArticuloPort.version_busqueda`).
+        """
+        return self._busqueda_repo.version_busqueda()
+
+
+class BuscarArticuloPaginadoUseCase:
+    """
+    Caso de uso para buscar artículos por código de a una página.
+
+    La paginación es por cursor: cada página devuelve `siguiente`, que se pasa
+    tal cual para pedir la próxima. Delegará la consulta al puerto `BuscarArticuloPort`.
+    """
+
+    def __init__(self, busqueda_repo: BuscarArticuloPort, por_pagina: int = 50) -> None:
+        self._busqueda_repo = busqueda_repo
+        self._por_pagina = por_pagina
+
+    def execute(self, query: str, abreviatura: Optional[str] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Delegar la búsqueda de la página al repositorio/puerto.
+        """
+        q = (query or "").strip()
+        vacia: Dict[str, Any] = {"resultados": [], "siguiente": None, "total": 0, "total_exacto": True}
+        # Rama de retorno cuando no hay datos de entrada
+        if not q and not abreviatura:
+            return vacia
+        pagina = self._busqueda_repo.buscar_pagina(
+            query=q, abreviatura=abreviatura, cursor=cursor or None, limite=self._por_pagina
+        )
+        return {**vacia, **(pagina or {})}
+
+
+class BuscarPorCodigoBarrasUseCase:
+    """
+    Caso de uso para resolver un código de barras escaneado a sus artículos
+    de proveedor con precios.
+
+    Delegará la consulta al puerto `BuscarArticuloPort`.
+    """
+
+    # Largo máximo de `codigo_barras` en los modelos
+    LARGO_MAXIMO = 50
+
+    def __init__(self, busqueda_repo: BuscarArticuloPort) -> None:
+        self._busqueda_repo = busqueda_repo
+
+    def execute(self, codigo_barras: str) -> List[Dict[str, Any]]:
+        """
+        Delegar la búsqueda exacta al repositorio/puerto.
+        """
+        codigo = (codigo_barras or "").strip()
+        # Lecturas vacías o imposibles (ruido del escáner) no llegan a la base
+        if not codigo or len(codigo) > self.LARGO_MAXIMO:
+            return []
+        return self._busqueda_repo.buscar_por_codigo_barras(codigo_barras=codigo) or []
+
+
+class AutocompletarArticuloUseCase:
+    """
+    Caso de uso para el autocompletado de Articulo al mapear un pendiente.
+
+    Delegará la consulta al puerto `BuscarArticuloPort`.
+    """
+
+    # Menos caracteres coinciden con demasiados artículos para ser útiles
+    LARGO_MINIMO = 2
+    LARGO_MAXIMO = 50
+
+    def __init__(self, busqueda_repo: BuscarArticuloPort) -> None:
+        self._busqueda_repo = busqueda_repo
+
+    def execute(self, texto: str, limite: int = 20) -> List[Dict[str, Any]]:
+        """
+        Delegar la búsqueda por prefijo al repositorio/puerto.
+        """
+        texto = (texto or "").strip()
+        if not self.LARGO_MINIMO <= len(texto) <= self.LARGO_MAXIMO:
+            return []
+        return self._busqueda_repo.autocompletar_articulos(texto=texto, limite=max(1, limite)) or []
+
 
 class MapearArticuloUseCase:
     """
@@ -108,4 +200,49 @@ class MapearArticuloUseCase:
             articulo_id=articulo_id,
             usuario_id=usuario_id,
         )
-        return resultado or {}
\ No newline at end of file
+        return resultado or {}
+
+
+class MapearEnBloqueUseCase:
+    """
+    Caso de uso para mapear muchos ArticuloSinRevisar de una vez (lista pegada o CSV).
+
+    Cada par indica el ASR y su destino: `articulo_id` (Articulo existente) o
+    `codigo_barras` (Articulo con ese código, que se crea si falta). Delegará
+    los pares válidos al puerto `MapearArticuloPort` en una sola operación.
+    """
+
+    def __init__(self, mapeo_repo: MapearArticuloPort) -> None:
+        self._mapeo_repo = mapeo_repo
+
+    def execute(self, pares: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validar los pares y delegar los válidos al repositorio/puerto.
+
+        Retorna {"mapeados": int, "articulos_creados": int, "errores": [...]};
+        los pares inválidos vuelven en `errores` junto con los que rechace el repositorio.
+        """
+        validos: List[Dict[str, Any]] = []
+        errores: List[Dict[str, Any]] = []
+        vistos = set()
+        for par in pares:
+            asr_id = par.get("articulo_s_revisar_id")
+            articulo_id = par.get("articulo_id")
+            articulo_id = None if articulo_id in (None, "") else articulo_id
+            codigo_barras = (par.get("codigo_barras") or "").strip() or None
+            if asr_id in (None, ""):
+                errores.append({**par, "error": "articulo_s_revisar_id es obligatorio"})
+            elif (articulo_id is None) == (codigo_barras is None):
+                errores.append({**par, "error": "indicar articulo_id o codigo_barras (uno solo)"})
+            elif asr_id in vistos:
+                errores.append({**par, "error": "ArticuloSinRevisar repetido"})
+            else:
+                vistos.add(asr_id)
+                validos.append(
+                    {"articulo_s_revisar_id": asr_id, "articulo_id": articulo_id, "codigo_barras": codigo_barras}
+                )
+        resultado: Dict[str, Any] = {"mapeados": 0, "articulos_creados": 0, "errores": []}
+        if validos:
+            resultado.update(self._mapeo_repo.mapear_en_bloque(validos) or {})
+        resultado["errores"] = errores + list(resultado.get("errores") or [])
+        return resultado
@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Deja un único ArticuloProveedor por PrecioDeLista en toda la tabla (conserva el de menor id). "
+        "El mapeo ya consolida lo que toca; sirve para datos viejos o cargados por fuera."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="negocio_db", help="Alias de base de datos (negocio_db).")
+
+    def handle(self, *args: Any, **options: Any):
+        from django.db import transaction
+
+        from articulos.adapters.repository import consolidar_por_precio_de_lista
+
+        alias = options["database"]
+        with transaction.atomic(using=alias):
+            borrados = consolidar_por_precio_de_lista(using=alias)
+        self.stdout.write(self.style.SUCCESS(f"ArticuloProveedor duplicados eliminados: {borrados}"))
@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea (si falta) y vuelve a poblar el índice de búsqueda por descripción de ArticuloProveedor. "
+        "Lo mantienen triggers/índices de la base; sirve tras restaurar datos o cargas hechas por fuera."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Alias de base de datos (default).")
+
+    def handle(self, *args: Any, **options: Any):
+        from articulos.adapters.indice_descripciones import asegurar_indice, reconstruir_indice
+
+        alias = options["database"]
+        if not asegurar_indice(alias):
+            self.stdout.write(self.style.WARNING("El motor de base de datos no tiene índice de texto; se usa icontains."))
+            return
+        reconstruir_indice(alias)
+        self.stdout.write(self.style.SUCCESS("Índice de descripciones reconstruido."))
@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalcula las sugerencias de mapeo (Articulo candidatos) de los ArticuloSinRevisar pendientes. "
+        "Con --reindexar arma antes el índice de palabras de Articulo (necesario una vez; luego lo mantienen las señales)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reindexar", action="store_true", help="Rearmar el índice de palabras de todos los Articulo.")
+        parser.add_argument("--database", default="default", help="Alias de base de datos (default).")
+
+    def handle(self, *args: Any, **options: Any):
+        from articulos.adapters.sugerencias_mapeo import indexar_articulos, precalcular_sugerencias
+
+        alias = options["database"]
+        if options.get("reindexar"):
+            terminos = indexar_articulos(using=alias)
+            self.stdout.write(f"Términos indexados: {terminos}")
+        guardadas = precalcular_sugerencias(using=alias)
+        self.stdout.write(self.style.SUCCESS(f"Sugerencias precalculadas: {guardadas}"))
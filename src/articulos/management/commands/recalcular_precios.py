@@ -0,0 +1,31 @@
+from typing import Any
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula PrecioCalculado (precios guardados que usa la búsqueda). "
+        "Necesario una vez tras crear la tabla; luego lo mantienen las señales y la importación."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--proveedor", type=int, default=None, help="Sólo los ArticuloProveedor de este proveedor (id).")
+        parser.add_argument(
+            "--faltantes",
+            action="store_true",
+            help="Sólo los ArticuloProveedor que todavía no tienen PrecioCalculado.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        from articulos.adapters.precios_calculados import recalcular_precios
+
+        ArticuloProveedor = apps.get_model("articulos", "ArticuloProveedor")
+        qs = ArticuloProveedor.objects.all()
+        if options.get("proveedor"):
+            qs = qs.filter(proveedor_id=options["proveedor"])
+        if options.get("faltantes"):
+            qs = qs.filter(precio_calculado__isnull=True)
+        escritos = recalcular_precios(qs)
+        self.stdout.write(self.style.SUCCESS(f"PrecioCalculado recalculados: {len(escritos)}"))
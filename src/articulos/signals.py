@@ -0,0 +1,169 @@
+"""
+Señales de la app `articulos`.
+
+Mantienen `PrecioCalculado` al día cuando cambia algo que interviene en el
+cálculo de precios de un ArticuloProveedor:
+
+- ArticuloProveedor: el propio AP.
+- PrecioDeLista (iva, bulto): los AP de esa lista.
+- Articulo / ArticuloSinRevisar (descuento): sus AP.
+- Proveedor (descuento comercial y márgenes): sus AP, sólo si esos campos cambiaron.
+- Descuento: los AP que lo usan directamente o a través de su artículo; si es
+  "Sin Descuento", también los AP sin descuento propio (caen en el default).
+
+Las escrituras masivas (bulk_create/bulk_update/update) no disparan señales:
+quien las hace llama a `recalcular_precios` / `programar_recalculo`.
+
+Un código de barras nuevo o cambiado vacía el LRU de búsquedas por código de
+barras (`adapters.cache_barras`). Además, tras migrar la app se crea el índice de búsqueda por descripción
+(`adapters.indice_descripciones`), y al guardar un Articulo se actualizan sus
+palabras en el índice de sugerencias de mapeo (`adapters.sugerencias_mapeo`).
+"""
+
+import logging
+
+
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from articulos.adapters import cache_barras
+from articulos.adapters.indice_descripciones import asegurar_indice
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.precios_calculados import aps_a_recalcular, programar_recalculo
+from articulos.adapters.sugerencias_mapeo import indexar_articulos
+from precios.adapters.models import Descuento, PrecioDeLista
+from proveedores.adapters.models import Proveedor
+
+_CAMPOS_PROVEEDOR = ("descuento_comercial", "margen_ganancia", "margen_ganancia_efectivo")
+_CAMPOS_DESCUENTO = ("tipo", "general", "bulto", "cantidad_bulto", "temporal", "desde", "hasta")
+_CAMPOS_PRECIO_DE_LISTA = ("iva", "bulto")
+_CAMPOS_ARTICULO = ("descuento",)
+_CAMPOS_TEXTO_ARTICULO = ("nombre", "descripcion")
+
+logger = logging.getLogger("articulos.signals")
+
+
+def _toca(update_fields, campos) -> bool:
+    """False si el save() declara update_fields y ninguno participa del cálculo."""
+    return update_fields is None or bool(set(update_fields) & set(campos))
+
+
+def _guardar_previos(sender, instance, using, update_fields, campos) -> None:
+    instance._precios_previos = None
+    if instance.pk is None or not _toca(update_fields, campos):
+        return
+    instance._precios_previos = (
+        sender._base_manager.using(using).filter(pk=instance.pk).values_list(*campos).first()
+    )
+
+
+def _cambio(instance, campos) -> bool:
+    previos = getattr(instance, "_precios_previos", None)
+    return previos is None or previos != tuple(getattr(instance, c) for c in campos)
+
+
+def _filtros_descuento(descuento) -> dict:
+    filtros = {
+        "descuento_id": [descuento.pk],
+        "articulo__descuento_id": [descuento.pk],
+        "articulo_s_revisar__descuento_id": [descuento.pk],
+    }
+    if descuento.tipo == "Sin Descuento":
+        filtros["descuento_id"].append(None)
+    return filtros
+
+
+@receiver(post_save, sender=ArticuloProveedor)
+def recalcular_ap(sender, instance, raw=False, **kwargs):
+    if not raw:
+        programar_recalculo(id=[instance.pk])
+
+
+@receiver(post_save, sender=PrecioDeLista)
+def recalcular_por_precio_de_lista(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and not created and _toca(update_fields, _CAMPOS_PRECIO_DE_LISTA):
+        programar_recalculo(precio_de_lista_id=[instance.pk])
+
+
+@receiver(post_save, sender=Articulo)
+def recalcular_por_articulo(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and not created and _toca(update_fields, _CAMPOS_ARTICULO):
+        programar_recalculo(articulo_id=[instance.pk])
+
+
+@receiver(post_save, sender=ArticuloSinRevisar)
+def recalcular_por_articulo_sin_revisar(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and not created and _toca(update_fields, _CAMPOS_ARTICULO):
+        programar_recalculo(articulo_s_revisar_id=[instance.pk])
+
+
+@receiver(post_save, sender=Articulo)
+@receiver(post_save, sender=ArticuloSinRevisar)
+@receiver(post_delete, sender=Articulo)
+@receiver(post_delete, sender=ArticuloSinRevisar)
+def limpiar_busquedas_por_barras(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _toca(update_fields, ("codigo_barras",)):
+        cache_barras.limpiar()
+
+
+@receiver(post_save, sender=Articulo)
+def indexar_articulo_para_sugerencias(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw and _toca(update_fields, _CAMPOS_TEXTO_ARTICULO):
+        indexar_articulos([instance.pk], using=using or "default")
+
+
+@receiver(pre_save, sender=Proveedor)
+def guardar_margenes_previos(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw:
+        _guardar_previos(sender, instance, using, update_fields, _CAMPOS_PROVEEDOR)
+
+
+@receiver(post_save, sender=Proveedor)
+def recalcular_por_proveedor(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or created or not _toca(update_fields, _CAMPOS_PROVEEDOR):
+        return
+    if _cambio(instance, _CAMPOS_PROVEEDOR):
+        programar_recalculo(proveedor_id=[instance.pk])
+
+
+@receiver(pre_save, sender=Descuento)
+def guardar_descuento_previo(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if not raw:
+        _guardar_previos(sender, instance, using, update_fields, _CAMPOS_DESCUENTO)
+
+
+@receiver(post_save, sender=Descuento)
+def recalcular_por_descuento(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw or not _toca(update_fields, _CAMPOS_DESCUENTO):
+        return
+    if created:
+        # Uno nuevo sólo afecta a quienes caían en el "Sin Descuento" por defecto (no persistido)
+        if instance.tipo == "Sin Descuento":
+            programar_recalculo(descuento_id=[None])
+        return
+    if _cambio(instance, _CAMPOS_DESCUENTO):
+        programar_recalculo(**_filtros_descuento(instance))
+
+
+@receiver(pre_delete, sender=Descuento)
+def guardar_afectados_por_descuento(sender, instance, **kwargs):
+    # Después del borrado los FK ya quedaron en NULL: se resuelven los AP antes
+    instance._precios_afectados = aps_a_recalcular(**_filtros_descuento(instance))
+
+
+@receiver(post_delete, sender=Descuento)
+def recalcular_por_descuento_borrado(sender, instance, **kwargs):
+    afectados = getattr(instance, "_precios_afectados", None)
+    if afectados:
+        programar_recalculo(id=afectados)
+
+
+@receiver(post_migrate)
+def crear_indice_descripciones(sender, using="default", **kwargs):
+    if getattr(sender, "name", None) != "articulos":
+        return
+    try:
+        asegurar_indice(using)
+    except Exception:
+        # Sin índice la búsqueda por descripción cae a icontains; no frenar la migración
+        logger.exception("[busqueda] No se pudo crear el índice de descripciones en %s", using)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from celery import shared_task
+
+
+@shared_task(bind=True, name="articulos.precalcular_sugerencias")
+def precalcular_sugerencias_task(self, asr_ids=None):
+    """Precalcula las sugerencias de mapeo de los ArticuloSinRevisar pendientes (`asr_ids`: sólo esos).
+
+    La página de mapeo sólo lee lo guardado; ver `articulos.adapters.sugerencias_mapeo`.
+    """
+    from articulos.adapters.sugerencias_mapeo import precalcular_sugerencias
+
+    return {"sugerencias": precalcular_sugerencias(asr_ids)}
@@ -0,0 +1,90 @@
+from contextlib import ExitStack
+from decimal import Decimal
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from articulos.adapters.models import ArticuloProveedor, ArticuloSinRevisar
+from precios.adapters.models import Descuento, PrecioDeLista
+from proveedores.adapters.models import Proveedor
+
+
+@pytest.fixture
+def crear_proveedor():
+    """Fábrica de Proveedor (con el Descuento "Sin Descuento" creado).
+
+    `crear_proveedor(abreviatura="PP", **campos)`: `nombre` por defecto
+    `f"Prov {abreviatura}"` y `margen_ganancia` 1.40.
+    """
+
+    def _crear(abreviatura="PP", **campos):
+        Descuento.objects.get_or_create(tipo="Sin Descuento")
+        campos.setdefault("nombre", f"Prov {abreviatura}")
+        campos.setdefault("margen_ganancia", Decimal("1.40"))
+        return Proveedor.objects.create(abreviatura=abreviatura, **campos)
+
+    return _crear
+
+
+@pytest.fixture
+def crear_asr():
+    """Fábrica de ArticuloSinRevisar pendientes.
+
+    `crear_asr(prov, codigo, descripcion=f"Item {codigo}", precio=100, **campos)`.
+    """
+
+    def _crear(prov, codigo, descripcion=None, precio=100, **campos):
+        campos.setdefault("estado", "pendiente")
+        return ArticuloSinRevisar.objects.create(
+            proveedor=prov, codigo_proveedor=codigo, descripcion_proveedor=descripcion or f"Item {codigo}",
+            precio=precio, **campos,
+        )
+
+    return _crear
+
+
+@pytest.fixture
+def crear_ap(crear_asr):
+    """Fábrica de ArticuloProveedor con su PrecioDeLista.
+
+    `crear_ap(prov, codigo, descripcion=f"Item {codigo}", precio=100, ...)`:
+
+    - `bulto`, `iva`: del PrecioDeLista.
+    - `articulo`: mapeado a ese Articulo; si no, vinculado a `asr` o a un
+      ArticuloSinRevisar pendiente nuevo (con `codigo_barras`).
+    - `descuento`, `dividir`: del ArticuloProveedor.
+    """
+
+    def _crear(
+        prov, codigo, descripcion=None, precio=100, bulto=1, iva=Decimal("0.21"), codigo_barras=None,
+        articulo=None, asr=None, descuento=None, dividir=False,
+    ):
+        descripcion = descripcion or f"Item {codigo}"
+        pl = PrecioDeLista.objects.create(
+            proveedor=prov, codigo=codigo, descripcion=descripcion, precio=precio, bulto=bulto, iva=iva
+        )
+        if articulo is None and asr is None:
+            asr = crear_asr(prov, codigo, descripcion, precio, codigo_barras=codigo_barras)
+        return ArticuloProveedor.objects.create(
+            articulo=articulo, articulo_s_revisar=asr, proveedor=prov, precio_de_lista=pl, codigo_proveedor=codigo,
+            descripcion_proveedor=descripcion, precio=precio, stock=0, descuento=descuento, dividir=dividir,
+        )
+
+    return _crear
+
+
+@pytest.fixture
+def consultas():
+    """`consultas(funcion, *alias)` -> (consultas de `funcion()` en esas conexiones, su resultado).
+
+    Sin `alias` se captura "default".
+    """
+
+    def _capturar(funcion, *alias):
+        with ExitStack() as pila:
+            contextos = [pila.enter_context(CaptureQueriesContext(connections[a])) for a in alias or ("default",)]
+            resultado = funcion()
+        return [q for ctx in contextos for q in ctx.captured_queries], resultado
+
+    return _capturar
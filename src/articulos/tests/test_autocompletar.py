@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articulos.adapters.forms import MapearArticuloForm
+from articulos.adapters.models import Articulo, ArticuloSinRevisar
+from articulos.adapters.repository import BusquedaRepository
+from articulos.domain.use_cases import AutocompletarArticuloUseCase
+from precios.adapters.models import Descuento
+from proveedores.adapters.models import Proveedor
+
+# El autocompletado lee por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+URL = reverse("articulos:autocompletar_articulos")
+
+
+def _ids(resp):
+    return [r["id"] for r in resp.json()["resultados"]]
+
+
+def test_por_prefijo_de_codigo_y_por_palabras(client):
+    llave = Articulo.objects.create(codigo_barras="7790001", nombre="Llave francesa", descripcion="8 pulgadas")
+    tornillo = Articulo.objects.create(codigo_barras="7790002", nombre="Tornillo", descripcion="Galvanizado 6x40")
+    otro = Articulo.objects.create(codigo_barras="8800001", nombre="Tornillo", descripcion="Acero")
+
+    assert _ids(client.get(URL, {"q": "77900"})) == [llave.id, tornillo.id]
+    assert _ids(client.get(URL, {"q": "torn"})) == [tornillo.id, otro.id]
+    # Todas las palabras, como inicio de palabra y sin acentos
+    assert _ids(client.get(URL, {"q": "Tornillo GALVÁN"})) == [tornillo.id]
+    assert client.get(URL, {"q": "t"}).json() == {"resultados": []}
+    assert client.get(URL, {"q": "inexistente"}).json() == {"resultados": []}
+    assert client.post(URL, {"q": "torn"}).status_code == 405
+
+
+def test_respeta_el_limite_con_los_de_codigo_primero(settings, client):
+    settings.ARTICULOS_AUTOCOMPLETAR_LIMITE = 3
+    por_nombre = Articulo.objects.create(codigo_barras="1", nombre="Arandela 12", descripcion="")
+    por_codigo = [Articulo.objects.create(codigo_barras=f"12{n}", nombre=f"Item {n}") for n in range(5)]
+
+    assert _ids(client.get(URL, {"q": "12"})) == [a.id for a in por_codigo[:3]]
+    assert BusquedaRepository().autocompletar_articulos("12", limite=10)[-1]["id"] == por_nombre.id
+
+
+def test_el_caso_de_uso_descarta_textos_cortos():
+    class Repo:
+        def autocompletar_articulos(self, texto, limite):
+            return [{"texto": texto, "limite": limite}]
+
+    use_case = AutocompletarArticuloUseCase(Repo())
+    assert use_case.execute(" a ") == [] and use_case.execute("9" * 51) == []
+    assert use_case.execute(" ab ", limite=0) == [{"texto": "ab", "limite": 1}]
+
+
+def test_el_formulario_valida_el_id_con_una_lectura():
+    art = Articulo.objects.create(codigo_barras="7795", nombre="Llave")
+
+    with CaptureQueriesContext(connection) as ctx:
+        form = MapearArticuloForm(data={"codigo_barras": "7796", "descripcion": "", "articulo_id": str(art.id)})
+        assert form.is_valid(), form.errors
+    assert form.articulo_elegido == art
+    assert len([q for q in ctx.captured_queries if '"articulos_articulo"."id" =' in q["sql"]]) == 1
+
+    for invalido in ("999999", "abc"):
+        form = MapearArticuloForm(data={"codigo_barras": "7796", "descripcion": "", "articulo_id": invalido})
+        assert not form.is_valid() and "articulo_id" in form.errors
+
+
+def test_la_pagina_no_depende_del_tamano_del_catalogo(client):
+    Descuento.objects.get_or_create(tipo="Sin Descuento")
+    prov = Proveedor.objects.create(nombre="Prov Auto", abreviatura="AU", margen_ganancia=Decimal("1.40"))
+    asr = ArticuloSinRevisar.objects.create(
+        proveedor=prov, codigo_proveedor="1/", descripcion_proveedor="Pendiente", precio=100, estado="pendiente"
+    )
+    url = reverse("articulos:mapear_articulo", kwargs={"pendiente_id": asr.id})
+
+    def consultas():
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            assert client.get(url).status_code == 200
+        return len(ctx.captured_queries)
+
+    pocas = consultas()
+    Articulo.objects.bulk_create([Articulo(codigo_barras=f"99{n}", nombre=f"Item {n}") for n in range(600)])
+    resp = client.get(url)
+    assert consultas() == pocas
+    assert "Item 599" not in resp.content.decode()
@@ -0,0 +1,84 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from articulos.adapters import indice_descripciones, repository
+from articulos.adapters.models import ArticuloProveedor
+from articulos.adapters.repository import BusquedaRepository
+from articulos.domain.use_cases import BuscarArticuloUseCase
+
+# La búsqueda lee por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+
+@pytest.fixture
+def provs(crear_proveedor):
+    return crear_proveedor("UNO"), crear_proveedor("DOS")
+
+
+def _buscar(texto, abreviatura=None):
+    return [r["descripcion"] for r in BusquedaRepository().buscar_por_descripcion(texto, abreviatura=abreviatura)]
+
+
+def test_busca_por_prefijos_de_palabras_sin_acentos(provs, crear_ap):
+    uno, dos = provs
+    crear_ap(uno, "1/", "Tornillo galvanizado 6x40")
+    crear_ap(uno, "2/", "Tornillo acero inoxidable")
+    crear_ap(dos, "3/", "Caño galvanizado 1/2")
+    crear_ap(dos, "4/", "Destornillador philips")
+
+    assert sorted(_buscar("torn galv")) == ["Tornillo galvanizado 6x40"]
+    assert sorted(_buscar("GALV")) == ["Caño galvanizado 1/2", "Tornillo galvanizado 6x40"]
+    assert _buscar("cano") == ["Caño galvanizado 1/2"]
+    assert _buscar("galv", abreviatura="dos") == ["Caño galvanizado 1/2"]
+    assert _buscar("galv", abreviatura="XX") == []
+    # Sintaxis de FTS5 en la entrada se toma como texto
+    assert _buscar('torn" OR "') == []
+
+
+def test_ordena_por_relevancia(provs, crear_ap):
+    uno, _ = provs
+    crear_ap(uno, "1/", "Llave francesa con mango de goma y estuche plastico reforzado")
+    crear_ap(uno, "2/", "Llave francesa")
+    assert _buscar("llave francesa") == ["Llave francesa", "Llave francesa con mango de goma y estuche plastico reforzado"]
+
+
+def test_indice_sigue_escrituras_masivas(provs, crear_ap):
+    uno, _ = provs
+    ap = crear_ap(uno, "1/", "Martillo carpintero")
+    ArticuloProveedor.objects.filter(pk=ap.pk).update(descripcion_proveedor="Maza goma")
+    assert _buscar("martillo") == []
+    assert _buscar("maza") == ["Maza goma"]
+
+    ArticuloProveedor.objects.filter(pk=ap.pk).delete()
+    assert _buscar("maza") == []
+
+    call_command("indexar_descripciones")
+    crear_ap(uno, "2/", "Pinza universal")
+    assert _buscar("pinza") == ["Pinza universal"]
+
+
+def test_sin_indice_usa_icontains(provs, monkeypatch, crear_ap):
+    uno, _ = provs
+    crear_ap(uno, "1/", "Cinta aisladora negra")
+    monkeypatch.setattr(repository, "ids_por_descripcion", lambda *a, **k: None)
+    assert _buscar("aislad NEGRA") == ["Cinta aisladora negra"]
+
+
+def test_vista_y_caso_de_uso_por_descripcion(provs, client, crear_ap):
+    uno, _ = provs
+    crear_ap(uno, "77/", "Sierra copa bimetal")
+
+    resp = client.get(reverse("articulos:buscar_articulos"), {"q": "sierra", "modo": "descripcion"})
+    assert resp.status_code == 200
+    assert [r["descripcion"] for r in resp.context["resultados"]] == ["Sierra copa bimetal"]
+    assert resp.context["modo"] == "descripcion"
+
+    use_case = BuscarArticuloUseCase(BusquedaRepository())
+    assert use_case.execute(query="  ", modo="descripcion") == []
+    with pytest.raises(ValueError):
+        use_case.execute(query="sierra", modo="otro")
+
+
+def test_palabras():
+    assert indice_descripciones.palabras("  Tornillo, tornillo 6x40 — ÑANDÚ ") == ["tornillo", "6x40", "ñandú"]
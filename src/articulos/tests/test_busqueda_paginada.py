@@ -0,0 +1,102 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articulos.adapters.models import ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.repository import BusquedaRepository
+from articulos.domain.use_cases import BuscarArticuloPaginadoUseCase
+from precios.adapters.models import PrecioDeLista
+
+# La búsqueda lee por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+
+@pytest.fixture
+def aps(crear_proveedor):
+    prov, otro = crear_proveedor("PG"), crear_proveedor("OT")
+    filas = [(prov, f"{n}/") for n in range(1, 201)] + [(otro, "1/"), (otro, "AB1/")]
+    # En bloque (sin señales): los precios se calculan al buscar
+    pls = PrecioDeLista.objects.bulk_create(
+        [PrecioDeLista(proveedor=p, codigo=codigo, descripcion=f"Item {i}", precio=100) for i, (p, codigo) in enumerate(filas)]
+    )
+    asrs = ArticuloSinRevisar.objects.bulk_create([
+        ArticuloSinRevisar(proveedor=p, codigo_proveedor=codigo, descripcion_proveedor="Item", precio=100, estado="pendiente")
+        for p, codigo in filas
+    ])
+    creados = ArticuloProveedor.objects.bulk_create([
+        ArticuloProveedor(
+            articulo_s_revisar=asr, proveedor=p, precio_de_lista=pl, codigo_proveedor=codigo,
+            descripcion_proveedor="Item", precio=100, stock=0,
+        )
+        for (p, codigo), pl, asr in zip(filas, pls, asrs)
+    ])
+    return creados
+
+
+def _paginas(query, limite=20, **kwargs):
+    repo, cursor, paginas = BusquedaRepository(), None, []
+    while True:
+        with CaptureQueriesContext(connections["negocio_db"]) as ctx:
+            pagina = repo.buscar_pagina(query, cursor=cursor, limite=limite, **kwargs)
+        paginas.append((pagina, ctx.captured_queries))
+        cursor = pagina["siguiente"]
+        if cursor is None:
+            return paginas
+
+
+def test_recorre_todas_las_paginas_en_orden(aps):
+    esperados = sorted(
+        ((ap.codigo_proveedor, ap.pk) for ap in aps if ap.codigo_proveedor.startswith("1")),
+    )
+    paginas = _paginas("1")
+    vistos = [(r["codigo"].split("/")[0] + "/", r["id"]) for pagina, _ in paginas for r in pagina["resultados"]]
+    assert vistos == esperados
+    assert len(paginas) == 6 and all(len(p["resultados"]) == 20 for p, _ in paginas[:-1])
+    assert all(p["total"] == len(esperados) and p["total_exacto"] for p, _ in paginas)
+
+
+def test_paginas_profundas_cuestan_lo_mismo(aps):
+    paginas = _paginas("", limite=10, abreviatura="PG")
+    assert len(paginas) == 20
+    consultas = {len(q) for _, q in paginas}
+    assert len(consultas) == 1
+    assert not any("OFFSET" in c["sql"].upper() for _, q in paginas for c in q)
+
+
+def test_conteo_aproximado_y_cursor_invalido(aps, settings):
+    settings.ARTICULOS_BUSQUEDA_CONTEO_MAX = 10
+    pagina = BusquedaRepository().buscar_pagina("1", cursor="no-es-un-cursor", limite=5)
+    assert (pagina["total"], pagina["total_exacto"]) == (10, False)
+    assert [r["codigo"] for r in pagina["resultados"]][0].startswith("1/")
+
+
+def test_prefijo_con_letras_y_caso_de_uso(aps):
+    assert [r["codigo"] for r in BusquedaRepository().buscar_pagina("ab")["resultados"]] == ["AB1/OT"]
+    vacia = BuscarArticuloPaginadoUseCase(BusquedaRepository()).execute(query="  ")
+    assert vacia == {"resultados": [], "siguiente": None, "total": 0, "total_exacto": True}
+
+
+def test_vista_enlaza_la_pagina_siguiente(aps, client):
+    url = reverse("articulos:buscar_articulos")
+    primera = client.get(url, {"q": "1"})
+    assert len(primera.context["resultados"]) == 50 and primera.context["total"] == 112
+    siguiente = primera.context["siguiente"]
+    assert siguiente and f"despues={siguiente}" in primera.content.decode()
+
+    segunda = client.get(url, {"q": "1", "despues": siguiente})
+    ids = {r["id"] for r in primera.context["resultados"]} & {r["id"] for r in segunda.context["resultados"]}
+    assert ids == set() and len(segunda.context["resultados"]) == 50
+    assert "Primera página" in segunda.content.decode()
+
+
+def test_rango_y_keyset_comparan_bytes_en_postgres(aps, monkeypatch):
+    # Con collation de idioma "3.7/" quedaría dentro de ["37", "38"): en PostgreSQL se compara con "C"
+    repo = BusquedaRepository()
+    assert "COLLATE" not in str(repo._por_codigo("37", None).query)
+
+    monkeypatch.setattr(connections["negocio_db"], "vendor", "postgresql")
+    qs = repo._por_codigo("37", None).order_by("codigo_binario", "id")
+    sql = str(qs.filter(codigo_binario__gt="37/").query)
+    assert sql.count('COLLATE "C"') == 4
+    assert "37" in sql and "38" in sql
@@ -0,0 +1,81 @@
+import pytest
+from django.urls import reverse
+
+from articulos.adapters import cache_barras
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.repository import BusquedaRepository
+from articulos.domain.use_cases import BuscarPorCodigoBarrasUseCase
+
+# La búsqueda lee por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+
+@pytest.fixture
+def provs(crear_proveedor):
+    return [crear_proveedor(a) for a in ("AA", "BB", "CC")]
+
+
+def test_resuelve_todos_los_proveedores_en_una_consulta(provs, crear_ap, consultas):
+    aa, bb, cc = provs
+    art = Articulo.objects.create(codigo_barras="7790001", nombre="Mapeado")
+    esperados = {crear_ap(aa, "1/", articulo=art).pk, crear_ap(bb, "2/", precio=90, articulo=art).pk, crear_ap(cc, "3/", codigo_barras="7790001").pk}
+    crear_ap(cc, "4/", codigo_barras="7790002")
+
+    capturadas, resultados = consultas(lambda: BusquedaRepository().buscar_por_codigo_barras(" 7790001 "), "negocio_db", "default")
+    assert {r["id"] for r in resultados} == esperados
+    assert {r["proveedor"] for r in resultados} == {"AA", "BB", "CC"}
+    assert all(r["precios"]["final"] > 0 for r in resultados)
+    assert len(capturadas) == 1
+    assert "7790002" not in str(resultados)
+
+
+def test_lru_atiende_la_rafaga_y_se_limpia_al_cambiar(provs, settings, crear_ap, consultas):
+    settings.ARTICULOS_BARRAS_LRU = 2
+    aa = provs[0]
+    ap = crear_ap(aa, "1/", codigo_barras="111")
+    crear_ap(aa, "2/", codigo_barras="222")
+    repo = BusquedaRepository()
+    repo.buscar_por_codigo_barras("111")
+
+    capturadas, resultados = consultas(lambda: [repo.buscar_por_codigo_barras("111") for _ in range(20)], "negocio_db", "default")
+    assert capturadas == [] and len(resultados[-1]) == 1
+
+    # Más códigos que el tamaño del LRU: el menos usado sale
+    repo.buscar_por_codigo_barras("222")
+    repo.buscar_por_codigo_barras("333")
+    capturadas, _ = consultas(lambda: repo.buscar_por_codigo_barras("111"), "negocio_db", "default")
+    assert len(capturadas) == 1
+
+    # Un precio recalculado invalida lo cacheado
+    ap.precio = 500
+    ap.save()
+    final = repo.buscar_por_codigo_barras("111")[0]["precios"]["final"]
+    assert final == float(ArticuloProveedor.objects.get(pk=ap.pk).generar_precios()["final"])
+
+    # Un código de barras nuevo también
+    assert repo.buscar_por_codigo_barras("444") == []
+    ArticuloSinRevisar.objects.filter(pk=ap.articulo_s_revisar_id).update(codigo_barras="444")
+    ArticuloSinRevisar.objects.get(pk=ap.articulo_s_revisar_id).save()
+    assert [r["id"] for r in repo.buscar_por_codigo_barras("444")] == [ap.pk]
+
+
+def test_vista_json(provs, client, crear_ap):
+    ap = crear_ap(provs[0], "9/", codigo_barras="7799999")
+    url = reverse("articulos:buscar_por_codigo_barras", kwargs={"codigo_barras": "7799999"})
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert [r["id"] for r in resp.json()["resultados"]] == [ap.pk]
+
+    faltante = client.get(reverse("articulos:buscar_por_codigo_barras", kwargs={"codigo_barras": "000"}))
+    assert faltante.status_code == 404 and faltante.json() == {"codigo_barras": "000", "resultados": []}
+    assert client.post(url).status_code == 405
+
+
+def test_caso_de_uso_descarta_lecturas_invalidas():
+    class Repo:
+        def buscar_por_codigo_barras(self, codigo_barras):
+            raise AssertionError("no debería consultar")
+
+    use_case = BuscarPorCodigoBarrasUseCase(Repo())
+    assert use_case.execute("   ") == [] and use_case.execute("9" * 51) == []
+    assert cache_barras.obtener("x", lambda c: [c]) == ["x"]
@@ -0,0 +1,113 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articulos.adapters.forms import MapearEnBloqueForm
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar, PrecioCalculado
+from articulos.adapters.repository import MapeoRepository
+from articulos.domain.use_cases import MapearEnBloqueUseCase
+
+# El mapeo escribe por "negocio_db" (otra conexión): necesita datos confirmados
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+
+@pytest.fixture
+def prov(crear_proveedor):
+    return crear_proveedor("BQ")
+
+
+def _mapear(pares):
+    with CaptureQueriesContext(connections["negocio_db"]) as ctx:
+        resultado = MapeoRepository().mapear_en_bloque(pares)
+    return resultado, len(ctx.captured_queries)
+
+
+def test_mapea_por_id_y_por_codigo_de_barras(prov, crear_ap):
+    existente = Articulo.objects.create(codigo_barras="7790001", descripcion="Existente")
+    asrs = [crear_ap(prov, f"{n}/").articulo_s_revisar for n in range(1, 5)]
+    pares = [
+        {"articulo_s_revisar_id": asrs[0].id, "articulo_id": existente.id, "codigo_barras": None},
+        {"articulo_s_revisar_id": asrs[1].id, "articulo_id": None, "codigo_barras": "7790001"},
+        {"articulo_s_revisar_id": asrs[2].id, "articulo_id": None, "codigo_barras": "7790002"},
+        {"articulo_s_revisar_id": asrs[3].id, "articulo_id": None, "codigo_barras": "7790002"},
+        {"articulo_s_revisar_id": 999999, "articulo_id": existente.id, "codigo_barras": None},
+        {"articulo_s_revisar_id": asrs[0].id, "articulo_id": 999999, "codigo_barras": None},
+    ]
+    resultado, _ = _mapear(pares)
+
+    assert (resultado["mapeados"], resultado["articulos_creados"]) == (4, 1)
+    assert [e["error"] for e in resultado["errores"]] == ["ArticuloSinRevisar inexistente", "Articulo inexistente"]
+    nuevo = Articulo.objects.get(codigo_barras="7790002")
+    assert nuevo.descripcion == "Item 3/"
+    # Indexado para las sugerencias de mapeo aunque bulk_create no dispare señales
+    assert nuevo.terminos.filter(termino="item").exists()
+    por_articulo = dict(ArticuloProveedor.objects.values_list("codigo_proveedor", "articulo_id"))
+    assert por_articulo == {"1/": existente.id, "2/": existente.id, "3/": nuevo.id, "4/": nuevo.id}
+    assert not ArticuloProveedor.objects.filter(articulo_s_revisar__isnull=False).exists()
+    assert set(ArticuloSinRevisar.objects.values_list("estado", flat=True)) == {"mapeado"}
+    # Los precios guardados se recalculan con el Articulo como origen del descuento
+    assert PrecioCalculado.objects.filter(articulo_proveedor__articulo__isnull=False).count() == 4
+
+    otra_vez, _ = _mapear(pares[:1])
+    assert otra_vez["mapeados"] == 0 and otra_vez["errores"][0]["error"] == "ArticuloSinRevisar ya mapeado"
+
+
+def test_cantidad_de_consultas_no_depende_de_los_pares(prov, crear_ap):
+    asrs = [crear_ap(prov, f"{n}/").articulo_s_revisar for n in range(1, 31)]
+    pares = [{"articulo_s_revisar_id": a.id, "articulo_id": None, "codigo_barras": f"77{a.id}"} for a in asrs]
+    _, pocas = _mapear(pares[:3])
+    _, muchas = _mapear(pares[3:])
+    assert pocas == muchas
+
+
+def test_caso_de_uso_valida_los_pares():
+    class Repo:
+        recibidos = None
+
+        def mapear_en_bloque(self, pares):
+            Repo.recibidos = pares
+            return {"mapeados": len(pares), "articulos_creados": 0, "errores": [{"error": "del repo"}]}
+
+    resultado = MapearEnBloqueUseCase(Repo()).execute([
+        {"articulo_s_revisar_id": 1, "articulo_id": 5, "codigo_barras": " "},
+        {"articulo_s_revisar_id": 1, "articulo_id": 6},
+        {"articulo_s_revisar_id": 2, "articulo_id": 5, "codigo_barras": "779"},
+        {"articulo_s_revisar_id": 3},
+        {"articulo_id": 5},
+    ])
+    assert Repo.recibidos == [{"articulo_s_revisar_id": 1, "articulo_id": 5, "codigo_barras": None}]
+    assert resultado["mapeados"] == 1
+    assert len(resultado["errores"]) == 5 and resultado["errores"][-1] == {"error": "del repo"}
+    assert MapearEnBloqueUseCase(Repo()).execute([]) == {"mapeados": 0, "articulos_creados": 0, "errores": []}
+
+
+def test_formulario_lee_pegado_y_csv_con_encabezado():
+    form = MapearEnBloqueForm(data={"texto": "10\t\t7791\n11\t4\t\n\n12\t7792"})
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["pares"] == [
+        {"articulo_s_revisar_id": 10, "articulo_id": None, "codigo_barras": "7791"},
+        {"articulo_s_revisar_id": 11, "articulo_id": 4, "codigo_barras": None},
+        {"articulo_s_revisar_id": 12, "articulo_id": None, "codigo_barras": "7792"},
+    ]
+
+    archivo = SimpleUploadedFile("pares.csv", "codigo_barras;asr_id\n7793;13\n".encode("utf-8"))
+    form = MapearEnBloqueForm(data={}, files={"archivo": archivo})
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["pares"] == [{"articulo_s_revisar_id": 13, "articulo_id": None, "codigo_barras": "7793"}]
+
+    assert not MapearEnBloqueForm(data={"texto": "x,1\n"}).is_valid()
+    assert not MapearEnBloqueForm(data={"texto": ""}).is_valid()
+
+
+def test_vista_muestra_el_resumen(prov, client, crear_ap):
+    asr = crear_ap(prov, "1/").articulo_s_revisar
+    url = reverse("articulos:mapear_en_bloque")
+    assert client.get(url).status_code == 200
+
+    resp = client.post(url, {"texto": f"{asr.id},,7790009\n999999,,7790010"})
+    assert resp.status_code == 200
+    assert resp.context["resultado"]["mapeados"] == 1
+    assert "Mapeados: 1" in resp.content.decode() and "ArticuloSinRevisar inexistente" in resp.content.decode()
+    assert ArticuloProveedor.objects.get().articulo.codigo_barras == "7790009"
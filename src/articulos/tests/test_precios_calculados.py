@@ -0,0 +1,179 @@
+import csv
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from articulos.adapters.models import Articulo, ArticuloProveedor, PrecioCalculado
+from articulos.adapters.precios_calculados import recalcular_precios, recalculo_diferido
+from articulos.adapters.repository import BusquedaRepository
+from precios.adapters.models import Descuento
+
+pytestmark = pytest.mark.django_db(databases=["default", "negocio_db"])
+# La búsqueda lee por "negocio_db" (otra conexión): necesita datos confirmados
+busqueda = pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+
+CLAVES = ["base", "final", "final_efectivo", "bulto", "final_bulto", "final_bulto_efectivo"]
+
+
+@pytest.fixture
+def prov(crear_proveedor):
+    Descuento.objects.get_or_create(tipo="Sin Descuento", defaults={"bulto": Decimal("5"), "cantidad_bulto": 1})
+    return crear_proveedor(
+        "PP",
+        nombre="Prov Precios",
+        descuento_comercial=Decimal("0.10"),
+        margen_ganancia=Decimal("1.50"),
+        margen_ganancia_efectivo=Decimal("0.90"),
+    )
+
+
+def _guardado(ap):
+    return PrecioCalculado.objects.get(articulo_proveedor=ap).como_precios()
+
+
+def test_guardado_coincide_con_generar_precios(prov, crear_ap):
+    promo = Descuento.objects.create(tipo="Promo", general=Decimal("10"), bulto=Decimal("3"), cantidad_bulto=2)
+    art = Articulo.objects.create(codigo_barras="779000", nombre="Mapeado", descuento=promo)
+    aps = [
+        crear_ap(prov, "1/"),
+        crear_ap(prov, "2/", precio=250, bulto=6, dividir=True),
+        crear_ap(prov, "3/", articulo=art),
+        crear_ap(prov, "4/", descuento=promo, bulto=12),
+    ]
+    for ap in aps:
+        ap.refresh_from_db()
+        esperado = ap.generar_precios(cantidad=1)
+        guardado = _guardado(ap)
+        assert {k: guardado[k] for k in esperado} == esperado
+
+
+@busqueda
+def test_busqueda_lee_los_precios_guardados_en_una_consulta(prov, crear_ap):
+    aps = [crear_ap(prov, f"{i}/", precio=10 * i, bulto=i) for i in range(10, 20)]
+    esperados = {ap.pk: ap.generar_precios(cantidad=1) for ap in aps}
+
+    with CaptureQueriesContext(connections["negocio_db"]) as ctx, CaptureQueriesContext(connections["default"]) as ctx_default:
+        resultados = BusquedaRepository().buscar_articulos("1", abreviatura="PP")
+    assert len(ctx.captured_queries) == 1
+    assert ctx_default.captured_queries == []
+    assert len(resultados) == 10
+    for r in resultados:
+        assert {k: r["precios"][k] for k in CLAVES} == {k: float(esperados[r["id"]][k]) for k in CLAVES}
+        assert r["precios"]["descuento_tipo"] == "Sin Descuento"
+
+
+@busqueda
+def test_busqueda_completa_los_que_faltan(prov, crear_ap):
+    ap = crear_ap(prov, "5/")
+    PrecioCalculado.objects.all().delete()
+    resultados = BusquedaRepository().buscar_articulos("5", abreviatura="PP")
+    assert resultados[0]["precios"]["final"] == float(ap.generar_precios()["final"])
+    assert PrecioCalculado.objects.filter(articulo_proveedor=ap).exists()
+
+
+def test_cambios_de_proveedor_lista_y_descuento_recalculan(prov, crear_ap):
+    promo = Descuento.objects.create(tipo="Promo", general=Decimal("0"))
+    ap = crear_ap(prov, "6/", descuento=promo)
+    final = _guardado(ap)["final"]
+
+    prov.margen_ganancia = Decimal("2.00")
+    prov.save()
+    assert _guardado(ap)["final"] > final
+
+    final = _guardado(ap)["final"]
+    pl = ap.precio_de_lista
+    pl.iva = Decimal("0")
+    pl.save()
+    assert _guardado(ap)["final"] < final
+
+    final = _guardado(ap)["final"]
+    promo.general = Decimal("20")
+    promo.save()
+    assert _guardado(ap)["final"] == (final * Decimal("0.8")).quantize(Decimal("0.01"))
+
+    promo.delete()
+    ap.refresh_from_db()
+    assert _guardado(ap)["final"] == final
+
+
+def test_guardar_proveedor_sin_cambiar_margenes_no_recalcula(prov, monkeypatch, crear_ap):
+    crear_ap(prov, "7/")
+    import articulos.signals as signals
+
+    llamadas = []
+    monkeypatch.setattr(signals, "programar_recalculo", lambda **f: llamadas.append(f))
+    prov.nombre = "Otro nombre"
+    prov.save()
+    assert llamadas == []
+
+
+@busqueda
+def test_descuento_temporal_vence_y_se_recalcula(prov, crear_ap):
+    ahora = timezone.now()
+    promo = Descuento.objects.create(
+        tipo="Semana", general=Decimal("50"), temporal=True, desde=ahora - timedelta(days=1), hasta=ahora + timedelta(days=1)
+    )
+    art = Articulo.objects.create(codigo_barras="779001", nombre="Temporal", descuento=promo)
+    ap = crear_ap(prov, "8/", articulo=art)
+    snapshot = PrecioCalculado.objects.get(articulo_proveedor=ap)
+    assert snapshot.vigente_hasta == promo.hasta + timedelta(seconds=1)
+    con_promo = snapshot.final
+
+    # La ventana terminó sin que nadie escribiera: la búsqueda detecta el vencimiento
+    Descuento.objects.filter(pk=promo.pk).update(hasta=ahora - timedelta(hours=1), desde=ahora - timedelta(days=2))
+    PrecioCalculado.objects.filter(pk=snapshot.pk).update(vigente_hasta=ahora - timedelta(minutes=1))
+    resultado = BusquedaRepository().buscar_articulos("8", abreviatura="PP")[0]
+    sin_promo = ArticuloProveedor.objects.get(pk=ap.pk).generar_precios()["final"]
+    assert sin_promo > con_promo
+    assert resultado["precios"]["final"] == float(sin_promo)
+    assert PrecioCalculado.objects.get(pk=snapshot.pk).vigente_hasta is None
+
+
+def test_recalculo_diferido_agrupa_las_escrituras(prov, monkeypatch, crear_ap):
+    import articulos.adapters.precios_calculados as pc
+
+    lotes = []
+    original = pc.recalcular_precios
+    monkeypatch.setattr(pc, "recalcular_precios", lambda aps: lotes.append(sorted(aps)) or original(aps))
+    with recalculo_diferido():
+        aps = [crear_ap(prov, f"{i}/") for i in range(20, 23)]
+        for ap in aps:
+            ap.precio = 500
+            ap.save()
+        assert lotes == []
+    assert lotes == [sorted(ap.pk for ap in aps)]
+    assert all(_guardado(ap)["base"] == ap.generar_precios()["base"] for ap in aps)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_importacion_deja_precios_calculados(prov, tmp_path, bulk):
+    from importaciones.services.importador_csv import importar_csv
+
+    path = tmp_path / "lista.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([["cod", "desc", "precio"]] + [[str(i), f"Item {i}", str(i * 10)] for i in range(1, 6)])
+    kwargs = dict(proveedor=prov, ruta_csv=str(path), start_row=2, col_codigo_idx=0, col_descripcion_idx=1, col_precio_idx=2, bulk=bulk)
+    importar_csv(**kwargs)
+    aps = list(ArticuloProveedor.objects.filter(proveedor=prov).select_related("precio_calculado"))
+    assert len(aps) == 5
+    assert all(ap.precio_calculado.final == ap.generar_precios()["final"] for ap in aps)
+
+    # Reimportar con otro precio actualiza lo guardado
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([["cod", "desc", "precio"], ["1", "Item 1", "999"]])
+    importar_csv(**kwargs)
+    ap = ArticuloProveedor.objects.get(proveedor=prov, codigo_proveedor="1/")
+    assert _guardado(ap)["final"] == ap.generar_precios()["final"]
+
+
+def test_comando_recalcula_los_faltantes(prov, crear_ap):
+    aps = [crear_ap(prov, f"{i}/") for i in range(30, 33)]
+    PrecioCalculado.objects.filter(articulo_proveedor=aps[0]).delete()
+    call_command("recalcular_precios", "--faltantes")
+    assert PrecioCalculado.objects.filter(articulo_proveedor__in=aps).count() == 3
+    assert len(recalcular_precios(ArticuloProveedor.objects.filter(proveedor=prov))) == 3
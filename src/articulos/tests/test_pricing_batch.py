@@ -0,0 +1,67 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from articulos.domain import pricing
+from articulos.domain.pricing import calculate_prices, calculate_prices_batch
+
+
+CONTEXTOS = [
+    dict(proveedor_desc_com=0, proveedor_margen=1, proveedor_margen_ef=1, descuento_general=0,
+         descuento_activo=True, descuento_bulto=0, descuento_cantidad_bulto=1),
+    dict(proveedor_desc_com="0.10", proveedor_margen="1.50", proveedor_margen_ef="0.90", descuento_general="10",
+         descuento_activo=True, descuento_bulto="5", descuento_cantidad_bulto=6),
+    dict(proveedor_desc_com=Decimal("0.07"), proveedor_margen=Decimal("1.35"), proveedor_margen_ef=Decimal("0.95"),
+         descuento_general=Decimal("0.15"), descuento_activo=False, descuento_bulto=Decimal("2.5"), descuento_cantidad_bulto=None),
+]
+
+
+def _filas(n, seed):
+    rnd = random.Random(seed)
+    return dict(
+        precios_de_lista=[Decimal(rnd.randint(1, 10_000_000)) / 100 for _ in range(n)],
+        ivas=[rnd.choice([Decimal("0.21"), Decimal("0.105"), "0.12", 21, 0]) for _ in range(n)],
+        bultos=[rnd.choice([1, 2, 3, 6, 7, 12, Decimal("2.5"), 0, None]) for _ in range(n)],
+        dividir=[rnd.random() < 0.4 for _ in range(n)],
+    )
+
+
+def _por_fila(filas, contexto, cantidad=1):
+    return [
+        calculate_prices(
+            precio_de_lista=p, iva=iva, bulto_articulo=b, dividir=d, cantidad=cantidad, **contexto
+        )
+        for p, iva, b, d in zip(filas["precios_de_lista"], filas["ivas"], filas["bultos"], filas["dividir"])
+    ]
+
+
+@pytest.mark.parametrize("contexto", CONTEXTOS)
+@pytest.mark.parametrize("cantidad", [1, 6])
+def test_batch_igual_a_calculate_prices(contexto, cantidad):
+    filas = _filas(2000, seed=CONTEXTOS.index(contexto) * 10 + cantidad)
+    batch = calculate_prices_batch(cantidad=cantidad, **filas, **contexto)
+    esperado = _por_fila(filas, contexto, cantidad)
+    for i, fila in enumerate(esperado):
+        assert {k: batch[k][i] for k in fila} == fila, i
+
+
+def test_empates_en_medio_centavo_usan_decimal(monkeypatch):
+    # 0.125 * 1 * 1 * 1 = 0,125 -> 0,13 (HALF_UP); 1.005 no es representable en float
+    filas = dict(precios_de_lista=["0.125", "1.005", "2.675"], ivas=[0, 0, 0], bultos=[1, 1, 1], dividir=[False] * 3)
+    llamadas = []
+    original = pricing.calculate_prices
+    monkeypatch.setattr(pricing, "calculate_prices", lambda **k: llamadas.append(k) or original(**k))
+
+    batch = calculate_prices_batch(**filas, **CONTEXTOS[0])
+    assert batch["final"] == [Decimal("0.13"), Decimal("1.01"), Decimal("2.68")]
+    assert len(llamadas) == 3
+
+
+def test_lote_vacio_y_largos_distintos():
+    vacio = calculate_prices_batch(precios_de_lista=[], ivas=[], bultos=[], dividir=[], **CONTEXTOS[1])
+    assert vacio["final"] == [] and set(vacio) == set(calculate_prices(
+        precio_de_lista=1, iva=0, bulto_articulo=1, dividir=False, cantidad=1, **CONTEXTOS[1]
+    ))
+    with pytest.raises(ValueError):
+        calculate_prices_batch(precios_de_lista=[1], ivas=[], bultos=[1], dividir=[False], **CONTEXTOS[1])
@@ -1,6 +1,7 @@
 import pytest
 from django.apps import apps
 
+from articulos.adapters.indice_descripciones import reconstruir_indice
 from articulos.adapters.repository import MapeoRepository
 
 
@@ -118,3 +119,58 @@ def test_mapeo_repository_mapear_articulo_updates_relations_and_dedups_and_marks
     ArticuloSinRevisar = apps.get_model('articulos', 'ArticuloSinRevisar')
     asr_db = ArticuloSinRevisar.objects.using('negocio_db').get(pk=asr.id)
     assert asr_db.estado == 'mapeado' and asr_db.fecha_mapeo is not None
+
+
+@pytest.fixture
+def sin_unicidad_por_precio_de_lista(monkeypatch):
+    # Datos viejos pueden tener AP repetidos por PrecioDeLista: se quita la restricción durante el test
+    from django.db import connections
+
+    ArticuloProveedor = apps.get_model('articulos', 'ArticuloProveedor')
+    originales = ArticuloProveedor._meta.constraints
+    restriccion = next(c for c in originales if c.name == 'unique_ap_per_precio_de_lista')
+    # SQLite rehace la tabla a partir de las restricciones del modelo
+    monkeypatch.setattr(ArticuloProveedor._meta, 'constraints', [c for c in originales if c is not restriccion])
+    with connections['default'].schema_editor() as editor:
+        editor.remove_constraint(ArticuloProveedor, restriccion)
+    yield
+    ArticuloProveedor.objects.all().delete()
+    monkeypatch.setattr(ArticuloProveedor._meta, 'constraints', originales)
+    with connections['default'].schema_editor() as editor:
+        editor.add_constraint(ArticuloProveedor, restriccion)
+    # Rehacer la tabla borra los triggers del índice de descripciones
+    reconstruir_indice('default')
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'negocio_db'])
+def test_mapeo_consolida_solo_los_precio_de_lista_del_articulo(sin_unicidad_por_precio_de_lista):
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test.utils import CaptureQueriesContext
+
+    ArticuloProveedor = apps.get_model('articulos', 'ArticuloProveedor')
+    prov = _make_proveedor()
+    pl = _make_precio_de_lista(proveedor=prov)
+    otro_pl = _make_precio_de_lista(proveedor=prov, codigo='9/')
+    asr = _make_asr(proveedor=prov)
+    conservado = _make_ap(articulo_s_revisar=asr, proveedor=prov, precio_de_lista=pl, codigo_proveedor='0001/')
+    _make_ap(articulo_s_revisar=asr, proveedor=prov, precio_de_lista=pl, codigo_proveedor='0002/')
+    # Duplicados de otro PrecioDeLista, ajenos al mapeo
+    ajeno = _make_asr(proveedor=prov, codigo_proveedor='0009/')
+    ajenos = [
+        _make_ap(articulo_s_revisar=ajeno, proveedor=prov, precio_de_lista=otro_pl, codigo_proveedor=f'00{n}9/')
+        for n in (1, 2)
+    ]
+    art = _make_articulo()
+
+    with CaptureQueriesContext(connections['negocio_db']) as ctx:
+        MapeoRepository().mapear_articulo(articulo_s_revisar_id=asr.id, articulo_id=art.id)
+
+    assert list(ArticuloProveedor.objects.filter(articulo=art).values_list('id', flat=True)) == [conservado.id]
+    assert ArticuloProveedor.objects.filter(id__in=[ap.id for ap in ajenos]).count() == 2
+    agrupadas = [q['sql'] for q in ctx.captured_queries if 'GROUP BY' in q['sql']]
+    assert len(agrupadas) == 1 and 'HAVING' in agrupadas[0]
+
+    # El barrido completo queda para el comando de mantenimiento
+    call_command('consolidar_articulos_proveedor')
+    assert list(ArticuloProveedor.objects.filter(precio_de_lista=otro_pl).values_list('id', flat=True)) == [ajenos[0].id]
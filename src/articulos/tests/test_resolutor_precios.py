@@ -0,0 +1,83 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from articulos.adapters.models import Articulo, ArticuloSinRevisar, PrecioCalculado
+from articulos.adapters.repository import BusquedaRepository
+from articulos.adapters.resolutor_precios import resolutor_activo, resolutor_precios
+from precios.adapters.models import Descuento
+
+pytestmark = pytest.mark.django_db(databases=["default", "negocio_db"])
+
+
+@pytest.fixture
+def prov(crear_proveedor):
+    return crear_proveedor("PR", nombre="Prov Resolutor")
+
+
+def test_generar_precios_de_asr_con_consultas_constantes(prov, crear_asr, consultas):
+    asrs = [crear_asr(prov, f"{i}/") for i in range(12)]
+    sin_resolutor = [a.generar_precios() for a in asrs]
+
+    def _precios(n):
+        def _calcular():
+            with resolutor_precios():
+                return [a.generar_precios() for a in ArticuloSinRevisar.objects.filter(pk__in=[x.pk for x in asrs[:n]]).order_by("pk")]
+        capturadas, precios = consultas(_calcular)
+        return len(capturadas), precios
+
+    (pocas, _), (muchas, precios_12) = _precios(3), _precios(12)
+    assert pocas == muchas
+    assert precios_12 == sin_resolutor
+    assert resolutor_activo() is None
+
+
+def test_resolutor_replica_get_descuento(prov, crear_asr, crear_ap):
+    ahora = timezone.now()
+    vencido = Descuento.objects.create(
+        tipo="Vencido", general=Decimal("30"), temporal=True, desde=ahora - timedelta(days=5), hasta=ahora - timedelta(days=1)
+    )
+    promo = Descuento.objects.create(tipo="Promo", general=Decimal("10"))
+    art = Articulo.objects.create(codigo_barras="7791", nombre="Art", descuento=vencido)
+    crear_ap(prov, "1/", articulo=art, descuento=promo)
+    crear_ap(prov, "2/", articulo=art)
+    asr = crear_asr(prov, "3/")
+    Articulo.objects.filter(pk=art.pk).update(descuento=vencido)
+
+    for objeto in (Articulo.objects.get(pk=art.pk), ArticuloSinRevisar.objects.get(pk=asr.pk)):
+        esperado = objeto.get_descuento()
+        with resolutor_precios():
+            assert objeto.get_descuento().pk == esperado.pk
+    # El artículo cae en el descuento de su primer AP (el vencido no aplica)
+    assert Articulo.objects.get(pk=art.pk).get_descuento().pk == promo.pk
+
+
+def test_resolutor_cachea_por_id(prov, crear_asr, consultas):
+    asr = crear_asr(prov, "9/")
+    with resolutor_precios() as resolutor:
+        asr.get_descuento()
+        asr.get_proveedor()
+        resolutor.sin_descuento()
+        capturadas, _ = consultas(lambda: (asr.get_descuento(), asr.get_proveedor(), resolutor.sin_descuento()))
+    assert capturadas == []
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "negocio_db"])
+def test_busqueda_sin_precios_guardados_con_consultas_constantes(prov, crear_ap, consultas):
+    aps = [crear_ap(prov, f"{i}/") for i in range(10, 40)]
+
+    def _buscar(query):
+        PrecioCalculado.objects.all().delete()
+        capturadas, resultados = consultas(
+            lambda: BusquedaRepository().buscar_articulos(query, abreviatura="PR"), "negocio_db", "default"
+        )
+        return len(capturadas), resultados
+
+    pocas, uno = _buscar("10")
+    muchas, todos = _buscar("")
+    assert (len(uno), len(todos)) == (1, 30)
+    assert pocas == muchas
+    finales = {r["id"]: r["precios"]["final"] for r in todos}
+    assert finales == {ap.pk: float(ap.generar_precios()["final"]) for ap in aps}
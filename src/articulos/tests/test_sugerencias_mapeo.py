@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from articulos.adapters import sugerencias_mapeo
+from articulos.adapters.models import Articulo, ArticuloSinRevisar, SugerenciaMapeo, TerminoArticulo
+from articulos.adapters.sugerencias_mapeo import precalcular_sugerencias, similitud, terminos, trigramas
+
+
+@pytest.fixture
+def prov(db, crear_proveedor):
+    return crear_proveedor("SG")
+
+
+def _sugeridos(asr):
+    return [(s.articulo.codigo_barras, s.motivo) for s in sugerencias_mapeo.sugerencias_de(asr.id)]
+
+
+def test_normalizacion_y_similitud():
+    assert terminos("Caño GALVANIZADO 1/2 con rosca 6x40") == {"cano", "galvanizado", "rosca", "6x40"}
+    assert similitud(trigramas("Tornillo galvanizado"), trigramas("tornillo  GALVANIZADO")) == 1.0
+    assert similitud(trigramas("Tornillo galv."), trigramas("Tornillo galvanizado")) > similitud(
+        trigramas("Tornillo galv."), trigramas("Martillo carpintero")
+    )
+    assert similitud(frozenset(), trigramas("x")) == 0.0
+
+
+def test_el_indice_sigue_a_los_articulos(prov):
+    art = Articulo.objects.create(codigo_barras="1", nombre="Tornillo", descripcion="Galvanizado 6x40")
+    assert set(TerminoArticulo.objects.filter(articulo=art).values_list("termino", flat=True)) == {
+        "tornillo", "galvanizado", "6x40",
+    }
+    art.descripcion = "Acero inoxidable"
+    art.save()
+    assert set(art.terminos.values_list("termino", flat=True)) == {"tornillo", "acero", "inoxidable"}
+    # Guardar otros campos no reindexa
+    with CaptureQueriesContext(connection) as ctx:
+        art.save(update_fields=["codigo_barras"])
+    assert not any("articulos_terminoarticulo" in q["sql"] for q in ctx.captured_queries)
+
+
+def test_precalcula_por_codigo_de_barras_y_descripcion(prov, settings, crear_asr):
+    settings.ARTICULOS_SUGERENCIAS_MAX = 2
+    Articulo.objects.create(codigo_barras="7791", nombre="Tornillo", descripcion="galvanizado 6x40")
+    Articulo.objects.create(codigo_barras="7792", nombre="Tornillo", descripcion="galvanizado 6x50")
+    Articulo.objects.create(codigo_barras="7793", nombre="Tornillo", descripcion="acero inoxidable")
+    Articulo.objects.create(codigo_barras="7794", nombre="Martillo", descripcion="carpintero")
+    por_barras = crear_asr(prov, "1/", "Cosa sin relación", codigo_barras="7794")
+    por_texto = crear_asr(prov, "2/", "TORNILLO GALVANIZADO 6X40")
+    sin_nada = crear_asr(prov, "3/", "Pintura latex")
+
+    assert precalcular_sugerencias() == 3
+    assert _sugeridos(por_barras) == [("7794", "codigo_barras")]
+    assert _sugeridos(por_texto) == [("7791", "descripcion"), ("7792", "descripcion")]
+    assert _sugeridos(sin_nada) == []
+
+    # Al mapearse, sus sugerencias se descartan en el próximo lote
+    ArticuloSinRevisar.objects.filter(pk=por_texto.pk).update(estado="mapeado")
+    precalcular_sugerencias(asr_ids=[por_barras.pk])
+    assert not SugerenciaMapeo.objects.filter(articulo_s_revisar=por_texto).exists()
+    assert SugerenciaMapeo.objects.filter(articulo_s_revisar=por_barras).count() == 1
+
+
+def test_comando_reindexa_y_la_pagina_preselecciona(prov, client, crear_asr):
+    art = Articulo.objects.create(codigo_barras="7795", nombre="Llave francesa", descripcion="")
+    TerminoArticulo.objects.all().delete()
+    asr = crear_asr(prov, "5/", "Llave francesa 8 pulgadas")
+
+    call_command("precalcular_sugerencias", "--reindexar")
+    assert _sugeridos(asr) == [("7795", "descripcion")]
+
+    resp = client.get(reverse("articulos:mapear_articulo", kwargs={"pendiente_id": asr.id}))
+    assert resp.status_code == 200
+    assert resp.context["form"].initial["articulo_id"] == str(art.id)
+    assert resp.context["articulo_elegido"] == art
+    assert "Llave francesa" in resp.content.decode()
+
+
+def test_con_ids_solo_recalcula_esos(prov, crear_asr):
+    Articulo.objects.create(codigo_barras="7796", nombre="Pinza", descripcion="universal")
+    viejo = crear_asr(prov, "6/", "Pinza universal")
+    assert precalcular_sugerencias() == 1
+    sugerencia = SugerenciaMapeo.objects.get(articulo_s_revisar=viejo)
+
+    Articulo.objects.create(codigo_barras="7797", nombre="Pinza", descripcion="universal")
+    nuevo = crear_asr(prov, "7/", "Pinza universal 8")
+    assert precalcular_sugerencias(asr_ids=[nuevo.pk, 999999]) == 2
+    # El pendiente que no se pidió conserva su sugerencia (no se vuelve a puntuar)
+    assert list(SugerenciaMapeo.objects.filter(articulo_s_revisar=viejo)) == [sugerencia]
+    assert {c for c, _ in _sugeridos(nuevo)} == {"7796", "7797"}
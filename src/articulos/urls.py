@@ -11,7 +11,10 @@ Los nombres de las rutas se usan para reverse, por ejemplo:
 from django.urls import path
 from articulos.adapters.views import (
     BuscarArticuloView,
+    autocompletar_articulos,  # vista JSON para el autocompletado del mapeo
+    buscar_por_codigo_barras,  # vista JSON para escáner de código de barras
     mapear_articulo,  # vista de función para el mapeo
+    mapear_en_bloque,  # vista de función para el mapeo de muchos pendientes
     editar_articulo_proveedor,  # vista de función para editar AP
 )
 
@@ -23,6 +26,14 @@ urlpatterns = [
     # Uso: reverse('articulos:buscar_articulos') -> "/articulos/buscar/"
     path("buscar/", BuscarArticuloView.as_view(), name="buscar_articulos"),
 
+    # Código de barras exacto -> AP de cada proveedor con precios (JSON, para escáner)
+    # Uso: reverse('articulos:buscar_por_codigo_barras', kwargs={'codigo_barras': '7791234567890'})
+    path("barras/<str:codigo_barras>/", buscar_por_codigo_barras, name="buscar_por_codigo_barras"),
+
+    # Autocompletado de Articulo por prefijo de código de barras o palabras (JSON)
+    # Uso: reverse('articulos:autocompletar_articulos') + "?q=tornillo"
+    path("autocompletar/", autocompletar_articulos, name="autocompletar_articulos"),
+
     # Mapeo de ArticuloSinRevisar -> Articulo (vista de función)
     # Nota: el convertidor correcto en Django es <int:pendiente_id>
     # Uso: reverse('articulos:mapear_articulo', kwargs={'pendiente_id': 1}) -> "/articulos/mapear/1/"
@@ -31,5 +42,8 @@ urlpatterns = [
     # renderizar errores en GET/POST. La URL permanece igual; solo cambia la
     # lógica interna de validación en la vista.
     path("mapear/<int:pendiente_id>/", mapear_articulo, name="mapear_articulo"),
+    # Mapeo en bloque: pares (asr_id, articulo_id | codigo_barras) pegados o en CSV
+    # Uso: reverse('articulos:mapear_en_bloque') -> "/articulos/mapear/bloque/"
+    path("mapear/bloque/", mapear_en_bloque, name="mapear_en_bloque"),
     path("editar-ap/<int:ap_id>/", editar_articulo_proveedor, name="editar_articulo_proveedor"),
 ]
@@ -115,6 +115,20 @@ def _apply_migrations_for_tests(django_db_setup, django_db_blocker):
                     interactive=False,
                     verbosity=0,
                 )
+
+
+@pytest.fixture(autouse=True)
+def _limpiar_caches_de_proceso():
+    """Process-wide caches must not outlive each test's rolled-back rows."""
+    from articulos.adapters import cache_barras
+    from precios.adapters import cache_descuentos
+    for cache in (cache_descuentos, cache_barras):
+        cache.limpiar()
+    yield
+    for cache in (cache_descuentos, cache_barras):
+        cache.limpiar()
+
+
 @pytest.fixture
 def user():
     """Create a test user."""
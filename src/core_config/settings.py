@@ -65,6 +65,7 @@ INSTALLED_APPS = [
     'precios.apps.PreciosConfig',
     'importaciones.apps.ImportacionesConfig',
     'monitor_tareas.apps.MonitorTareasConfig',
+    'api.apps.ApiConfig',
 ]
 
 # Configuración de django-allauth
@@ -194,6 +195,40 @@ CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='') or None
 CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', cast=bool, default=False)
 CELERY_TIMEZONE = config('CELERY_TIMEZONE', default='UTC')
 
+# Importaciones: motor por lotes (bulk_create/bulk_update, opt-in; por defecto el camino por fila) y filas leídas por chunk
+IMPORTACIONES_BULK = config('IMPORTACIONES_BULK', cast=bool, default=False)
+IMPORTACIONES_CHUNK_SIZE = config('IMPORTACIONES_CHUNK_SIZE', cast=int, default=2000)
+# Importaciones: chunks por ejecución de la tarea procesar_pendientes (0 = archivos completos); se reencola hasta terminar
+IMPORTACIONES_LOTES_POR_TAREA = config('IMPORTACIONES_LOTES_POR_TAREA', cast=int, default=25)
+# Importaciones: una tarea por proveedor en paralelo (requiere CELERY_RESULT_BACKEND) y vigencia de los locks por proveedor y reclamos por archivo
+IMPORTACIONES_EN_PARALELO = config('IMPORTACIONES_EN_PARALELO', cast=bool, default=False)
+IMPORTACIONES_BLOQUEO_SEGUNDOS = config('IMPORTACIONES_BLOQUEO_SEGUNDOS', cast=int, default=600)
+# Importaciones: segundos que un archivo ya importado sigue apareciendo en el progreso del monitor de tareas
+IMPORTACIONES_PROGRESO_RECIENTES = config('IMPORTACIONES_PROGRESO_RECIENTES', cast=int, default=600)
+# Importaciones: conversión xlsx->CSV por streaming (openpyxl read_only) en lugar de DataFrame completo
+IMPORTACIONES_XLSX_STREAMING = config('IMPORTACIONES_XLSX_STREAMING', cast=bool, default=True)
+# Importaciones: libros abiertos cacheados por proceso (preview/confirmación) y hojas parseadas por libro
+IMPORTACIONES_LIBROS_EN_CACHE = config('IMPORTACIONES_LIBROS_EN_CACHE', cast=int, default=4)
+IMPORTACIONES_HOJAS_EN_CACHE = config('IMPORTACIONES_HOJAS_EN_CACHE', cast=int, default=8)
+# Importaciones: procesos para convertir hojas a CSV en paralelo (1 = secuencial, 0 = todos los núcleos)
+IMPORTACIONES_CONVERSION_WORKERS = config('IMPORTACIONES_CONVERSION_WORKERS', cast=int, default=1)
+# Importaciones: directorio de los .xlsx convertidos desde .xls legados (vacío = temporal del sistema)
+IMPORTACIONES_DIR_XLS2XLSX = config('IMPORTACIONES_DIR_XLS2XLSX', default='')
+# Precios: segundos que un Descuento queda en el cache de proceso (cambios hechos por otro proceso)
+PRECIOS_CACHE_DESCUENTOS_TTL = config('PRECIOS_CACHE_DESCUENTOS_TTL', cast=int, default=300)
+# Artículos: hasta cuántos resultados de búsqueda se cuentan exactos (por encima se estima)
+ARTICULOS_BUSQUEDA_CONTEO_MAX = config('ARTICULOS_BUSQUEDA_CONTEO_MAX', cast=int, default=1000)
+# Artículos: LRU de búsquedas por código de barras (códigos guardados y segundos de vigencia)
+ARTICULOS_BARRAS_LRU = config('ARTICULOS_BARRAS_LRU', cast=int, default=512)
+ARTICULOS_BARRAS_TTL = config('ARTICULOS_BARRAS_TTL', cast=int, default=15)
+# Artículos: sugerencias de mapeo precalculadas (cuántas por pendiente y similitud mínima 0-1)
+ARTICULOS_SUGERENCIAS_MAX = config('ARTICULOS_SUGERENCIAS_MAX', cast=int, default=5)
+ARTICULOS_SUGERENCIAS_MIN = config('ARTICULOS_SUGERENCIAS_MIN', cast=float, default=0.3)
+# Artículos: resultados del autocompletado de la página de mapeo
+ARTICULOS_AUTOCOMPLETAR_LIMITE = config('ARTICULOS_AUTOCOMPLETAR_LIMITE', cast=int, default=20)
+# API: segundos que un cliente puede reusar una búsqueda sin revalidarla (Cache-Control max-age)
+API_BUSQUEDA_MAX_AGE = config('API_BUSQUEDA_MAX_AGE', cast=int, default=5)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,131 @@
+"""
+Locks con vencimiento para importar desde varios workers a la vez.
+
+Se guardan en la base y no en la caché, que no es compartida entre procesos
+en todas las instalaciones:
+
+- Por proveedor (`BloqueoImportacion`, una fila por proveedor): tomar es
+  crear la fila o quedarse con una vencida; renovar extiende `vence`; soltar
+  borra la fila si sigue siendo propia.
+- Por archivo (reclamo de un `ArchivoPendiente`): un UPDATE condicionado
+  sobre `reclamado_por`/`reclamado_hasta`, así los procesos que recorren la
+  cola a la vez se la reparten en lugar de importar dos veces el mismo archivo.
+
+En ambos casos la toma es un único INSERT/UPDATE condicionado: dos procesos
+nunca la consiguen a la vez, y un worker caído la pierde al vencer.
+
+Ajuste: `IMPORTACIONES_BLOQUEO_SEGUNDOS` (vigencia de cada toma o renovación).
+"""
+
+import math
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def _vigencia() -> timedelta:
+    return timedelta(seconds=int(getattr(settings, "IMPORTACIONES_BLOQUEO_SEGUNDOS", 600)))
+
+
+def _segundos_hasta(vence: Optional[datetime]) -> int:
+    if vence is None:
+        return 0
+    return max(0, math.ceil((vence - timezone.now()).total_seconds()))
+
+
+class BloqueoProveedor:
+    """Toma del lock de un proveedor; `tomado` indica si se consiguió."""
+
+    def __init__(self, proveedor_id: Any) -> None:
+        self.proveedor_id = proveedor_id
+        self.dueno = uuid.uuid4().hex
+        self.tomado = False
+
+    @property
+    def _filas(self):
+        return apps.get_model("importaciones", "BloqueoImportacion").objects.filter(proveedor_id=self.proveedor_id)
+
+    def tomar(self) -> bool:
+        BloqueoImportacion = apps.get_model("importaciones", "BloqueoImportacion")
+        ahora = timezone.now()
+        try:
+            with transaction.atomic():
+                BloqueoImportacion.objects.create(proveedor_id=self.proveedor_id, dueno=self.dueno, vence=ahora + _vigencia())
+            self.tomado = True
+        except IntegrityError:
+            # Ocupado: sólo se puede quedar con él si ya venció
+            self.tomado = self._filas.filter(vence__lt=ahora).update(dueno=self.dueno, vence=ahora + _vigencia()) == 1
+        return self.tomado
+
+    def renovar(self) -> None:
+        if self.tomado:
+            self._filas.filter(dueno=self.dueno).update(vence=timezone.now() + _vigencia())
+
+    def soltar(self) -> None:
+        if self.tomado:
+            self._filas.filter(dueno=self.dueno).delete()
+            self.tomado = False
+
+
+def espera_bloqueo(proveedor_id: Any) -> int:
+    """Segundos hasta que vence el lock de un proveedor (0 si está libre o ya venció)."""
+    BloqueoImportacion = apps.get_model("importaciones", "BloqueoImportacion")
+    vence = BloqueoImportacion.objects.filter(proveedor_id=proveedor_id).values_list("vence", flat=True).first()
+    return _segundos_hasta(vence)
+
+
+@contextmanager
+def bloqueo_proveedor(proveedor_id: Any) -> Iterator[Optional[BloqueoProveedor]]:
+    """Context manager: el lock tomado, o None si otro worker lo tiene."""
+    bloqueo = BloqueoProveedor(proveedor_id)
+    if not bloqueo.tomar():
+        yield None
+        return
+    try:
+        yield bloqueo
+    finally:
+        bloqueo.soltar()
+
+
+class ReclamoPerdido(Exception):
+    """El reclamo de un ArchivoPendiente venció y otro proceso lo tomó."""
+
+
+def _archivos():
+    return apps.get_model("importaciones", "ArchivoPendiente").objects
+
+
+def reclamar_archivo(archivo_id: Any) -> Optional[str]:
+    """Reclama un ArchivoPendiente sin procesar; devuelve el dueño del reclamo o None si otro lo tiene."""
+    dueno = uuid.uuid4().hex
+    ahora = timezone.now()
+    tomados = (
+        _archivos()
+        .filter(pk=archivo_id, procesado=False)
+        .filter(Q(reclamado_hasta__isnull=True) | Q(reclamado_hasta__lt=ahora))
+        .update(reclamado_por=dueno, reclamado_hasta=ahora + _vigencia())
+    )
+    return dueno if tomados else None
+
+
+def confirmar_reclamado(archivo_id: Any, dueno: str, **campos: Any) -> None:
+    """Guarda `campos` y renueva el reclamo; ReclamoPerdido si ya no es propio."""
+    if not _archivos().filter(pk=archivo_id, reclamado_por=dueno).update(reclamado_hasta=timezone.now() + _vigencia(), **campos):
+        raise ReclamoPerdido(archivo_id)
+
+
+def liberar_archivo(archivo_id: Any, dueno: str) -> None:
+    """Suelta el reclamo si sigue siendo propio."""
+    _archivos().filter(pk=archivo_id, reclamado_por=dueno).update(reclamado_por="", reclamado_hasta=None)
+
+
+def espera_reclamo(archivo_id: Any) -> int:
+    """Segundos hasta que vence el reclamo de un ArchivoPendiente (0 si está libre o ya venció)."""
+    return _segundos_hasta(_archivos().filter(pk=archivo_id).values_list("reclamado_hasta", flat=True).first())
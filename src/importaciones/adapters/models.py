@@ -27,3 +27,27 @@ class ArchivoPendiente(models.Model):
     nombre_archivo_origen = models.CharField(max_length=255, blank=True, null=True)
     fecha_subida = models.DateTimeField(auto_now_add=True)
     procesado = models.BooleanField(default=False)
+    # Punto de control de la importación por chunks: última fila del CSV ya
+    # confirmada (y el byte donde termina, para retomar con seek) y totales
+    # (ImportStats) acumulados hasta ella
+    fila_confirmada = models.PositiveIntegerField(default=0)
+    byte_confirmado = models.PositiveBigIntegerField(default=0)
+    stats_confirmadas = models.JSONField(default=dict, blank=True)
+    # Reclamo (lease) del proceso que lo está importando; vencido, otro puede tomarlo
+    reclamado_por = models.CharField(max_length=64, blank=True, default='')
+    reclamado_hasta = models.DateTimeField(null=True, blank=True)
+    # Progreso de la importación en curso, actualizado en cada punto de control
+    filas_totales = models.PositiveIntegerField(null=True, blank=True)
+    filas_por_segundo = models.FloatField(null=True, blank=True)
+    progreso_actualizado = models.DateTimeField(null=True, blank=True)
+
+
+class BloqueoImportacion(models.Model):
+    """Lock por proveedor entre workers: a lo sumo una importación por proveedor a la vez.
+
+    Vence solo (`vence`) para que un worker caído no deje al proveedor bloqueado;
+    el dueño lo renueva a medida que confirma chunks. Ver `adapters.bloqueos`.
+    """
+    proveedor = models.OneToOneField('proveedores.Proveedor', on_delete=models.CASCADE, related_name='+')
+    dueno = models.CharField(max_length=64)
+    vence = models.DateTimeField()
@@ -10,20 +10,37 @@ la base de datos por defecto ("default").
 """
 
 import os
-import tempfile
-from typing import Any, Dict, List, Tuple, Optional
+import time
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional
 
 import pandas as pd
 from django.apps import apps
+from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 from django.db import transaction
+from django.utils import timezone
 import logging
 
 from ..domain.use_cases import ImportarExcelPort
 from ..services.conversion import convertir_a_csv
+from ..services.libro_excel import abrir_libro, descartar_libro
 
 logger = logging.getLogger("importaciones.repository")
 
+# Filas de datos que muestra la vista previa por hoja
+PREVIEW_FILAS = 20
+
+# Totales de ImportStats que se acumulan entre ejecuciones de un mismo pendiente
+_CAMPOS_STATS = ("filas_leidas", "filas_validas", "filas_descartadas", "creadas", "actualizadas", "sin_cambios")
+
+
+def _contar_filas_csv(path: str) -> int:
+    """Registros no vacíos del CSV (como los cuenta `read_csv`), sin construir un DataFrame."""
+    import csv
+
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        return sum(1 for fila in csv.reader(f) if fila)
+
 class ExcelRepository(ImportarExcelPort):
     """
     Adaptador que procesa archivos Excel para generar/actualizar registros
@@ -50,83 +67,21 @@ class ExcelRepository(ImportarExcelPort):
         No realiza escrituras en base de datos.
 
         Soporta .xlsx/.xls/.ods mediante pandas y .csv por ruta directa.
+        Sólo se leen las filas a mostrar; `total_filas` se obtiene sin parsear la
+        hoja completa (ver `SesionLibro.vista_previa`).
         """
         file_path = self.storage.path(nombre_archivo)
         _, ext = os.path.splitext(nombre_archivo.lower())
 
         if ext == ".csv":
-            df = pd.read_csv(file_path)
+            df = pd.read_csv(file_path, nrows=PREVIEW_FILAS)
+            total_filas = len(df) if len(df) < PREVIEW_FILAS else _contar_filas_csv(file_path) - 1
             hoja = None
         else:
-            # Sniff de contenido para definir mejor el engine y aplicar múltiples intentos
-            def _sniff_excel_format(path: str) -> Optional[str]:
-                try:
-                    with open(path, "rb") as f:
-                        header = f.read(8)
-                    if header.startswith(b"PK"):
-                        return "xlsx_like"
-                    if header.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"):
-                        return "xls_like"
-                except Exception:
-                    pass
-                return None
-
-            sniff = _sniff_excel_format(file_path)
-            candidates: List[Optional[str]] = []
-            if sniff == "xlsx_like":
-                candidates = ["openpyxl", "xlrd", None]
-            elif sniff == "xls_like":
-                candidates = ["xlrd", "openpyxl", None]
-            else:
-                if ext == ".xlsx":
-                    candidates = ["openpyxl", "xlrd", None]
-                elif ext == ".xls":
-                    candidates = ["xlrd", "openpyxl", None]
-                elif ext == ".ods":
-                    candidates = ["odf", None]
-                else:
-                    candidates = [None, "openpyxl", "xlrd"]
-
-            last_exc: Optional[Exception] = None
-            for engine in candidates:
-                try:
-                    if sheet_name is not None:
-                        df = pd.read_excel(file_path, sheet_name=sheet_name, engine=engine) if engine else pd.read_excel(file_path, sheet_name=sheet_name)
-                        hoja = sheet_name
-                    else:
-                        df = pd.read_excel(file_path, engine=engine) if engine else pd.read_excel(file_path)
-                        hoja = getattr(getattr(df, "name", None), "name", None) or None
-                    last_exc = None
-                    break
-                except Exception as exc:
-                    # Fallback adicional: si es .xls-like y falla xlrd, intentar convertir a xlsx y leer con openpyxl
-                    if engine == "xlrd":
-                        try:
-                            from xls2xlsx import XLS2XLSX  # type: ignore
-                            fd, tmp_xlsx = tempfile.mkstemp(suffix=".xlsx")
-                            os.close(fd)
-                            XLS2XLSX(file_path).to_xlsx(tmp_xlsx)
-                            if sheet_name is not None:
-                                df = pd.read_excel(tmp_xlsx, sheet_name=sheet_name, engine="openpyxl")
-                                hoja = sheet_name
-                            else:
-                                df = pd.read_excel(tmp_xlsx, engine="openpyxl")
-                                hoja = getattr(getattr(df, "name", None), "name", None) or None
-                            last_exc = None
-                            # limpieza best-effort
-                            try:
-                                os.remove(tmp_xlsx)
-                            except Exception:
-                                pass
-                            break
-                        except Exception:
-                            last_exc = exc
-                            continue
-                    else:
-                        last_exc = exc
-                        continue
-            if last_exc is not None:
-                raise last_exc
+            # Sesión compartida con listar_hojas/generar_csvs: el libro se abre una sola vez
+            sesion = abrir_libro(file_path)
+            df, total_filas = sesion.vista_previa(sheet_name if sheet_name is not None else 0, nrows=PREVIEW_FILAS)
+            hoja = sheet_name
 
         # Construir preview con índice visible (#) sin desplazar las columnas reales.
         # Las columnas se muestran como letras excel en minúscula: a, b, c, ...
@@ -143,7 +98,7 @@ class ExcelRepository(ImportarExcelPort):
                 res.append(s)
             return res
 
-        df_preview = df.head(20).fillna("")
+        df_preview = df.head(PREVIEW_FILAS).fillna("")
         cols = _letters(df_preview.shape[1])
 
         def _is_header_like(r) -> bool:
@@ -187,69 +142,16 @@ class ExcelRepository(ImportarExcelPort):
             "sheet_name": hoja,
             "columnas": ["#"] + cols,
             "filas": preview_rows,
-            "total_filas": int(len(df)),
+            "total_filas": int(max(total_filas, len(df))),
         }
 
     def listar_hojas_excel(self, nombre_archivo: str) -> List[str]:
         """Devuelve la lista de hojas disponibles en el Excel subido."""
         file_path = self.storage.path(nombre_archivo)
-        _, ext = os.path.splitext(nombre_archivo.lower())
-
-        def _sniff_excel_format(path: str) -> Optional[str]:
-            try:
-                with open(path, "rb") as f:
-                    header = f.read(8)
-                if header.startswith(b"PK"):
-                    return "xlsx_like"
-                if header.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"):
-                    return "xls_like"
-            except Exception:
-                pass
-            return None
-
-        sniff = _sniff_excel_format(file_path)
-        candidates: List[Optional[str]] = []
-        if sniff == "xlsx_like":
-            candidates = ["openpyxl", "xlrd", None]
-        elif sniff == "xls_like":
-            candidates = ["xlrd", "openpyxl", None]
-        else:
-            if ext == ".xlsx":
-                candidates = ["openpyxl", "xlrd", None]
-            elif ext == ".xls":
-                candidates = ["xlrd", "openpyxl", None]
-            elif ext == ".ods":
-                candidates = ["odf", None]
-            else:
-                candidates = [None, "openpyxl", "xlrd"]
-
-        last_exc: Optional[Exception] = None
-        for engine in candidates:
-            try:
-                xls = pd.ExcelFile(file_path, engine=engine) if engine else pd.ExcelFile(file_path)
-                return list(xls.sheet_names)
-            except Exception as exc:
-                # Fallback adicional: si xlrd falla, convertir a xlsx y reintentar con openpyxl
-                if engine == "xlrd":
-                    try:
-                        from xls2xlsx import XLS2XLSX  # type: ignore
-                        fd, tmp_xlsx = tempfile.mkstemp(suffix=".xlsx")
-                        os.close(fd)
-                        XLS2XLSX(file_path).to_xlsx(tmp_xlsx)
-                        xls = pd.ExcelFile(tmp_xlsx, engine="openpyxl")
-                        sheets = list(xls.sheet_names)
-                        try:
-                            os.remove(tmp_xlsx)
-                        except Exception:
-                            pass
-                        return sheets
-                    except Exception:
-                        last_exc = exc
-                        continue
-                else:
-                    last_exc = exc
-                    continue
-        raise RuntimeError(f"No se pudo abrir el archivo {nombre_archivo}") from last_exc
+        try:
+            return abrir_libro(file_path).sheet_names
+        except RuntimeError as exc:
+            raise RuntimeError(f"No se pudo abrir el archivo {nombre_archivo}") from exc
 
     def get_configs_for_proveedor(self, proveedor_id: Any) -> List[Dict[str, Any]]:
         """
@@ -336,68 +238,11 @@ class ExcelRepository(ImportarExcelPort):
 
         file_path = self.storage.path(nombre_archivo)
         # Validar existencia de hojas (tolerando mayúsculas/minúsculas y espacios)
-        _, ext = os.path.splitext(nombre_archivo.lower())
-
-        def _sniff_excel_format(path: str) -> Optional[str]:
-            try:
-                with open(path, "rb") as f:
-                    header = f.read(8)
-                if header.startswith(b"PK"):
-                    return "xlsx_like"
-                if header.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"):
-                    return "xls_like"
-            except Exception:
-                pass
-            return None
-
-        sniff = _sniff_excel_format(file_path)
-        candidates: List[Optional[str]] = []
-        if sniff == "xlsx_like":
-            candidates = ["openpyxl", "xlrd", None]
-        elif sniff == "xls_like":
-            candidates = ["xlrd", "openpyxl", None]
-        else:
-            if ext == ".xlsx":
-                candidates = ["openpyxl", "xlrd", None]
-            elif ext == ".xls":
-                candidates = ["xlrd", "openpyxl", None]
-            elif ext == ".ods":
-                candidates = ["odf", None]
-            else:
-                candidates = [None, "openpyxl", "xlrd"]
-
-        disponibles_lista: List[str] = []
-        last_exc: Optional[Exception] = None
-        for engine in candidates:
-            try:
-                xls = pd.ExcelFile(file_path, engine=engine) if engine else pd.ExcelFile(file_path)
-                disponibles_lista = list(xls.sheet_names)
-                last_exc = None
-                break
-            except Exception as exc:
-                # Fallback adicional: si xlrd falla, convertir a xlsx y reintentar con openpyxl
-                if engine == "xlrd":
-                    try:
-                        from xls2xlsx import XLS2XLSX  # type: ignore
-                        fd, tmp_xlsx = tempfile.mkstemp(suffix=".xlsx")
-                        os.close(fd)
-                        XLS2XLSX(file_path).to_xlsx(tmp_xlsx)
-                        xls = pd.ExcelFile(tmp_xlsx, engine="openpyxl")
-                        disponibles_lista = list(xls.sheet_names)
-                        try:
-                            os.remove(tmp_xlsx)
-                        except Exception:
-                            pass
-                        last_exc = None
-                        break
-                    except Exception:
-                        last_exc = exc
-                        continue
-                else:
-                    last_exc = exc
-                    continue
-        if last_exc is not None:
-            raise RuntimeError(f"No se pudo abrir el archivo {nombre_archivo}") from last_exc
+        try:
+            sesion = abrir_libro(file_path)
+        except RuntimeError as exc:
+            raise RuntimeError(f"No se pudo abrir el archivo {nombre_archivo}") from exc
+        disponibles_lista: List[str] = sesion.sheet_names
 
         # Normalizador básico: recorta y compara case-insensitive
         def _norm(s: str) -> str:
@@ -448,6 +293,7 @@ class ExcelRepository(ImportarExcelPort):
             output_dir=output_dir,
             sheet_name=sheet_list,
             start_row=start_rows,
+            sesion=sesion,
         )
         # out_paths es lista de rutas alineada a sheet_list
         if not isinstance(out_paths, list):
@@ -482,6 +328,7 @@ class ExcelRepository(ImportarExcelPort):
         try:
             _, ext = os.path.splitext(nombre_archivo.lower())
             if ext != ".csv":
+                descartar_libro(file_path)
                 # Usar el storage para borrar por nombre (respetando MEDIA_ROOT)
                 self.storage.delete(nombre_archivo)
         except Exception:
@@ -508,101 +355,402 @@ class ExcelRepository(ImportarExcelPort):
                 return max(0, idx - 1)
             return default
 
-    def procesar_pendientes(self) -> Dict[str, Any]:
+    def _indices_columnas(self, config: Any) -> Dict[str, Optional[int]]:
+        """Índices 0-based de columnas de la configuración, como kwargs de `importar_csv`."""
+        col_codigo_idx = self._col_to_index(getattr(config, "col_codigo", None), 0)
+        col_desc_idx = self._col_to_index(getattr(config, "col_descripcion", None), 1)
+        col_precio_idx = self._col_to_index(getattr(config, "col_precio", None), 2)
+        col_cant_idx = self._col_to_index(getattr(config, "col_cant", None), -1)
+        if col_cant_idx < 0:
+            col_cant_idx = None
+        col_iva_idx = self._col_to_index(getattr(config, "col_iva", None), -1)
+        if col_iva_idx < 0:
+            col_iva_idx = None
+        col_cod_barras_idx = self._col_to_index(getattr(config, "col_cod_barras", None), -1)
+        if col_cod_barras_idx < 0:
+            col_cod_barras_idx = None
+        col_marca_idx = self._col_to_index(getattr(config, "col_marca", None), -1)
+        if col_marca_idx < 0:
+            col_marca_idx = None
+
+        try:
+            logger.info(
+                "Config columnas (letras): codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s | índices (0-based): codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s",
+                getattr(config, "col_codigo", None),
+                getattr(config, "col_descripcion", None),
+                getattr(config, "col_precio", None),
+                getattr(config, "col_cant", None),
+                getattr(config, "col_iva", None),
+                getattr(config, "col_cod_barras", None),
+                getattr(config, "col_marca", None),
+                col_codigo_idx,
+                col_desc_idx,
+                col_precio_idx,
+                col_cant_idx,
+                col_iva_idx,
+                col_cod_barras_idx,
+                col_marca_idx,
+            )
+        except Exception:
+            pass
+
+        return {
+            "col_codigo_idx": col_codigo_idx,
+            "col_descripcion_idx": col_desc_idx,
+            "col_precio_idx": col_precio_idx,
+            "col_cant_idx": col_cant_idx,
+            "col_iva_idx": col_iva_idx,
+            "col_cod_barras_idx": col_cod_barras_idx,
+            "col_marca_idx": col_marca_idx,
+        }
+
+    def importar_pendiente(
+        self,
+        archivo_id: Any,
+        max_lotes: Optional[int] = None,
+        al_confirmar: Optional[Callable[[], None]] = None,
+        reclamo: Optional[str] = None,
+        asr_tocados: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
         """
-        Procesa todos los CSV pendientes en `ArchivoPendiente` (procesado=False)
-        usando las configuraciones almacenadas. Marca como procesados al finalizar.
+        Importa un `ArchivoPendiente` por chunks de `IMPORTACIONES_CHUNK_SIZE`
+        filas, retomando desde su punto de control.
+
+        Cada chunk confirma junto con `fila_confirmada`/`stats_confirmadas`: si
+        el proceso muere a mitad del archivo, la próxima ejecución sigue desde
+        la última fila confirmada en lugar de rehacerlo entero. `procesado`
+        pasa a True sólo cuando se confirmó el archivo completo.
+
+        Con `max_lotes` importa a lo sumo esa cantidad de chunks y devuelve
+        None si pueden quedar filas; al terminar devuelve el detalle con los
+        totales acumulados de todas las ejecuciones. `al_confirmar()` se
+        llama tras cada punto de control (p.ej. para renovar un lock).
+
+        El archivo se importa reclamado (`reclamo`, de `reclamar_archivo`, o
+        uno propio si no se pasa): si otro proceso lo tiene, devuelve None sin
+        importar nada. Cada punto de control renueva el reclamo y al salir se
+        suelta; si venció y otro lo tomó, el chunk en curso se revierte
+        (`ReclamoPerdido`).
+
+        `asr_tocados`, si se pasa, acumula los ids de ArticuloSinRevisar que
+        creó o cambió esta ejecución (aunque el archivo no termine), para
+        recalcular sólo sus sugerencias de mapeo.
         """
-        Proveedor, ConfigImportacion, ArchivoPendiente, PrecioDeLista, ArticuloSinRevisar, Descuento = self._load_models()
+        _, _, ArchivoPendiente, *_ = self._load_models()
 
-        from ..services.importador_csv import importar_csv
+        from .bloqueos import liberar_archivo, reclamar_archivo
 
-        pendientes = ArchivoPendiente.objects.select_related("proveedor", "config_usada").filter(procesado=False)
+        ap = ArchivoPendiente.objects.select_related("proveedor", "config_usada").get(pk=archivo_id)
+        if ap.procesado:
+            return self._detalle_pendiente(ap, ap.stats_confirmadas or {})
+        if reclamo is None:
+            reclamo = reclamar_archivo(ap.pk)
+            if reclamo is None:
+                logger.info("Pendiente %s reclamado por otro proceso", ap.pk)
+                return None
         try:
-            logger.info("Procesando pendientes: count=%s", pendientes.count())
-        except Exception:
-            pass
+            return self._importar_reclamado(ap, reclamo, max_lotes, al_confirmar, asr_tocados)
+        finally:
+            liberar_archivo(ap.pk, reclamo)
 
-        resultados: List[Dict[str, Any]] = []
-        for ap in pendientes:
-            proveedor = ap.proveedor
-            config = ap.config_usada
-
-            # Calcular índices de columnas a partir de la configuración
-            col_codigo_idx = self._col_to_index(getattr(config, "col_codigo", None), 0)
-            col_desc_idx = self._col_to_index(getattr(config, "col_descripcion", None), 1)
-            col_precio_idx = self._col_to_index(getattr(config, "col_precio", None), 2)
-            col_cant_idx = self._col_to_index(getattr(config, "col_cant", None), -1)
-            if col_cant_idx < 0:
-                col_cant_idx = None
-            col_iva_idx = self._col_to_index(getattr(config, "col_iva", None), -1)
-            if col_iva_idx < 0:
-                col_iva_idx = None
-            col_cod_barras_idx = self._col_to_index(getattr(config, "col_cod_barras", None), -1)
-            if col_cod_barras_idx < 0:
-                col_cod_barras_idx = None
-            col_marca_idx = self._col_to_index(getattr(config, "col_marca", None), -1)
-            if col_marca_idx < 0:
-                col_marca_idx = None
+    def _importar_reclamado(
+        self,
+        ap: Any,
+        reclamo: str,
+        max_lotes: Optional[int],
+        al_confirmar: Optional[Callable[[], None]],
+        asr_tocados: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Cuerpo de `importar_pendiente` con el archivo ya reclamado.
+
+        Cada punto de control publica además el progreso (filas por segundo
+        de esta ejecución y hora), que lee `progreso_pendientes`.
+        """
+        from ..services.importador_csv import importar_csv
+        from .bloqueos import confirmar_reclamado
 
+        previas = dict(ap.stats_confirmadas or {})
+        if ap.filas_totales is None:
+            # Se cuenta una vez por archivo; sin total el monitor muestra progreso sin porcentaje
             try:
-                logger.info(
-                    "Config columnas (letras): codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s | índices (0-based): codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s",
-                    getattr(config, "col_codigo", None),
-                    getattr(config, "col_descripcion", None),
-                    getattr(config, "col_precio", None),
-                    getattr(config, "col_cant", None),
-                    getattr(config, "col_iva", None),
-                    getattr(config, "col_cod_barras", None),
-                    getattr(config, "col_marca", None),
-                    col_codigo_idx,
-                    col_desc_idx,
-                    col_precio_idx,
-                    (col_cant_idx if col_cant_idx is not None else None),
-                    (col_iva_idx if col_iva_idx is not None else None),
-                    (col_cod_barras_idx if col_cod_barras_idx is not None else None),
-                    (col_marca_idx if col_marca_idx is not None else None),
-                )
-            except Exception:
+                ap.filas_totales = _contar_filas_csv(ap.ruta_csv)
+            except OSError:
                 pass
+            else:
+                confirmar_reclamado(ap.pk, reclamo, filas_totales=ap.filas_totales)
+        inicio = time.monotonic()
+
+        def _progreso(stats: Any) -> Dict[str, Any]:
+            transcurrido = max(time.monotonic() - inicio, 1e-3)
+            return {
+                "filas_por_segundo": round((getattr(stats, "filas_leidas", 0) or 0) / transcurrido, 1),
+                "progreso_actualizado": timezone.now(),
+            }
+
+        def _acumuladas(stats: Any) -> Dict[str, int]:
+            return {
+                campo: int(previas.get(campo) or 0) + int(getattr(stats, campo, 0) or 0)
+                for campo in _CAMPOS_STATS
+            }
+
+        def _confirmar(stats: Any) -> None:
+            # Corre dentro de la transacción del chunk (modo bulk)
+            progreso = _progreso(stats)
+            confirmar_reclamado(
+                ap.pk,
+                reclamo,
+                fila_confirmada=stats.ultima_fila,
+                byte_confirmado=stats.ultimo_byte,
+                stats_confirmadas=_acumuladas(stats),
+                **progreso,
+            )
+            logger.info(
+                "Progreso %s: fila %s de %s (%s filas/s)",
+                ap.ruta_csv, stats.ultima_fila, ap.filas_totales, progreso["filas_por_segundo"],
+            )
+            if al_confirmar is not None:
+                al_confirmar()
+
+        chunk_size = int(getattr(settings, "IMPORTACIONES_CHUNK_SIZE", 2000))
+        if ap.fila_confirmada:
+            logger.info("Retomando %s desde la fila %s", ap.ruta_csv, ap.fila_confirmada + 1)
+        stats = importar_csv(
+            proveedor=ap.proveedor,
+            ruta_csv=ap.ruta_csv,
+            # start_row ya fue aplicado al generar el CSV: sólo se saltean las filas
+            # confirmadas, con seek al byte donde terminan
+            start_row=ap.fila_confirmada + 1,
+            desde_byte=ap.byte_confirmado if ap.fila_confirmada else 0,
+            **self._indices_columnas(ap.config_usada),
+            dry_run=False,
+            bulk=getattr(settings, "IMPORTACIONES_BULK", False),
+            chunk_size=chunk_size,
+            max_lotes=max_lotes,
+            al_confirmar_lote=_confirmar,
+        )
+        if asr_tocados is not None:
+            asr_tocados.update(getattr(stats, "asr_tocados", ()))
+        if max_lotes is not None and (getattr(stats, "filas_leidas", 0) or 0) >= max_lotes * chunk_size:
+            return None
 
-            with transaction.atomic():
-                stats = importar_csv(
-                    proveedor=proveedor,
-                    ruta_csv=ap.ruta_csv,
-                    start_row=0,  # start_row ya fue aplicado al generar el CSV
-                    col_codigo_idx=col_codigo_idx,
-                    col_descripcion_idx=col_desc_idx,
-                    col_precio_idx=col_precio_idx,
-                    col_cant_idx=col_cant_idx,
-                    col_iva_idx=col_iva_idx,
-                    col_cod_barras_idx=col_cod_barras_idx,
-                    col_marca_idx=col_marca_idx,
-                    dry_run=False,
-                )
-                # marcar como procesado
-                ap.procesado = True
-                ap.save(update_fields=["procesado"])
+        ap.procesado = True
+        ap.fila_confirmada = max(ap.fila_confirmada, getattr(stats, "ultima_fila", 0) or 0)
+        ap.stats_confirmadas = _acumuladas(stats)
+        confirmar_reclamado(
+            ap.pk,
+            reclamo,
+            procesado=True,
+            fila_confirmada=ap.fila_confirmada,
+            stats_confirmadas=ap.stats_confirmadas,
+            **_progreso(stats),
+        )
 
-            try:
-                logger.info(
-                    "Resultado importación: leidas=%s validas=%s descartadas=%s",
-                    getattr(stats, "filas_leidas", None),
-                    getattr(stats, "filas_validas", None),
-                    getattr(stats, "filas_descartadas", None),
-                )
-            except Exception:
-                pass
+        logger.info(
+            "Resultado importación: leidas=%s validas=%s descartadas=%s creadas=%s actualizadas=%s sin_cambios=%s",
+            *(ap.stats_confirmadas[campo] for campo in _CAMPOS_STATS),
+        )
+        return self._detalle_pendiente(ap, ap.stats_confirmadas)
+
+    @staticmethod
+    def _detalle_pendiente(ap: Any, totales: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "proveedor_id": ap.proveedor_id,
+            "ruta_csv": ap.ruta_csv,
+            **{campo: totales.get(campo) for campo in _CAMPOS_STATS},
+        }
+
+    def procesar_pendientes(
+        self,
+        max_lotes: Optional[int] = None,
+        proveedor_id: Any = None,
+    ) -> Dict[str, Any]:
+        """
+        Procesa los CSV pendientes en `ArchivoPendiente` (procesado=False)
+        usando las configuraciones almacenadas, cada uno desde su punto de
+        control (ver `importar_pendiente`). Marca como procesados al finalizar.
+
+        Los archivos se agrupan por proveedor y cada grupo se importa con el
+        lock del proveedor tomado (ver `adapters.bloqueos`), igual que en el
+        modo en paralelo: la tarea secuencial, "Forzar procesamiento", el
+        comando y las tareas por proveedor nunca importan el mismo proveedor a
+        la vez.
+
+        Con `max_lotes` cada archivo importa a lo sumo esa cantidad de chunks y
+        el recorrido se corta en el primero que no terminó (`completo=False`):
+        la siguiente llamada lo retoma. Con `proveedor_id`, sólo los de ese
+        proveedor (en orden de llegada).
+
+        Los proveedores ocupados (o con su próximo archivo reclamado por otro
+        proceso) se saltean pero el resultado queda `completo=False`, con
+        `reintentar_en` = segundos hasta que vence ese lock: su dueño puede
+        estar terminando o haber muerto sin soltarlo, y los archivos nuevos
+        del proveedor quedarían sin importar.
+
+        `asr_ids`: ArticuloSinRevisar creados o cambiados (ver `importar_pendiente`).
+        """
+        from .bloqueos import bloqueo_proveedor, espera_bloqueo
+
+        proveedores = [proveedor_id] if proveedor_id is not None else self.proveedores_con_pendientes()
+        resultados: List[Dict[str, Any]] = []
+        asr_tocados: Set[int] = set()
+        completo = True
+        reintentar_en = 0
+        for pid in proveedores:
+            with bloqueo_proveedor(pid) as bloqueo:
+                if bloqueo is None:
+                    espera = espera_bloqueo(pid)
+                    logger.info("Proveedor %s ocupado por otro proceso: se reintenta en %ss", pid, espera)
+                    completo = False
+                    reintentar_en = max(reintentar_en, espera, 1)
+                    continue
+                parcial = self._procesar_con_bloqueo(pid, bloqueo, max_lotes, asr_tocados)
+            resultados.extend(parcial["detalles"])
+            if not parcial["completo"]:
+                completo = False
+                if not parcial["reintentar_en"]:
+                    # Cortado por `max_lotes`: la siguiente llamada sigue ya mismo
+                    reintentar_en = 0
+                    break
+                reintentar_en = max(reintentar_en, parcial["reintentar_en"])
+
+        return {
+            "status": "ok",
+            "procesados": len(resultados),
+            "detalles": resultados,
+            "completo": completo,
+            "reintentar_en": reintentar_en,
+            "asr_ids": sorted(asr_tocados),
+        }
+
+    def _procesar_con_bloqueo(
+        self, proveedor_id: Any, bloqueo: Any, max_lotes: Optional[int], asr_tocados: Set[int]
+    ) -> Dict[str, Any]:
+        """Pendientes de un proveedor, en orden de llegada, con su lock ya tomado (se renueva en cada punto de control).
+
+        Si un archivo está reclamado por otro proceso no se sigue con los
+        posteriores del proveedor (se importan siempre en orden): `completo`
+        queda en False con `reintentar_en` = segundos hasta que vence el
+        reclamo. Cortado por `max_lotes`, `reintentar_en` es 0.
+        """
+        _, _, ArchivoPendiente, *_ = self._load_models()
+
+        from .bloqueos import espera_reclamo, reclamar_archivo
+
+        pendientes = ArchivoPendiente.objects.filter(procesado=False, proveedor_id=proveedor_id).order_by("id")
+        archivo_ids = list(pendientes.values_list("id", flat=True))
+        logger.info("Procesando pendientes del proveedor %s: count=%s", proveedor_id, len(archivo_ids))
 
-            resultados.append({
-                "proveedor_id": proveedor.pk,
-                "ruta_csv": ap.ruta_csv,
-                "filas_leidas": getattr(stats, "filas_leidas", None),
-                "filas_validas": getattr(stats, "filas_validas", None),
-                "filas_descartadas": getattr(stats, "filas_descartadas", None),
+        resultados: List[Dict[str, Any]] = []
+        for archivo_id in archivo_ids:
+            reclamo = reclamar_archivo(archivo_id)
+            if reclamo is None:
+                # Los siguientes del proveedor son listas más nuevas: importarlas antes
+                # que este dejaría que sus precios los pise la lista vieja al terminar
+                logger.info("Pendiente %s reclamado por otro proceso: se saltean los del proveedor %s", archivo_id, proveedor_id)
+                return {"detalles": resultados, "completo": False, "reintentar_en": max(espera_reclamo(archivo_id), 1)}
+            detalle = self.importar_pendiente(
+                archivo_id, max_lotes=max_lotes, al_confirmar=bloqueo.renovar, reclamo=reclamo, asr_tocados=asr_tocados
+            )
+            if detalle is None:
+                return {"detalles": resultados, "completo": False, "reintentar_en": 0}
+            resultados.append(detalle)
+        return {"detalles": resultados, "completo": True, "reintentar_en": 0}
+
+    def progreso_pendientes(self) -> List[Dict[str, Any]]:
+        """
+        Progreso de los archivos sin procesar y de los terminados en los
+        últimos `IMPORTACIONES_PROGRESO_RECIENTES` segundos, leído de los
+        puntos de control (una consulta; no consulta a Celery).
+
+        Por archivo: filas leídas/válidas/creadas/actualizadas, porcentaje,
+        filas por segundo y segundos estimados para terminar (`eta_segundos`,
+        sólo mientras se está importando).
+        """
+        from datetime import timedelta
+
+        from django.db.models import Q
+
+        _, _, ArchivoPendiente, *_ = self._load_models()
+        ahora = timezone.now()
+        recientes = timedelta(seconds=int(getattr(settings, "IMPORTACIONES_PROGRESO_RECIENTES", 600)))
+        archivos = (
+            ArchivoPendiente.objects.select_related("proveedor")
+            .filter(Q(procesado=False) | Q(progreso_actualizado__gte=ahora - recientes))
+            .order_by("procesado", "id")
+        )
+        resultado: List[Dict[str, Any]] = []
+        for ap in archivos:
+            stats = ap.stats_confirmadas or {}
+            en_curso = not ap.procesado and ap.reclamado_hasta is not None and ap.reclamado_hasta >= ahora
+            porcentaje = None
+            if ap.procesado:
+                porcentaje = 100.0
+            elif ap.filas_totales:
+                porcentaje = round(min(100.0, 100.0 * ap.fila_confirmada / ap.filas_totales), 1)
+            eta = None
+            if en_curso and ap.filas_totales and ap.filas_por_segundo:
+                eta = max(0, round((ap.filas_totales - ap.fila_confirmada) / ap.filas_por_segundo))
+            resultado.append({
+                "id": ap.pk,
+                "proveedor": ap.proveedor.nombre,
+                "hoja": ap.hoja_origen,
+                "procesado": ap.procesado,
+                "en_curso": en_curso,
+                "filas_totales": ap.filas_totales,
+                "fila_confirmada": ap.fila_confirmada,
+                "porcentaje": porcentaje,
+                **{campo: stats.get(campo, 0) for campo in ("filas_leidas", "filas_validas", "creadas", "actualizadas")},
+                "filas_por_segundo": ap.filas_por_segundo,
+                "eta_segundos": eta,
+                "actualizado": ap.progreso_actualizado.isoformat() if ap.progreso_actualizado else None,
             })
+        return resultado
+
+    def proveedores_con_pendientes(self) -> List[Any]:
+        """Ids de proveedores con archivos sin procesar, por orden de su archivo más antiguo."""
+        from django.db.models import Min
+
+        _, _, ArchivoPendiente, *_ = self._load_models()
+        return list(
+            ArchivoPendiente.objects.filter(procesado=False)
+            .values("proveedor_id")
+            .annotate(primero=Min("id"))
+            .order_by("primero")
+            .values_list("proveedor_id", flat=True)
+        )
 
-        return {"status": "ok", "procesados": len(resultados), "detalles": resultados}
+    def procesar_pendientes_de_proveedor(self, proveedor_id: Any) -> Dict[str, Any]:
+        """
+        Procesa los pendientes de un proveedor con su lock tomado (ver
+        `adapters.bloqueos`): dos workers nunca importan el mismo proveedor a
+        la vez. El lock se renueva en cada punto de control.
+
+        Si otro worker lo tiene, no importa nada (`ocupado=True`) y queda
+        `completo=False` con `reintentar_en` = segundos hasta que vence su
+        lock: ese worker sigue con los pendientes nuevos, pero puede estar en
+        su último chunk o haber muerto sin soltarlo. Lo mismo si el próximo
+        archivo está reclamado por otro proceso.
+        """
+        from .bloqueos import bloqueo_proveedor, espera_bloqueo
+
+        with bloqueo_proveedor(proveedor_id) as bloqueo:
+            if bloqueo is None:
+                espera = max(espera_bloqueo(proveedor_id), 1)
+                logger.info("Proveedor %s ocupado por otro worker: se reintenta en %ss", proveedor_id, espera)
+                return {
+                    "status": "ok", "procesados": 0, "detalles": [], "completo": False,
+                    "reintentar_en": espera, "asr_ids": [], "ocupado": True,
+                }
+            resultado = {"status": "ok", "procesados": 0, "detalles": [], "completo": True, "reintentar_en": 0}
+            asr_tocados: Set[int] = set()
+            while True:
+                parcial = self._procesar_con_bloqueo(proveedor_id, bloqueo, None, asr_tocados)
+                resultado["procesados"] += len(parcial["detalles"])
+                resultado["detalles"].extend(parcial["detalles"])
+                if not parcial["detalles"] or not parcial["completo"]:
+                    resultado["completo"], resultado["reintentar_en"] = parcial["completo"], parcial["reintentar_en"]
+                    resultado["asr_ids"] = sorted(asr_tocados)
+                    return resultado
 
     def procesar_excel(self, proveedor_id: Any, nombre_archivo: str) -> Dict[str, Any]:
         """
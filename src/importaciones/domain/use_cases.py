@@ -7,7 +7,7 @@ Este caso de uso es Python puro y delega la interacción a un puerto
 dependencias ni lógica específica de Django.
 """
 
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional
 
 from ..ports.interfaces import ImportarExcelPort
 
@@ -32,7 +32,26 @@ class ImportarExcelPort:  # hint-only interface (no implementación)
     ) -> List[Tuple[str, str]]:  # pragma: no cover - interface
         raise NotImplementedError
 
-    def procesar_pendientes(self) -> Dict[str, Any]:  # pragma: no cover - interface
+    def procesar_pendientes(self, max_lotes: Optional[int] = None, proveedor_id: Any = None) -> Dict[str, Any]:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def proveedores_con_pendientes(self) -> List[Any]:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def procesar_pendientes_de_proveedor(self, proveedor_id: Any) -> Dict[str, Any]:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def importar_pendiente(
+        self,
+        archivo_id: Any,
+        max_lotes: Optional[int] = None,
+        al_confirmar: Optional[Callable[[], None]] = None,
+        reclamo: Optional[str] = None,
+        asr_tocados: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Any]]:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    def progreso_pendientes(self) -> List[Dict[str, Any]]:  # pragma: no cover - interface
         raise NotImplementedError
 
     def get_configs_for_proveedor(self, proveedor_id: Any) -> List[Dict[str, Any]]:  # pragma: no cover - interface
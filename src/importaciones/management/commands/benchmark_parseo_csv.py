@@ -0,0 +1,110 @@
+import csv
+import os
+import random
+import tempfile
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el parseo fila a fila (_parsear_fila) con el parseo columnar (parsear_columnas) "
+        "sobre una lista sintética o un CSV existente. No escribe en la base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=100_000, help="Filas de la lista sintética.")
+        parser.add_argument("--csv", default=None, help="CSV a usar en lugar de la lista sintética.")
+        parser.add_argument("--start-row", type=int, default=2, help="Primera fila de datos (1-based).")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Filas por bloque del parseo columnar.")
+        parser.add_argument("--repeticiones", type=int, default=3, help="Se informa el mejor tiempo.")
+
+    def handle(self, *args: Any, **options: Any):
+        from itertools import islice
+
+        from importaciones.services.importador_csv import _parsear_fila, leer_csv_en_filas
+        from importaciones.services.parseo_columnar import parsear_columnas
+
+        ruta = options.get("csv")
+        temporal = None
+        if not ruta:
+            temporal = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8", newline="")
+            self._escribir_lista_sintetica(temporal, options["filas"])
+            temporal.close()
+            ruta = temporal.name
+
+        idxs = dict(
+            col_codigo_idx=0,
+            col_descripcion_idx=1,
+            col_precio_idx=2,
+            col_cant_idx=3,
+            col_iva_idx=4,
+            col_cod_barras_idx=5,
+            col_marca_idx=6,
+        )
+        start_row = options["start_row"]
+        chunk_size = max(1, options["chunk_size"])
+
+        def bloques():
+            filas = leer_csv_en_filas(ruta, start_row)
+            while True:
+                crudas = list(islice(filas, chunk_size))
+                if not crudas:
+                    return
+                yield crudas
+
+        # Como en la importación, cada bloque se consume y se descarta
+        def por_fila(bloque):
+            return [f for f in (_parsear_fila(n, row, **idxs) for n, row in bloque) if f is not None]
+
+        def columnar(bloque):
+            return parsear_columnas(bloque, **idxs)
+
+        try:
+            for bloque in bloques():
+                # repr: Decimal("NaN") != Decimal("NaN")
+                if [repr(f) for f in por_fila(bloque)] != [repr(f) for f in columnar(bloque)]:
+                    self.stderr.write(self.style.ERROR(f"Los parseos difieren en el bloque que empieza en la fila {bloque[0][0]}."))
+                    return
+
+            tiempos = {}
+            for nombre, fn in (("fila a fila", por_fila), ("columnar", columnar)):
+                mejor = None
+                for _ in range(max(1, options["repeticiones"])):
+                    validas = 0
+                    t0 = time.perf_counter()
+                    for bloque in bloques():
+                        validas += len(fn(bloque))
+                    dt = time.perf_counter() - t0
+                    mejor = dt if mejor is None else min(mejor, dt)
+                tiempos[nombre] = mejor
+                self.stdout.write(f"{nombre:>12}: {mejor:.3f}s ({validas} filas válidas)")
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Resultados idénticos. Aceleración: x{tiempos['fila a fila'] / tiempos['columnar']:.1f}"
+                )
+            )
+        finally:
+            if temporal is not None:
+                os.remove(temporal.name)
+
+    @staticmethod
+    def _escribir_lista_sintetica(f, filas: int) -> None:
+        """Lista de precios con la distribución típica: pocos bultos/IVA/marcas distintos."""
+        rnd = random.Random(42)
+        writer = csv.writer(f)
+        writer.writerow(["codigo", "descripcion", "precio", "bulto", "iva", "barras", "marca"])
+        marcas = ["ACME", "Tramontina", "Stanley", "", "Bahco"]
+        for i in range(filas):
+            writer.writerow([
+                f"{i:06d}",
+                f"Artículo de ferretería {i}",
+                f"{rnd.randint(1, 5000)}.{rnd.choice(['00', '50', '99'])}",
+                rnd.choice(["x1", "x6", "10u", "12", ""]),
+                rnd.choice(["21%", "10,5", "0.21", ""]),
+                f"779{i:010d}" if i % 4 == 0 else "",
+                rnd.choice(marcas),
+            ])
@@ -1,10 +1,9 @@
 import os
 import logging
-from typing import Any
+from typing import Any, Dict, List
 
 from django.core.management.base import BaseCommand
 from django.apps import apps
-from django.db import transaction
 
 logger = logging.getLogger("importaciones.cmd")
 
@@ -22,16 +21,15 @@ class Command(BaseCommand):
 
     def handle(self, *args: Any, **options: Any):
         ArchivoPendiente = apps.get_model("importaciones", "ArchivoPendiente")
-        ConfigImportacion = apps.get_model("importaciones", "ConfigImportacion")
-        Proveedor = apps.get_model("proveedores", "Proveedor")
 
-        # Importador CSV
-        from importaciones.services.importador_csv import importar_csv
+        # Misma importación que la tarea: por chunks y retomando desde el punto de control
+        from importaciones.adapters.bloqueos import bloqueo_proveedor
+        from importaciones.adapters.repository import ExcelRepository
 
         # Usar siempre la base por defecto
         qs = (
             ArchivoPendiente.objects
-            .select_related("proveedor", "config_usada")
+            .select_related("proveedor")
             .filter(procesado=False)
             .order_by("fecha_subida")
         )
@@ -46,81 +44,36 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.NOTICE(f"Procesando {total} pendiente(s)..."))
 
-        def col_to_index(value, default):
-            if value is None:
-                return default
-            try:
-                return int(value)
-            except Exception:
-                s = str(value).strip().upper()
-                if not s:
-                    return default
-                if s.isalpha():
-                    idx = 0
-                    for ch in s:
-                        idx = idx * 26 + (ord(ch) - ord("A") + 1)
-                    return max(0, idx - 1)
-                return default
+        # Agrupados por proveedor (en orden de llegada) para importar cada uno
+        # con su lock tomado, como la tarea: nunca dos procesos sobre el mismo proveedor
+        por_proveedor: Dict[Any, List[Any]] = {}
+        for ap in qs:
+            por_proveedor.setdefault(ap.proveedor_id, []).append(ap)
 
+        repo = ExcelRepository()
         procesados = 0
-        for ap in qs:
-            proveedor = ap.proveedor  # type: Proveedor
-            config = ap.config_usada  # type: ConfigImportacion
-
-            col_codigo_idx = col_to_index(getattr(config, "col_codigo", None), 0)
-            col_desc_idx = col_to_index(getattr(config, "col_descripcion", None), 1)
-            col_precio_idx = col_to_index(getattr(config, "col_precio", None), 2)
-            col_cant_idx = col_to_index(getattr(config, "col_cant", None), -1)
-            if col_cant_idx < 0:
-                col_cant_idx = None
-            col_iva_idx = col_to_index(getattr(config, "col_iva", None), -1)
-            if col_iva_idx < 0:
-                col_iva_idx = None
-            col_cod_barras_idx = col_to_index(getattr(config, "col_cod_barras", None), -1)
-            if col_cod_barras_idx < 0:
-                col_cod_barras_idx = None
-            col_marca_idx = col_to_index(getattr(config, "col_marca", None), -1)
-            if col_marca_idx < 0:
-                col_marca_idx = None
-
-            self.stdout.write(f"- {proveedor.nombre} :: {ap.hoja_origen} -> {ap.ruta_csv}")
-            try:
-                logger.info(
-                    "Idxs usados (0-based): codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s | letras: codigo=%s desc=%s precio=%s cant=%s iva=%s barras=%s marca=%s",
-                    col_codigo_idx,
-                    col_desc_idx,
-                    col_precio_idx,
-                    (col_cant_idx if col_cant_idx is not None else None),
-                    (col_iva_idx if col_iva_idx is not None else None),
-                    (col_cod_barras_idx if col_cod_barras_idx is not None else None),
-                    (col_marca_idx if col_marca_idx is not None else None),
-                    getattr(config, "col_codigo", None),
-                    getattr(config, "col_descripcion", None),
-                    getattr(config, "col_precio", None),
-                    getattr(config, "col_cant", None),
-                    getattr(config, "col_iva", None),
-                    getattr(config, "col_cod_barras", None),
-                    getattr(config, "col_marca", None),
-                )
-            except Exception:
-                pass
-
-            with transaction.atomic():
-                stats = importar_csv(
-                    proveedor=proveedor,
-                    ruta_csv=ap.ruta_csv,
-                    start_row=0,  # start_row aplicado al generar el CSV
-                    col_codigo_idx=col_codigo_idx,
-                    col_descripcion_idx=col_desc_idx,
-                    col_precio_idx=col_precio_idx,
-                    col_cant_idx=col_cant_idx,
-                    col_iva_idx=col_iva_idx,
-                    col_cod_barras_idx=col_cod_barras_idx,
-                    col_marca_idx=col_marca_idx,
-                    dry_run=False,
-                )
-                ap.procesado = True
-                ap.save(update_fields=["procesado"])
+        for proveedor_id, archivos in por_proveedor.items():
+            with bloqueo_proveedor(proveedor_id) as bloqueo:
+                if bloqueo is None:
+                    self.stdout.write(
+                        self.style.WARNING(f"Omitido {archivos[0].proveedor.nombre}: lo está importando otro proceso")
+                    )
+                    continue
+                procesados += self._importar(repo, archivos, bloqueo)
+
+        self.stdout.write(self.style.SUCCESS(f"Finalizado. Pendientes procesados: {procesados}"))
+
+    def _importar(self, repo: Any, archivos: List[Any], bloqueo: Any) -> int:
+        procesados = 0
+        for ap in archivos:
+            self.stdout.write(f"- {ap.proveedor.nombre} :: {ap.hoja_origen} -> {ap.ruta_csv}")
+            if ap.fila_confirmada:
+                self.stdout.write(f"  retomando desde la fila {ap.fila_confirmada + 1}")
+            stats = repo.importar_pendiente(ap.pk, al_confirmar=bloqueo.renovar)
+            if stats is None:
+                # Los siguientes del proveedor son más nuevos: no adelantarlos a este
+                self.stdout.write(self.style.WARNING("  Omitido (y los siguientes del proveedor): lo está importando otro proceso"))
+                break
 
             # Intentar borrar el archivo CSV
             try:
@@ -131,9 +84,9 @@ class Command(BaseCommand):
 
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"  OK - leidas={getattr(stats, 'filas_leidas', '-')}, validas={getattr(stats, 'filas_validas', '-')}, descartadas={getattr(stats, 'filas_descartadas', '-')}"
+                    f"  OK - leidas={stats['filas_leidas']}, validas={stats['filas_validas']}, descartadas={stats['filas_descartadas']}, "
+                    f"nuevas={stats['creadas']}, actualizadas={stats['actualizadas']}, sin_cambios={stats['sin_cambios']}"
                 )
             )
             procesados += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Finalizado. Pendientes procesados: {procesados}"))
+        return procesados
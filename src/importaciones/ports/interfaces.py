@@ -4,7 +4,7 @@ Definiciones de puertos del dominio de importaciones (Python puro).
 No depende de Django ni de infraestructura.
 """
 
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Set, Tuple, Optional
 
 
 class ImportarExcelPort:  # pragma: no cover - interfaz
@@ -31,7 +31,26 @@ class ImportarExcelPort:  # pragma: no cover - interfaz
     ) -> List[Tuple[str, str]]:
         raise NotImplementedError
 
-    def procesar_pendientes(self) -> Dict[str, Any]:
+    def procesar_pendientes(self, max_lotes: Optional[int] = None, proveedor_id: Any = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def proveedores_con_pendientes(self) -> List[Any]:
+        raise NotImplementedError
+
+    def procesar_pendientes_de_proveedor(self, proveedor_id: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def importar_pendiente(
+        self,
+        archivo_id: Any,
+        max_lotes: Optional[int] = None,
+        al_confirmar: Optional[Callable[[], None]] = None,
+        reclamo: Optional[str] = None,
+        asr_tocados: Optional[Set[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def progreso_pendientes(self) -> List[Dict[str, Any]]:
         raise NotImplementedError
 
     def get_configs_for_proveedor(self, proveedor_id: Any) -> List[Dict[str, Any]]:
@@ -1,7 +1,12 @@
 import os
 import tempfile
 import logging
-from typing import Optional, Union, List, Dict, Tuple
+from typing import TYPE_CHECKING, Optional, Union, List, Dict, Tuple
+
+from .lector_excel import sniff_formato, resolver_lector
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .libro_excel import SesionLibro
 
 logger = logging.getLogger("importaciones.conversion")
 
@@ -12,6 +17,27 @@ def _get_pandas():
     return pd
 
 
+def _streaming_xlsx_habilitado() -> bool:
+    try:
+        from django.conf import settings
+
+        return bool(getattr(settings, "IMPORTACIONES_XLSX_STREAMING", True))
+    except Exception:  # pragma: no cover - sin Django configurado
+        return True
+
+
+def _libro_openpyxl(xls) -> Optional[object]:
+    """Workbook openpyxl (read_only) detrás de un ExcelFile de pandas, si lo hay."""
+    try:
+        from openpyxl.workbook.workbook import Workbook  # type: ignore
+    except Exception:  # pragma: no cover - openpyxl no instalado
+        return None
+    book = getattr(xls, "book", None)
+    if isinstance(book, Workbook) and getattr(book, "read_only", False):
+        return book
+    return None
+
+
 def convertir_a_csv(
     input_path: str,
     output_dir: Optional[str] = None,
@@ -20,6 +46,8 @@ def convertir_a_csv(
     encoding: str = "utf-8",
     decimal: str = ".",
     delimiter: str = ",",
+    sesion: Optional["SesionLibro"] = None,
+    workers: Optional[int] = None,
 ) -> Union[str, List[str]]:
     """
     Convierte una planilla (xls, xlsx, ods) a CSV. Si ya es CSV, devuelve el mismo path.
@@ -31,6 +59,19 @@ def convertir_a_csv(
 
     Retorna la(s) ruta(s) al/los CSV generado(s). Si se especifican múltiples hojas,
     devuelve una lista de rutas. Si es una sola, devuelve un string.
+
+    Las hojas .xlsx (engine openpyxl) se convierten por streaming con memoria
+    constante (`conversion_xlsx`), con la misma salida byte a byte; si la hoja
+    tiene casos no emulables o `IMPORTACIONES_XLSX_STREAMING=False`, se usa
+    `xls.parse(...).to_csv(...)`.
+
+    Con `sesion` (ver `libro_excel.abrir_libro`) se reutiliza el libro ya abierto
+    y las hojas ya parseadas, sin volver a resolver el engine.
+
+    Con `workers` > 1 (por defecto `IMPORTACIONES_CONVERSION_WORKERS`; 0 = todos
+    los núcleos) y varias hojas, cada hoja se convierte en un pool de procesos;
+    las rutas se devuelven en el mismo orden que `sheet_name` y si una hoja
+    falla el error la nombra, igual que en modo secuencial.
     """
     ext = os.path.splitext(input_path)[1].lower()
     if ext == ".csv":
@@ -42,6 +83,11 @@ def convertir_a_csv(
     except Exception as exc:  # pragma: no cover - error claro si no está
         raise RuntimeError("pandas es requerido para convertir a CSV") from exc
 
+    if sesion is not None:
+        return _convertir_hojas(pd, sesion.libro(), sesion.engine, input_path, output_dir, sheet_name, start_row,
+                                encoding, decimal, delimiter, parse=sesion.parse,
+                                ruta_libro=sesion.xlsx_convertido or sesion.path, workers=workers)
+
     engine = None
     if ext == ".xlsx":
         engine = "openpyxl"
@@ -52,71 +98,46 @@ def convertir_a_csv(
     else:
         raise ValueError(f"Formato no soportado para conversión: {ext}")
 
-    # Resolver nombres de hojas y DataFrames a procesar, con sniff y fallbacks
-    def _sniff_excel_format(path: str) -> Optional[str]:
-        try:
-            with open(path, "rb") as f:
-                header = f.read(8)
-            if header.startswith(b"PK"):
-                return "xlsx_like"
-            if header.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"):
-                return "xls_like"
-        except Exception:
-            pass
-        return None
-
-    sniff = _sniff_excel_format(input_path)
+    # Resolver el lector (sniff + engines en cadena + xls2xlsx), recordando el que funcionó
+    sniff = sniff_formato(input_path)
     if sniff == "xlsx_like":
         candidates = ["openpyxl", "xlrd", None]
     elif sniff == "xls_like":
         candidates = ["xlrd", "openpyxl", None]
     else:
-        if engine:
-            candidates = [engine, None]
-        else:
-            candidates = [None, "openpyxl", "xlrd"]
+        candidates = [engine, None]
 
-    xls = None
-    last_exc: Optional[Exception] = None
-    for eng in candidates:
-        try:
-            logger.debug("[conversion] Abriendo archivo: path=%s ext=%s engine=%s", input_path, ext, eng)
-            xls = pd.ExcelFile(input_path, engine=eng) if eng else pd.ExcelFile(input_path)
-            engine = eng or engine
-            last_exc = None
-            break
-        except Exception as exc:
-            # Si falla xlrd, intentar conversión a xlsx y reintentar con openpyxl
-            if eng == "xlrd":
-                try:
-                    from xls2xlsx import XLS2XLSX  # type: ignore
-                    fd, tmp_xlsx = tempfile.mkstemp(suffix=".xlsx")
-                    os.close(fd)
-                    XLS2XLSX(input_path).to_xlsx(tmp_xlsx)
-                    xls = pd.ExcelFile(tmp_xlsx, engine="openpyxl")
-                    engine = "openpyxl"
-                    try:
-                        os.remove(tmp_xlsx)
-                    except Exception:
-                        pass
-                    last_exc = None
-                    break
-                except Exception as exc2:
-                    last_exc = exc2
-                    continue
-            else:
-                last_exc = exc
-                continue
-
-    if xls is None:
+    try:
+        xls, engine_resuelto, ruta_libro = resolver_lector(input_path, pd=pd, engines=candidates)
+    except RuntimeError as exc:
         if ext == ".xls":
             raise RuntimeError(
                 f"No se pudo abrir el archivo {input_path} como .xls/.xlsx. Verifique dependencias (xlrd/openpyxl) y formato."
-            ) from last_exc
+            ) from exc.__cause__
         raise RuntimeError(
             f"No se pudo abrir el archivo {input_path} con engine='{engine}'. Verifique dependencias y formato."
-        ) from last_exc
+        ) from exc.__cause__
+    engine = engine_resuelto or engine
+
+    return _convertir_hojas(pd, xls, engine, input_path, output_dir, sheet_name, start_row, encoding, decimal,
+                            delimiter, ruta_libro=ruta_libro, workers=workers)
 
+
+def _convertir_hojas(
+    pd,
+    xls,
+    engine: Optional[str],
+    input_path: str,
+    output_dir: Optional[str],
+    sheet_name: Union[int, str, List[Union[int, str]]],
+    start_row: Union[int, Dict[str, int]],
+    encoding: str,
+    decimal: str,
+    delimiter: str,
+    parse=None,
+    ruta_libro: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Union[str, List[str]]:
     requested: List[Union[int, str]]
     if isinstance(sheet_name, list):
         requested = sheet_name
@@ -146,41 +167,168 @@ def convertir_a_csv(
 
     base = os.path.splitext(os.path.basename(input_path))[0]
 
+    hojas = [
+        (name, sr, os.path.join(output_dir, f"{base}_{name}.csv") if len(pairs) > 1 else os.path.join(output_dir, f"{base}.csv"))
+        for name, sr in pairs
+    ]
+    streaming = engine == "openpyxl" and _streaming_xlsx_habilitado()
+    opciones = dict(encoding=encoding, decimal=decimal, delimiter=delimiter)
+
+    n_workers = _workers_conversion(workers, len(hojas))
+    if n_workers > 1 and ruta_libro:
+        return _convertir_hojas_en_paralelo(ruta_libro, engine, input_path, hojas, streaming, opciones, n_workers)
+
+    libro = _libro_openpyxl(xls) if streaming else None
     out_paths: List[str] = []
-    for name, sr in pairs:
+    for name, sr, out_path in hojas:
+        _convertir_hoja(pd, xls, engine, libro, input_path, name, sr, out_path, parse=parse, **opciones)
+        out_paths.append(out_path)
+
+    return out_paths[0] if len(out_paths) == 1 else out_paths
+
+
+def _convertir_hoja(
+    pd,
+    xls,
+    engine: Optional[str],
+    libro,
+    input_path: str,
+    name: str,
+    sr: int,
+    out_path: str,
+    encoding: str,
+    decimal: str,
+    delimiter: str,
+    parse=None,
+) -> None:
+    if libro is not None:
+        from .conversion_xlsx import convertir_hoja_xlsx
+
         try:
-            df = xls.parse(name, header=None)
-        except Exception as exc:
-            raise RuntimeError(
-                f"No se pudo leer la hoja '{name}' del archivo {input_path} con engine='{engine}'."
-            ) from exc
+            ok = convertir_hoja_xlsx(
+                pd, libro[name], out_path, start_row=sr, encoding=encoding, delimiter=delimiter, decimal=decimal
+            )
+        except Exception:
+            logger.warning("[conversion] Falló la conversión por streaming de la hoja '%s'; se usa pandas", name, exc_info=True)
+            ok = False
+        if ok:
+            return
 
-        # Aplicar start_row por hoja (soporta mocks donde iloc puede ser indexable o callable)
-        if sr > 0:
-            try:
-                # Camino normal de pandas: indexador por slice
-                df = df.iloc[sr:]
-            except Exception:
-                # En algunos tests, iloc es un Mock callable
-                try:
-                    df = df.iloc(sr)  # type: ignore[misc]
-                except Exception:
-                    # Si fallara, dejamos df tal cual
-                    pass
+    try:
+        df = parse(name, header=None) if parse is not None else xls.parse(name, header=None)
+    except Exception as exc:
+        raise RuntimeError(
+            f"No se pudo leer la hoja '{name}' del archivo {input_path} con engine='{engine}'."
+        ) from exc
+
+    # Aplicar start_row por hoja (soporta mocks donde iloc puede ser indexable o callable)
+    if sr > 0:
+        try:
+            # Camino normal de pandas: indexador por slice
+            df = df.iloc[sr:]
+        except Exception:
+            # En algunos tests, iloc es un Mock callable
             try:
-                df = df.reset_index(drop=True)
+                df = df.iloc(sr)  # type: ignore[misc]
             except Exception:
-                # En mocks puede no existir reset_index
+                # Si fallara, dejamos df tal cual
                 pass
+        try:
+            df = df.reset_index(drop=True)
+        except Exception:
+            # En mocks puede no existir reset_index
+            pass
+
+    # Guardar CSV con el delimitador/encoding/decimal solicitados
+    try:
+        df.to_csv(out_path, index=False, header=False, encoding=encoding, sep=delimiter, decimal=decimal)
+    except Exception as exc:
+        raise RuntimeError(f"No se pudo escribir el CSV en {out_path}") from exc
 
-        out_path = os.path.join(output_dir, f"{base}_{name}.csv") if len(pairs) > 1 else os.path.join(output_dir, f"{base}.csv")
 
-        # Guardar CSV con el delimitador/encoding/decimal solicitados
+def _workers_conversion(workers: Optional[int], n_hojas: int) -> int:
+    """Procesos a usar: `workers` o `IMPORTACIONES_CONVERSION_WORKERS` (0 = todos los núcleos)."""
+    if workers is None:
         try:
-            df.to_csv(out_path, index=False, header=False, encoding=encoding, sep=delimiter, decimal=decimal)
-        except Exception as exc:
-            raise RuntimeError(f"No se pudo escribir el CSV en {out_path}") from exc
+            from django.conf import settings
 
-        out_paths.append(out_path)
+            workers = int(getattr(settings, "IMPORTACIONES_CONVERSION_WORKERS", 1))
+        except Exception:  # pragma: no cover - sin Django configurado
+            workers = 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if n_hojas < 2 or workers < 2:
+        return 1
+    import multiprocessing
 
-    return out_paths[0] if len(out_paths) == 1 else out_paths
+    # Un proceso daemon (p.ej. worker prefork de Celery) no puede crear hijos
+    if multiprocessing.current_process().daemon:
+        return 1
+    return min(workers, n_hojas)
+
+
+def _convertir_hoja_en_proceso(
+    ruta_libro: str,
+    engine: Optional[str],
+    input_path: str,
+    name: str,
+    sr: int,
+    out_path: str,
+    streaming: bool,
+    opciones: Dict[str, str],
+) -> str:
+    """Tarea del pool: cada proceso abre su propio libro (ExcelFile no es serializable)."""
+    pd = _get_pandas()
+    try:
+        xls = pd.ExcelFile(ruta_libro, engine=engine) if engine else pd.ExcelFile(ruta_libro)
+    except Exception as exc:
+        raise RuntimeError(
+            f"No se pudo leer la hoja '{name}' del archivo {input_path} con engine='{engine}'."
+        ) from exc
+    try:
+        libro = _libro_openpyxl(xls) if streaming else None
+        _convertir_hoja(pd, xls, engine, libro, input_path, name, sr, out_path, **opciones)
+    finally:
+        try:
+            xls.close()
+        except Exception:
+            pass
+    return out_path
+
+
+def _convertir_hojas_en_paralelo(
+    ruta_libro: str,
+    engine: Optional[str],
+    input_path: str,
+    hojas: List[Tuple[str, int, str]],
+    streaming: bool,
+    opciones: Dict[str, str],
+    n_workers: int,
+) -> List[str]:
+    """Convierte las hojas en un pool de procesos; devuelve las rutas en el orden de `hojas`.
+
+    Si alguna hoja falla se cancelan las que todavía no empezaron (como el modo
+    secuencial, que corta en la primera) y se propaga el error de la primera en
+    el orden de `hojas`, que nombra la hoja o su CSV. Un proceso que muere sin
+    devolver error (p.ej. por el OOM killer) también se informa con el nombre de la hoja.
+    """
+    from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+
+    logger.debug("[conversion] Convirtiendo %s hojas con %s procesos", len(hojas), n_workers)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futuros = [
+            pool.submit(_convertir_hoja_en_proceso, ruta_libro, engine, input_path, name, sr, out_path, streaming, opciones)
+            for name, sr, out_path in hojas
+        ]
+        wait(futuros, return_when=FIRST_EXCEPTION)
+        for futuro in futuros:
+            futuro.cancel()
+    errores = [None if f.cancelled() else f.exception() for f in futuros]
+    for (name, _sr, _out), exc in zip(hojas, errores):
+        if exc is not None:
+            # Sólo los RuntimeError propios ya nombran la hoja; BrokenProcessPool
+            # también es RuntimeError pero no dice cuál
+            if type(exc) is RuntimeError:
+                raise exc
+            raise RuntimeError(f"No se pudo convertir la hoja '{name}' del archivo {input_path}.") from exc
+    return [out_path for _name, _sr, out_path in hojas]
@@ -0,0 +1,267 @@
+"""
+Conversión xlsx -> CSV por streaming con openpyxl (read_only).
+
+`xls.parse(hoja, header=None).to_csv(...)` materializa la hoja completa como
+DataFrame. Acá la hoja se recorre fila a fila (`iter_rows(values_only=True)`)
+con memoria constante y se escribe directo con `csv.writer`, produciendo los
+mismos bytes que el camino pandas:
+
+1ª pasada: se leen las filas, se vuelcan a un archivo temporal (pickle por
+   bloques) y se acumulan por columna los datos que pandas usa para inferir el
+   dtype (int64 / float64 / object) sobre la hoja completa, tal como hace
+   `read_excel` antes del `iloc[start_row:]`.
+2ª pasada: se relee el temporal y se escribe cada fila formateando cada celda
+   como lo haría `to_csv` para el dtype inferido.
+
+Casos que no se emulan (fechas, booleanos, literales de error de Excel,
+números con formato que pandas interpreta pero la regla estricta no, enteros
+fuera de rango, hojas de una sola columna o vacías, decimal distinto de "."):
+`convertir_hoja_xlsx` devuelve False y el llamador usa el camino pandas.
+"""
+
+import csv
+import os
+import pickle
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence, Set
+
+import logging
+
+logger = logging.getLogger("importaciones.conversion")
+
+# Valores que read_excel interpreta como NaN por defecto (pandas STR_NA_VALUES)
+_NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+# Con values_only un error de celda llega como este texto: no se distingue de un literal
+_ERRORES_EXCEL = frozenset({"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"})
+# pandas (maybe_convert_bool) convierte columnas con sólo estos textos
+_TEXTOS_BOOL = frozenset({"true", "false"})
+
+_RE_ENTERO = re.compile(r"[+-]?\d+\Z")
+_RE_DECIMAL = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?\Z")
+# Todo texto que pandas podría tomar como número empieza así (tras espacios)
+_RE_CANDIDATO_NUMERICO = re.compile(r"\s*[+-]?(?:\d|\.\d|inf|nan)", re.IGNORECASE)
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+# Enteros en texto de más dígitos podrían no convertirse a float igual que en pandas
+_MAX_DIGITOS_ENTERO_TEXTO = 15
+
+_FILAS_POR_BLOQUE = 1000
+
+
+class _NoEmulable(Exception):
+    """La hoja tiene un caso que sólo el camino pandas resuelve igual."""
+
+
+@dataclass
+class _Columna:
+    valores: int = 0  # celdas no vacías/no NA
+    enteros: int = 0
+    decimales: int = 0
+    texto_entero: int = 0
+    texto_decimal: int = 0
+    texto: int = 0
+    texto_bool: int = 0
+
+    def dtype(self, filas: int) -> str:
+        numericos = self.enteros + self.decimales + self.texto_entero + self.texto_decimal
+        if numericos != self.valores:
+            if self.texto_bool == self.valores:
+                # Columna de sólo "true"/"false": pandas la convierte a bool
+                raise _NoEmulable("columna booleana en texto")
+            return "object"
+        if filas > self.valores or self.decimales or self.texto_decimal:
+            return "float64"
+        return "int64"
+
+
+def _convertir_celda(valor: Any) -> Any:
+    """Equivalente a `_convert_cell` del lector openpyxl de pandas (None -> "", float entero -> int)."""
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        raise _NoEmulable("booleano")
+    if isinstance(valor, float):
+        entero = int(valor)
+        return entero if entero == valor else valor
+    if isinstance(valor, (int, str)):
+        return valor
+    raise _NoEmulable(f"tipo de celda {type(valor).__name__}")
+
+
+def _clasificar(valor: Any, col: _Columna, candidatos: Set[str], decimales: Set[str]) -> None:
+    if isinstance(valor, str):
+        if valor in _NA_VALUES:
+            return
+        if valor in _ERRORES_EXCEL:
+            raise _NoEmulable("literal de error de Excel")
+        col.valores += 1
+        if _RE_ENTERO.match(valor):
+            digitos = valor.lstrip("+-").lstrip("0")
+            if len(digitos) > _MAX_DIGITOS_ENTERO_TEXTO:
+                raise _NoEmulable("entero largo en texto")
+            col.texto_entero += 1
+        elif _RE_DECIMAL.match(valor):
+            col.texto_decimal += 1
+            decimales.add(valor)
+        else:
+            col.texto += 1
+            if valor.lower() in _TEXTOS_BOOL:
+                col.texto_bool += 1
+            elif _RE_CANDIDATO_NUMERICO.match(valor):
+                candidatos.add(valor)
+        return
+    col.valores += 1
+    if isinstance(valor, int):
+        if not _INT64_MIN <= valor <= _INT64_MAX:
+            raise _NoEmulable("entero fuera de int64")
+        col.enteros += 1
+    else:
+        col.decimales += 1
+
+
+def _verificar_textos(pd: Any, candidatos: Set[str], decimales: Set[str]) -> None:
+    """Confirma con pandas la clasificación de los textos dudosos del bloque.
+
+    `candidatos` no pasan la regla estricta y pandas no debe leerlos como número
+    (" 12", "inf" sí lo serían); `decimales` la pasan y pandas debe leerlos como número.
+    """
+    if candidatos:
+        convertidos = pd.to_numeric(pd.Series(list(candidatos), dtype=object), errors="coerce")
+        if convertidos.notna().any():
+            raise _NoEmulable("texto numérico con formato no estricto")
+        candidatos.clear()
+    if decimales:
+        convertidos = pd.to_numeric(pd.Series(list(decimales), dtype=object), errors="coerce")
+        if convertidos.isna().any():
+            raise _NoEmulable("texto decimal que pandas no interpreta")
+        decimales.clear()
+
+
+def _a_float(pd: Any, valores: Sequence[Any]) -> List[Any]:
+    """Convierte a float como `maybe_convert_numeric` (texto vía pandas) para una columna float64."""
+    textos = sorted({v for v in valores if isinstance(v, str) and v not in _NA_VALUES})
+    por_texto: Dict[str, float] = {}
+    if textos:
+        numeros = pd.to_numeric(pd.Series(textos, dtype=object), errors="raise").astype("float64")
+        por_texto = dict(zip(textos, numeros.tolist()))
+    resultado: List[Any] = []
+    for v in valores:
+        if isinstance(v, str):
+            resultado.append(por_texto.get(v, float("nan")))
+        else:
+            resultado.append(float(v))
+    return resultado
+
+
+def _leer_bloques(spool) -> Iterator[List[List[Any]]]:
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def convertir_hoja_xlsx(
+    pd: Any,
+    hoja: Any,
+    out_path: str,
+    start_row: int = 0,
+    encoding: str = "utf-8",
+    delimiter: str = ",",
+    decimal: str = ".",
+) -> bool:
+    """Escribe la hoja openpyxl (read_only) en `out_path` con los mismos bytes que el camino pandas.
+
+    Devuelve False (sin escribir nada) si la hoja tiene un caso no emulable.
+    """
+    if decimal != ".":
+        return False
+    import numpy as np
+
+    try:
+        hoja.reset_dimensions()
+    except AttributeError:
+        pass
+
+    columnas: List[_Columna] = []
+    candidatos: Set[str] = set()
+    decimales: Set[str] = set()
+    ultima_con_datos = -1
+    with tempfile.TemporaryFile() as spool:
+        # 1ª pasada: volcar filas recortadas e inferir dtypes
+        try:
+            bloque: List[List[Any]] = []
+            for numero, fila in enumerate(hoja.iter_rows(values_only=True)):
+                convertida = [_convertir_celda(v) for v in fila]
+                while convertida and convertida[-1] == "":
+                    convertida.pop()
+                if convertida:
+                    ultima_con_datos = numero
+                    if len(convertida) > len(columnas):
+                        columnas.extend(_Columna() for _ in range(len(convertida) - len(columnas)))
+                    for valor, col in zip(convertida, columnas):
+                        _clasificar(valor, col, candidatos, decimales)
+                bloque.append(convertida)
+                if len(bloque) >= _FILAS_POR_BLOQUE:
+                    pickle.dump(bloque, spool, protocol=pickle.HIGHEST_PROTOCOL)
+                    bloque = []
+                    _verificar_textos(pd, candidatos, decimales)
+            if bloque:
+                pickle.dump(bloque, spool, protocol=pickle.HIGHEST_PROTOCOL)
+            _verificar_textos(pd, candidatos, decimales)
+
+            filas = ultima_con_datos + 1
+            ancho = len(columnas)
+            if filas == 0 or ancho < 2:
+                # Hoja vacía o de una columna: pandas descarta filas en blanco
+                raise _NoEmulable("hoja vacía o de una sola columna")
+            dtypes = [col.dtype(filas) for col in columnas]
+        except _NoEmulable as exc:
+            logger.info("[conversion] Hoja '%s' no emulable por streaming (%s); se usa pandas", getattr(hoja, "title", "?"), exc)
+            return False
+
+        # 2ª pasada: escribir desde start_row con el formato de `to_csv` para cada dtype
+        cols_float = [i for i, d in enumerate(dtypes) if d == "float64"]
+        cols_int = [i for i, d in enumerate(dtypes) if d == "int64"]
+        cols_object = [i for i, d in enumerate(dtypes) if d == "object"]
+        with open(out_path, "w", encoding=encoding, newline="") as f:
+            writer = csv.writer(
+                f,
+                delimiter=delimiter,
+                lineterminator=os.linesep,
+                quoting=csv.QUOTE_MINIMAL,
+                doublequote=True,
+                quotechar='"',
+                escapechar=None,
+            )
+            numero = 0
+            for bloque in _leer_bloques(spool):
+                desde = max(0, start_row - numero)
+                hasta = max(0, filas - numero)
+                numero += len(bloque)
+                salida = [fila + [""] * (ancho - len(fila)) for fila in bloque[desde:hasta]]
+                if not salida:
+                    continue
+                for i in cols_int:
+                    for fila in salida:
+                        fila[i] = str(int(fila[i]))
+                for i in cols_float:
+                    valores = _a_float(pd, [fila[i] for fila in salida])
+                    arr = np.array(valores, dtype="float64")
+                    textos = arr.astype(str).tolist()
+                    for fila, texto, nulo in zip(salida, textos, np.isnan(arr).tolist()):
+                        fila[i] = "" if nulo else texto
+                for i in cols_object:
+                    for fila in salida:
+                        v = fila[i]
+                        if isinstance(v, str) and v in _NA_VALUES:
+                            fila[i] = ""
+                writer.writerows(salida)
+    return True
@@ -0,0 +1,480 @@
+"""
+Motor de importación por lotes (set-based) para `importar_csv(bulk=True)`.
+
+Lee el CSV en chunks, precarga una sola vez las filas existentes del proveedor
+indexadas por código normalizado y escribe los cambios de cada chunk con
+bulk_create/bulk_update. La cantidad de consultas crece con la cantidad de
+chunks y no con la cantidad de filas.
+
+Replica las reglas del camino fila a fila de `importar_csv` (mismas
+`ImportStats` y mismo estado final de la base):
+
+- PrecioDeLista: upsert por (proveedor, código normalizado); si hay duplicados
+  históricos se conserva el de menor id y se eliminan los demás.
+- ArticuloSinRevisar: se busca por prefijo de código (`startswith`), tomando el
+  de menor id; si no existe se crea. Los códigos se resuelven en memoria con
+  `IndiceCodigosProveedor`.
+- ArticuloProveedor: uno por PrecioDeLista; si la fila trae código de barras se
+  crea/reutiliza el Articulo y el AP queda mapeado (ASR en estado 'mapeado').
+  Los Articulo nuevos se indexan para las sugerencias de mapeo.
+- PrecioCalculado: las escrituras masivas no disparan señales; los AP del chunk
+  se recalculan juntos al final de cada chunk.
+
+Nota: el prefijo se compara en forma exacta (sensible a mayúsculas), como
+`startswith` en Postgres.
+"""
+
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from functools import cached_property
+from itertools import islice
+import logging
+
+from django.db import connections, transaction
+from django.db.backends.utils import format_number
+
+from proveedores.adapters.models import Proveedor
+from precios.adapters.models import Descuento, PrecioDeLista
+from precios.adapters import cache_descuentos
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.precios_calculados import recalcular_precios
+from articulos.adapters.sugerencias_mapeo import indexar_articulos
+
+from .importador_csv import (
+    FilaCSV,
+    ImportStats,
+    _normalizar_codigo_precio,
+    leer_csv_con_posicion,
+)
+from .indice_codigos import IndiceCodigosProveedor, IndicePrefijos
+from .parseo_columnar import parsear_columnas
+
+logger = logging.getLogger("importaciones.importador")
+
+# Tamaño de las consultas `__in` por lote para no exceder límites de parámetros.
+_MAX_IN = 500
+
+
+def _en_lotes(valores: List[Any], n: int = _MAX_IN) -> Iterator[List[Any]]:
+    for i in range(0, len(valores), n):
+        yield valores[i:i + n]
+
+
+def _como_db(instancia: Any, campo: str, valor: Any) -> Any:
+    """Devuelve `valor` tal como quedaría persistido (Decimal cuantizado al campo).
+
+    Permite comparar contra instancias en memoria igual que el camino fila a fila
+    compara contra lo releído de la base.
+    """
+    if valor is None:
+        return None
+    field = instancia._meta.get_field(campo)
+    if getattr(field, "decimal_places", None) is None:
+        return valor
+    return Decimal(format_number(Decimal(valor), field.max_digits, field.decimal_places))
+
+
+def _asignar(instancia: Any, campo: str, valor: Any) -> None:
+    setattr(instancia, campo, _como_db(instancia, campo, valor))
+
+
+def leer_lotes_csv(
+    ruta_csv: str,
+    start_row: int,
+    col_codigo_idx: int,
+    col_descripcion_idx: int,
+    col_precio_idx: int,
+    col_cant_idx: Optional[int],
+    col_iva_idx: Optional[int],
+    col_cod_barras_idx: Optional[int],
+    col_marca_idx: Optional[int],
+    stats: ImportStats,
+    chunk_size: int,
+    desde_byte: int = 0,
+) -> Iterator[List[FilaCSV]]:
+    """Lee el CSV y produce listas de filas válidas, una por cada `chunk_size` filas leídas.
+
+    Cada bloque se parsea por columnas (`parsear_columnas`). Actualiza `stats`
+    (leídas/válidas/descartadas) a medida que avanza.
+    """
+    chunk_size = max(1, int(chunk_size or 1))
+    filas = leer_csv_con_posicion(ruta_csv, start_row, desde_byte)
+    while True:
+        crudas = list(islice(filas, chunk_size))
+        if not crudas:
+            return
+        lote = parsear_columnas(
+            [(idx, row) for idx, row, _ in crudas],
+            col_codigo_idx,
+            col_descripcion_idx,
+            col_precio_idx,
+            col_cant_idx,
+            col_iva_idx,
+            col_cod_barras_idx,
+            col_marca_idx,
+        )
+        stats.filas_leidas += len(crudas)
+        stats.ultima_fila, stats.ultimo_byte = crudas[-1][0], crudas[-1][2]
+        stats.filas_validas += len(lote)
+        stats.filas_descartadas += len(crudas) - len(lote)
+        yield lote
+
+
+class _SincronizadorProveedor:
+    """Estado de una importación por lotes para un proveedor.
+
+    Mantiene en memoria el índice de códigos del proveedor (cargado una sola vez)
+    y aplica cada chunk con escrituras masivas.
+    """
+
+    def __init__(self, proveedor: Proveedor) -> None:
+        self.proveedor = proveedor
+        self.indice = IndiceCodigosProveedor.cargar(proveedor)
+
+    @cached_property
+    def descuento_default(self) -> Optional[Descuento]:
+        """Descuento por defecto que ArticuloSinRevisar.save() asignaría."""
+        return cache_descuentos.sin_descuento()
+
+    # ------------------------------------------------------------------
+    # Aplicación de un chunk
+    # ------------------------------------------------------------------
+    def aplicar_lote(self, filas: List[FilaCSV], stats: ImportStats) -> None:
+        # Descartar las filas idénticas a la última importación de su código (huella sin cambios)
+        a_aplicar: List[FilaCSV] = []
+        normas: List[str] = []
+        huellas: List[str] = []
+        for fila in filas:
+            norm = _normalizar_codigo_precio(fila.codigo)
+            huella = fila.huella()
+            if self.indice.huella(norm) == huella:
+                stats.sin_cambios += 1
+                continue
+            self.indice.registrar_huella(norm, huella)
+            a_aplicar.append(fila)
+            normas.append(norm)
+            huellas.append(huella)
+        filas = a_aplicar
+        if not filas:
+            return
+        proveedor = self.proveedor
+
+        # Fase A: decidir (en orden de filas) qué PL/ASR/Articulo crear y crearlos en bloque,
+        # así todas las filas del chunk trabajan luego con instancias persistidas.
+        pl_nuevos: Dict[str, PrecioDeLista] = {}
+        asr_pendientes = IndicePrefijos()
+        asr_nuevos: List[ArticuloSinRevisar] = []
+        crea_pl: List[bool] = []
+        crea_asr: List[bool] = []
+        barras: Dict[str, Tuple[str, str]] = {}
+        for fila, norm, huella in zip(filas, normas, huellas):
+            if self.indice.pl_id(norm) is not None or norm in pl_nuevos:
+                crea_pl.append(False)
+            else:
+                pl = PrecioDeLista(
+                    proveedor=proveedor,
+                    codigo=norm,
+                    descripcion=fila.descripcion,
+                    marca=fila.marca,
+                    huella=huella,
+                )
+                _asignar(pl, "precio", fila.precio)
+                _asignar(pl, "bulto", fila.bulto if fila.bulto is not None else 1)
+                _asignar(pl, "iva", fila.iva if fila.iva is not None else Decimal("0.21"))
+                pl_nuevos[norm] = pl
+                crea_pl.append(True)
+            if self.indice.asr_id(norm) is not None or asr_pendientes.buscar(norm) is not None:
+                crea_asr.append(False)
+            else:
+                asr = ArticuloSinRevisar(
+                    proveedor=proveedor,
+                    codigo_proveedor=norm,
+                    descripcion_proveedor=fila.descripcion,
+                    stock=0,
+                    codigo_barras=fila.codigo_barras if fila.codigo_barras else None,
+                    descuento=self.descuento_default,
+                    # La misma fila lo mapea en la etapa de ArticuloProveedor si trae código de barras
+                    estado="mapeado" if fila.codigo_barras else "",
+                )
+                _asignar(asr, "precio", fila.precio)
+                asr_nuevos.append(asr)
+                asr_pendientes.registrar(norm, asr)
+                crea_asr.append(True)
+            if fila.codigo_barras and fila.codigo_barras not in barras:
+                barras[fila.codigo_barras] = (fila.descripcion, norm)
+
+        if pl_nuevos:
+            creados = PrecioDeLista.objects.bulk_create(list(pl_nuevos.values()))
+            for pl in creados:
+                self.indice.registrar_pl(pl.codigo, pl.pk)
+        if asr_nuevos:
+            ArticuloSinRevisar.objects.bulk_create(asr_nuevos)
+            self.indice.registrar_asrs((asr.codigo_proveedor, asr.pk) for asr in asr_nuevos)
+            stats.asr_tocados.update(asr.pk for asr in asr_nuevos)
+        articulos = self._resolver_articulos(barras)
+
+        # Cargar instancias existentes necesarias para este chunk
+        pls: Dict[int, PrecioDeLista] = {pl.pk: pl for pl in pl_nuevos.values()}
+        pl_chunk = {self.indice.pl_id(n) for n in normas}
+        pls.update(PrecioDeLista.objects.in_bulk(list(pl_chunk - set(pls))))
+        asrs: Dict[int, ArticuloSinRevisar] = {asr.pk: asr for asr in asr_nuevos}
+        asr_necesarios = {self.indice.asr_id(n) for n in normas} - set(asrs)
+        asrs.update(ArticuloSinRevisar.objects.in_bulk(list(asr_necesarios)))
+        ap_necesarios = {self.indice.ap_id(pl_id) for pl_id in pl_chunk} - {None}
+        aps: Dict[int, ArticuloProveedor] = ArticuloProveedor.objects.in_bulk(list(ap_necesarios))
+
+        # Fase B: aplicar cada fila en orden, acumulando escrituras
+        pl_borrar: Set[int] = set()
+        ap_borrar: Set[int] = set()
+        pl_cambios: Dict[int, Tuple[PrecioDeLista, Set[str]]] = {}
+        asr_cambios: Dict[int, Tuple[ArticuloSinRevisar, Set[str]]] = {}
+        ap_cambios: Dict[int, Tuple[ArticuloProveedor, Set[str]]] = {}
+        ap_nuevos: Dict[int, ArticuloProveedor] = {}
+
+        def _marcar(destino, obj, campos) -> None:
+            entrada = destino.setdefault(obj.pk, (obj, set()))
+            entrada[1].update(campos)
+
+        for i, (fila, norm) in enumerate(zip(filas, normas)):
+            descripcion = fila.descripcion
+            precio = fila.precio
+            codigo_barras = fila.codigo_barras
+
+            # PrecioDeLista
+            duplicados = self.indice.pl_duplicados(norm)
+            if duplicados:
+                # Los AP de los duplicados se eliminan en cascada con el PrecioDeLista
+                pl_borrar.update(duplicados)
+                self.indice.quitar_pl_duplicados(norm)
+            pl = pls[self.indice.pl_id(norm)]
+            if crea_pl[i]:
+                stats.creadas += 1
+            else:
+                campos: Set[str] = set()
+                if pl.descripcion != descripcion:
+                    pl.descripcion = descripcion
+                    campos.add("descripcion")
+                if pl.precio != precio:
+                    _asignar(pl, "precio", precio)
+                    campos.add("precio")
+                if fila.bulto is not None and fila.bulto > 0 and pl.bulto != fila.bulto:
+                    _asignar(pl, "bulto", fila.bulto)
+                    campos.add("bulto")
+                if fila.iva is not None and pl.iva != fila.iva:
+                    _asignar(pl, "iva", fila.iva)
+                    campos.add("iva")
+                if fila.marca is not None and pl.marca != fila.marca:
+                    pl.marca = fila.marca
+                    campos.add("marca")
+                if campos:
+                    _marcar(pl_cambios, pl, campos)
+                    stats.actualizadas += 1
+            if pl.huella != huellas[i]:
+                pl.huella = huellas[i]
+                _marcar(pl_cambios, pl, {"huella"})
+
+            # ArticuloSinRevisar (primer match por prefijo)
+            asr = asrs[self.indice.asr_id(norm)]
+            if not crea_asr[i]:
+                campos = set()
+                if asr.precio != precio:
+                    _asignar(asr, "precio", precio)
+                    campos.add("precio")
+                if codigo_barras and asr.codigo_barras != codigo_barras:
+                    asr.codigo_barras = codigo_barras
+                    campos.add("codigo_barras")
+                    stats.asr_tocados.add(asr.pk)
+                if campos:
+                    # save() completo: también asigna el descuento por defecto si faltaba
+                    if asr.descuento_id is None and self.descuento_default is not None:
+                        asr.descuento = self.descuento_default
+                        campos.add("descuento")
+                    _marcar(asr_cambios, asr, campos)
+
+            # ArticuloProveedor (uno por PrecioDeLista)
+            art = articulos.get(codigo_barras) if codigo_barras else None
+            ap_id = self.indice.ap_id(pl.pk)
+            ap = aps.get(ap_id) if ap_id is not None else ap_nuevos.get(pl.pk)
+            if ap is not None:
+                duplicados = self.indice.ap_duplicados(pl.pk)
+                if duplicados:
+                    ap_borrar.update(duplicados)
+                    self.indice.quitar_ap_duplicados(pl.pk)
+                campos = set()
+                if ap.codigo_proveedor != norm:
+                    ap.codigo_proveedor = norm
+                    campos.add("codigo_proveedor")
+                if ap.precio != precio:
+                    _asignar(ap, "precio", precio)
+                    campos.add("precio")
+                if ap.articulo_id is None and ap.articulo_s_revisar_id != asr.pk:
+                    ap.articulo_s_revisar = asr
+                    campos.add("articulo_s_revisar")
+                if ap.proveedor_id != proveedor.pk:
+                    ap.proveedor = proveedor
+                    campos.add("proveedor")
+                if art is not None:
+                    if ap.articulo_id != art.pk:
+                        ap.articulo = art
+                        ap.articulo_s_revisar = None
+                        campos.update({"articulo", "articulo_s_revisar"})
+                    self._marcar_mapeado(asr, asr_cambios, _marcar)
+                if campos and ap.pk is not None:
+                    _marcar(ap_cambios, ap, campos)
+            else:
+                if art is not None:
+                    self._marcar_mapeado(asr, asr_cambios, _marcar)
+                ap = ArticuloProveedor(
+                    articulo=art,
+                    articulo_s_revisar=None if art is not None else asr,
+                    proveedor=proveedor,
+                    precio_de_lista=pl,
+                    codigo_proveedor=norm,
+                    descripcion_proveedor=descripcion,
+                    stock=asr.stock,
+                    dividir=False,
+                )
+                _asignar(ap, "precio", precio)
+                ap_nuevos[pl.pk] = ap
+
+        # Escrituras del chunk
+        if pl_borrar:
+            PrecioDeLista.objects.filter(id__in=list(pl_borrar)).delete()
+        if ap_borrar:
+            ArticuloProveedor.objects.filter(id__in=list(ap_borrar)).delete()
+        self._bulk_update(PrecioDeLista, pl_cambios)
+        self._bulk_update(ArticuloSinRevisar, asr_cambios)
+        if ap_nuevos:
+            ArticuloProveedor.objects.bulk_create(list(ap_nuevos.values()))
+            for pl_id, ap in ap_nuevos.items():
+                self.indice.registrar_ap(pl_id, ap.pk)
+        self._bulk_update(ArticuloProveedor, ap_cambios)
+        recalcular_precios({self.indice.ap_id(pl_id) for pl_id in pl_chunk} - {None})
+
+        logger.info(
+            "Chunk aplicado (proveedor=%s): filas=%s PL nuevos=%s actualizados=%s | ASR nuevos=%s actualizados=%s | AP nuevos=%s actualizados=%s",
+            getattr(proveedor, "pk", None),
+            len(filas),
+            len(pl_nuevos),
+            len(pl_cambios),
+            len(asr_nuevos),
+            len(asr_cambios),
+            len(ap_nuevos),
+            len(ap_cambios),
+        )
+
+    @staticmethod
+    def _marcar_mapeado(asr: ArticuloSinRevisar, asr_cambios, marcar) -> None:
+        if getattr(asr, "estado", None) != "mapeado":
+            asr.estado = "mapeado"
+            marcar(asr_cambios, asr, {"estado"})
+
+    def _resolver_articulos(self, barras: Dict[str, Tuple[str, str]]) -> Dict[str, Articulo]:
+        """Equivalente a `Articulo.objects.get_or_create(codigo_barras=...)` para todo el chunk."""
+        if not barras:
+            return {}
+        codigos = list(barras)
+        articulos: Dict[str, Articulo] = {}
+        for parte in _en_lotes(codigos):
+            for art in Articulo.objects.filter(codigo_barras__in=parte):
+                articulos[art.codigo_barras] = art
+        nuevos = [
+            Articulo(
+                codigo_barras=codigo,
+                nombre=descripcion[:200] or norm,
+                descripcion=descripcion,
+            )
+            for codigo, (descripcion, norm) in barras.items()
+            if codigo not in articulos
+        ]
+        if nuevos:
+            Articulo.objects.bulk_create(nuevos)
+            # bulk_create no dispara señales: indexar los Articulo nuevos para las sugerencias
+            indexar_articulos([art.pk for art in nuevos])
+            for art in nuevos:
+                logger.info("Articulo create: id=%s codigo_barras=%s", art.pk, art.codigo_barras)
+                articulos[art.codigo_barras] = art
+        return articulos
+
+    @staticmethod
+    def _bulk_update(modelo, cambios: Dict[int, Tuple[Any, Set[str]]]) -> None:
+        """Agrupa por conjunto de campos modificados para no pisar columnas no tocadas."""
+        por_campos: Dict[Tuple[str, ...], List[Any]] = {}
+        for obj, campos in cambios.values():
+            por_campos.setdefault(tuple(sorted(campos)), []).append(obj)
+        for campos, objs in por_campos.items():
+            modelo.objects.bulk_update(objs, list(campos))
+
+
+def importar_csv_bulk(
+    proveedor: Proveedor,
+    ruta_csv: str,
+    start_row: int,
+    col_codigo_idx: int,
+    col_descripcion_idx: int,
+    col_precio_idx: int,
+    col_cant_idx: Optional[int] = None,
+    col_iva_idx: Optional[int] = None,
+    col_cod_barras_idx: Optional[int] = None,
+    col_marca_idx: Optional[int] = None,
+    dry_run: bool = False,
+    chunk_size: int = 2000,
+    max_lotes: Optional[int] = None,
+    al_confirmar_lote: Optional[Callable[[ImportStats], None]] = None,
+    desde_byte: int = 0,
+) -> ImportStats:
+    """Importa el CSV por chunks con escrituras masivas. Ver docstring del módulo.
+
+    `al_confirmar_lote(stats)` corre dentro de la transacción de cada chunk,
+    así el punto de control que guarde confirma junto con las filas del chunk.
+    Con `max_lotes` se detiene tras esa cantidad de chunks.
+    """
+    if not connections["default"].features.can_return_rows_from_bulk_insert:
+        # Sin ids devueltos por bulk_create no se pueden vincular PL/ASR/AP del mismo chunk
+        logger.warning("El backend no devuelve ids en bulk_create; se usa la importación fila a fila")
+        from .importador_csv import importar_csv
+
+        return importar_csv(
+            proveedor=proveedor,
+            ruta_csv=ruta_csv,
+            start_row=start_row,
+            col_codigo_idx=col_codigo_idx,
+            col_descripcion_idx=col_descripcion_idx,
+            col_precio_idx=col_precio_idx,
+            col_cant_idx=col_cant_idx,
+            col_iva_idx=col_iva_idx,
+            col_cod_barras_idx=col_cod_barras_idx,
+            col_marca_idx=col_marca_idx,
+            dry_run=dry_run,
+            chunk_size=chunk_size,
+            max_lotes=max_lotes,
+            al_confirmar_lote=al_confirmar_lote,
+            desde_byte=desde_byte,
+        )
+    stats = ImportStats()
+    sincronizador: Optional[_SincronizadorProveedor] = None
+    lotes: Iterable[List[FilaCSV]] = leer_lotes_csv(
+        ruta_csv,
+        start_row,
+        col_codigo_idx,
+        col_descripcion_idx,
+        col_precio_idx,
+        col_cant_idx,
+        col_iva_idx,
+        col_cod_barras_idx,
+        col_marca_idx,
+        stats,
+        chunk_size,
+        desde_byte,
+    )
+    for n, filas in enumerate(lotes, start=1):
+        with transaction.atomic():
+            if filas and not dry_run:
+                if sincronizador is None:
+                    sincronizador = _SincronizadorProveedor(proveedor)
+                sincronizador.aplicar_lote(filas, stats)
+            if al_confirmar_lote is not None:
+                al_confirmar_lote(stats)
+        if max_lotes is not None and n >= max_lotes:
+            break
+    return stats
@@ -1,8 +1,10 @@
 import csv
+import hashlib
 import re
 from decimal import Decimal, InvalidOperation
-from dataclasses import dataclass
-from typing import Iterable, Optional, Tuple, Dict
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple, Dict
 
 from django.db import transaction
 import logging
@@ -11,7 +13,10 @@ logger = logging.getLogger("importaciones.importador")
 
 from proveedores.adapters.models import Proveedor
 from precios.adapters.models import PrecioDeLista
-from articulos.adapters.models import Articulo, ArticuloSinRevisar
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.precios_calculados import aplicar_recalculo_diferido, recalculo_diferido
+
+from .indice_codigos import IndiceCodigosProveedor
 
 
 @dataclass
@@ -21,6 +26,13 @@ class ImportStats:
     filas_descartadas: int = 0
     creadas: int = 0
     actualizadas: int = 0
+    sin_cambios: int = 0
+    # Número (1-based) de la última fila del CSV leída
+    ultima_fila: int = 0
+    # Posición (en bytes) del CSV donde termina `ultima_fila`: al reanudar se salta ahí
+    ultimo_byte: int = 0
+    # ArticuloSinRevisar creados o con código de barras nuevo (sus sugerencias de mapeo cambian)
+    asr_tocados: Set[int] = field(default_factory=set)
 
 
 def _parse_decimal(valor: str) -> Optional[Decimal]:
@@ -55,13 +67,177 @@ def _parse_decimal_loose(raw: object) -> Optional[Decimal]:
         return None
 
 
+def _normalizar_iva(raw: object) -> Optional[Decimal]:
+    """IVA como fracción (0-1): acepta 21, 0.21, "21%" o "10,5"."""
+    iva_val = _parse_decimal_loose(raw) if raw is not None else None
+    if iva_val is None:
+        return None
+    try:
+        f = float(iva_val)
+        if f > 1.5:  # valores como 21, 10.5
+            f = f / 100.0
+        return Decimal(str(f))
+    except Exception:
+        return None
+
+
 def leer_csv_en_filas(ruta_csv: str, start_row: int) -> Iterable[Tuple[int, list]]:
-    with open(ruta_csv, "r", encoding="utf-8", newline="") as f:
-        reader = csv.reader(f, delimiter=",")
-        for idx, row in enumerate(reader, start=1):
+    for idx, row, _ in leer_csv_con_posicion(ruta_csv, start_row):
+        yield idx, row
+
+
+def leer_csv_con_posicion(ruta_csv: str, start_row: int, desde_byte: int = 0) -> Iterator[Tuple[int, list, int]]:
+    """`(fila, valores, byte donde termina la fila)` desde `start_row`.
+
+    Con `desde_byte` (el `ultimo_byte` de la fila `start_row - 1`) salta
+    directo a esa posición en lugar de releer las filas anteriores.
+    """
+    with open(ruta_csv, "rb") as f:
+        posicion = 0
+        if desde_byte:
+            f.seek(desde_byte)
+            posicion = desde_byte
+
+        def _lineas() -> Iterator[str]:
+            # csv.reader pide líneas sólo a medida que arma cada fila: tras cada
+            # fila, `posicion` queda al final de su última línea
+            nonlocal posicion
+            for linea in iter(f.readline, b""):
+                posicion += len(linea)
+                yield linea.decode("utf-8")
+
+        reader = csv.reader(_lineas(), delimiter=",")
+        for idx, row in enumerate(reader, start=start_row if desde_byte else 1):
             if idx < start_row:
                 continue
-            yield idx, row
+            yield idx, row, posicion
+
+
+@dataclass
+class FilaCSV:
+    """Fila válida del CSV ya normalizada, lista para escribir."""
+
+    fila: int
+    codigo: str
+    descripcion: str
+    precio: Decimal
+    bulto: Optional[Decimal] = None
+    iva: Optional[Decimal] = None
+    codigo_barras: Optional[str] = None
+    marca: Optional[str] = None
+
+    def huella(self) -> str:
+        """sha1 del contenido importable de la fila (código normalizado incluido)."""
+        partes = (
+            _normalizar_codigo_precio(self.codigo),
+            self.descripcion,
+            self.precio,
+            self.bulto,
+            self.iva,
+            self.codigo_barras,
+            self.marca,
+        )
+        contenido = "\x1f".join("" if p is None else str(p) for p in partes)
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+
+def _parsear_fila(
+    row_idx: int,
+    row: list,
+    col_codigo_idx: int,
+    col_descripcion_idx: int,
+    col_precio_idx: int,
+    col_cant_idx: Optional[int] = None,
+    col_iva_idx: Optional[int] = None,
+    col_cod_barras_idx: Optional[int] = None,
+    col_marca_idx: Optional[int] = None,
+) -> Optional[FilaCSV]:
+    """Extrae y normaliza una fila del CSV. Devuelve None si la fila es inválida."""
+    # Expand row if short
+    cols = list(row)
+    # Extraer por indices; si falta índice, es inválida
+    try:
+        raw_codigo = cols[col_codigo_idx]
+        raw_desc = cols[col_descripcion_idx]
+        raw_precio = cols[col_precio_idx]
+        raw_cant = cols[col_cant_idx] if (col_cant_idx is not None and col_cant_idx < len(cols)) else None
+        raw_iva = cols[col_iva_idx] if (col_iva_idx is not None and col_iva_idx < len(cols)) else None
+        raw_barras = cols[col_cod_barras_idx] if (col_cod_barras_idx is not None and col_cod_barras_idx < len(cols)) else None
+        raw_marca = cols[col_marca_idx] if (col_marca_idx is not None and col_marca_idx < len(cols)) else None
+    except IndexError:
+        return None
+
+    codigo = (raw_codigo or "").strip()
+    descripcion = (raw_desc or "").strip()
+    precio = _parse_decimal(raw_precio)
+    # cantidad opcional: usar decimal "flojo" para soportar distintos formatos
+    bulto_val: Optional[Decimal] = _parse_decimal_loose(raw_cant) if raw_cant is not None else None
+    # iva opcional: soportar 21 o 0.21 o "21%". Normalizar a fracción (0-1)
+    iva_norm = _normalizar_iva(raw_iva)
+    # código de barras opcional
+    codigo_barras = (str(raw_barras).strip() if raw_barras is not None else None) or None
+    marca_str = (str(raw_marca).strip() if raw_marca is not None else None) or None
+
+    logger.debug(
+        "Fila %s: codigo='%s' precio=%s bulto_raw='%s' bulto_parsed=%s iva_raw='%s' iva_norm=%s barras='%s' marca='%s'",
+        row_idx,
+        codigo,
+        precio,
+        raw_cant,
+        bulto_val,
+        raw_iva,
+        iva_norm,
+        codigo_barras,
+        marca_str,
+    )
+
+    if not codigo or not descripcion or precio is None:
+        return None
+
+    return FilaCSV(
+        fila=row_idx,
+        codigo=codigo,
+        descripcion=descripcion,
+        precio=precio,
+        bulto=bulto_val,
+        iva=iva_norm,
+        codigo_barras=codigo_barras,
+        marca=marca_str,
+    )
+
+
+def _en_chunks(filas: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    filas = iter(filas)
+    while True:
+        chunk = list(islice(filas, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _precargar_instancias(indice: IndiceCodigosProveedor, filas: List[FilaCSV]) -> None:
+    """Trae a `indice` las instancias existentes que van a tocar las filas con cambios del chunk.
+
+    Una consulta por modelo con los ids del chunk: la memoria queda acotada al
+    chunk y no a todo el proveedor. Las filas sin cambios (misma huella) no piden nada.
+    """
+    pl_ids, asr_ids, ap_ids = set(), set(), set()
+    for fila in filas:
+        codigo_norm = _normalizar_codigo_precio(fila.codigo)
+        if indice.huella(codigo_norm) == fila.huella():
+            continue
+        pl_id = indice.pl_id(codigo_norm)
+        if pl_id is not None:
+            pl_ids.add(pl_id)
+            ap_id = indice.ap_id(pl_id)
+            if ap_id is not None:
+                ap_ids.add(ap_id)
+        asr_id = indice.asr_id(codigo_norm)
+        if asr_id is not None:
+            asr_ids.add(asr_id)
+    indice.precargar_instancias(PrecioDeLista, pl_ids)
+    indice.precargar_instancias(ArticuloSinRevisar, asr_ids)
+    indice.precargar_instancias(ArticuloProveedor, ap_ids)
 
 
 def importar_csv(
@@ -76,7 +252,35 @@ def importar_csv(
     col_cod_barras_idx: Optional[int] = None,
     col_marca_idx: Optional[int] = None,
     dry_run: bool = False,
+    bulk: bool = False,
+    chunk_size: int = 2000,
+    max_lotes: Optional[int] = None,
+    al_confirmar_lote: Optional[Callable[[ImportStats], None]] = None,
+    desde_byte: int = 0,
 ) -> ImportStats:
+    """Importa un CSV de lista de precios para `proveedor`.
+
+    Con `bulk=False` (por defecto) procesa fila a fila, una transacción por fila.
+    Con `bulk=True` delega en el motor por lotes (`importador_bulk`), que lee el CSV
+    en chunks de `chunk_size` filas y escribe con bulk_create/bulk_update; el
+    resultado (stats y estado final de la base) es el mismo.
+
+    Fila a fila, los códigos existentes salen de `IndiceCodigosProveedor` (una
+    consulta por archivo) y las instancias a modificar se precargan por chunk
+    (una consulta por modelo con los ids del chunk): el bucle sólo escribe. La
+    excepción es el Articulo de las filas con código de barras, que se resuelve
+    con `get_or_create` por fila (los Articulo no son del proveedor).
+
+    En ambos modos las filas cuya huella coincide con la guardada en el
+    PrecioDeLista (misma fila que en la importación anterior) no se escriben y se
+    cuentan en `stats.sin_cambios`.
+
+    Puntos de control: cada `chunk_size` filas leídas se llama a
+    `al_confirmar_lote(stats)` (en modo bulk, dentro de la transacción del
+    chunk) y con `max_lotes` se corta tras esa cantidad de chunks; la siguiente
+    llamada sigue con `start_row=stats.ultima_fila + 1` y
+    `desde_byte=stats.ultimo_byte` (se salta ahí sin releer las filas previas).
+    """
     stats = ImportStats()
 
     logger.info(
@@ -92,270 +296,319 @@ def importar_csv(
         col_marca_idx,
     )
 
-    for row_idx, row in leer_csv_en_filas(ruta_csv, start_row=start_row):
-        stats.filas_leidas += 1
-        # Expand row if short
-        cols = list(row)
-        # Extraer por indices; si falta índice, es inválida
-        try:
-            raw_codigo = cols[col_codigo_idx]
-            raw_desc = cols[col_descripcion_idx]
-            raw_precio = cols[col_precio_idx]
-            raw_cant = cols[col_cant_idx] if (col_cant_idx is not None and col_cant_idx < len(cols)) else None
-            raw_iva = cols[col_iva_idx] if (col_iva_idx is not None and col_iva_idx < len(cols)) else None
-            raw_barras = cols[col_cod_barras_idx] if (col_cod_barras_idx is not None and col_cod_barras_idx < len(cols)) else None
-            raw_marca = cols[col_marca_idx] if (col_marca_idx is not None and col_marca_idx < len(cols)) else None
-        except IndexError:
-            stats.filas_descartadas += 1
-            continue
+    if bulk:
+        from .importador_bulk import importar_csv_bulk
 
-        codigo = (raw_codigo or "").strip()
-        descripcion = (raw_desc or "").strip()
-        precio = _parse_decimal(raw_precio)
-        # cantidad opcional: usar decimal "flojo" para soportar distintos formatos
-        bulto_val: Optional[Decimal] = _parse_decimal_loose(raw_cant) if raw_cant is not None else None
-        # iva opcional: soportar 21 o 0.21 o "21%". Normalizar a fracción (0-1)
-        iva_val: Optional[Decimal] = _parse_decimal_loose(raw_iva) if raw_iva is not None else None
-        iva_norm: Optional[Decimal] = None
-        if iva_val is not None:
-            try:
-                f = float(iva_val)
-                if f > 1.5:  # valores como 21, 10.5
-                    f = f / 100.0
-                iva_norm = Decimal(str(f))
-            except Exception:
-                iva_norm = None
-        # código de barras opcional
-        codigo_barras = (str(raw_barras).strip() if raw_barras is not None else None) or None
-        marca_str = (str(raw_marca).strip() if raw_marca is not None else None) or None
-
-        logger.debug(
-            "Fila %s: codigo='%s' precio=%s bulto_raw='%s' bulto_parsed=%s iva_raw='%s' iva_norm=%s barras='%s' marca='%s'",
-            row_idx,
-            codigo,
-            precio,
-            raw_cant,
-            bulto_val,
-            raw_iva,
-            iva_norm,
-            codigo_barras,
-            marca_str,
+        return importar_csv_bulk(
+            proveedor=proveedor,
+            ruta_csv=ruta_csv,
+            start_row=start_row,
+            col_codigo_idx=col_codigo_idx,
+            col_descripcion_idx=col_descripcion_idx,
+            col_precio_idx=col_precio_idx,
+            col_cant_idx=col_cant_idx,
+            col_iva_idx=col_iva_idx,
+            col_cod_barras_idx=col_cod_barras_idx,
+            col_marca_idx=col_marca_idx,
+            dry_run=dry_run,
+            chunk_size=chunk_size,
+            max_lotes=max_lotes,
+            al_confirmar_lote=al_confirmar_lote,
+            desde_byte=desde_byte,
         )
 
-        if not codigo or not descripcion or precio is None:
-            stats.filas_descartadas += 1
-            continue
-
-        stats.filas_validas += 1
+    # Cada fila confirma en su propia transacción: el punto de control va detrás
+    # de las filas ya escritas y, si se repite alguna al reanudar, su huella la
+    # descarta como sin cambios.
+    chunk_size = max(1, int(chunk_size or 1))
+    lotes = 0
 
-        if dry_run:
-            # No escribimos nada
-            continue
+    # Índice de códigos del proveedor: se carga una vez (al primer uso) y evita
+    # las búsquedas exactas/por prefijo contra la base en cada fila.
+    indice: Optional[IndiceCodigosProveedor] = None
 
-        with transaction.atomic():
-            # Normalizar código para respetar la unicidad como la aplica PrecioDeLista.save()
-            codigo_norm = _normalizar_codigo_precio(codigo)
-
-            # Upsert PrecioDeLista con clave exacta (proveedor, codigo_norm).
-            # Si hay duplicados históricos para esa clave, mantener el primero y eliminar el resto.
-            qs_pl = (
-                PrecioDeLista.objects
-                .filter(proveedor=proveedor, codigo=codigo_norm)
-                .order_by("id")
-            )
-            if qs_pl.exists():
-                pl = qs_pl.first()
-                # Eliminar duplicados restantes
-                dup_ids = list(qs_pl.values_list("id", flat=True))[1:]
-                if dup_ids:
-                    PrecioDeLista.objects.filter(id__in=dup_ids).delete()
-                # Actualizar
-                changed = False
-                if pl.descripcion != descripcion:
-                    pl.descripcion = descripcion
-                    changed = True
-                if pl.precio != precio:
-                    pl.precio = precio
-                    changed = True
-                # Actualizar bulto si vino cantidad en CSV
-                if bulto_val is not None and bulto_val > 0 and pl.bulto != bulto_val:
-                    logger.info(
-                        "PL %s update: bulto %s -> %s (codigo=%s, proveedor=%s)",
-                        getattr(pl, "pk", None),
-                        pl.bulto,
-                        bulto_val,
-                        codigo_norm,
-                        getattr(proveedor, "pk", None),
-                    )
-                    pl.bulto = bulto_val
-                    changed = True
-                if iva_norm is not None and pl.iva != iva_norm:
-                    pl.iva = iva_norm
-                    changed = True
-                if marca_str is not None and pl.marca != marca_str:
-                    pl.marca = marca_str
-                    changed = True
-                if changed:
-                    pl.save()
-                    logger.info(
-                        "PL update: id=%s bulto=%s iva=%s marca='%s' (codigo=%s, proveedor=%s)",
-                        getattr(pl, "pk", None),
-                        pl.bulto,
-                        pl.iva,
-                        getattr(pl, "marca", None),
-                        codigo_norm,
-                        getattr(proveedor, "pk", None),
-                    )
-                    stats.actualizadas += 1
-            else:
-                pl = PrecioDeLista.objects.create(
-                    proveedor=proveedor,
-                    codigo=codigo_norm,
-                    descripcion=descripcion,
-                    precio=precio,
-                    bulto=(bulto_val if bulto_val is not None else 1),
-                    iva=(iva_norm if iva_norm is not None else Decimal("0.21")),
-                    marca=marca_str,
-                )
-                logger.info(
-                    "PL create: id=%s bulto=%s iva=%s marca='%s' (codigo=%s, proveedor=%s)",
-                    getattr(pl, "pk", None),
-                    pl.bulto,
-                    pl.iva,
-                    getattr(pl, "marca", None),
-                    codigo_norm,
-                    getattr(proveedor, "pk", None),
-                )
-                stats.creadas += 1
-
-            # Si no hay mapeo a Articulo definitivo, lo dejamos como ArticuloSinRevisar
-            # Evitar MultipleObjectsReturned: usar filter().first() por posibles duplicados históricos
-            codigo_prov_norm = _normalizar_codigo_precio(codigo)
-            asr = (
-                ArticuloSinRevisar.objects
-                .filter(proveedor=proveedor, codigo_proveedor__startswith=codigo_prov_norm)
-                .order_by("id")
-                .first()
-            )
-            if asr:
-                changed_asr = False
-                # Mantener descripcion_proveedor existente, solo actualizar precio
-                if asr.precio != precio:
-                    asr.precio = precio
-                    changed_asr = True
-                # Actualizar código de barras si provisto
-                if codigo_barras and asr.codigo_barras != codigo_barras:
-                    asr.codigo_barras = codigo_barras
-                    changed_asr = True
-                if changed_asr:
-                    asr.save()
-            else:
-                asr = ArticuloSinRevisar.objects.create(
-                    proveedor=proveedor,
-                    codigo_proveedor=codigo_prov_norm,
-                    descripcion_proveedor=descripcion,
-                    precio=precio,
-                    stock=0,
-                    codigo_barras=codigo_barras if codigo_barras else None,
+    # Las señales piden recalcular PrecioCalculado en cada save(): se juntan y se
+    # recalculan en bloque en cada punto de control y al terminar el archivo.
+    with recalculo_diferido():
+        for chunk in _en_chunks(leer_csv_con_posicion(ruta_csv, start_row, desde_byte), chunk_size):
+            if stats.filas_leidas:
+                lotes += 1
+                if al_confirmar_lote is not None:
+                    # Los precios de las filas del chunk se recalculan antes de
+                    # confirmarlas: al reanudar, su huella las saltea
+                    aplicar_recalculo_diferido()
+                    al_confirmar_lote(stats)
+                if max_lotes is not None and lotes >= max_lotes:
+                    break
+            filas = [
+                (
+                    row_idx,
+                    _parsear_fila(
+                        row_idx,
+                        row,
+                        col_codigo_idx,
+                        col_descripcion_idx,
+                        col_precio_idx,
+                        col_cant_idx,
+                        col_iva_idx,
+                        col_cod_barras_idx,
+                        col_marca_idx,
+                    ),
+                    fin,
                 )
+                for row_idx, row, fin in chunk
+            ]
+            validas = [fila for _, fila, _ in filas if fila is not None]
+            if validas and not dry_run:
+                if indice is None:
+                    indice = IndiceCodigosProveedor.cargar(proveedor)
+                # Las instancias que el chunk va a modificar, en una consulta por modelo
+                _precargar_instancias(indice, validas)
+
+            for row_idx, fila, fin in filas:
+                stats.filas_leidas += 1
+                stats.ultima_fila = row_idx
+                stats.ultimo_byte = fin
+                if fila is None:
+                    stats.filas_descartadas += 1
+                    continue
+
+                codigo = fila.codigo
+                descripcion = fila.descripcion
+                precio = fila.precio
+                bulto_val = fila.bulto
+                iva_norm = fila.iva
+                codigo_barras = fila.codigo_barras
+                marca_str = fila.marca
+
+                stats.filas_validas += 1
+
+                if dry_run:
+                    # No escribimos nada
+                    continue
+
+                # Normalizar código para respetar la unicidad como la aplica PrecioDeLista.save()
+                codigo_norm = _normalizar_codigo_precio(codigo)
+                # Fila idéntica a la última importada para este código: nada que escribir
+                huella = fila.huella()
+                if indice.huella(codigo_norm) == huella:
+                    stats.sin_cambios += 1
+                    continue
+
+                with transaction.atomic():
+
+                    # Upsert PrecioDeLista con clave exacta (proveedor, codigo_norm).
+                    # Si hay duplicados históricos para esa clave, mantener el primero y eliminar el resto.
+                    pl_id = indice.pl_id(codigo_norm)
+                    if pl_id is not None:
+                        pl = indice.instancia(PrecioDeLista, pl_id)
+                        # Eliminar duplicados restantes
+                        dup_ids = indice.pl_duplicados(codigo_norm)
+                        if dup_ids:
+                            PrecioDeLista.objects.filter(id__in=dup_ids).delete()
+                            indice.quitar_pl_duplicados(codigo_norm)
+                        # Actualizar
+                        changed = False
+                        if pl.descripcion != descripcion:
+                            pl.descripcion = descripcion
+                            changed = True
+                        if pl.precio != precio:
+                            pl.precio = precio
+                            changed = True
+                        # Actualizar bulto si vino cantidad en CSV
+                        if bulto_val is not None and bulto_val > 0 and pl.bulto != bulto_val:
+                            logger.info(
+                                "PL %s update: bulto %s -> %s (codigo=%s, proveedor=%s)",
+                                getattr(pl, "pk", None),
+                                pl.bulto,
+                                bulto_val,
+                                codigo_norm,
+                                getattr(proveedor, "pk", None),
+                            )
+                            pl.bulto = bulto_val
+                            changed = True
+                        if iva_norm is not None and pl.iva != iva_norm:
+                            pl.iva = iva_norm
+                            changed = True
+                        if marca_str is not None and pl.marca != marca_str:
+                            pl.marca = marca_str
+                            changed = True
+                        if changed:
+                            pl.save()
+                            logger.info(
+                                "PL update: id=%s bulto=%s iva=%s marca='%s' (codigo=%s, proveedor=%s)",
+                                getattr(pl, "pk", None),
+                                pl.bulto,
+                                pl.iva,
+                                getattr(pl, "marca", None),
+                                codigo_norm,
+                                getattr(proveedor, "pk", None),
+                            )
+                            stats.actualizadas += 1
+                    else:
+                        pl = PrecioDeLista.objects.create(
+                            proveedor=proveedor,
+                            codigo=codigo_norm,
+                            descripcion=descripcion,
+                            precio=precio,
+                            bulto=(bulto_val if bulto_val is not None else 1),
+                            iva=(iva_norm if iva_norm is not None else Decimal("0.21")),
+                            marca=marca_str,
+                        )
+                        indice.registrar_pl(codigo_norm, pl.pk)
+                        indice.registrar_instancia(pl)
+                        logger.info(
+                            "PL create: id=%s bulto=%s iva=%s marca='%s' (codigo=%s, proveedor=%s)",
+                            getattr(pl, "pk", None),
+                            pl.bulto,
+                            pl.iva,
+                            getattr(pl, "marca", None),
+                            codigo_norm,
+                            getattr(proveedor, "pk", None),
+                        )
+                        stats.creadas += 1
+
+                    # Si no hay mapeo a Articulo definitivo, lo dejamos como ArticuloSinRevisar
+                    # Evitar MultipleObjectsReturned: usar filter().first() por posibles duplicados históricos
+                    codigo_prov_norm = _normalizar_codigo_precio(codigo)
+                    # (primer ASR por prefijo, resuelto desde el índice)
+                    asr_id = indice.asr_id(codigo_prov_norm)
+                    asr = indice.instancia(ArticuloSinRevisar, asr_id) if asr_id is not None else None
+                    if asr:
+                        changed_asr = False
+                        # Mantener descripcion_proveedor existente, solo actualizar precio
+                        if asr.precio != precio:
+                            asr.precio = precio
+                            changed_asr = True
+                        # Actualizar código de barras si provisto
+                        if codigo_barras and asr.codigo_barras != codigo_barras:
+                            asr.codigo_barras = codigo_barras
+                            changed_asr = True
+                            stats.asr_tocados.add(asr.pk)
+                        if changed_asr:
+                            asr.save()
+                    else:
+                        asr = ArticuloSinRevisar.objects.create(
+                            proveedor=proveedor,
+                            codigo_proveedor=codigo_prov_norm,
+                            descripcion_proveedor=descripcion,
+                            precio=precio,
+                            stock=0,
+                            codigo_barras=codigo_barras if codigo_barras else None,
+                        )
+                        indice.registrar_asr(asr.codigo_proveedor, asr.pk)
+                        stats.asr_tocados.add(asr.pk)
+                        indice.registrar_instancia(asr)
+
+                    # Asegurar ArticuloProveedor por cada PrecioDeLista (inicialmente vinculado a ASR)
+                    from articulos.adapters.models import ArticuloProveedor as AP
+                    ap_id = indice.ap_id(pl.pk)
+                    if ap_id is not None:
+                        ap = indice.instancia(AP, ap_id)
+                        # Eliminar duplicados si existieran (defensa histórica)
+                        extra_ids = indice.ap_duplicados(pl.pk)
+                        if extra_ids:
+                            AP.objects.filter(id__in=extra_ids).delete()
+                            indice.quitar_ap_duplicados(pl.pk)
+                        # Actualizar datos desde PL/ASR (si no está mapeado a Articulo)
+                        changed_ap = False
+                        if ap.codigo_proveedor != codigo_prov_norm:
+                            ap.codigo_proveedor = codigo_prov_norm
+                            changed_ap = True
+                        if ap.precio != precio:
+                            ap.precio = precio
+                            changed_ap = True
+                        # Mantener stock y descripcion_proveedor existentes
+                        if ap.articulo_id is None and ap.articulo_s_revisar_id != asr.id:
+                            ap.articulo_s_revisar = asr
+                            changed_ap = True
+                        if ap.proveedor_id != proveedor.id:
+                            ap.proveedor = proveedor
+                            changed_ap = True
+                        # Sincronizar flag dividir desde PrecioDeLista si existe ese campo
+                        try:
+                            pl_dividir = getattr(pl, "dividir")
+                        except Exception:
+                            pl_dividir = None
+                        if pl_dividir is not None and getattr(ap, "dividir", None) != pl_dividir:
+                            ap.dividir = pl_dividir
+                            changed_ap = True
+                        # Si hay código de barras, crear/mantener Articulo definitivo y mapear AP
+                        if codigo_barras:
+                            art, created_art = Articulo.objects.get_or_create(
+                                codigo_barras=codigo_barras,
+                                defaults={
+                                    "nombre": descripcion[:200] or codigo_prov_norm,
+                                    "descripcion": descripcion,
+                                },
+                            )
+                            if created_art:
+                                logger.info("Articulo create: id=%s codigo_barras=%s", getattr(art, "pk", None), codigo_barras)
+                            if ap.articulo_id != art.id:
+                                ap.articulo = art
+                                ap.articulo_s_revisar = None
+                                changed_ap = True
+                            # Deshabilitar ASR: marcar estado como 'mapeado' si existe ese choice
+                            try:
+                                if asr and getattr(asr, "estado", None) != "mapeado":
+                                    asr.estado = "mapeado"
+                                    asr.save(update_fields=["estado"])
+                            except Exception:
+                                pass
+                        if changed_ap:
+                            ap.save()
+                    else:
+                        if codigo_barras:
+                            art, created_art = Articulo.objects.get_or_create(
+                                codigo_barras=codigo_barras,
+                                defaults={
+                                    "nombre": descripcion[:200] or codigo_prov_norm,
+                                    "descripcion": descripcion,
+                                },
+                            )
+                            if created_art:
+                                logger.info("Articulo create: id=%s codigo_barras=%s", getattr(art, "pk", None), codigo_barras)
+                            # Deshabilitar ASR si se creó
+                            try:
+                                if asr and getattr(asr, "estado", None) != "mapeado":
+                                    asr.estado = "mapeado"
+                                    asr.save(update_fields=["estado"])
+                            except Exception:
+                                pass
+                            ap = AP.objects.create(
+                                articulo=art,
+                                articulo_s_revisar=None,
+                                proveedor=proveedor,
+                                precio_de_lista=pl,
+                                codigo_proveedor=codigo_prov_norm,
+                                descripcion_proveedor=descripcion,
+                                precio=precio,
+                                stock=asr.stock,
+                                dividir=getattr(pl, "dividir", False),
+                            )
+                        else:
+                            ap = AP.objects.create(
+                                articulo=None,
+                                articulo_s_revisar=asr,
+                                proveedor=proveedor,
+                                precio_de_lista=pl,
+                                codigo_proveedor=codigo_prov_norm,
+                                descripcion_proveedor=descripcion,
+                                precio=precio,
+                                stock=asr.stock,
+                                dividir=getattr(pl, "dividir", False),
+                            )
+                        indice.registrar_ap(pl.pk, ap.pk)
+                        indice.registrar_instancia(ap)
+
+                    # update() y no save(): save() invalida la huella
+                    PrecioDeLista.objects.filter(pk=pl.pk).update(huella=huella)
+                    indice.registrar_huella(codigo_norm, huella)
 
-            # Asegurar ArticuloProveedor por cada PrecioDeLista (inicialmente vinculado a ASR)
-            from articulos.adapters.models import ArticuloProveedor as AP
-            qs_ap = AP.objects.filter(precio_de_lista=pl).order_by("id")
-            if qs_ap.exists():
-                ap = qs_ap.first()
-                # Eliminar duplicados si existieran (defensa histórica)
-                extra_ids = list(qs_ap.values_list("id", flat=True))[1:]
-                if extra_ids:
-                    AP.objects.filter(id__in=extra_ids).delete()
-                # Actualizar datos desde PL/ASR (si no está mapeado a Articulo)
-                changed_ap = False
-                if ap.codigo_proveedor != codigo_prov_norm:
-                    ap.codigo_proveedor = codigo_prov_norm
-                    changed_ap = True
-                if ap.precio != precio:
-                    ap.precio = precio
-                    changed_ap = True
-                # Mantener stock y descripcion_proveedor existentes
-                if ap.articulo is None and ap.articulo_s_revisar_id != asr.id:
-                    ap.articulo_s_revisar = asr
-                    changed_ap = True
-                if ap.proveedor_id != proveedor.id:
-                    ap.proveedor = proveedor
-                    changed_ap = True
-                # Sincronizar flag dividir desde PrecioDeLista si existe ese campo
-                try:
-                    pl_dividir = getattr(pl, "dividir")
-                except Exception:
-                    pl_dividir = None
-                if pl_dividir is not None and getattr(ap, "dividir", None) != pl_dividir:
-                    ap.dividir = pl_dividir
-                    changed_ap = True
-                # Si hay código de barras, crear/mantener Articulo definitivo y mapear AP
-                if codigo_barras:
-                    art, created_art = Articulo.objects.get_or_create(
-                        codigo_barras=codigo_barras,
-                        defaults={
-                            "nombre": descripcion[:200] or codigo_prov_norm,
-                            "descripcion": descripcion,
-                        },
-                    )
-                    if created_art:
-                        logger.info("Articulo create: id=%s codigo_barras=%s", getattr(art, "pk", None), codigo_barras)
-                    if ap.articulo_id != art.id:
-                        ap.articulo = art
-                        ap.articulo_s_revisar = None
-                        changed_ap = True
-                    # Deshabilitar ASR: marcar estado como 'mapeado' si existe ese choice
-                    try:
-                        if asr and getattr(asr, "estado", None) != "mapeado":
-                            asr.estado = "mapeado"
-                            asr.save(update_fields=["estado"])
-                    except Exception:
-                        pass
-                if changed_ap:
-                    ap.save()
-            else:
-                if codigo_barras:
-                    art, created_art = Articulo.objects.get_or_create(
-                        codigo_barras=codigo_barras,
-                        defaults={
-                            "nombre": descripcion[:200] or codigo_prov_norm,
-                            "descripcion": descripcion,
-                        },
-                    )
-                    if created_art:
-                        logger.info("Articulo create: id=%s codigo_barras=%s", getattr(art, "pk", None), codigo_barras)
-                    # Deshabilitar ASR si se creó
-                    try:
-                        if asr and getattr(asr, "estado", None) != "mapeado":
-                            asr.estado = "mapeado"
-                            asr.save(update_fields=["estado"])
-                    except Exception:
-                        pass
-                    AP.objects.create(
-                        articulo=art,
-                        articulo_s_revisar=None,
-                        proveedor=proveedor,
-                        precio_de_lista=pl,
-                        codigo_proveedor=codigo_prov_norm,
-                        descripcion_proveedor=descripcion,
-                        precio=precio,
-                        stock=asr.stock,
-                        dividir=getattr(pl, "dividir", False),
-                    )
-                else:
-                    AP.objects.create(
-                        articulo=None,
-                        articulo_s_revisar=asr,
-                        proveedor=proveedor,
-                        precio_de_lista=pl,
-                        codigo_proveedor=codigo_prov_norm,
-                        descripcion_proveedor=descripcion,
-                        precio=precio,
-                        stock=asr.stock,
-                        dividir=getattr(pl, "dividir", False),
-                    )
+    # Último chunk (incompleto), si no se cortó por `max_lotes`; después del
+    # recálculo diferido para no confirmar filas con precios sin recalcular
+    if al_confirmar_lote is not None and stats.filas_leidas > lotes * chunk_size:
+        al_confirmar_lote(stats)
 
     return stats
 
@@ -0,0 +1,208 @@
+"""
+Índice en memoria de los códigos de un proveedor para la importación.
+
+Se carga una sola vez al comienzo de `importar_csv` y responde desde memoria
+las búsquedas que antes se hacían por fila contra la base:
+
+- código normalizado -> ids de PrecioDeLista y huella de la última importación (vía dict)
+- id de PrecioDeLista -> ids de ArticuloProveedor (vía dict)
+- prefijo -> ArticuloSinRevisar de menor id cuyo código empieza con él
+  (equivalente a `codigo_proveedor__startswith=...order_by("id").first()`),
+  resuelto con búsqueda binaria sobre la lista ordenada de códigos.
+
+Los ArticuloSinRevisar se cargan recién en la primera búsqueda por prefijo: una
+reimportación sin cambios resuelve todo con la consulta de PrecioDeLista.
+
+El camino fila a fila pide además las instancias a modificar (`instancia`): se
+precargan por chunk (`precargar_instancias`, una consulta por modelo con sólo
+los ids que el chunk necesita) y la importación las modifica y guarda en el lugar.
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from proveedores.adapters.models import Proveedor
+from precios.adapters.models import PrecioDeLista
+from articulos.adapters.models import ArticuloSinRevisar
+
+
+class IndicePrefijos:
+    """Lista ordenada de `(codigo, valor)` con búsqueda por prefijo.
+
+    `buscar(prefijo)` devuelve el valor del primer elemento registrado (orden de
+    inserción, que para ids de base coincide con el menor id) cuyo código empieza
+    con `prefijo`. Los resultados se memorizan; registrar un código nuevo sólo
+    puede completar búsquedas que antes no tenían resultado.
+    """
+
+    def __init__(self) -> None:
+        self._codigos: List[str] = []
+        # Valores por posición de la lista ordenada: (orden de registro, valor)
+        self._valores: List[Tuple[int, Any]] = []
+        self._memo: Dict[str, Optional[Any]] = {}
+        self._orden = 0
+
+    def __len__(self) -> int:
+        return len(self._codigos)
+
+    def registrar(self, codigo: str, valor: Any) -> None:
+        pos = bisect_left(self._codigos, codigo)
+        self._codigos.insert(pos, codigo)
+        self._valores.insert(pos, (self._orden, valor))
+        self._orden += 1
+        # Sólo cambian los prefijos cacheados sin resultado: el nuevo es el de mayor orden
+        for fin in range(1, len(codigo) + 1):
+            prefijo = codigo[:fin]
+            if prefijo in self._memo and self._memo[prefijo] is None:
+                self._memo[prefijo] = valor
+
+    def registrar_lote(self, pares: Iterable[Tuple[str, Any]]) -> None:
+        """Registra varios `(codigo, valor)` reordenando una sola vez (evita inserciones O(n) por código)."""
+        nuevos = []
+        for codigo, valor in pares:
+            nuevos.append((codigo, (self._orden, valor)))
+            self._orden += 1
+            for fin in range(1, len(codigo) + 1):
+                prefijo = codigo[:fin]
+                if prefijo in self._memo and self._memo[prefijo] is None:
+                    self._memo[prefijo] = valor
+        if not nuevos:
+            return
+        # sort estable: ante códigos iguales conserva el orden de registro
+        combinados = sorted(list(zip(self._codigos, self._valores)) + nuevos, key=lambda par: par[0])
+        self._codigos = [codigo for codigo, _ in combinados]
+        self._valores = [valor for _, valor in combinados]
+
+    def buscar(self, prefijo: str) -> Optional[Any]:
+        if prefijo in self._memo:
+            return self._memo[prefijo]
+        mejor: Optional[Tuple[int, Any]] = None
+        pos = bisect_left(self._codigos, prefijo)
+        while pos < len(self._codigos) and self._codigos[pos].startswith(prefijo):
+            candidato = self._valores[pos]
+            if mejor is None or candidato[0] < mejor[0]:
+                mejor = candidato
+            pos += 1
+        valor = mejor[1] if mejor is not None else None
+        self._memo[prefijo] = valor
+        return valor
+
+
+class IndiceCodigosProveedor:
+    """Códigos existentes de un proveedor (PrecioDeLista / ArticuloSinRevisar / ArticuloProveedor).
+
+    Usar `cargar(proveedor)` para construirlo (una consulta, más otra al primer uso
+    del índice de ArticuloSinRevisar) y los métodos
+    `registrar_*`/`quitar_*` para mantenerlo al día con lo que escribe la importación.
+    """
+
+    def __init__(self, proveedor: Optional[Proveedor] = None) -> None:
+        self.proveedor = proveedor
+        # código normalizado -> ids de PrecioDeLista ordenados (>1 implica duplicados históricos)
+        self.pl_ids: Dict[str, List[int]] = {}
+        # código normalizado -> huella guardada en el PrecioDeLista de menor id
+        self.huellas: Dict[str, Optional[str]] = {}
+        # id de PrecioDeLista -> ids de ArticuloProveedor ordenados (>1 implica duplicados históricos)
+        self.ap_ids: Dict[int, List[int]] = {}
+        self._asr: Optional[IndicePrefijos] = None
+        # modelo -> {id: instancia} del chunk en curso (`precargar_instancias`)
+        self._instancias: Dict[Type[Any], Dict[int, Any]] = {}
+
+    @classmethod
+    def cargar(cls, proveedor: Proveedor) -> "IndiceCodigosProveedor":
+        indice = cls(proveedor)
+        filas = (
+            PrecioDeLista.objects.filter(proveedor=proveedor)
+            .order_by("id", "articuloproveedor__id")
+            .values_list("id", "codigo", "huella", "articuloproveedor__id")
+        )
+        for pl_id, codigo, huella, ap_id in filas:
+            ids = indice.pl_ids.setdefault(codigo, [])
+            if not ids:
+                indice.huellas[codigo] = huella
+            if not ids or ids[-1] != pl_id:
+                ids.append(pl_id)
+            if ap_id is not None:
+                indice.ap_ids.setdefault(pl_id, []).append(ap_id)
+        return indice
+
+    @property
+    def asr(self) -> IndicePrefijos:
+        if self._asr is None:
+            self._asr = IndicePrefijos()
+            if self.proveedor is not None:
+                self._asr.registrar_lote(
+                    (codigo, asr_id)
+                    for asr_id, codigo in ArticuloSinRevisar.objects.filter(proveedor=self.proveedor)
+                    .order_by("id")
+                    .values_list("id", "codigo_proveedor")
+                )
+        return self._asr
+
+    def pl_id(self, codigo: str) -> Optional[int]:
+        ids = self.pl_ids.get(codigo)
+        return ids[0] if ids else None
+
+    def huella(self, codigo: str) -> Optional[str]:
+        return self.huellas.get(codigo)
+
+    def registrar_huella(self, codigo: str, huella: Optional[str]) -> None:
+        self.huellas[codigo] = huella
+
+    def pl_duplicados(self, codigo: str) -> List[int]:
+        """Ids de PrecioDeLista sobrantes para `codigo` (todos menos el de menor id)."""
+        return list(self.pl_ids.get(codigo, [])[1:])
+
+    def asr_id(self, prefijo: str) -> Optional[int]:
+        return self.asr.buscar(prefijo)
+
+    def ap_id(self, pl_id: int) -> Optional[int]:
+        ids = self.ap_ids.get(pl_id)
+        return ids[0] if ids else None
+
+    def ap_duplicados(self, pl_id: int) -> List[int]:
+        return list(self.ap_ids.get(pl_id, [])[1:])
+
+    def registrar_pl(self, codigo: str, pl_id: int) -> None:
+        self.pl_ids.setdefault(codigo, []).append(pl_id)
+
+    def quitar_pl_duplicados(self, codigo: str) -> None:
+        """Deja sólo el PrecioDeLista de menor id (sus AP se borran en cascada)."""
+        ids = self.pl_ids.get(codigo)
+        if ids and len(ids) > 1:
+            for pl_id in ids[1:]:
+                self.ap_ids.pop(pl_id, None)
+            del ids[1:]
+
+    def registrar_asr(self, codigo: str, asr_id: int) -> None:
+        self.asr.registrar(codigo, asr_id)
+
+    def registrar_asrs(self, pares: Iterable[Tuple[str, int]]) -> None:
+        self.asr.registrar_lote(pares)
+
+    def quitar_ap_duplicados(self, pl_id: int) -> None:
+        ids = self.ap_ids.get(pl_id)
+        if ids and len(ids) > 1:
+            del ids[1:]
+
+    def registrar_ap(self, pl_id: int, ap_id: int) -> None:
+        self.ap_ids[pl_id] = [ap_id]
+
+    def precargar_instancias(self, modelo: Type[Any], ids: Iterable[int]) -> None:
+        """Carga en una consulta las instancias de `modelo` con esos ids (reemplaza las del chunk anterior)."""
+        self._instancias[modelo] = modelo.objects.in_bulk(sorted(set(ids)))
+
+    def instancia(self, modelo: Type[Any], pk: int) -> Any:
+        """PrecioDeLista / ArticuloSinRevisar / ArticuloProveedor por id, desde la precarga del chunk.
+
+        Una instancia fuera de la precarga (no debería pasar) se lee sola y queda guardada.
+        """
+        instancias = self._instancias.setdefault(modelo, {})
+        obj = instancias.get(pk)
+        if obj is None:
+            obj = instancias[pk] = modelo.objects.get(pk=pk)
+        return obj
+
+    def registrar_instancia(self, obj: Any) -> None:
+        """Suma una instancia recién creada, para las filas siguientes del mismo chunk."""
+        self._instancias.setdefault(type(obj), {})[obj.pk] = obj
@@ -0,0 +1,249 @@
+"""
+Resolución del lector (engine de pandas) para planillas subidas.
+
+Antes cada apertura hacía el sniff, probaba engines en cadena (cada intento
+fallido cuesta un parse) y, para .xls que xlrd no lee, volvía a convertir con
+xls2xlsx. `resolver_lector` centraliza esa cadena y recuerda qué funcionó:
+
+- El engine que abrió el archivo se registra por huella del archivo
+  (sha1 de los primeros 4 KB + tamaño + extensión), en memoria del proceso y en el cache
+  de Django; las aperturas siguientes van directo a ese engine.
+- El .xlsx convertido de un .xls legado se guarda en `IMPORTACIONES_DIR_XLS2XLSX`
+  direccionado por el hash del contenido completo (la huella corta no alcanza
+  para reutilizar datos) y se conserva hasta `descartar_lector`, cuando se
+  descarta el archivo subido.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger("importaciones.lector_excel")
+
+# Marca en el cache: el archivo se lee convirtiéndolo con xls2xlsx
+XLS2XLSX = "xls2xlsx"
+# Marca en el cache: pandas eligió el engine (ExcelFile sin engine)
+_AUTO = "auto"
+
+_BYTES_HUELLA = 4096
+_TTL_CACHE = 60 * 60 * 24 * 30
+_MAX_EN_MEMORIA = 256
+
+_ENGINES: "OrderedDict[str, str]" = OrderedDict()
+_ENGINES_LOCK = threading.Lock()
+
+
+def sniff_formato(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            header = f.read(8)
+        if header.startswith(b"PK"):
+            return "xlsx_like"
+        if header.startswith(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"):
+            return "xls_like"
+    except Exception:
+        pass
+    return None
+
+
+def candidatos(path: str) -> List[Optional[str]]:
+    """Engines a probar según el contenido del archivo y, si no se reconoce, su extensión."""
+    sniff = sniff_formato(path)
+    if sniff == "xlsx_like":
+        return ["openpyxl", "xlrd", None]
+    if sniff == "xls_like":
+        return ["xlrd", "openpyxl", None]
+    ext = os.path.splitext(path.lower())[1]
+    if ext == ".xlsx":
+        return ["openpyxl", "xlrd", None]
+    if ext == ".xls":
+        return ["xlrd", "openpyxl", None]
+    if ext == ".ods":
+        return ["odf", None]
+    return [None, "openpyxl", "xlrd"]
+
+
+def huella_lector(path: str) -> Optional[str]:
+    """sha1 de los primeros 4 KB + tamaño (+ extensión); None si el archivo no se puede leer."""
+    try:
+        with open(path, "rb") as f:
+            inicio = f.read(_BYTES_HUELLA)
+        ext = os.path.splitext(path.lower())[1].lstrip(".")
+        return f"{hashlib.sha1(inicio).hexdigest()}-{os.path.getsize(path)}-{ext}"
+    except OSError:
+        return None
+
+
+def _clave_cache(huella: str) -> str:
+    return f"importaciones:lector:{huella}"
+
+
+def _cache():
+    try:
+        from django.core.cache import cache
+
+        return cache
+    except Exception:  # pragma: no cover - sin Django configurado
+        return None
+
+
+def engine_registrado(huella: Optional[str]) -> Optional[str]:
+    if not huella:
+        return None
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(huella)
+    if engine is None:
+        cache = _cache()
+        try:
+            engine = cache.get(_clave_cache(huella)) if cache is not None else None
+        except Exception:
+            engine = None
+    return engine
+
+
+def _registrar_engine(huella: Optional[str], engine: Optional[str]) -> None:
+    if not huella:
+        return
+    valor = engine or _AUTO
+    with _ENGINES_LOCK:
+        _ENGINES[huella] = valor
+        _ENGINES.move_to_end(huella)
+        while len(_ENGINES) > _MAX_EN_MEMORIA:
+            _ENGINES.popitem(last=False)
+    cache = _cache()
+    try:
+        if cache is not None:
+            cache.set(_clave_cache(huella), valor, _TTL_CACHE)
+    except Exception:
+        logger.debug("[lector] No se pudo guardar el engine en cache", exc_info=True)
+
+
+def _olvidar_engine(huella: Optional[str]) -> None:
+    if not huella:
+        return
+    with _ENGINES_LOCK:
+        _ENGINES.pop(huella, None)
+    cache = _cache()
+    try:
+        if cache is not None:
+            cache.delete(_clave_cache(huella))
+    except Exception:
+        pass
+
+
+def _dir_convertidos() -> str:
+    try:
+        from django.conf import settings
+
+        directorio = getattr(settings, "IMPORTACIONES_DIR_XLS2XLSX", None)
+    except Exception:  # pragma: no cover - sin Django configurado
+        directorio = None
+    return directorio or os.path.join(tempfile.gettempdir(), "importaciones_xls2xlsx")
+
+
+def ruta_convertido(path: str) -> str:
+    """Ruta del .xlsx convertido para el contenido de `path` (exista o no)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return os.path.join(_dir_convertidos(), f"{h.hexdigest()}.xlsx")
+
+
+def convertir_xls_a_xlsx(path: str) -> str:
+    """Convierte con xls2xlsx una sola vez por contenido; devuelve la ruta del .xlsx."""
+    destino = ruta_convertido(path)
+    if os.path.exists(destino):
+        return destino
+    from xls2xlsx import XLS2XLSX as _XLS2XLSX  # type: ignore
+
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix=".xlsx", dir=os.path.dirname(destino))
+    os.close(fd)
+    try:
+        _XLS2XLSX(path).to_xlsx(tmp)
+        # Reemplazo atómico: otro proceso puede estar convirtiendo el mismo archivo
+        os.replace(tmp, destino)
+    except Exception:
+        _borrar(tmp)
+        raise
+    return destino
+
+
+def resolver_lector(
+    path: str,
+    pd: Any = None,
+    engines: Optional[List[Optional[str]]] = None,
+) -> Tuple[Any, Optional[str], str]:
+    """Abre `path` con el engine que corresponda. Devuelve (ExcelFile, engine, ruta_abierta).
+
+    `ruta_abierta` es `path` o el .xlsx convertido. Si el engine registrado para
+    la huella ya no sirve, se olvida y se recorre la cadena completa
+    (`engines`, por defecto `candidatos(path)`). Lanza RuntimeError si ninguno abre.
+    """
+    if pd is None:
+        import pandas as pd  # type: ignore
+
+    huella = huella_lector(path)
+    registrado = engine_registrado(huella)
+    if registrado is not None:
+        try:
+            return _abrir(pd, path, registrado)
+        except Exception:
+            logger.info("[lector] El engine registrado (%s) ya no abre %s; se resuelve de nuevo", registrado, path)
+            _olvidar_engine(huella)
+
+    last_exc: Optional[Exception] = None
+    for engine in engines if engines is not None else candidatos(path):
+        try:
+            logger.debug("[lector] Abriendo archivo: path=%s engine=%s", path, engine)
+            resultado = _abrir(pd, path, engine or _AUTO)
+            _registrar_engine(huella, engine)
+            return resultado
+        except Exception as exc:
+            last_exc = exc
+            # Si falla xlrd, convertir a xlsx y reintentar con openpyxl
+            if engine == "xlrd":
+                try:
+                    resultado = _abrir(pd, path, XLS2XLSX)
+                    _registrar_engine(huella, XLS2XLSX)
+                    return resultado
+                except Exception as exc2:
+                    last_exc = exc2
+    raise RuntimeError(f"No se pudo abrir el archivo {path}") from last_exc
+
+
+def _abrir(pd: Any, path: str, engine: str) -> Tuple[Any, Optional[str], str]:
+    if engine == XLS2XLSX:
+        convertido = convertir_xls_a_xlsx(path)
+        return pd.ExcelFile(convertido, engine="openpyxl"), "openpyxl", convertido
+    if engine == _AUTO:
+        xls = pd.ExcelFile(path)
+        engine_elegido = getattr(xls, "engine", None)
+        return xls, engine_elegido if isinstance(engine_elegido, str) else None, path
+    return pd.ExcelFile(path, engine=engine), engine, path
+
+
+def descartar_lector(path: str) -> None:
+    """Olvida el engine de `path` y borra su .xlsx convertido (al descartar el archivo subido)."""
+    try:
+        _borrar(ruta_convertido(path))
+    except OSError:
+        pass
+    _olvidar_engine(huella_lector(path))
+
+
+def limpiar_engines() -> None:
+    with _ENGINES_LOCK:
+        _ENGINES.clear()
+
+
+def _borrar(path: str) -> None:
+    try:
+        os.remove(path)
+    except Exception:
+        pass
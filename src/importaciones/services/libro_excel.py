@@ -0,0 +1,274 @@
+"""
+Sesión de libro Excel compartida por el flujo de importación.
+
+Listar hojas, previsualizar cada hoja y generar los CSV volvían a hacer el
+sniff del archivo, probar engines y reabrir el libro (a veces pasando otra vez
+por xls2xlsx). `abrir_libro` devuelve una `SesionLibro` cacheada en el proceso
+por ruta + mtime + tamaño, que conserva:
+
+- el `pd.ExcelFile` abierto y el engine resuelto (`lector_excel.resolver_lector`),
+- la ruta del .xlsx convertido si el original es un .xls legado,
+- las hojas ya parseadas (LRU de `IMPORTACIONES_HOJAS_EN_CACHE` por libro).
+
+Se mantienen a lo sumo `IMPORTACIONES_LIBROS_EN_CACHE` sesiones. Una sesión
+desalojada o invalidada sólo sale del cache (otro hilo puede estar usándola);
+el libro se cierra cuando se libera la última referencia. `cerrar_libro` sí la
+cierra, y la sesión se reabre si alguien la sigue usando; `descartar_libro`
+además borra el .xlsx convertido cuando se descarta el archivo subido.
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lector_excel import descartar_lector, resolver_lector
+
+logger = logging.getLogger("importaciones.libro_excel")
+
+
+def _get_pandas():
+    import pandas as pd  # type: ignore
+    return pd
+
+
+def _huella_archivo(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class SesionLibro:
+    """Libro abierto una sola vez, con sus hojas parseadas en un LRU."""
+
+    def __init__(self, path: str, huella: Tuple[int, int], max_hojas: int = 8) -> None:
+        self.path = path
+        self.huella = huella
+        self.max_hojas = max(1, int(max_hojas))
+        self.xls: Any = None
+        self.engine: Optional[str] = None
+        self.xlsx_convertido: Optional[str] = None
+        self._hojas: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._totales: Dict[Any, int] = {}
+        self._lock = threading.RLock()
+
+    def abrir(self) -> "SesionLibro":
+        """Abre el libro con el lector resuelto (ver `lector_excel`). Lanza RuntimeError si no abre."""
+        self.xls, self.engine, ruta = resolver_lector(self.path, pd=_get_pandas())
+        self.xlsx_convertido = ruta if ruta != self.path else None
+        return self
+
+    def libro(self) -> Any:
+        """El `pd.ExcelFile` abierto; lo reabre si la sesión se cerró mientras se usaba."""
+        with self._lock:
+            if self.xls is None:
+                self.abrir()
+            return self.xls
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.libro().sheet_names)
+
+    def parse(self, hoja: Any = 0, header: Any = 0, nrows: Optional[int] = None) -> Any:
+        """DataFrame de la hoja (como `read_excel(sheet_name=hoja, header=header, nrows=nrows)`), cacheado."""
+        clave = (hoja, header, nrows)
+        with self._lock:
+            df = self._hojas.get(clave)
+            if df is not None:
+                self._hojas.move_to_end(clave)
+                return df
+            xls = self.libro()
+            if nrows is None:
+                df = xls.parse(hoja, header=header)
+            else:
+                df = xls.parse(hoja, header=header, nrows=nrows)
+            self._hojas[clave] = df
+            while len(self._hojas) > self.max_hojas:
+                self._hojas.popitem(last=False)
+            return df
+
+    def vista_previa(self, hoja: Any = 0, nrows: int = 20) -> Tuple[Any, int]:
+        """Primeras `nrows` filas de datos (encabezado en la fila 0) y total de filas de datos.
+
+        Sólo se leen las filas pedidas; el total sale de la metadata de la hoja
+        o de un conteo que no construye celdas (`contar_filas`).
+        """
+        df = self.parse(hoja, nrows=nrows)
+        if len(df) < nrows:
+            return df, int(len(df))
+        # Encabezado + filas ya leídas: cota mínima para validar la metadata
+        return df, self.contar_filas(hoja, minimo=len(df) + 1) - 1
+
+    def contar_filas(self, hoja: Any = 0, minimo: int = 0) -> int:
+        """Filas de la hoja hasta la última con datos (lo que leería `parse(header=None)`).
+
+        En xlsx se usa la dimensión declarada (`<dimension ref="A1:G50001">`); si
+        falta o es menor que `minimo` (hay generadores que escriben sólo "A1"),
+        se cuentan las filas recorriendo el XML.
+        """
+        with self._lock:
+            total = self._totales.get(hoja)
+            if total is None or total < minimo:
+                total = self._contar_filas(hoja, minimo)
+                self._totales[hoja] = total
+            return total
+
+    def _contar_filas(self, hoja: Any, minimo: int) -> int:
+        nombre = self.sheet_names[hoja] if isinstance(hoja, int) else hoja
+        book = getattr(self.libro(), "book", None)
+        if self.engine == "openpyxl" and book is not None:
+            ws = book[nombre]
+            # pandas llama a reset_dimensions() al parsear: se relee la declarada en el XML
+            max_row = _filas_declaradas(ws) if getattr(book, "read_only", False) else ws.max_row
+            if max_row and max_row >= max(minimo, 2):
+                return int(max_row)
+            return max(minimo, _contar_filas_xml(ws))
+        if self.engine == "xlrd" and book is not None:
+            return max(minimo, int(book.sheet_by_name(nombre).nrows))
+        # ODS: sin metadata barata, se parsea (y queda cacheada para la conversión)
+        return max(minimo, int(len(self.parse(nombre, header=None))))
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._hojas.clear()
+            self._totales.clear()
+            try:
+                close = getattr(self.xls, "close", None)
+                if callable(close):
+                    close()
+            except Exception:
+                pass
+            self.xls = None
+
+
+# Inicio de fila (<row r="N" ...>) o valor de celda (<v> / <is>), con o sin prefijo de namespace
+_RE_TOKEN_XML = re.compile(rb"<(?:\w+:)?(?:row\b([^>]*)|v[\s>]|is[\s>])")
+_RE_ATRIBUTO_R = re.compile(rb'\br="(\d+)"')
+
+
+_RE_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\b[^>]*\bref="([^"]+)"')
+
+
+def _filas_declaradas(ws: Any) -> Optional[int]:
+    """Última fila según `<dimension ref="A1:G50001">` (al principio del XML), o None si no está."""
+    get_source = getattr(ws, "_get_source", None)
+    if get_source is None:
+        return getattr(ws, "max_row", None)
+    with get_source() as src:
+        inicio = src.read(4096)
+    m = _RE_DIMENSION.search(inicio)
+    if not m:
+        return None
+    from openpyxl.utils.cell import range_boundaries  # type: ignore
+
+    try:
+        return range_boundaries(m.group(1).decode("ascii"))[3]
+    except (ValueError, TypeError):
+        return None
+
+
+def _contar_filas_xml(ws: Any, bloque: int = 1 << 20) -> int:
+    """Índice de la última fila con algún valor, escaneando el XML de la hoja sin crear celdas.
+
+    Usa el origen de la hoja read_only de openpyxl; si no está disponible, cae a `iter_rows`.
+    """
+    get_source = getattr(ws, "_get_source", None)
+    if get_source is None:
+        ultima = 0
+        for numero, fila in enumerate(ws.iter_rows(values_only=True), start=1):
+            if any(v is not None for v in fila):
+                ultima = numero
+        return ultima
+
+    ultima = numero = 0
+    resto = b""
+    with get_source() as src:
+        while True:
+            datos = src.read(bloque)
+            buf = resto + datos
+            # Procesar hasta el último "<" para no partir un tag entre bloques
+            corte = buf.rfind(b"<") if datos else len(buf)
+            if corte == -1:
+                corte = len(buf)
+            for m in _RE_TOKEN_XML.finditer(buf, 0, corte):
+                atributos = m.group(1)
+                if atributos is None:
+                    ultima = numero
+                else:
+                    r = _RE_ATRIBUTO_R.search(atributos)
+                    numero = int(r.group(1)) if r else numero + 1
+            resto = buf[corte:]
+            if not datos:
+                return ultima
+
+
+_SESIONES: "OrderedDict[str, SesionLibro]" = OrderedDict()
+_SESIONES_LOCK = threading.Lock()
+
+
+def _limites() -> Tuple[int, int]:
+    try:
+        from django.conf import settings
+
+        return (
+            int(getattr(settings, "IMPORTACIONES_LIBROS_EN_CACHE", 4)),
+            int(getattr(settings, "IMPORTACIONES_HOJAS_EN_CACHE", 8)),
+        )
+    except Exception:  # pragma: no cover - sin Django configurado
+        return 4, 8
+
+
+def abrir_libro(path: str) -> SesionLibro:
+    """Devuelve la sesión cacheada del archivo, o la abre si no existe o el archivo cambió."""
+    huella = _huella_archivo(path)
+    max_libros, max_hojas = _limites()
+    with _SESIONES_LOCK:
+        sesion = _SESIONES.get(path)
+        if sesion is not None and sesion.huella == huella:
+            _SESIONES.move_to_end(path)
+            return sesion
+        if sesion is not None:
+            # Sin cerrarla: otro hilo puede estar usándola
+            del _SESIONES[path]
+    # Abrir fuera del lock global: puede tardar (xls2xlsx)
+    nueva = SesionLibro(path, huella, max_hojas=max_hojas).abrir()
+    if max_libros <= 0:
+        return nueva
+    sobrante: Optional[SesionLibro] = None
+    with _SESIONES_LOCK:
+        otra = _SESIONES.get(path)
+        if otra is not None and otra.huella == huella:
+            # Otro hilo la abrió mientras tanto: la nuestra no la vio nadie
+            sobrante, nueva = nueva, otra
+        else:
+            _SESIONES[path] = nueva
+        _SESIONES.move_to_end(path)
+        # Las desalojadas sólo salen del cache: quien las tenga sigue usándolas
+        while len(_SESIONES) > max_libros:
+            _SESIONES.popitem(last=False)
+    if sobrante is not None:
+        sobrante.cerrar()
+    return nueva
+
+
+def cerrar_libro(path: str) -> None:
+    """Invalida la sesión del archivo (p.ej. antes de borrarlo)."""
+    with _SESIONES_LOCK:
+        sesion = _SESIONES.pop(path, None)
+    if sesion is not None:
+        sesion.cerrar()
+
+
+def descartar_libro(path: str) -> None:
+    """Cierra la sesión y descarta el lector del archivo subido (incluido su .xlsx convertido)."""
+    cerrar_libro(path)
+    descartar_lector(path)
+
+
+def limpiar_sesiones() -> None:
+    with _SESIONES_LOCK:
+        sesiones = list(_SESIONES.values())
+        _SESIONES.clear()
+    for sesion in sesiones:
+        sesion.cerrar()
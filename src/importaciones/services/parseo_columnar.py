@@ -0,0 +1,114 @@
+"""
+Parseo columnar (pandas/NumPy) de filas del CSV de importación.
+
+Transforma un bloque de filas crudas en `FilaCSV` trabajando por columna en
+lugar de fila a fila:
+
+- las columnas configuradas (`ConfigImportacion`) se transponen de una vez;
+- códigos, descripciones, barras y marca se limpian en una pasada por columna;
+- precio, bulto e IVA se factorizan (`pd.factorize`) y se parsean una sola vez
+  por valor distinto con las mismas funciones que usa `_parsear_fila`, por lo
+  que la semántica Decimal es idéntica (las listas repiten mucho estos valores);
+- las filas inválidas se descartan con una máscara booleana.
+
+La lectura del archivo sigue siendo `csv.reader` para respetar exactamente las
+filas cortas/irregulares y la numeración de filas del camino fila a fila.
+"""
+
+from itertools import zip_longest
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .importador_csv import (
+    FilaCSV,
+    _normalizar_iva,
+    _parse_decimal,
+    _parse_decimal_loose,
+)
+
+
+def _por_valor_unico(columna: Sequence[Optional[str]], fn: Callable[[object], object]) -> np.ndarray:
+    """Aplica `fn` una vez por valor distinto de `columna`; las celdas ausentes quedan en None."""
+    codigos, unicos = pd.factorize(pd.Series(columna, dtype=object))
+    resultados = np.empty(len(unicos) + 1, dtype=object)
+    for i, valor in enumerate(unicos):
+        resultados[i] = fn(valor)
+    # factorize marca los faltantes con -1: apunta al último elemento (None)
+    resultados[-1] = None
+    return resultados[codigos]
+
+
+def _limpiar(columna: Sequence[Optional[str]]) -> np.ndarray:
+    """strip() por celda; ausente -> "".
+
+    (`Series.str.strip` sobre columnas object también itera en Python y con más
+    overhead, por eso se usa una comprensión.)
+    """
+    return np.array([c.strip() if c is not None else "" for c in columna], dtype=object)
+
+
+def _texto_opcional(columna: Sequence[Optional[str]]) -> np.ndarray:
+    """strip(); vacío o ausente -> None."""
+    return np.array([(c.strip() or None) if c is not None else None for c in columna], dtype=object)
+
+
+def parsear_columnas(
+    filas: Sequence[Tuple[int, list]],
+    col_codigo_idx: int,
+    col_descripcion_idx: int,
+    col_precio_idx: int,
+    col_cant_idx: Optional[int] = None,
+    col_iva_idx: Optional[int] = None,
+    col_cod_barras_idx: Optional[int] = None,
+    col_marca_idx: Optional[int] = None,
+) -> List[FilaCSV]:
+    """Equivalente vectorizado de aplicar `_parsear_fila` a cada fila; devuelve sólo las válidas."""
+    n = len(filas)
+    if n == 0:
+        return []
+    # Transponer: una tupla por columna, None donde la fila es más corta
+    columnas = list(zip_longest(*(row for _, row in filas)))
+    vacia = (None,) * n
+
+    def _columna(idx: Optional[int]) -> Sequence[Optional[str]]:
+        if idx is None or idx >= len(columnas):
+            return vacia
+        return columnas[idx]
+
+    raw_codigo = _columna(col_codigo_idx)
+    raw_desc = _columna(col_descripcion_idx)
+    raw_precio = _columna(col_precio_idx)
+
+    codigo = _limpiar(raw_codigo)
+    descripcion = _limpiar(raw_desc)
+    precio = _por_valor_unico(raw_precio, _parse_decimal)
+
+    # Una columna obligatoria ausente en la fila la invalida (IndexError en el camino fila a fila);
+    # `is not None` y no pd.notna: Decimal("NaN") es un precio válido para `_parse_decimal`.
+    validas = (codigo != "") & (descripcion != "")
+    validas &= np.fromiter((p is not None for p in precio), dtype=bool, count=n)
+    posiciones = np.flatnonzero(validas)
+    if len(posiciones) == 0:
+        return []
+
+    bulto = _por_valor_unico(_columna(col_cant_idx), _parse_decimal_loose)
+    iva = _por_valor_unico(_columna(col_iva_idx), _normalizar_iva)
+    barras = _texto_opcional(_columna(col_cod_barras_idx))
+    marca = _texto_opcional(_columna(col_marca_idx))
+    numeros = np.fromiter((idx for idx, _ in filas), dtype=np.int64, count=n)
+
+    return list(
+        map(
+            FilaCSV,
+            numeros[posiciones].tolist(),
+            codigo[posiciones],
+            descripcion[posiciones],
+            precio[posiciones],
+            bulto[posiciones],
+            iva[posiciones],
+            barras[posiciones],
+            marca[posiciones],
+        )
+    )
@@ -1,16 +1,97 @@
 from __future__ import annotations
 
+import logging
+
 from celery import shared_task
 
+logger = logging.getLogger("importaciones.tasks")
+
 
-@shared_task(bind=True, name="importaciones.procesar_pendientes")
+@shared_task(bind=True, name="importaciones.procesar_pendientes", acks_late=True)
 def procesar_pendientes_task(self):
     """Procesa los CSV pendientes encolados en ArchivoPendiente.
 
     Reutiliza la lógica existente del repositorio para mantener una sola fuente de verdad.
+
+    Cada ejecución importa a lo sumo `IMPORTACIONES_LOTES_POR_TAREA` chunks por
+    archivo y, si quedan filas, se reencola: la siguiente sigue desde el punto
+    de control confirmado (con seek al byte donde termina). Varios chunks por
+    ejecución reparten la lectura del índice del proveedor y el arranque de la
+    tarea entre muchas filas. Con `acks_late`, si el worker muere a mitad de un
+    chunk el broker reentrega la tarea y se rehace sólo ese chunk.
+
+    Con `IMPORTACIONES_EN_PARALELO` reparte el trabajo: una tarea por proveedor
+    (`importar_proveedor_task`) y un chord que junta los resultados en
+    `resumir_importaciones_task`, con el mismo resumen que el modo secuencial.
+    En ambos modos cada proveedor se importa con su lock tomado; si estaba
+    ocupado (su dueño puede estar en el último chunk o haber muerto sin
+    soltarlo) la tarea se reencola para cuando venza (`reintentar_en`).
     """
+    from django.conf import settings
+
     from importaciones.adapters.repository import ExcelRepository
 
     repo = ExcelRepository()
-    result = repo.procesar_pendientes()
+    if _en_paralelo(self.app):
+        from celery import chord
+
+        proveedores = repo.proveedores_con_pendientes()
+        if proveedores:
+            chord(importar_proveedor_task.s(proveedor_id) for proveedor_id in proveedores)(resumir_importaciones_task.s())
+        return {"status": "encolado", "proveedores": proveedores}
+
+    result = repo.procesar_pendientes(max_lotes=getattr(settings, "IMPORTACIONES_LOTES_POR_TAREA", 25) or None)
+    _al_terminar(result)
+    return result
+
+
+@shared_task(bind=True, name="importaciones.importar_proveedor", acks_late=True)
+def importar_proveedor_task(self, proveedor_id):
+    """Importa todos los pendientes de un proveedor, en orden y con su lock tomado.
+
+    Si otro worker ya lo está importando devuelve un resumen vacío (`ocupado`,
+    `completo=False`): el chord lo reintenta cuando venza ese lock.
+    """
+    from importaciones.adapters.repository import ExcelRepository
+
+    return ExcelRepository().procesar_pendientes_de_proveedor(proveedor_id)
+
+
+@shared_task(bind=True, name="importaciones.resumir_importaciones")
+def resumir_importaciones_task(self, resultados):
+    """Paso final del chord: junta los resúmenes por proveedor en uno solo."""
+    result = {"status": "ok", "procesados": 0, "detalles": [], "completo": True, "reintentar_en": 0, "asr_ids": []}
+    for parcial in resultados or []:
+        result["procesados"] += parcial.get("procesados", 0)
+        result["detalles"].extend(parcial.get("detalles", []))
+        result["completo"] = result["completo"] and parcial.get("completo", True)
+        result["reintentar_en"] = max(result["reintentar_en"], parcial.get("reintentar_en", 0))
+        result["asr_ids"].extend(parcial.get("asr_ids", []))
+    result["asr_ids"].sort()
+    _al_terminar(result)
     return result
+
+
+def _en_paralelo(app) -> bool:
+    from django.conf import settings
+
+    if not getattr(settings, "IMPORTACIONES_EN_PARALELO", False):
+        return False
+    # El chord necesita dónde guardar los resultados de cada proveedor
+    if app.conf.task_always_eager or app.conf.result_backend:
+        return True
+    logger.warning("IMPORTACIONES_EN_PARALELO requiere CELERY_RESULT_BACKEND; se procesa en secuencia")
+    return False
+
+
+def _al_terminar(result) -> None:
+    from articulos.tasks import precalcular_sugerencias_task
+
+    if not result.get("completo", True):
+        # Quedan filas (`reintentar_en` 0) o un proveedor/archivo ocupado: se
+        # reintenta cuando venza su lock (aunque lo haya dejado un worker caído)
+        procesar_pendientes_task.apply_async(countdown=result.get("reintentar_en", 0))
+    if result.get("asr_ids"):
+        # Sólo los ArticuloSinRevisar que la importación creó o cambió necesitan
+        # sugerencias nuevas (también tras una ejecución parcial)
+        precalcular_sugerencias_task.apply_async(args=[result["asr_ids"]], countdown=0)
@@ -0,0 +1,35 @@
+import csv
+
+import pytest
+
+from importaciones.adapters.models import ArchivoPendiente, ConfigImportacion
+from precios.adapters.models import Descuento
+from proveedores.adapters.models import Proveedor
+
+
+@pytest.fixture
+def crear_pendiente(db, tmp_path):
+    """Fábrica de ArchivoPendiente listos para importar (CSV en `tmp_path`, columnas A/B/C).
+
+    `crear_pendiente(nombre, filas=3, proveedor="PP")`:
+
+    - `filas`: cantidad de filas `[f"{nombre}{n}", f"Item {n}", "100"]` o la
+      lista de filas del CSV.
+    - `proveedor`: un Proveedor o su abreviatura (se crea si falta).
+    """
+    Descuento.objects.get_or_create(tipo="Sin Descuento")
+
+    def _crear(nombre, filas=3, proveedor="PP"):
+        if not isinstance(proveedor, Proveedor):
+            proveedor, _ = Proveedor.objects.get_or_create(abreviatura=proveedor, defaults={"nombre": f"Prov {proveedor}"})
+        config, _ = ConfigImportacion.objects.get_or_create(
+            proveedor=proveedor, col_codigo="A", col_descripcion="B", col_precio="C"
+        )
+        if isinstance(filas, int):
+            filas = [[f"{nombre}{n}", f"Item {n}", "100"] for n in range(filas)]
+        ruta = tmp_path / f"{nombre}.csv"
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(filas)
+        return ArchivoPendiente.objects.create(proveedor=proveedor, ruta_csv=str(ruta), hoja_origen="Hoja1", config_usada=config)
+
+    return _crear
@@ -0,0 +1,198 @@
+import datetime
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from django.test import override_settings
+
+from importaciones.services import conversion, conversion_xlsx
+from importaciones.services.conversion import convertir_a_csv
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _xlsx(tmp_path, filas, hojas=None):
+    path = tmp_path / "lista.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "H1"
+    for fila in filas:
+        ws.append(fila)
+    for nombre, extra in (hojas or {}).items():
+        otra = wb.create_sheet(nombre)
+        for fila in extra:
+            otra.append(fila)
+    wb.save(path)
+    return str(path)
+
+
+def _convertir(path, tmp_path, streaming, **kwargs):
+    salida = tmp_path / ("stream" if streaming else "pandas")
+    salida.mkdir(exist_ok=True)
+    with override_settings(IMPORTACIONES_XLSX_STREAMING=streaming):
+        out = convertir_a_csv(path, output_dir=str(salida), **kwargs)
+    outs = out if isinstance(out, list) else [out]
+    return [open(o, "rb").read() for o in outs]
+
+
+@pytest.fixture
+def contar_streaming(monkeypatch):
+    llamadas = []
+    original = conversion_xlsx.convertir_hoja_xlsx
+
+    def _wrap(*args, **kwargs):
+        ok = original(*args, **kwargs)
+        llamadas.append(ok)
+        return ok
+
+    monkeypatch.setattr(conversion_xlsx, "convertir_hoja_xlsx", _wrap)
+    return llamadas
+
+
+CASOS = {
+    "encabezado_y_mixto": (
+        [["Lista", None, None], ["cod", "desc", "precio"], ["0042", "Tornillo", 12.5], ["43", "Tuerca", 3], [44, "x", None]],
+        2,
+    ),
+    "columnas_numericas": ([[1, 2.5, "a"], [2, 3, "b"], [3, None, "NA"]], 0),
+    "numeros_en_texto": ([[1, "1.5", "a,b"], [2, "2", 'q"uote'], [3, "1e5", "multi\nline"]], 0),
+    "filas_en_blanco": ([["a", 1], [None, None], ["b", 2], [None, None]], 0),
+    "filas_irregulares": ([["a", 1, None, None, "x"], ["b"]], 0),
+    "floats": ([["a", 0.1], ["b", 1e16], ["c", 1e-5], ["d", 123456.789]], 1),
+    "floats_en_texto": ([["a", "0.1"], ["b", "1e16"], ["c", ""], ["d", "-.5"]], 0),
+    "start_row_mayor_que_la_hoja": ([["a", 1], ["b", 2]], 5),
+    "na_en_texto": ([["a", "nan"], ["b", "1"], ["c", "N/A"]], 0),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("caso", sorted(CASOS))
+def test_streaming_mismos_bytes_que_pandas(tmp_path, contar_streaming, caso):
+    filas, start_row = CASOS[caso]
+    path = _xlsx(tmp_path, filas)
+    esperado = _convertir(path, tmp_path, streaming=False, start_row=start_row)
+    assert _convertir(path, tmp_path, streaming=True, start_row=start_row) == esperado
+    assert contar_streaming == [True]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "filas",
+    [
+        [["a", datetime.datetime(2024, 1, 1)], ["b", datetime.datetime(2024, 1, 2)]],
+        [["a", True], ["b", False]],
+        [["a", "TRUE"], ["b", "false"]],
+        [["a", " 12"], ["b", "13"]],
+        [["a", "#DIV/0!"], ["b", "ok"]],
+        [["x"], ["y"]],
+    ],
+    ids=["fechas", "booleanos", "booleanos_en_texto", "numero_con_espacios", "error_excel", "una_columna"],
+)
+def test_casos_no_emulables_usan_pandas(tmp_path, contar_streaming, filas):
+    path = _xlsx(tmp_path, filas)
+    esperado = _convertir(path, tmp_path, streaming=False)
+    assert _convertir(path, tmp_path, streaming=True) == esperado
+    assert contar_streaming == [False]
+
+
+@pytest.mark.django_db
+def test_multiples_hojas_con_start_row_por_hoja(tmp_path, contar_streaming):
+    path = _xlsx(tmp_path, [["t", None], ["1", 2.5]], hojas={"H2": [["c", "d"], [3, 4]]})
+    kwargs = dict(sheet_name=["H1", "H2"], start_row={"H1": 1, "H2": 0})
+    assert _convertir(path, tmp_path, streaming=True, **kwargs) == _convertir(path, tmp_path, streaming=False, **kwargs)
+    assert contar_streaming == [True, True]
+
+
+def test_hoja_en_bloques_y_decimal_distinto(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversion_xlsx, "_FILAS_POR_BLOQUE", 2)
+    path = _xlsx(tmp_path, [["t", None]] + [[str(i), i * 0.5] for i in range(7)])
+    hoja = openpyxl.load_workbook(path, read_only=True)["H1"]
+    import pandas as pd
+
+    out = os.path.join(str(tmp_path), "out.csv")
+    assert conversion_xlsx.convertir_hoja_xlsx(pd, hoja, out, start_row=3) is True
+    filas = open(out, encoding="utf-8").read().splitlines()
+    assert filas[0] == "2,1.0"
+    assert len(filas) == 5
+    assert conversion_xlsx.convertir_hoja_xlsx(pd, hoja, out, decimal=",") is False
+
+
+def _libro_varias_hojas(tmp_path, n=4):
+    hojas = {f"H{i}": [["t", None, None]] + [[f"{i}{j:03d}", f"Item {j}", j * 1.5] for j in range(50)] for i in range(2, n + 1)}
+    return _xlsx(tmp_path, [["c", "d", "e"], [1, 2, 3]], hojas=hojas), ["H1"] + list(hojas)
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_conversion_en_paralelo_conserva_orden_y_contenido(tmp_path, streaming):
+    path, hojas = _libro_varias_hojas(tmp_path)
+    orden = list(reversed(hojas))
+    kwargs = dict(sheet_name=orden, start_row={h: 1 for h in hojas})
+    (tmp_path / "seq").mkdir()
+    (tmp_path / "par").mkdir()
+    with override_settings(IMPORTACIONES_XLSX_STREAMING=streaming):
+        secuencial = convertir_a_csv(path, output_dir=str(tmp_path / "seq"), workers=1, **kwargs)
+        paralelo = convertir_a_csv(path, output_dir=str(tmp_path / "par"), workers=3, **kwargs)
+    assert [os.path.basename(p) for p in paralelo] == [f"lista_{h}.csv" for h in orden]
+    assert [open(p, "rb").read() for p in paralelo] == [open(p, "rb").read() for p in secuencial]
+
+
+def test_conversion_en_paralelo_usa_el_setting(tmp_path, monkeypatch):
+    from concurrent import futures
+
+    pools = []
+    original = futures.ProcessPoolExecutor
+
+    def _pool(*args, **kwargs):
+        pools.append(kwargs.get("max_workers"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(futures, "ProcessPoolExecutor", _pool)
+    path, hojas = _libro_varias_hojas(tmp_path)
+    with override_settings(IMPORTACIONES_CONVERSION_WORKERS=2):
+        assert len(convertir_a_csv(path, output_dir=str(tmp_path), sheet_name=hojas)) == 4
+    with override_settings(IMPORTACIONES_CONVERSION_WORKERS=1):
+        convertir_a_csv(path, output_dir=str(tmp_path), sheet_name=hojas)
+    assert pools == [2]
+
+
+def test_conversion_en_paralelo_error_nombra_la_hoja(tmp_path):
+    path, hojas = _libro_varias_hojas(tmp_path)
+    # Un directorio con el nombre del CSV de H3 hace fallar la escritura de esa hoja
+    os.mkdir(tmp_path / "lista_H3.csv")
+    with pytest.raises(RuntimeError, match="lista_H3.csv"):
+        convertir_a_csv(path, output_dir=str(tmp_path), sheet_name=hojas, workers=2)
+
+
+def _falla_h1_y_demora_el_resto(ruta_libro, engine, input_path, name, *args):
+    if name == "H1":
+        raise RuntimeError(f"No se pudo convertir la hoja '{name}'")
+    time.sleep(0.5)
+    return _convertir_hoja_original(ruta_libro, engine, input_path, name, *args)
+
+
+def _muere_en_h1(ruta_libro, engine, input_path, name, *args):
+    if name == "H1":
+        # Como el OOM killer: el proceso termina sin devolver el error
+        os._exit(1)
+    return _convertir_hoja_original(ruta_libro, engine, input_path, name, *args)
+
+
+_convertir_hoja_original = conversion._convertir_hoja_en_proceso
+
+
+def test_conversion_en_paralelo_cancela_las_hojas_pendientes(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversion, "_convertir_hoja_en_proceso", _falla_h1_y_demora_el_resto)
+    path, hojas = _libro_varias_hojas(tmp_path, n=8)
+    with pytest.raises(RuntimeError, match="hoja 'H1'"):
+        convertir_a_csv(path, output_dir=str(tmp_path), sheet_name=hojas, workers=2)
+    # Las que no habían llegado a un proceso no se convierten
+    assert not os.path.exists(tmp_path / "lista_H8.csv")
+
+
+def test_conversion_en_paralelo_proceso_muerto_nombra_la_hoja(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversion, "_convertir_hoja_en_proceso", _muere_en_h1)
+    path, hojas = _libro_varias_hojas(tmp_path)
+    with pytest.raises(RuntimeError, match="No se pudo convertir la hoja 'H1' del archivo") as exc:
+        convertir_a_csv(path, output_dir=str(tmp_path), sheet_name=hojas, workers=2)
+    assert isinstance(exc.value.__cause__, BrokenProcessPool)
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from articulos.adapters.models import ArticuloSinRevisar
+from importaciones.adapters.bloqueos import BloqueoProveedor, bloqueo_proveedor
+from importaciones.adapters.models import ArchivoPendiente, BloqueoImportacion
+from importaciones.adapters.repository import ExcelRepository
+from precios.adapters.models import PrecioDeLista
+from proveedores.adapters.models import Proveedor
+
+
+@pytest.fixture
+def provs(db):
+    return [Proveedor.objects.create(nombre=f"Prov {a}", abreviatura=a) for a in ("PA", "PB")]
+
+
+def test_el_lock_es_exclusivo_y_vence(provs):
+    prov = provs[0]
+    primero = BloqueoProveedor(prov.pk)
+    assert primero.tomar()
+    assert not BloqueoProveedor(prov.pk).tomar()
+
+    # Vencido (worker caído): otro lo toma y el primero ya no puede soltarlo
+    BloqueoImportacion.objects.update(vence=timezone.now() - timedelta(seconds=1))
+    segundo = BloqueoProveedor(prov.pk)
+    assert segundo.tomar()
+    primero.soltar()
+    assert BloqueoImportacion.objects.get().dueno == segundo.dueno
+
+    antes = BloqueoImportacion.objects.get().vence
+    segundo.renovar()
+    assert BloqueoImportacion.objects.get().vence >= antes
+    segundo.soltar()
+    with bloqueo_proveedor(prov.pk) as bloqueo:
+        assert bloqueo is not None
+    assert not BloqueoImportacion.objects.exists()
+
+
+def test_proveedor_ocupado_no_se_importa_dos_veces(provs, crear_pendiente):
+    prov = provs[0]
+    archivo = crear_pendiente("a", proveedor=prov)
+    repo = ExcelRepository()
+
+    with bloqueo_proveedor(prov.pk):
+        ocupado = repo.procesar_pendientes_de_proveedor(prov.pk)
+    assert ocupado["ocupado"] is True and ocupado["procesados"] == 0
+    assert ocupado["completo"] is False and ocupado["reintentar_en"] > 0
+    archivo.refresh_from_db()
+    assert not archivo.procesado
+
+    resultado = repo.procesar_pendientes_de_proveedor(prov.pk)
+    assert resultado["procesados"] == 1 and resultado["detalles"][0]["creadas"] == 3
+    assert not BloqueoImportacion.objects.exists()
+
+
+def test_modo_secuencial_y_comando_respetan_el_lock(provs, crear_pendiente):
+    from django.core.management import call_command
+
+    pa, pb = provs
+    a1, b1 = crear_pendiente("a1", proveedor=pa), crear_pendiente("b1", proveedor=pb)
+
+    with bloqueo_proveedor(pa.pk):
+        resultado = ExcelRepository().procesar_pendientes()
+        assert [d["proveedor_id"] for d in resultado["detalles"]] == [pb.pk]
+        # El ocupado no cuenta como terminado: se reintenta al vencer su lock
+        assert resultado["completo"] is False and 590 <= resultado["reintentar_en"] <= 600
+
+        b2 = crear_pendiente("b2", proveedor=pb)
+        call_command("procesar_pendientes_script")
+        assert not ArchivoPendiente.objects.get(pk=a1.pk).procesado
+        assert ArchivoPendiente.objects.get(pk=b2.pk).procesado
+
+    assert ExcelRepository().procesar_pendientes()["procesados"] == 1
+    assert ArchivoPendiente.objects.get(pk=a1.pk).procesado and ArchivoPendiente.objects.get(pk=b1.pk).procesado
+    assert not BloqueoImportacion.objects.exists()
+
+
+def test_reparte_por_proveedor_y_resume_en_un_chord(provs, crear_pendiente, settings, monkeypatch):
+    from articulos.tasks import precalcular_sugerencias_task
+    from importaciones import tasks
+
+    app = tasks.procesar_pendientes_task.app
+
+    settings.IMPORTACIONES_EN_PARALELO = True
+    # La app toma la configuración de Django con prefijo CELERY_
+    monkeypatch.setitem(app.conf, "CELERY_TASK_ALWAYS_EAGER", True)
+    sugerencias = []
+    monkeypatch.setattr(precalcular_sugerencias_task, "apply_async", lambda **kw: sugerencias.append(kw))
+    resumenes = []
+    original = tasks.resumir_importaciones_task.run
+    monkeypatch.setattr(tasks.resumir_importaciones_task, "run", lambda r: resumenes.append(original(r)) or resumenes[-1])
+
+    pa, pb = provs
+    archivos = [crear_pendiente("a1", proveedor=pa), crear_pendiente("b1", proveedor=pb), crear_pendiente("a2", proveedor=pa)]
+    assert ExcelRepository().proveedores_con_pendientes() == [pa.pk, pb.pk]
+
+    assert tasks.procesar_pendientes_task.run() == {"status": "encolado", "proveedores": [pa.pk, pb.pk]}
+    assert all(ArchivoPendiente.objects.get(pk=a.pk).procesado for a in archivos)
+    assert PrecioDeLista.objects.count() == 9
+    assert resumenes[0]["procesados"] == 3 and resumenes[0]["completo"] is True
+    assert set(resumenes[0]) == {"status", "procesados", "detalles", "completo", "reintentar_en", "asr_ids"}
+    assert sugerencias == [{"args": [sorted(ArticuloSinRevisar.objects.values_list("id", flat=True))], "countdown": 0}]
+
+
+def test_sin_backend_de_resultados_procesa_en_secuencia(provs, crear_pendiente, settings, monkeypatch):
+    from importaciones import tasks
+
+    app = tasks.procesar_pendientes_task.app
+
+    settings.IMPORTACIONES_EN_PARALELO = True
+    monkeypatch.setitem(app.conf, "CELERY_TASK_ALWAYS_EAGER", False)
+    monkeypatch.setitem(app.conf, "CELERY_RESULT_BACKEND", None)
+    monkeypatch.setattr(tasks, "_al_terminar", lambda result: None)
+    crear_pendiente("a", proveedor=provs[0])
+
+    assert tasks.procesar_pendientes_task.run()["procesados"] == 1
+
+
+def test_un_lock_de_worker_caido_no_da_la_cola_por_terminada(provs, crear_pendiente, monkeypatch):
+    # acks_late reentrega la tarea pero el lock del worker caído sigue vigente
+    from importaciones import tasks
+
+    prov = provs[0]
+    archivo = crear_pendiente("a", proveedor=prov)
+    BloqueoImportacion.objects.create(proveedor=prov, dueno="caido", vence=timezone.now() + timedelta(seconds=90))
+    encoladas = []
+    monkeypatch.setattr(tasks.procesar_pendientes_task, "apply_async", lambda **kw: encoladas.append(kw))
+
+    resultado = tasks.procesar_pendientes_task.run()
+    assert (resultado["procesados"], resultado["completo"]) == (0, False)
+    assert encoladas == [{"countdown": resultado["reintentar_en"]}] and 85 <= resultado["reintentar_en"] <= 90
+
+    # Lo mismo por proveedor (chord): el resumen reencola con la espera más larga
+    parciales = [ExcelRepository().procesar_pendientes_de_proveedor(prov.pk), {"completo": True, "reintentar_en": 0}]
+    assert tasks.resumir_importaciones_task.run(parciales)["completo"] is False
+    assert encoladas[1]["countdown"] == parciales[0]["reintentar_en"] > 0
+
+    # Vencido, la tarea reencolada lo toma e importa
+    BloqueoImportacion.objects.update(vence=timezone.now() - timedelta(seconds=1))
+    monkeypatch.setattr(tasks, "_al_terminar", lambda result: None)
+    assert tasks.procesar_pendientes_task.run()["completo"] is True
+    archivo.refresh_from_db()
+    assert archivo.procesado and not BloqueoImportacion.objects.exists()
+
+
+def test_archivo_reclamado_se_reintenta_al_vencer_el_reclamo(provs, crear_pendiente):
+    prov = provs[0]
+    archivo = crear_pendiente("a", proveedor=prov)
+    ArchivoPendiente.objects.filter(pk=archivo.pk).update(
+        reclamado_por="otro", reclamado_hasta=timezone.now() + timedelta(seconds=30)
+    )
+    for resultado in (ExcelRepository().procesar_pendientes(), ExcelRepository().procesar_pendientes_de_proveedor(prov.pk)):
+        assert (resultado["procesados"], resultado["completo"]) == (0, False)
+        assert 25 <= resultado["reintentar_en"] <= 30
@@ -0,0 +1,121 @@
+import pytest
+
+from articulos.adapters.models import ArticuloProveedor, ArticuloSinRevisar, PrecioCalculado
+from importaciones.adapters.repository import ExcelRepository
+from importaciones.services import importador_bulk
+from importaciones.services.importador_csv import importar_csv, leer_csv_con_posicion
+from precios.adapters.models import PrecioDeLista
+
+
+@pytest.fixture
+def pendiente(crear_pendiente, settings):
+    settings.IMPORTACIONES_CHUNK_SIZE = 2
+    return crear_pendiente("lista", filas=[[str(n), f"Item {n}", str(100 + n)] for n in range(1, 6)])
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_importa_por_chunks_con_punto_de_control(pendiente, settings, bulk):
+    settings.IMPORTACIONES_BULK = bulk
+    repo = ExcelRepository()
+
+    assert repo.importar_pendiente(pendiente.pk, max_lotes=1) is None
+    pendiente.refresh_from_db()
+    assert (pendiente.procesado, pendiente.fila_confirmada) == (False, 2)
+    assert pendiente.stats_confirmadas["creadas"] == 2
+    assert PrecioDeLista.objects.count() == 2
+
+    assert repo.importar_pendiente(pendiente.pk, max_lotes=1) is None
+    detalle = repo.importar_pendiente(pendiente.pk, max_lotes=1)
+    assert detalle["filas_leidas"] == 5 and detalle["creadas"] == 5
+    pendiente.refresh_from_db()
+    assert (pendiente.procesado, pendiente.fila_confirmada) == (True, 5)
+    assert ArticuloProveedor.objects.count() == 5
+    # Ya procesado: no se vuelve a importar
+    assert repo.importar_pendiente(pendiente.pk) == detalle
+
+
+def test_leer_desde_un_byte_equivale_a_releer_hasta_la_fila(tmp_path):
+    ruta = tmp_path / "multilinea.csv"
+    ruta.write_text('1,Caño ½",100\r\n2,"Dos\nlíneas",200\r\n3,Tres,300\r\n', encoding="utf-8")
+    completas = list(leer_csv_con_posicion(str(ruta), 1))
+    assert [fila for _, fila, _ in completas] == [["1", "Caño ½\"", "100"], ["2", "Dos\nlíneas", "200"], ["3", "Tres", "300"]]
+    assert completas[-1][2] == ruta.stat().st_size
+    for idx, _, fin in completas:
+        assert list(leer_csv_con_posicion(str(ruta), idx + 1, fin)) == completas[idx:]
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_retoma_con_seek_sin_releer_las_filas_confirmadas(pendiente, settings, bulk):
+    settings.IMPORTACIONES_BULK = bulk
+    repo = ExcelRepository()
+    assert repo.importar_pendiente(pendiente.pk, max_lotes=1) is None
+    pendiente.refresh_from_db()
+    with open(pendiente.ruta_csv, "rb") as f:
+        contenido = f.read()
+    assert pendiente.byte_confirmado == contenido.index(b"3,")
+
+    # Las filas ya confirmadas se pisan con basura del mismo largo: al retomar no se leen
+    with open(pendiente.ruta_csv, "wb") as f:
+        f.write(b"x" * pendiente.byte_confirmado + contenido[pendiente.byte_confirmado:])
+    detalle = repo.importar_pendiente(pendiente.pk)
+    assert (detalle["filas_leidas"], detalle["filas_descartadas"], detalle["creadas"]) == (5, 0, 5)
+
+
+def test_fila_a_fila_recalcula_precios_antes_de_cada_punto_de_control(pendiente):
+    # Sin salir del recálculo diferido (como un worker que muere tras confirmar)
+    vistos = []
+
+    def _al_confirmar(stats):
+        vistos.append((stats.ultima_fila, ArticuloProveedor.objects.count(), PrecioCalculado.objects.count()))
+
+    importar_csv(
+        proveedor=pendiente.proveedor, ruta_csv=pendiente.ruta_csv, start_row=1,
+        col_codigo_idx=0, col_descripcion_idx=1, col_precio_idx=2,
+        chunk_size=2, max_lotes=1, al_confirmar_lote=_al_confirmar,
+    )
+    assert vistos == [(2, 2, 2)]
+
+
+def test_retoma_desde_el_ultimo_chunk_confirmado(pendiente, settings, monkeypatch):
+    settings.IMPORTACIONES_BULK = True
+    original = importador_bulk._SincronizadorProveedor.aplicar_lote
+    llamadas = []
+
+    def falla_en_el_segundo(self, filas, stats):
+        llamadas.append([f.codigo for f in filas])
+        if len(llamadas) == 2:
+            raise RuntimeError("worker caído")
+        return original(self, filas, stats)
+
+    monkeypatch.setattr(importador_bulk._SincronizadorProveedor, "aplicar_lote", falla_en_el_segundo)
+    with pytest.raises(RuntimeError):
+        ExcelRepository().procesar_pendientes()
+    pendiente.refresh_from_db()
+    # El chunk fallido se revirtió junto con su punto de control
+    assert (pendiente.procesado, pendiente.fila_confirmada) == (False, 2)
+    assert sorted(PrecioDeLista.objects.values_list("codigo", flat=True)) == ["1/", "2/"]
+
+    resultado = ExcelRepository().procesar_pendientes()
+    assert llamadas[2:] == [["3", "4"], ["5"]]
+    assert resultado["completo"] is True
+    assert resultado["detalles"][0]["filas_leidas"] == 5 and resultado["detalles"][0]["creadas"] == 5
+    assert PrecioDeLista.objects.count() == 5
+
+
+def test_la_tarea_se_reencola_hasta_terminar(pendiente, settings, monkeypatch):
+    from articulos.tasks import precalcular_sugerencias_task
+    from importaciones.tasks import procesar_pendientes_task
+
+    settings.IMPORTACIONES_LOTES_POR_TAREA = 2
+    encoladas = []
+    monkeypatch.setattr(procesar_pendientes_task, "apply_async", lambda **kw: encoladas.append("pendientes"))
+    monkeypatch.setattr(precalcular_sugerencias_task, "apply_async", lambda **kw: encoladas.append(kw["args"]))
+
+    # Las sugerencias se piden también tras una ejecución parcial, sólo con sus ArticuloSinRevisar
+    assert procesar_pendientes_task.run()["completo"] is False
+    primeros = sorted(ArticuloSinRevisar.objects.values_list("id", flat=True))
+    assert encoladas == ["pendientes", [primeros]] and len(primeros) == 4
+    resultado = procesar_pendientes_task.run()
+    assert resultado["completo"] is True and resultado["procesados"] == 1
+    nuevos = sorted(ArticuloSinRevisar.objects.exclude(id__in=primeros).values_list("id", flat=True))
+    assert encoladas[2:] == [[nuevos]] and resultado["asr_ids"] == nuevos
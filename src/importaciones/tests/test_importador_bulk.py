@@ -0,0 +1,199 @@
+import csv
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from proveedores.adapters.models import Proveedor
+from precios.adapters.models import Descuento, PrecioDeLista
+from articulos.adapters.models import Articulo, ArticuloProveedor, ArticuloSinRevisar
+from articulos.adapters.sugerencias_mapeo import precalcular_sugerencias, sugerencias_de
+from importaciones.services.importador_csv import importar_csv
+
+
+def _escribir_csv(path, filas):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(filas)
+    return str(path)
+
+
+def _snapshot():
+    return {
+        "pl": list(
+            PrecioDeLista.objects.order_by("id").values_list(
+                "id", "proveedor_id", "codigo", "descripcion", "precio", "bulto", "iva", "marca", "huella"
+            )
+        ),
+        "asr": list(
+            ArticuloSinRevisar.objects.order_by("id").values_list(
+                "id", "proveedor_id", "codigo_proveedor", "descripcion_proveedor", "precio", "stock",
+                "codigo_barras", "estado", "descuento_id",
+            )
+        ),
+        "ap": list(
+            ArticuloProveedor.objects.order_by("id").values_list(
+                "id", "articulo_id", "articulo_s_revisar_id", "proveedor_id", "precio_de_lista_id",
+                "codigo_proveedor", "descripcion_proveedor", "precio", "stock", "dividir",
+            )
+        ),
+        "art": list(Articulo.objects.order_by("id").values_list("id", "codigo_barras", "nombre", "descripcion")),
+    }
+
+
+class ImportadorBulkTest(TestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        Descuento.objects.get_or_create(tipo="Sin Descuento")
+        self.prov = Proveedor.objects.create(nombre="Prov Bulk", abreviatura="pb")
+        # Estado previo: PL+ASR+AP existentes, un ASR que matchea por prefijo y un Articulo con barras
+        pl = PrecioDeLista.objects.create(
+            proveedor=self.prov, codigo="20", descripcion="Viejo 20", precio=10, bulto=1, iva=Decimal("0.21")
+        )
+        asr = ArticuloSinRevisar.objects.create(
+            proveedor=self.prov, codigo_proveedor="20", descripcion_proveedor="Viejo 20", precio=10, estado="pendiente"
+        )
+        ArticuloProveedor.objects.create(
+            articulo_s_revisar=asr, proveedor=self.prov, precio_de_lista=pl,
+            codigo_proveedor="20", descripcion_proveedor="Viejo 20", precio=10, stock=3,
+        )
+        ArticuloSinRevisar.objects.create(
+            proveedor=self.prov, codigo_proveedor="30/A", descripcion_proveedor="Prefijo", precio=5, estado="pendiente"
+        )
+        Articulo.objects.create(codigo_barras="779000", nombre="Existente", descripcion="Existente")
+
+    def _importar(self, path, **kwargs):
+        return importar_csv(
+            proveedor=self.prov,
+            ruta_csv=path,
+            start_row=2,
+            col_codigo_idx=0,
+            col_descripcion_idx=1,
+            col_precio_idx=2,
+            col_cant_idx=3,
+            col_iva_idx=4,
+            col_cod_barras_idx=5,
+            col_marca_idx=6,
+            **kwargs,
+        )
+
+    def _comparar(self, path, chunk_size):
+        with transaction.atomic():
+            stats_fila = self._importar(path)
+            estado_fila = _snapshot()
+            transaction.set_rollback(True)
+        stats_bulk = self._importar(path, bulk=True, chunk_size=chunk_size)
+        self.assertEqual(stats_bulk, stats_fila)
+        self.assertEqual(_snapshot(), estado_fila)
+        return stats_bulk
+
+    def test_mismo_resultado_que_fila_a_fila(self, chunk_size=3):
+        path = _escribir_csv(
+            self._tmp("lista.csv"),
+            [
+                ["codigo", "descripcion", "precio", "cant", "iva", "barras", "marca"],
+                ["0020", "Nuevo 20", "12.50", "x6", "21%", "", "ACME"],
+                ["30", "Matchea prefijo", "7", "", "10.5", "", ""],
+                ["", "sin codigo", "1", "", "", "", ""],
+                ["40", "Con barras", "99.999", "10u", "0.105", "779000", "M"],
+                ["41", "Barras nuevas", "3,5", "", "", "779111", ""],
+                ["0042", "Nuevo 42", "4", "", "", "", ""],
+                ["42", "Repetido 42", "4.10", "2", "", "", "Z"],
+                ["43", "Precio inválido", "abc", "", "", "", ""],
+                ["44", "Otra vez barras nuevas", "8", "", "", "779111", ""],
+                ["20", "Nuevo 20", "12.50", "6", "21", "", "ACME"],
+            ],
+        )
+        stats = self._comparar(path, chunk_size)
+        self.assertEqual(stats.filas_leidas, 10)
+        self.assertEqual(stats.filas_descartadas, 3)
+
+    def test_mismo_resultado_en_un_solo_chunk(self):
+        self.test_mismo_resultado_que_fila_a_fila(chunk_size=1000)
+
+    def test_reimportacion_sin_cambios(self):
+        path = _escribir_csv(
+            self._tmp("lista.csv"),
+            [["h"]] + [[str(i), f"Item {i}", f"{i}.25", "", "", "", ""] for i in range(1, 8)],
+        )
+        self._importar(path, bulk=True, chunk_size=4)
+        stats = self._comparar(path, chunk_size=4)
+        self.assertEqual(stats.creadas, 0)
+        self.assertEqual(stats.actualizadas, 0)
+        self.assertEqual(stats.sin_cambios, 7)
+
+    def test_reimportacion_sin_cambios_una_sola_lectura(self):
+        path = _escribir_csv(
+            self._tmp("lista.csv"),
+            [["h"]] + [[str(i), f"Item {i}", "10", "", "", "", ""] for i in range(1, 50)],
+        )
+        self._importar(path, bulk=True, chunk_size=10)
+        for bulk in (True, False):
+            with CaptureQueriesContext(connection) as ctx:
+                stats = self._importar(path, bulk=bulk, chunk_size=10)
+            sql = [q["sql"] for q in ctx.captured_queries if not q["sql"].upper().startswith(("SAVEPOINT", "RELEASE"))]
+            self.assertEqual(len(sql), 1, sql)
+            self.assertEqual(stats.sin_cambios, 49)
+
+    def test_cambio_de_precio_solo_reaplica_esa_fila(self):
+        filas = [["h"]] + [[str(i), f"Item {i}", "10", "", "", "", ""] for i in range(1, 6)]
+        self._importar(_escribir_csv(self._tmp("a.csv"), filas), bulk=True)
+        filas[3][2] = "11"
+        stats = self._comparar(_escribir_csv(self._tmp("b.csv"), filas), chunk_size=2)
+        self.assertEqual((stats.creadas, stats.actualizadas, stats.sin_cambios), (0, 1, 4))
+        self.assertEqual(PrecioDeLista.objects.get(proveedor=self.prov, codigo="3/").precio, Decimal("11"))
+
+    def test_edicion_manual_invalida_huella(self):
+        path = _escribir_csv(self._tmp("a.csv"), [["h"], ["7", "Item", "10", "", "", "", ""]])
+        self._importar(path, bulk=True)
+        pl = PrecioDeLista.objects.get(proveedor=self.prov, codigo="7/")
+        self.assertIsNotNone(pl.huella)
+        pl.precio = Decimal("99")
+        pl.save()
+        stats = self._importar(path, bulk=True)
+        self.assertEqual(stats.actualizadas, 1)
+        self.assertEqual(PrecioDeLista.objects.get(pk=pl.pk).precio, Decimal("10"))
+
+    def test_dry_run_no_escribe(self):
+        path = _escribir_csv(self._tmp("lista.csv"), [["h"], ["1", "Item", "10", "", "", "", ""]])
+        antes = _snapshot()
+        stats = self._importar(path, bulk=True, dry_run=True)
+        self.assertEqual(stats.filas_validas, 1)
+        self.assertEqual(_snapshot(), antes)
+
+    def test_consultas_crecen_con_chunks_no_con_filas(self):
+        def _contar(n_filas, chunk_size):
+            path = _escribir_csv(
+                self._tmp(f"lista_{n_filas}.csv"),
+                [["h"]] + [[f"{n_filas}{i:04d}", f"Item {i}", "10", "", "", "", ""] for i in range(n_filas)],
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                self._importar(path, bulk=True, chunk_size=chunk_size)
+            return len(ctx.captured_queries)
+
+        # 3 chunks en ambos casos, con el doble de filas en el segundo
+        self.assertEqual(_contar(30, 10), _contar(60, 20))
+
+    def test_articulos_creados_se_sugieren_por_descripcion(self):
+        pendiente = ArticuloSinRevisar.objects.create(
+            proveedor=self.prov, codigo_proveedor="90/", descripcion_proveedor="TORNILLO GALVANIZADO 6X40 caja",
+            precio=5, estado="pendiente",
+        )
+        path = _escribir_csv(self._tmp("lista.csv"), [["h"], ["50", "Tornillo galvanizado 6x40", "10", "", "", "779555", ""]])
+        self._importar(path, bulk=True)
+        nuevo = Articulo.objects.get(codigo_barras="779555")
+        self.assertTrue(nuevo.terminos.filter(termino="galvanizado").exists())
+
+        precalcular_sugerencias()
+        self.assertEqual(
+            [(s.articulo_id, s.motivo) for s in sugerencias_de(pendiente.pk)], [(nuevo.pk, "descripcion")]
+        )
+
+    def _tmp(self, nombre):
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d, ignore_errors=True)
+        return os.path.join(d, nombre)
@@ -0,0 +1,139 @@
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from proveedores.adapters.models import Proveedor
+from precios.adapters.models import Descuento, PrecioDeLista
+from articulos.adapters.models import ArticuloProveedor, ArticuloSinRevisar
+from importaciones.services.importador_csv import importar_csv
+from importaciones.services.indice_codigos import IndiceCodigosProveedor, IndicePrefijos
+
+
+class IndicePrefijosTest(TestCase):
+    databases = {"default"}
+
+    def test_buscar_devuelve_el_primero_registrado(self):
+        idx = IndicePrefijos()
+        idx.registrar("30/B/", 2)
+        idx.registrar("30/A/", 5)
+        idx.registrar("300/", 1)
+        self.assertEqual(idx.buscar("30/"), 2)
+        self.assertEqual(idx.buscar("30/A/"), 5)
+        self.assertEqual(idx.buscar("3"), 2)
+        self.assertIsNone(idx.buscar("31/"))
+
+    def test_registrar_completa_busquedas_sin_resultado(self):
+        idx = IndicePrefijos()
+        idx.registrar("10/", 1)
+        self.assertIsNone(idx.buscar("20/"))
+        self.assertEqual(idx.buscar("10/"), 1)
+        idx.registrar_lote([("20/X/", 7), ("10/Y/", 8)])
+        self.assertEqual(idx.buscar("20/"), 7)
+        # Un registro posterior no desplaza al primero
+        self.assertEqual(idx.buscar("10/"), 1)
+        self.assertEqual(len(idx), 3)
+
+
+class IndiceCodigosProveedorTest(TestCase):
+    databases = {"default"}
+
+    def setUp(self):
+        self.prov = Proveedor.objects.create(nombre="Prov Idx", abreviatura="pi")
+        otro = Proveedor.objects.create(nombre="Otro", abreviatura="ot")
+        self.pl = PrecioDeLista.objects.create(proveedor=self.prov, codigo="15", descripcion="d", precio=1)
+        self.asr = ArticuloSinRevisar.objects.create(
+            proveedor=self.prov, codigo_proveedor="15/A", descripcion_proveedor="d", precio=1
+        )
+        self.ap = ArticuloProveedor.objects.create(
+            articulo_s_revisar=self.asr, proveedor=self.prov, precio_de_lista=self.pl,
+            codigo_proveedor="15", descripcion_proveedor="d", precio=1, stock=0,
+        )
+        PrecioDeLista.objects.create(proveedor=otro, codigo="99", descripcion="x", precio=1)
+
+    def test_cargar_en_una_consulta_y_asr_al_primer_uso(self):
+        with CaptureQueriesContext(connection) as ctx:
+            idx = IndiceCodigosProveedor.cargar(self.prov)
+            self.assertEqual(idx.pl_id("15/"), self.pl.pk)
+            self.assertIsNone(idx.pl_id("99/"))
+            self.assertEqual(idx.ap_id(self.pl.pk), self.ap.pk)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(idx.asr_id("15/"), self.asr.pk)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(idx.pl_duplicados("15/"), [])
+
+    def test_sin_consultas_por_fila(self):
+        idx = IndiceCodigosProveedor.cargar(self.prov)
+        idx.asr_id("15/")
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(100):
+                idx.pl_id("15/")
+                idx.asr_id("15/")
+                idx.asr_id("16/")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_instancias_precargadas_por_ids(self):
+        idx = IndiceCodigosProveedor.cargar(self.prov)
+        otro = PrecioDeLista.objects.create(proveedor=self.prov, codigo="16", descripcion="d", precio=1)
+        with CaptureQueriesContext(connection) as ctx:
+            idx.precargar_instancias(PrecioDeLista, [self.pl.pk])
+            idx.precargar_instancias(ArticuloSinRevisar, [self.asr.pk])
+            idx.precargar_instancias(ArticuloProveedor, [self.ap.pk])
+            for _ in range(3):
+                self.assertEqual(idx.instancia(PrecioDeLista, self.pl.pk).codigo, "15/")
+                self.assertEqual(idx.instancia(ArticuloSinRevisar, self.asr.pk).codigo_proveedor, "15/A/")
+                self.assertEqual(idx.instancia(ArticuloProveedor, self.ap.pk).precio_de_lista_id, self.pl.pk)
+        self.assertEqual(len(ctx.captured_queries), 3)
+        # Sólo los ids pedidos, no todo el proveedor
+        self.assertEqual(list(idx._instancias[PrecioDeLista]), [self.pl.pk])
+
+        nuevo = PrecioDeLista.objects.create(proveedor=self.prov, codigo="17", descripcion="d", precio=1)
+        idx.registrar_instancia(nuevo)
+        self.assertIs(idx.instancia(PrecioDeLista, nuevo.pk), nuevo)
+        # El chunk siguiente reemplaza la precarga anterior
+        idx.precargar_instancias(PrecioDeLista, [otro.pk])
+        self.assertEqual(list(idx._instancias[PrecioDeLista]), [otro.pk])
+
+    def test_importacion_fila_a_fila_no_lee_por_fila(self):
+        Descuento.objects.get_or_create(tipo="Sin Descuento")
+
+        def _csv(n_filas, precio):
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8", delete=False) as f:
+                csv.writer(f).writerows([[f"{i}", f"Item {i}", precio] for i in range(100, 100 + n_filas)])
+            self.addCleanup(os.remove, f.name)
+            return f.name
+
+        def _lecturas(n_filas, precio):
+            with CaptureQueriesContext(connection) as ctx:
+                importar_csv(
+                    proveedor=self.prov, ruta_csv=_csv(n_filas, precio), start_row=1,
+                    col_codigo_idx=0, col_descripcion_idx=1, col_precio_idx=2,
+                )
+            return sum(q["sql"].lstrip().upper().startswith("SELECT") for q in ctx.captured_queries)
+
+        _lecturas(10, "1")
+        # Todas las filas existen y cambian de precio: las lecturas no crecen con las filas
+        self.assertEqual(_lecturas(5, "2"), _lecturas(10, "3"))
+
+        precargados = []
+        original = IndiceCodigosProveedor.precargar_instancias
+
+        def _registrar(indice, modelo, ids):
+            ids = list(ids)
+            precargados.append((modelo, len(ids)))
+            return original(indice, modelo, ids)
+
+        with mock.patch.object(IndiceCodigosProveedor, "precargar_instancias", _registrar):
+            importar_csv(
+                proveedor=self.prov, ruta_csv=_csv(10, "4"), start_row=1,
+                col_codigo_idx=0, col_descripcion_idx=1, col_precio_idx=2, chunk_size=4,
+            )
+        # Una precarga por modelo y chunk (4 + 4 + 2 filas), acotada a los ids del chunk
+        self.assertEqual([n for modelo, n in precargados if modelo is PrecioDeLista], [4, 4, 2])
+        self.assertEqual(PrecioDeLista.objects.get(proveedor=self.prov, codigo="109/").precio, Decimal("4"))
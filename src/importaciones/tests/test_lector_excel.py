@@ -0,0 +1,139 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from django.test import override_settings
+
+from importaciones.services import lector_excel
+from importaciones.services.conversion import convertir_a_csv
+from importaciones.services.lector_excel import descartar_lector, huella_lector, resolver_lector
+
+XLS_HEADER = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+
+
+class _FakeXls:
+    sheet_names = ["Hoja1"]
+
+    def __init__(self, path, engine):
+        self.path = path
+        self.engine = engine
+
+    def parse(self, name, header=None):
+        class _DF:
+            def to_csv(self, out_path, **kwargs):
+                with open(out_path, "w", encoding="utf-8") as f:
+                    f.write("1,2\n")
+
+        return _DF()
+
+
+class _FakePD:
+    """ExcelFile que falla con los engines indicados y registra cada intento."""
+
+    def __init__(self, fallan=("xlrd",)):
+        self.fallan = set(fallan)
+        self.intentos = []
+
+    def ExcelFile(self, path, engine=None):  # noqa: N802 (nombre de pandas)
+        self.intentos.append((os.path.basename(path), engine))
+        if engine in self.fallan:
+            raise Exception(f"{engine} no puede abrir {path}")
+        return _FakeXls(path, engine)
+
+
+@pytest.fixture(autouse=True)
+def _aislado(settings, tmp_path, monkeypatch):
+    settings.IMPORTACIONES_DIR_XLS2XLSX = str(tmp_path / "convertidos")
+    lector_excel.limpiar_engines()
+    conversiones = []
+
+    class _FakeXLS2XLSX:
+        def __init__(self, in_path):
+            self.in_path = in_path
+
+        def to_xlsx(self, out_path):
+            conversiones.append(self.in_path)
+            with open(out_path, "wb") as f:
+                f.write(b"PKconvertido")
+
+    monkeypatch.setitem(sys.modules, "xls2xlsx", SimpleNamespace(XLS2XLSX=_FakeXLS2XLSX))
+    yield conversiones
+    lector_excel.limpiar_engines()
+
+
+def _archivo(tmp_path, nombre, contenido):
+    path = tmp_path / nombre
+    path.write_bytes(contenido)
+    return str(path)
+
+
+def test_engine_registrado_evita_los_intentos_fallidos(tmp_path, _aislado):
+    path = _archivo(tmp_path, "lista.xls", XLS_HEADER + b"legado")
+    pd = _FakePD(fallan=("xlrd",))
+
+    _xls, engine, ruta = resolver_lector(path, pd=pd)
+    assert engine == "openpyxl" and ruta.endswith(".xlsx") and ruta != path
+    assert [e for _p, e in pd.intentos] == ["xlrd", "openpyxl"]
+
+    pd.intentos.clear()
+    _xls, engine, ruta2 = resolver_lector(path, pd=pd)
+    # Directo al .xlsx convertido: sin xlrd y sin volver a convertir
+    assert pd.intentos == [(os.path.basename(ruta), "openpyxl")]
+    assert ruta2 == ruta
+    assert _aislado == [path]
+
+
+def test_engine_registrado_persiste_en_el_cache_de_django(tmp_path):
+    path = _archivo(tmp_path, "lista.xlsx", b"PK" + b"x" * 5000)
+    caches = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "lector-test"}}
+    with override_settings(CACHES=caches):
+        pd = _FakePD(fallan=("openpyxl",))
+        resolver_lector(path, pd=pd)
+        assert [e for _p, e in pd.intentos] == ["openpyxl", "xlrd"]
+
+        # Otro proceso (memoria local vacía) lo encuentra en el cache compartido
+        lector_excel.limpiar_engines()
+        pd.intentos.clear()
+        resolver_lector(path, pd=pd)
+        assert [e for _p, e in pd.intentos] == ["xlrd"]
+        descartar_lector(path)
+
+
+def test_engine_registrado_que_deja_de_servir_se_resuelve_de_nuevo(tmp_path):
+    path = _archivo(tmp_path, "lista.xlsx", b"PK" + b"x" * 100)
+    resolver_lector(path, pd=_FakePD(fallan=()))
+    assert lector_excel.engine_registrado(huella_lector(path)) == "openpyxl"
+
+    pd = _FakePD(fallan=("openpyxl",))
+    _xls, engine, _ruta = resolver_lector(path, pd=pd)
+    assert engine == "xlrd"
+    assert [e for _p, e in pd.intentos] == ["openpyxl", "openpyxl", "xlrd"]
+    assert lector_excel.engine_registrado(huella_lector(path)) == "xlrd"
+
+
+def test_la_huella_usa_solo_el_inicio_y_el_tamano(tmp_path):
+    a = _archivo(tmp_path, "a.xlsx", b"PK" + b"x" * 5000 + b"1")
+    b = _archivo(tmp_path, "b.xlsx", b"PK" + b"x" * 5000 + b"2")
+    c = _archivo(tmp_path, "c.ods", b"PK" + b"x" * 5000 + b"2")
+    assert huella_lector(a) == huella_lector(b) != huella_lector(c)
+    assert huella_lector(str(tmp_path / "no_existe.xlsx")) is None
+
+
+def test_convertir_a_csv_convierte_el_xls_una_sola_vez(tmp_path, monkeypatch, _aislado):
+    import importaciones.services.conversion as conv
+
+    path = _archivo(tmp_path, "lista.xls", XLS_HEADER + b"legado")
+    pd = _FakePD(fallan=("xlrd",))
+    monkeypatch.setattr(conv, "_get_pandas", lambda: pd)
+
+    for _ in range(3):
+        assert convertir_a_csv(path, output_dir=str(tmp_path)).endswith("lista.csv")
+    assert _aislado == [path]
+    assert [e for _p, e in pd.intentos] == ["xlrd", "openpyxl", "openpyxl", "openpyxl"]
+
+    convertido = lector_excel.ruta_convertido(path)
+    assert os.path.exists(convertido)
+    descartar_lector(path)
+    assert not os.path.exists(convertido)
+    assert lector_excel.engine_registrado(huella_lector(path)) is None
@@ -0,0 +1,224 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.test import override_settings
+
+from importaciones.services import lector_excel, libro_excel
+from importaciones.services.libro_excel import abrir_libro, cerrar_libro
+
+openpyxl = pytest.importorskip("openpyxl")
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture(autouse=True)
+def _sin_sesiones():
+    libro_excel.limpiar_sesiones()
+    lector_excel.limpiar_engines()
+    yield
+    libro_excel.limpiar_sesiones()
+    lector_excel.limpiar_engines()
+
+
+@pytest.fixture
+def aperturas(monkeypatch):
+    llamadas = []
+    original = pd.ExcelFile
+
+    def _excel_file(path, engine=None, **kwargs):
+        llamadas.append((path, engine))
+        return original(path, engine=engine, **kwargs)
+
+    monkeypatch.setattr(pd, "ExcelFile", _excel_file)
+    return llamadas
+
+
+def _xlsx(path, hojas):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for nombre, filas in hojas.items():
+        ws = wb.create_sheet(nombre)
+        for fila in filas:
+            ws.append(fila)
+    wb.save(path)
+    return str(path)
+
+
+HOJAS = {f"H{i}": [["cod", "desc", "precio"], [f"{i}01", "Item", 10 + i], [f"{i}02", "Otro", 20 + i]] for i in range(1, 4)}
+
+
+@pytest.mark.django_db
+def test_flujo_preview_y_confirmacion_abre_el_libro_una_vez(tmp_path, aperturas):
+    from importaciones.adapters.repository import ExcelRepository
+
+    Proveedor = apps.get_model("proveedores", "Proveedor")
+    ConfigImportacion = apps.get_model("importaciones", "ConfigImportacion")
+    prov = Proveedor.objects.create(nombre="Prov Libro", abreviatura="PL")
+    cfg = ConfigImportacion.objects.create(proveedor=prov, nombre_config="default", col_codigo="A", col_descripcion="B", col_precio="C")
+
+    path = _xlsx(tmp_path / "lista.xlsx", HOJAS)
+    repo = ExcelRepository()
+    repo.storage = SimpleNamespace(path=lambda nombre: path, delete=lambda nombre: os.remove(path))
+
+    hojas = repo.listar_hojas_excel("lista.xlsx")
+    previews = [repo.vista_previa_excel(prov.pk, "lista.xlsx", sheet_name=h) for h in hojas]
+    assert hojas == ["H1", "H2", "H3"]
+    assert [p["total_filas"] for p in previews] == [2, 2, 2]
+    # Un POST con errores vuelve a listar y previsualizar: sigue sin reabrir
+    repo.listar_hojas_excel("lista.xlsx")
+    creados = repo.generar_csvs_por_hoja(prov.pk, "lista.xlsx", {h: {"config_id": cfg.pk, "start_row": 1} for h in hojas})
+
+    assert aperturas == [(path, "openpyxl")]
+    assert [h for h, _ in creados] == hojas
+    assert open(creados[0][1], encoding="utf-8").read().splitlines() == ["101,Item,11", "102,Otro,21"]
+    # El original se borró y la sesión se invalidó
+    assert not os.path.exists(path)
+    assert libro_excel._SESIONES == {}
+
+
+def test_preview_coincide_con_read_excel(tmp_path):
+    from importaciones.adapters.repository import ExcelRepository
+
+    path = _xlsx(tmp_path / "lista.xlsx", HOJAS)
+    repo = ExcelRepository()
+    repo.storage = SimpleNamespace(path=lambda nombre: path)
+
+    prev = repo.vista_previa_excel(1, "lista.xlsx", sheet_name="H2")
+    assert prev["sheet_name"] == "H2"
+    df = pd.read_excel(path, sheet_name="H2")
+    assert prev["filas"][0] == {"#": 0, **dict(zip("abc", df.iloc[0].tolist()))}
+    assert prev["total_filas"] == len(df)
+
+
+def test_archivo_modificado_se_reabre(tmp_path, aperturas):
+    path = _xlsx(tmp_path / "lista.xlsx", {"A": [[1, 2]]})
+    sesion = abrir_libro(path)
+    assert abrir_libro(path) is sesion
+
+    _xlsx(tmp_path / "lista.xlsx", {"A": [[1, 2]], "B": [[3, 4]]})
+    os.utime(path, ns=(sesion.huella[0] + 10**9, sesion.huella[0] + 10**9))
+    nueva = abrir_libro(path)
+    assert nueva is not sesion
+    assert nueva.sheet_names == ["A", "B"]
+    # La sesión vieja sale del cache sin cerrarse: un hilo que la tenga sigue usándola
+    assert sesion.xls is not None
+    assert len(aperturas) == 2
+
+
+def test_lru_de_hojas_y_de_libros(tmp_path):
+    paths = [_xlsx(tmp_path / f"l{i}.xlsx", HOJAS) for i in range(3)]
+    with override_settings(IMPORTACIONES_LIBROS_EN_CACHE=2, IMPORTACIONES_HOJAS_EN_CACHE=2):
+        sesion = abrir_libro(paths[0])
+        h1 = sesion.parse("H1")
+        assert sesion.parse("H1") is h1
+        sesion.parse("H2")
+        sesion.parse("H3")
+        assert sesion.parse("H1") is not h1
+
+        abrir_libro(paths[1])
+        abrir_libro(paths[2])
+    assert list(libro_excel._SESIONES) == paths[1:]
+    # Desalojada pero abierta para quien ya la tenía
+    assert sesion.xls is not None
+    assert list(sesion.parse("H2").columns) == list(pd.read_excel(paths[0], sheet_name="H2").columns)
+
+
+def test_sesion_cerrada_mientras_se_usa_se_reabre(tmp_path, aperturas):
+    path = _xlsx(tmp_path / "lista.xlsx", HOJAS)
+    sesion = abrir_libro(path)
+    cerrar_libro(path)
+    assert sesion.xls is None
+    assert sesion.sheet_names == list(HOJAS)
+    assert len(sesion.parse("H1")) == len(pd.read_excel(path, sheet_name="H1"))
+    assert len(aperturas) == 2
+
+
+def test_xlsx_convertido_vive_hasta_descartar_el_archivo(tmp_path, monkeypatch, settings):
+    settings.IMPORTACIONES_DIR_XLS2XLSX = str(tmp_path / "convertidos")
+    xls = tmp_path / "viejo.xls"
+    xls.write_bytes(b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1dummy")
+    convertidos = []
+
+    class _FakeXLS2XLSX:
+        def __init__(self, in_path):
+            self.in_path = in_path
+
+        def to_xlsx(self, out_path):
+            _xlsx(out_path, {"Conv": [["x", 1]]})
+            convertidos.append(out_path)
+
+    monkeypatch.setitem(sys.modules, "xls2xlsx", SimpleNamespace(XLS2XLSX=_FakeXLS2XLSX))
+
+    sesion = abrir_libro(str(xls))
+    assert abrir_libro(str(xls)).sheet_names == ["Conv"]
+    assert sesion.engine == "openpyxl"
+    assert os.path.exists(sesion.xlsx_convertido)
+
+    # Cerrar la sesión (p.ej. desalojo del LRU) no borra el convertido: se reutiliza
+    cerrar_libro(str(xls))
+    assert abrir_libro(str(xls)).xlsx_convertido == sesion.xlsx_convertido
+    assert len(convertidos) == 1
+
+    libro_excel.descartar_libro(str(xls))
+    assert not os.path.exists(sesion.xlsx_convertido)
+    assert libro_excel._SESIONES == {}
+
+
+def _con_dimension(path, ref):
+    """Reescribe el <dimension ref> de la primera hoja (o lo quita si ref es None)."""
+    import re
+    import zipfile
+
+    with zipfile.ZipFile(path) as z:
+        contenido = {n: z.read(n) for n in z.namelist()}
+    hoja = "xl/worksheets/sheet1.xml"
+    xml = re.sub(rb'<dimension ref="[^"]*"\s*/>', b"" if ref is None else b'<dimension ref="%s"/>' % ref.encode(), contenido[hoja])
+    contenido[hoja] = xml
+    with zipfile.ZipFile(path, "w") as z:
+        for n, data in contenido.items():
+            z.writestr(n, data)
+    return path
+
+
+@pytest.mark.parametrize("dimension", ["declarada", "A1", None], ids=["declarada", "solo_a1", "sin_dimension"])
+def test_vista_previa_lee_solo_las_primeras_filas(tmp_path, monkeypatch, dimension):
+    filas = [["cod", "desc", "precio"]] + [[f"{i:04d}", f"Item {i}", i] for i in range(60)]
+    if dimension != "declarada":
+        # El conteo sobre el XML ignora filas finales sin valores, como read_excel
+        filas += [[None, None, None]] * 3
+    path = _xlsx(tmp_path / "lista.xlsx", {"L": filas})
+    if dimension != "declarada":
+        _con_dimension(path, dimension)
+
+    sesion = abrir_libro(path)
+    parseos = []
+    parse_original = sesion.xls.parse
+    monkeypatch.setattr(sesion.xls, "parse", lambda *a, **k: parseos.append(k) or parse_original(*a, **k))
+
+    df, total = sesion.vista_previa("L", nrows=5)
+    assert len(df) == 5
+    assert total == len(pd.read_excel(path, sheet_name="L")) == 60
+    assert parseos == [{"header": 0, "nrows": 5}]
+
+
+def test_vista_previa_de_hoja_corta_no_cuenta(tmp_path, monkeypatch):
+    path = _xlsx(tmp_path / "lista.xlsx", HOJAS)
+    sesion = abrir_libro(path)
+    monkeypatch.setattr(libro_excel, "_contar_filas_xml", lambda *_a, **_k: pytest.fail("no debe contar"))
+    df, total = sesion.vista_previa("H1", nrows=20)
+    assert total == len(df) == 2
+
+
+def test_vista_previa_csv_acotada(tmp_path):
+    from importaciones.adapters.repository import ExcelRepository
+
+    path = tmp_path / "lista.csv"
+    path.write_text("cod,desc,precio\n" + "".join(f'{i},"Item\n{i}",{i}\n' for i in range(30)), encoding="utf-8")
+    repo = ExcelRepository()
+    repo.storage = SimpleNamespace(path=lambda nombre: str(path))
+
+    prev = repo.vista_previa_excel(1, "lista.csv")
+    assert len(prev["filas"]) == 20
+    assert prev["total_filas"] == len(pd.read_csv(path)) == 30
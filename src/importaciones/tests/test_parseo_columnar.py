@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from importaciones.services.importador_csv import _parsear_fila
+from importaciones.services.parseo_columnar import parsear_columnas
+
+
+IDXS = dict(
+    col_codigo_idx=0,
+    col_descripcion_idx=1,
+    col_precio_idx=2,
+    col_cant_idx=3,
+    col_iva_idx=4,
+    col_cod_barras_idx=5,
+    col_marca_idx=6,
+)
+
+FILAS = [
+    ["001", " Tornillo ", "12.50", "x10", "21%", " 779 ", " ACME "],
+    ["2", "Tuerca", " 3 ", "10u", "10,5", "", ""],
+    ["3", "Arandela", "1e2", "1,5", "0.105", "", "M"],
+    ["4", "Precio con coma", "3,5", "", "", "", ""],
+    ["5", "Precio raro", "NaN", "", "", "", ""],
+    ["6", "Subrayado", "1_000", "", "", "", ""],
+    ["", "Sin código", "1", "", "", "", ""],
+    ["7", "   ", "1", "", "", "", ""],
+    ["8", "Sin precio", "", "", "", "", ""],
+    ["9", "Corta"],
+    ["10", "Corta pero válida", "5"],
+    ["11", "IVA borde", "5", "", "1.5", "", ""],
+    ["12", "IVA alto", "5", "-3", "1.51", "", ""],
+    ["13", "IVA vacío", "5", "abc", "abc", "", ""],
+    [],
+    ["14", "Larga", "7", "2", "21", "x", "y", "extra", "extra"],
+]
+
+
+def _esperado(filas, **idxs):
+    resultado = []
+    for n, row in enumerate(filas, start=1):
+        fila = _parsear_fila(n, row, **idxs)
+        if fila is not None:
+            resultado.append(repr(fila))
+    return resultado
+
+
+def _columnar(filas, **idxs):
+    # repr: Decimal("NaN") != Decimal("NaN")
+    return [repr(f) for f in parsear_columnas(list(enumerate(filas, start=1)), **idxs)]
+
+
+def test_mismo_resultado_que_parsear_fila():
+    assert _columnar(FILAS, **IDXS) == _esperado(FILAS, **IDXS)
+
+
+def test_columnas_opcionales_ausentes():
+    idxs = dict(col_codigo_idx=0, col_descripcion_idx=1, col_precio_idx=2)
+    assert _columnar(FILAS, **idxs) == _esperado(FILAS, **idxs)
+
+
+def test_tipos_y_valores():
+    (fila,) = parsear_columnas([(7, ["0042", "Item", "10.10", "x6", "21", "779", "M"])], **IDXS)
+    assert fila.fila == 7
+    assert fila.codigo == "0042"
+    assert fila.precio == Decimal("10.10") and isinstance(fila.precio, Decimal)
+    assert fila.bulto == Decimal("6")
+    assert fila.iva == Decimal("0.21")
+
+
+def test_sin_filas_validas():
+    assert parsear_columnas([], **IDXS) == []
+    assert parsear_columnas([(1, ["", "", ""])], **IDXS) == []
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from importaciones.adapters.models import ArchivoPendiente
+from importaciones.adapters.repository import ExcelRepository
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def chunks_de_dos(settings):
+    settings.IMPORTACIONES_CHUNK_SIZE = 2
+
+
+def test_cada_punto_de_control_publica_el_progreso(crear_pendiente):
+    archivo = crear_pendiente("a", filas=5)
+    vistos = []
+
+    def _al_confirmar():
+        ap = ArchivoPendiente.objects.get(pk=archivo.pk)
+        vistos.append((ap.fila_confirmada, ap.filas_totales, ap.filas_por_segundo is not None))
+
+    ExcelRepository().importar_pendiente(archivo.pk, max_lotes=1, al_confirmar=_al_confirmar)
+    assert vistos == [(2, 5, True)]
+
+    # A mitad de camino: porcentaje y ETA mientras el archivo sigue reclamado
+    ArchivoPendiente.objects.filter(pk=archivo.pk).update(
+        reclamado_por="otro", reclamado_hasta=timezone.now() + timedelta(minutes=1), filas_por_segundo=1.5
+    )
+    (progreso,) = ExcelRepository().progreso_pendientes()
+    assert progreso["en_curso"] and not progreso["procesado"]
+    assert (progreso["porcentaje"], progreso["filas_leidas"], progreso["creadas"]) == (40.0, 2, 2)
+    assert progreso["eta_segundos"] == 2
+
+    ArchivoPendiente.objects.filter(pk=archivo.pk).update(reclamado_por="", reclamado_hasta=None)
+    ExcelRepository().importar_pendiente(archivo.pk)
+    (progreso,) = ExcelRepository().progreso_pendientes()
+    assert progreso["procesado"] and progreso["porcentaje"] == 100.0
+    assert (progreso["filas_leidas"], progreso["filas_validas"], progreso["eta_segundos"]) == (5, 5, None)
+
+
+def test_los_terminados_hace_rato_no_se_listan(crear_pendiente, settings):
+    settings.IMPORTACIONES_PROGRESO_RECIENTES = 60
+    viejo, en_cola = crear_pendiente("a"), crear_pendiente("b")
+    ArchivoPendiente.objects.filter(pk=viejo.pk).update(
+        procesado=True, progreso_actualizado=timezone.now() - timedelta(minutes=5)
+    )
+    (progreso,) = ExcelRepository().progreso_pendientes()
+    assert progreso["id"] == en_cola.pk and not progreso["en_curso"]
+    assert (progreso["porcentaje"], progreso["eta_segundos"]) == (None, None)
+
+
+def test_endpoint_solo_staff_y_sin_inspect(crear_pendiente, client, monkeypatch):
+    archivo = crear_pendiente("a")
+    url = reverse("monitor_tareas:progreso")
+    assert client.get(url).status_code == 302
+
+    client.force_login(User.objects.create_user(username="normal", password="pass1234"))
+    assert client.get(url).status_code == 403
+
+    import celery.app.control
+
+    def _sin_inspect(*args, **kwargs):
+        raise AssertionError("no debería consultar a los workers")
+
+    monkeypatch.setattr(celery.app.control, "Inspect", _sin_inspect)
+    client.force_login(User.objects.create_user(username="staff", password="pass1234", is_staff=True))
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    assert [a["id"] for a in resp.json()["archivos"]] == [archivo.pk]
+    assert sum("importaciones_archivopendiente" in q["sql"] for q in ctx.captured_queries) == 1
+    assert client.get(reverse("monitor_tareas:list")).status_code == 200
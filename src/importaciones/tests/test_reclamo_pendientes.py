@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from importaciones.adapters.bloqueos import ReclamoPerdido, liberar_archivo, reclamar_archivo
+from importaciones.adapters.models import ArchivoPendiente
+from importaciones.adapters.repository import ExcelRepository
+from precios.adapters.models import PrecioDeLista
+
+
+@pytest.fixture(autouse=True)
+def chunks_de_dos(settings):
+    settings.IMPORTACIONES_CHUNK_SIZE = 2
+
+
+def test_el_reclamo_es_exclusivo_y_vence(crear_pendiente):
+    archivo = crear_pendiente("a")
+    dueno = reclamar_archivo(archivo.pk)
+    assert dueno and reclamar_archivo(archivo.pk) is None
+
+    ArchivoPendiente.objects.update(reclamado_hasta=timezone.now() - timedelta(seconds=1))
+    otro = reclamar_archivo(archivo.pk)
+    assert otro and otro != dueno
+    # El dueño anterior ya no puede soltarlo
+    liberar_archivo(archivo.pk, dueno)
+    assert ArchivoPendiente.objects.get().reclamado_por == otro
+    liberar_archivo(archivo.pk, otro)
+    assert reclamar_archivo(archivo.pk) is not None
+
+
+def test_las_ejecuciones_simultaneas_se_reparten_la_cola(crear_pendiente):
+    ajeno, libre = crear_pendiente("a"), crear_pendiente("b", proveedor="OT")
+    posterior = crear_pendiente("c")
+    dueno = reclamar_archivo(ajeno.pk)
+
+    resultado = ExcelRepository().procesar_pendientes()
+    assert resultado["procesados"] == 1 and resultado["detalles"][0]["ruta_csv"] == libre.ruta_csv
+    assert ExcelRepository().importar_pendiente(ajeno.pk) is None
+    ajeno.refresh_from_db()
+    assert not ajeno.procesado and ajeno.reclamado_por == dueno
+    # La lista más nueva del mismo proveedor espera a la que se está importando
+    posterior.refresh_from_db()
+    assert not posterior.procesado and posterior.reclamado_por == ""
+    assert sorted(PrecioDeLista.objects.values_list("codigo", flat=True)) == ["b0/", "b1/", "b2/"]
+
+    libre.refresh_from_db()
+    assert (libre.procesado, libre.reclamado_por, libre.reclamado_hasta) == (True, "", None)
+
+    liberar_archivo(ajeno.pk, dueno)
+    assert ExcelRepository().procesar_pendientes()["procesados"] == 2
+    assert PrecioDeLista.objects.count() == 9
+
+
+def test_reclamo_perdido_revierte_el_chunk_en_curso(crear_pendiente, settings):
+    # Motor por lotes: el chunk en curso es una sola transacción
+    settings.IMPORTACIONES_BULK = True
+    archivo = crear_pendiente("a", filas=5)
+
+    def otro_proceso_lo_toma():
+        ArchivoPendiente.objects.filter(pk=archivo.pk).update(reclamado_por="otro")
+
+    with pytest.raises(ReclamoPerdido):
+        ExcelRepository().importar_pendiente(archivo.pk, al_confirmar=otro_proceso_lo_toma)
+    archivo.refresh_from_db()
+    assert (archivo.procesado, archivo.fila_confirmada, archivo.reclamado_por) == (False, 2, "otro")
+    assert PrecioDeLista.objects.count() == 2
@@ -24,25 +24,9 @@ class TareasListView(LoginRequiredMixin, StaffRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):  # type: ignore[override]
         ctx = super().get_context_data(**kwargs)
-        # Intentar consultar el estado de Celery vía inspect. Si falla, mostrar vacío.
-        try:
-            from celery.app.control import Inspect
-            from core_config.celery import app as celery_app
-
-            insp = Inspect(app=celery_app)
-            active = insp.active() or {}
-            reserved = insp.reserved() or {}
-            scheduled = insp.scheduled() or {}
-        except Exception:
-            active = {}
-            reserved = {}
-            scheduled = {}
-
+        # El estado de Celery (Inspect) y el progreso de importaciones se cargan
+        # por fetch desde el template: el render inicial no consulta a los workers.
         ctx.update({
-            "active": active,
-            "reserved": reserved,
-            "scheduled": scheduled,
-            # indicador para el template: si se quiere, puede renderizar placeholders
             "deferred_load": True,
         })
         return ctx
@@ -105,6 +89,19 @@ class TareasStatusView(LoginRequiredMixin, StaffRequiredMixin, TemplateView):
         return JsonResponse(data)
 
 
+class TareasProgresoView(LoginRequiredMixin, StaffRequiredMixin, View):
+    """Entrega JSON con el progreso de las importaciones de archivos pendientes.
+
+    Lo lee de los puntos de control que guarda cada importación (una consulta a
+    la base), sin pasar por Inspect; la página lo consulta cada pocos segundos.
+    """
+
+    def get(self, request: HttpRequest, *args, **kwargs):  # type: ignore[override]
+        from importaciones.adapters.repository import ExcelRepository
+
+        return JsonResponse({"archivos": ExcelRepository().progreso_pendientes()})
+
+
 class TareasTriggerNowView(LoginRequiredMixin, StaffRequiredMixin, View):
     def post(self, request: HttpRequest, *args, **kwargs):  # type: ignore[override]
         try:
@@ -0,0 +1,125 @@
+"""
+Cache de proceso de `Descuento`: el "Sin Descuento" por defecto y los descuentos por id.
+
+`ArticuloSinRevisar.save()` y `ArticuloBase.get_descuento()` consultaban el
+Descuento en cada llamada (una consulta por ASR creado al importar). Los
+Descuento cambian poco, así que se guardan en memoria del proceso:
+
+- las señales de `Descuento` (ver `precios.signals`) invalidan la entrada al
+  guardar o borrar, y otra vez al confirmar la transacción;
+- cada entrada vence a los `PRECIOS_CACHE_DESCUENTOS_TTL` segundos (cambios de
+  otro proceso o hechos con `update()`), y la de un descuento temporal además
+  al cruzar el próximo borde de su ventana `desde`/`hasta`, donde cambia su
+  estado activo.
+
+Las instancias devueltas son compartidas entre hilos: no modificarlas.
+"""
+
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+_LOCK = threading.Lock()
+# pk -> _Entrada (obj None = no existe)
+_POR_ID: Dict[Any, "_Entrada"] = {}
+# Clave de la entrada del "Sin Descuento" en _POR_ID
+_SIN_DESCUENTO = object()
+
+
+class _Entrada(NamedTuple):
+    obj: Any
+    activo: bool
+    vence: Any
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "PRECIOS_CACHE_DESCUENTOS_TTL", 300))
+
+
+def _proximo_borde(descuento: Any, ahora) -> Optional[Any]:
+    """Primer instante futuro en que el descuento temporal entra o sale de vigencia."""
+    if descuento is None or not descuento.temporal:
+        return None
+    # `Descuento.is_active` incluye hasta `hasta + 1s`: deja de estar activo justo después
+    bordes = (descuento.desde, descuento.hasta + timedelta(seconds=1, microseconds=1) if descuento.hasta else None)
+    futuros = [b for b in bordes if b is not None and b > ahora]
+    return min(futuros) if futuros else None
+
+
+def _entrada(obj: Any, ahora) -> _Entrada:
+    vence = ahora + _ttl()
+    borde = _proximo_borde(obj, ahora)
+    if borde is not None and borde < vence:
+        vence = borde
+    activo = obj is not None and bool(getattr(obj, "is_active", lambda: True)())
+    return _Entrada(obj, activo, vence)
+
+
+def _vigentes(claves: Iterable[Any], ahora) -> Dict[Any, _Entrada]:
+    with _LOCK:
+        entradas = {k: _POR_ID.get(k) for k in claves}
+    return {k: e for k, e in entradas.items() if e is not None and ahora < e.vence}
+
+
+def descuentos(ids: Iterable[Any]) -> Dict[Any, Any]:
+    """Descuento por id (activos o no) para los ids dados; los que no existen quedan en None."""
+    ids = [pk for pk in ids if pk]
+    ahora = timezone.now()
+    encontrados = _vigentes(ids, ahora)
+    faltan = {pk for pk in ids if pk not in encontrados}
+    if faltan:
+        Descuento = apps.get_model("precios", "Descuento")
+        cargados = Descuento.objects.using("default").in_bulk(faltan)
+        nuevas = {pk: _entrada(cargados.get(pk), ahora) for pk in faltan}
+        with _LOCK:
+            _POR_ID.update(nuevas)
+        encontrados.update(nuevas)
+    return {pk: encontrados[pk].obj for pk in ids}
+
+
+def descuento(pk: Any) -> Any:
+    return descuentos([pk]).get(pk) if pk else None
+
+
+def descuento_activo(pk: Any) -> Any:
+    """El Descuento `pk` si existe y está activo ahora; si no, None."""
+    if not pk:
+        return None
+    ahora = timezone.now()
+    entrada = _vigentes([pk], ahora).get(pk)
+    if entrada is None:
+        descuentos([pk])
+        entrada = _vigentes([pk], ahora).get(pk)
+    return entrada.obj if entrada is not None and entrada.activo else None
+
+
+def sin_descuento() -> Any:
+    """El Descuento "Sin Descuento" persistido (el de menor id) o None si no existe."""
+    ahora = timezone.now()
+    entrada = _vigentes([_SIN_DESCUENTO], ahora).get(_SIN_DESCUENTO)
+    if entrada is None:
+        Descuento = apps.get_model("precios", "Descuento")
+        obj = Descuento.objects.using("default").filter(tipo="Sin Descuento").order_by("id").first()
+        entrada = _entrada(obj, ahora)
+        with _LOCK:
+            _POR_ID[_SIN_DESCUENTO] = entrada
+            if obj is not None:
+                _POR_ID[obj.pk] = entrada
+    return entrada.obj
+
+
+def invalidar(pk: Any = None) -> None:
+    """Olvida el descuento `pk` y el "Sin Descuento" (que puede ser ese u otro recién creado)."""
+    with _LOCK:
+        _POR_ID.pop(_SIN_DESCUENTO, None)
+        if pk is not None:
+            _POR_ID.pop(pk, None)
+
+
+def limpiar() -> None:
+    with _LOCK:
+        _POR_ID.clear()
@@ -10,6 +10,8 @@ class PrecioDeLista(models.Model):
     bulto = models.DecimalField(max_digits=10, decimal_places=2, default=1)
     stock = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     marca = models.CharField(max_length=100, blank=True, null=True)
+    # Huella (sha1) de la última fila importada; la importación saltea las filas cuya huella no cambió
+    huella = models.CharField(max_length=40, blank=True, null=True, editable=False)
 
     class Meta:
         unique_together = ('proveedor', 'codigo')
@@ -24,6 +26,10 @@ class PrecioDeLista(models.Model):
         except ValueError:
             pass
         self.codigo = f"{codigo_base}/"
+        # Un guardado fuera de la importación invalida la huella: la próxima importación vuelve a aplicar la fila
+        self.huella = None
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'huella'}
         super().save(*args, **kwargs)
 
     def get_codigo_completo(self):
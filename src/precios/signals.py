@@ -2,7 +2,9 @@
 Señales de la app `precios`.
 
 Crea un registro `Descuento` por defecto tras aplicar migraciones
-de la app `precios` en la base de datos `negocio_db`.
+de la app `precios` en la base de datos `negocio_db`, e invalida el cache de
+proceso de descuentos (`adapters.cache_descuentos`) cuando un `Descuento`
+se guarda o se borra.
 
 Nota: asegúrate de importar este módulo en el AppConfig de la app
 (`ready()`) para que la señal se registre al iniciar Django.
@@ -13,10 +15,12 @@ from decimal import Decimal
 import os
 from django.apps import apps
 from django.conf import settings
-from django.db import connections
-from django.db.models.signals import post_migrate
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
+from .adapters import cache_descuentos
+
 
 @receiver(post_migrate)
 def create_default_descuento(sender, **kwargs):
@@ -60,3 +64,23 @@ def create_default_descuento(sender, **kwargs):
             "temporal": False,
         },
     )
+
+
+@receiver(pre_save, sender="precios.Descuento")
+@receiver(pre_delete, sender="precios.Descuento")
+def invalidar_cache_descuento(sender, instance, **kwargs):
+    """Olvida el descuento antes del cambio.
+
+    Los recálculos de precios conectados en post_save/post_delete (app
+    `articulos`, que se registra antes) ya leen el valor nuevo.
+    """
+    cache_descuentos.invalidar(instance.pk)
+
+
+@receiver(post_save, sender="precios.Descuento")
+@receiver(post_delete, sender="precios.Descuento")
+def invalidar_cache_descuento_confirmado(sender, instance, using=None, **kwargs):
+    """Olvida lo que otro hilo haya cacheado antes de confirmar la transacción."""
+    pk = instance.pk
+    cache_descuentos.invalidar(pk)
+    transaction.on_commit(lambda: cache_descuentos.invalidar(pk), using=using)
@@ -0,0 +1,2 @@
+# Los descuentos se prueban sobre artículos: mismas fábricas que sus tests
+from articulos.tests.conftest import consultas, crear_asr, crear_proveedor  # noqa: F401
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from precios.adapters import cache_descuentos
+from precios.adapters.models import Descuento
+
+pytestmark = pytest.mark.django_db(databases=["default", "negocio_db"])
+
+
+def _de_descuento(capturadas):
+    return [q["sql"] for q in capturadas if "precios_descuento" in q["sql"]]
+
+
+def test_crear_asr_no_consulta_el_descuento_por_defecto(crear_proveedor, crear_asr, consultas):
+    default, _ = Descuento.objects.get_or_create(tipo="Sin Descuento")
+    prov = crear_proveedor("PC")
+
+    def _crear():
+        for i in range(20):
+            asr = crear_asr(prov, f"{i}/", precio=1)
+            assert asr.descuento_id == default.pk
+            assert asr.get_descuento().pk == default.pk
+
+    capturadas, _ = consultas(_crear)
+    assert len(_de_descuento(capturadas)) == 1
+
+
+def test_guardar_y_borrar_invalidan():
+    Descuento.objects.filter(tipo="Sin Descuento").delete()
+    assert cache_descuentos.sin_descuento() is None
+    default = Descuento.objects.create(tipo="Sin Descuento")
+    assert cache_descuentos.sin_descuento().pk == default.pk
+
+    promo = Descuento.objects.create(tipo="Promo", general=Decimal("10"))
+    assert cache_descuentos.descuento_activo(promo.pk).general == Decimal("10")
+    promo.general = Decimal("25")
+    promo.save()
+    assert cache_descuentos.descuento_activo(promo.pk).general == Decimal("25")
+
+    pk = promo.pk
+    promo.delete()
+    assert cache_descuentos.descuento(pk) is None
+
+
+def test_descuento_temporal_cruza_su_ventana(monkeypatch, consultas):
+    ahora = timezone.now()
+    promo = Descuento.objects.create(
+        tipo="Finde", general=Decimal("15"), temporal=True, desde=ahora + timedelta(hours=1), hasta=ahora + timedelta(hours=2)
+    )
+    assert cache_descuentos.descuento_activo(promo.pk) is None
+
+    for horas, activo in ((1.5, True), (2.5, False)):
+        monkeypatch.setattr(timezone, "now", lambda h=horas: ahora + timedelta(hours=h))
+        # Sin escrituras: el cache vence en el borde de la ventana y vuelve a leer
+        capturadas, _ = consultas(lambda: cache_descuentos.descuento_activo(promo.pk))
+        assert len(_de_descuento(capturadas)) == 1
+        assert (cache_descuentos.descuento_activo(promo.pk) is not None) is activo
+
+
+def test_ttl_relee_cambios_sin_senales(monkeypatch, settings):
+    settings.PRECIOS_CACHE_DESCUENTOS_TTL = 60
+    promo = Descuento.objects.create(tipo="Promo", general=Decimal("10"))
+    cache_descuentos.descuento(promo.pk)
+    Descuento.objects.filter(pk=promo.pk).update(general=Decimal("30"))
+    assert cache_descuentos.descuento(promo.pk).general == Decimal("10")
+
+    ahora = timezone.now()
+    monkeypatch.setattr(timezone, "now", lambda: ahora + timedelta(seconds=61))
+    assert cache_descuentos.descuento(promo.pk).general == Decimal("30")